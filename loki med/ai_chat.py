@@ -9,7 +9,6 @@ from tkinter import ttk, scrolledtext, font
 import time
 import threading
 import random
-import os
 import sys
 
 class AIChatWindow:
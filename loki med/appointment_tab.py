@@ -5,13 +5,12 @@ This module implements the Appointments tab in the Medical Assistant application
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-import os
 from datetime import datetime
 from tkcalendar import Calendar
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from services import ServiceError, appointments as appointment_service
+from db_worker import run_in_background, show_tree_placeholder, clear_tree, PLACEHOLDER_IID
 
 def create_appointment_tab(parent, username):
     """Create the appointments tab"""
@@ -249,7 +248,7 @@ def create_appointment_tab(parent, username):
         nonlocal selected_appointment_id
         
         selected = appointments_tree.selection()
-        if not selected:
+        if not selected or selected[0] == PLACEHOLDER_IID:
             return
         
         # Get the appointment ID
@@ -345,46 +344,12 @@ def add_appointment(username, date_entry, hour_var, minute_var, doctor_var, type
         notes = notes_text.get("1.0", tk.END).strip()
         status = "Scheduled"  # Default status for new appointments
         
-        # Validate inputs
-        if not date_str or not time_str or not doctor or not appointment_type:
-            messagebox.showerror("Error", "Please fill in all required fields (date, time, doctor, type)")
+        try:
+            appointment_service.add_appointment(username, date_str, time_str, doctor, appointment_type, notes, status)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Insert appointment
-        cursor.execute(
-            """INSERT INTO appointments 
-               (user_id, date, time, doctor, type, notes, reminder, status, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                user_id,
-                date_str,
-                time_str,
-                doctor,
-                appointment_type,
-                notes,
-                1,  # Default reminder to True
-                status,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            )
-        )
-        
-        conn.commit()
-        conn.close()
-        
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
         
@@ -413,50 +378,14 @@ def update_appointment(username, appointment_id, date_entry, hour_var, minute_va
         notes = notes_text.get("1.0", tk.END).strip()
         status = status_var.get()
         
-        # Validate inputs
-        if not date_str or not time_str or not doctor or not appointment_type or not status:
-            messagebox.showerror("Error", "Please fill in all required fields")
-            return False
-        
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Update appointment
-        cursor.execute(
-            """UPDATE appointments 
-               SET date = ?, time = ?, doctor = ?, type = ?, notes = ?, status = ? 
-               WHERE id = ? AND user_id = ?""",
-            (
-                date_str,
-                time_str,
-                doctor,
-                appointment_type,
-                notes,
-                status,
-                appointment_id,
-                user_id
+        try:
+            appointment_service.update_appointment(
+                username, appointment_id, date_str, time_str, doctor, appointment_type, notes, status
             )
-        )
-        
-        if cursor.rowcount == 0:
-            messagebox.showerror("Error", "Failed to update appointment. Appointment not found or not owned by current user.")
-            conn.close()
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
-        conn.commit()
-        conn.close()
-        
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
         
@@ -479,34 +408,12 @@ def delete_appointment(username, appointment_id, appointments_tree):
         if not confirm:
             return False
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Delete appointment
-        cursor.execute(
-            "DELETE FROM appointments WHERE id = ? AND user_id = ?",
-            (appointment_id, user_id)
-        )
-        
-        if cursor.rowcount == 0:
-            messagebox.showerror("Error", "Failed to delete appointment. Appointment not found or not owned by current user.")
-            conn.close()
+        try:
+            appointment_service.delete_appointment(username, appointment_id)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
-        conn.commit()
-        conn.close()
-        
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
         
@@ -518,86 +425,53 @@ def delete_appointment(username, appointment_id, appointments_tree):
         return False
 
 def load_appointments(username, appointments_tree):
-    """Load appointments from the database"""
-    try:
-        # Clear existing appointments
-        for item in appointments_tree.get_children():
-            appointments_tree.delete(item)
-        
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Get appointments
-        cursor.execute(
-            """SELECT id, date, time, doctor, type, status
-               FROM appointments 
-               WHERE user_id = ? 
-               ORDER BY date, time""",
-            (user_id,)
-        )
-        
-        appointments = cursor.fetchall()
-        conn.close()
+    """Load appointments from the database on the background worker"""
+    show_tree_placeholder(appointments_tree)
+    
+    def fetch():
+        try:
+            return appointment_service.list_appointments(username)
+        except ServiceError:
+            # Unknown user
+            return []
+    
+    def show(appointments):
+        clear_tree(appointments_tree)
         
         # Add appointments to tree
         for appointment in appointments:
-            app_id, date, time, doctor, app_type, status = appointment
-            
-            appointments_tree.insert("", "end", iid=app_id, values=(
-                date,
-                time,
-                doctor,
-                app_type,
-                status
+            appointments_tree.insert("", "end", iid=appointment.id, values=(
+                appointment.date,
+                appointment.time,
+                appointment.doctor,
+                appointment.type,
+                appointment.status
             ))
-        
-        return True
-        
-    except Exception as e:
+    
+    def failed(e):
         print(f"Error loading appointments: {str(e)}")
-        return False
+        show_tree_placeholder(appointments_tree, "Could not load appointments")
+    
+    return run_in_background(appointments_tree, "appointments", fetch, on_done=show, on_error=failed)
 
 def get_appointment_details(appointment_id):
     """Get details of a specific appointment"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT date, time, doctor, type, notes, status
-               FROM appointments 
-               WHERE id = ?""",
-            (appointment_id,)
-        )
-        
-        result = cursor.fetchone()
-        conn.close()
+        appointment = appointment_service.get_appointment(appointment_id)
         
-        if not result:
+        if not appointment:
             return None
         
         # Create a dictionary with appointment details
-        appointment = {
-            "date": result[0],
-            "time": result[1],
-            "doctor": result[2],
-            "type": result[3],
-            "notes": result[4],
-            "status": result[5]
+        return {
+            "date": appointment.date,
+            "time": appointment.time,
+            "doctor": appointment.doctor,
+            "type": appointment.type,
+            "notes": appointment.notes,
+            "status": appointment.status
         }
         
-        return appointment
-        
     except Exception as e:
         print(f"Error getting appointment details: {str(e)}")
         return None
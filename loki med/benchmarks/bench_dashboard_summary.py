@@ -0,0 +1,136 @@
+"""
+Benchmark: dashboard data latency, five queries vs the dashboard_summary row.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_dashboard_summary.py [--rows 10000,1000000] [--users N]
+
+For each size, appointments, reminders, health_readings and medical_records
+get that many rows each, spread over --users users, in a throw-away
+database. Reported per size (median of the repeats):
+  queries   - the five per-render queries the dashboard used to run
+  summary   - reading the trigger-maintained summary row
+  rebuild   - rebuilding one user's row (first dashboard of the day)
+  insert    - 1000 pulse readings, without and with a summary row to maintain
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import connection_manager
+from migrations import migrate
+from repositories import appointments_repo, reminders_repo, readings_repo, records_repo, dashboard_repo
+
+TODAY = "2025-06-15"
+
+def populate(rows, users):
+    """Fill the four tables with rows each, in bulk"""
+    with connection_manager.acquire() as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+            [(f"user{i}", "x", f"User {i}") for i in range(1, users + 1)]
+        )
+        conn.execute("INSERT INTO medications (name, price, description, quantity) VALUES ('Aspirin', 1, '', 100)")
+        
+        # Dates spread over a year around TODAY
+        series = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+        conn.execute(series + """
+            INSERT INTO appointments (user_id, date, date_iso, time, doctor, type, notes, reminder, status)
+            SELECT 1 + i % ?, '', date('2025-01-01', '+' || (i % 365) || ' days'),
+                   printf('%02d:00', 8 + i % 10), 'Dr ' || (i % 7), 'Check-up', '', 0,
+                   CASE i % 5 WHEN 0 THEN 'Completed' WHEN 1 THEN 'Cancelled' ELSE 'Scheduled' END
+            FROM n
+        """, (rows, users))
+        conn.execute(series + """
+            INSERT INTO reminders (user_id, medicine_id, dose, date, date_iso, time, frequency)
+            SELECT 1 + i % ?, 1, '1 tablet', '', date('2025-01-01', '+' || (i % 365) || ' days'),
+                   printf('%02d:00', 8 + i % 12), 'Daily'
+            FROM n
+        """, (rows, users))
+        conn.execute(series + """
+            INSERT INTO health_readings (user_id, reading_type, value, timestamp, notes)
+            SELECT 1 + i % ?, CASE i % 3 WHEN 0 THEN 'bp' ELSE 'pulse' END, 60 + i % 40,
+                   datetime('2025-01-01', '+' || (i % 500000) || ' minutes'), NULL
+            FROM n
+        """, (rows, users))
+        conn.execute(series + """
+            INSERT INTO medical_records (user_id, file_name, file_path, record_type, upload_date)
+            SELECT 1 + i % ?, 'file' || i, '', 'Lab', datetime('2024-01-01', '+' || (i % 100000) || ' minutes')
+            FROM n
+        """, (rows, users))
+    
+    with connection_manager.acquire() as conn:
+        conn.execute("ANALYZE")
+
+def five_queries(user_id):
+    appointments_repo.upcoming_summary(user_id, TODAY)
+    reminders_repo.count_for_user(user_id)
+    reminders_repo.count_on(user_id, TODAY)
+    readings_repo.latest(user_id, "pulse")
+    records_repo.summary(user_id)
+
+def timed(fn, repeats):
+    """Median milliseconds of fn()"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def insert_readings(user_id, count=1000):
+    readings_repo.add_many([(user_id, "pulse", 72, None, None) for _ in range(count)])
+
+def run_size(rows, users, repeats):
+    folder = tempfile.mkdtemp(prefix="bench_dashboard_")
+    try:
+        connection_manager.set_database_path(os.path.join(folder, "bench.db"))
+        migrate()
+        
+        start = time.perf_counter()
+        populate(rows, users)
+        load_seconds = time.perf_counter() - start
+        
+        user_id = 1
+        queries_ms = timed(lambda: five_queries(user_id), repeats)
+        
+        # No summary rows exist yet, so the triggers have nothing to maintain
+        insert_plain_ms = timed(lambda: insert_readings(user_id), 3)
+        
+        rebuild_ms = timed(lambda: dashboard_repo.rebuild(TODAY, user_id), repeats)
+        summary_ms = timed(lambda: dashboard_repo.summary(user_id, TODAY), repeats)
+        insert_summary_ms = timed(lambda: insert_readings(user_id), 3)
+        
+        # The maintained row must still match a rebuild
+        maintained = dashboard_repo.summary(user_id, TODAY)
+        dashboard_repo.rebuild(TODAY, user_id)
+        consistent = maintained == dashboard_repo.summary(user_id, TODAY)
+        
+        return load_seconds, queries_ms, summary_ms, rebuild_ms, insert_plain_ms, insert_summary_ms, consistent
+    finally:
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="10000,1000000", help="rows per table, comma separated")
+    parser.add_argument("--users", type=int, default=10, help="users the rows are spread over (default 10)")
+    parser.add_argument("--repeats", type=int, default=21, help="timed repeats (default 21)")
+    args = parser.parse_args()
+    
+    print(f"{'rows/table':>11} {'load s':>7} {'queries ms':>11} {'summary ms':>11} {'rebuild ms':>11} "
+          f"{'insert ms':>10} {'+summary ms':>12}  consistent")
+    for rows in (int(value) for value in args.rows.split(",")):
+        load_s, queries_ms, summary_ms, rebuild_ms, plain_ms, with_summary_ms, consistent = \
+            run_size(rows, args.users, args.repeats)
+        print(f"{rows:>11} {load_s:>7.1f} {queries_ms:>11.3f} {summary_ms:>11.3f} {rebuild_ms:>11.3f} "
+              f"{plain_ms:>10.2f} {with_summary_ms:>12.2f}  {consistent}")
+
+if __name__ == "__main__":
+    main()
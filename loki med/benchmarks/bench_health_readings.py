@@ -0,0 +1,101 @@
+"""
+Benchmark: health_readings inserts, per-row path vs. the batched writer.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_health_readings.py [--rows N]
+
+Uses a throw-away database in a temporary folder.
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import connection_manager
+from migrations import migrate
+from repositories import readings_repo
+from readings_writer import ReadingsWriter
+
+def setup_database(folder):
+    """Create a migrated database with one user and return (path, user_id)"""
+    db_path = os.path.join(folder, "bench.db")
+    connection_manager.set_database_path(db_path)
+    migrate()
+    
+    with connection_manager.acquire() as conn:
+        cursor = conn.execute(
+            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+            ("bench", "bench", "Benchmark User")
+        )
+        user_id = cursor.lastrowid
+    return db_path, user_id
+
+def per_row_connect(db_path, username, rows):
+    """The original path: connect, look up the user, insert, commit, close per reading"""
+    for i in range(rows):
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+        user_id = cursor.fetchone()[0]
+        cursor.execute(
+            "INSERT INTO health_readings (user_id, reading_type, value, notes) VALUES (?, ?, ?, ?)",
+            (user_id, "pulse", str(70 + i % 20), None)
+        )
+        conn.commit()
+        conn.close()
+
+def per_row_repo(user_id, rows):
+    """Cached connection and statement, but still one commit per reading"""
+    for i in range(rows):
+        readings_repo.add(user_id, "pulse", 70 + i % 20)
+
+def batched(user_id, rows, durability, spool_path):
+    """Readings queued on the write-behind writer, flushed on close"""
+    writer = ReadingsWriter(max_batch=500, flush_interval=0.5, durability=durability, spool_path=spool_path)
+    for i in range(rows):
+        writer.add(user_id, "pulse", 70 + i % 20)
+    writer.close()
+
+def count_rows():
+    with connection_manager.acquire() as conn:
+        return conn.execute("SELECT COUNT(*) FROM health_readings").fetchone()[0]
+
+def measure(name, fn, rows):
+    before = count_rows()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    written = count_rows() - before
+    assert written == rows, f"{name}: expected {rows} rows, got {written}"
+    print(f"{name:<28} {rows:>7} rows  {elapsed:8.3f} s  {rows / elapsed:12,.0f} rows/s")
+    return rows / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="readings per run (default 2000)")
+    args = parser.parse_args()
+    
+    folder = tempfile.mkdtemp(prefix="bench_readings_")
+    try:
+        db_path, user_id = setup_database(folder)
+        spool_path = os.path.join(folder, "health_readings.spool")
+        rows = args.rows
+        
+        print(f"SQLite {sqlite3.sqlite_version}, database in {folder}\n")
+        baseline = measure("per-row connect+commit", lambda: per_row_connect(db_path, "bench", rows), rows)
+        measure("per-row repository", lambda: per_row_repo(user_id, rows), rows)
+        for durability in ("buffered", "spooled", "fsync"):
+            rate = measure(f"batched ({durability})", lambda: batched(user_id, rows, durability, spool_path), rows)
+            print(f"{'':<28} {rate / baseline:>7.1f}x the per-row path")
+    finally:
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: the notification outbox against a local SMTP server.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_notification_outbox.py [--users N] [--notifications N] [--batch N] [--fail-every N]
+
+A throw-away database gets --users users with email addresses, and
+--notifications grouped notifications are queued for them on the email
+and in-app channels. One worker then delivers them, email through
+benchmarks/smtp_sink.py on a free port, which refuses every --fail-every-th
+recipient with a temporary error so that rows go through the retries.
+Reported:
+  enqueue   - rows written per second, one transaction per batch of 1000
+  delivery  - rows sent per second on each channel, and batches
+  latency   - from queuing to sent, per channel (retried rows included);
+              everything is queued before the worker starts, so this is
+              mostly the time a row waits behind the backlog
+  retries   - rows retried and failed; nothing should fail
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import connection_manager, checkpoint_scheduler, configure_storage
+from migrations import migrate
+from repositories import outbox_repo
+from notification_dispatcher import GroupedNotification
+from notification_preferences import CATEGORY_MEDICATION, CHANNEL_EMAIL, CHANNEL_IN_APP
+from notification_outbox import Outbox, OutboxWorker, EmailChannel, InAppChannel
+from smtp_sink import SmtpSink
+
+# Notifications queued per enqueue() call, like one scheduler batch
+ENQUEUE_BATCH = 1000
+
+# Seconds before a failed row is retried, instead of the real backoff
+RETRY_DELAY = 0.05
+
+def populate(users):
+    """Seed users with email addresses"""
+    with connection_manager.acquire() as conn:
+        conn.execute("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO users (username, password, full_name, email)
+            SELECT 'user' || i, 'x', 'User ' || i, 'user' || i || '@example.org' FROM n
+        """, (users,))
+
+def latencies_ms(channel):
+    """Milliseconds from queuing to sent of every sent row of a channel, sorted"""
+    with connection_manager.acquire() as conn:
+        rows = conn.execute("""
+            SELECT (julianday(sent_at) - julianday(created_at)) * 86400000.0
+            FROM notification_outbox
+            WHERE status = 'sent' AND channel = ?
+            ORDER BY 1
+        """, (channel,)).fetchall()
+    return [row[0] for row in rows]
+
+def percentile(values, fraction):
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="users (default 1000)")
+    parser.add_argument("--notifications", type=int, default=20000, help="notifications queued (default 20000)")
+    parser.add_argument("--batch", type=int, default=100, help="rows claimed and sent together (default 100)")
+    parser.add_argument("--fail-every", type=int, default=50,
+                        help="refuse every Nth email recipient, 0 for never (default 50)")
+    args = parser.parse_args()
+    
+    folder = tempfile.mkdtemp(prefix="bench_outbox_")
+    sink = SmtpSink(fail_every=args.fail_every, quiet=True).start()
+    try:
+        connection_manager.set_database_path(os.path.join(folder, "outbox.db"))
+        configure_storage("server")
+        migrate()
+        populate(args.users)
+        
+        # Every user wants email and in-app notifications; no preference files are read
+        channels = (CHANNEL_EMAIL, CHANNEL_IN_APP)
+        outbox = Outbox(channels_for=lambda user_ids, category: {user_id: channels for user_id in user_ids})
+        notifications = [
+            GroupedNotification(1 + i % args.users, "Medication Reminder",
+                                f"Time to take Medicine {i % 50} (1 tablet)", [], CATEGORY_MEDICATION)
+            for i in range(args.notifications)
+        ]
+        
+        start = time.perf_counter()
+        queued = 0
+        for first in range(0, len(notifications), ENQUEUE_BATCH):
+            queued += outbox.enqueue(notifications[first:first + ENQUEUE_BATCH])
+        elapsed = time.perf_counter() - start
+        print(f"{args.users} users, {args.notifications} notifications")
+        print(f"enqueue: {queued} rows in {elapsed:.2f} s, {queued / elapsed:,.0f} rows/s\n")
+        
+        worker = OutboxWorker(
+            [EmailChannel(sink.host, sink.port), InAppChannel()],
+            batch_size=args.batch, poll_interval=RETRY_DELAY, backoff=lambda attempts: RETRY_DELAY,
+        )
+        start = time.perf_counter()
+        worker.start()
+        while True:
+            counts = outbox_repo.counts()
+            if not counts.get("pending") and not counts.get("sending"):
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        worker.stop()
+        
+        print(f"delivery: {worker.sent} rows in {elapsed:.2f} s, {worker.sent / elapsed:,.0f} rows/s, "
+              f"{worker.batches} batches of up to {args.batch}")
+        print(f"{'channel':>8} {'sent':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for channel in channels:
+            values = latencies_ms(channel)
+            print(f"{channel:>8} {len(values):>8} {percentile(values, 0.50):>9.1f} "
+                  f"{percentile(values, 0.99):>9.1f} {max(values, default=0):>9.1f}")
+        print(f"\nretries: {worker.retried} retried, {worker.failed} failed; "
+              f"the SMTP server accepted {sink.messages} messages and refused {sink.refused} recipients")
+    finally:
+        sink.stop()
+        checkpoint_scheduler.stop()
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
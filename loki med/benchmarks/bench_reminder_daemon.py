@@ -0,0 +1,188 @@
+"""
+Benchmark: the reminder daemon over many users.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_reminder_daemon.py [--users N] [--reminders N] [--days D] [--burst N]
+
+A throw-away database gets --reminders reminders of --users users spread
+over --days days, plus --burst reminders that all fall due in one minute
+(the morning dose). The daemon's scheduler then runs with its clock set
+to just before that minute. Reported:
+  load      - one window load, a single query for every user
+  memory    - Python memory held by a loaded window, and the peak RSS
+  dispatch  - latency from the start of the due minute to the end of the
+              batch holding each reminder; a tenth of the users are attached
+              as sessions, the rest go to the outbox
+  polling   - what one due query per user every 30 seconds would cost
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import connection_manager, checkpoint_scheduler, configure_storage
+from migrations import migrate
+from repositories import reminders_repo
+from reminder_scheduler import ReminderScheduler
+from reminder_daemon import ReminderDispatcher, DAEMON_HORIZON
+
+# Seconds of the clock before the burst minute when the scheduler starts
+LEAD_IN = 2.0
+
+def populate(users, reminders, days, burst, burst_minute):
+    """Seed users, reminders over days from an hour before burst_minute, and the burst"""
+    first = burst_minute - timedelta(hours=1)
+    with connection_manager.acquire() as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+            [(f"user{i}", "x", f"User {i}") for i in range(1, users + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO medications (name, price, description, quantity) VALUES (?, 1, '', 100)",
+            [(f"Medicine {i}",) for i in range(1, 51)]
+        )
+        
+        series = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+        # Pseudo-random minutes, so reminders are not sorted by user or time
+        conn.execute(series + """
+            INSERT INTO reminders (user_id, medicine_id, dose, date, date_iso, time, frequency)
+            SELECT 1 + i % ?, 1 + i % 50, '1 tablet', '',
+                   date(?, '+' || ((i * 7919) % ?) || ' minutes'),
+                   strftime('%H:%M', ?, '+' || ((i * 7919) % ?) || ' minutes'), 'Once only'
+            FROM n
+        """, (reminders, users, first.strftime("%Y-%m-%d %H:%M"), days * 1440,
+              first.strftime("%Y-%m-%d %H:%M"), days * 1440))
+        conn.execute(series + """
+            INSERT INTO reminders (user_id, medicine_id, dose, date, date_iso, time, frequency)
+            SELECT 1 + i % ?, 1 + i % 50, '2 tablets', '', ?, ?, 'Once only'
+            FROM n
+        """, (burst, users, burst_minute.strftime("%Y-%m-%d"), burst_minute.strftime("%H:%M")))
+    
+    with connection_manager.acquire() as conn:
+        conn.execute("ANALYZE")
+
+def peak_rss_mb():
+    """Peak resident set size of the process, or None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def measure_load(horizon, now):
+    """(rows, seconds, bytes held) of one window load"""
+    scheduler = ReminderScheduler(None, horizon=horizon, appointments=True)
+    start = time.perf_counter()
+    occurrences, _ = scheduler._load(now, timedelta(0))
+    elapsed = time.perf_counter() - start
+    
+    # Loaded again under tracemalloc, which slows allocation down too much to time
+    del occurrences
+    tracemalloc.start()
+    occurrences, _ = scheduler._load(now, timedelta(0))
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(occurrences), elapsed, held
+
+class TimedDispatcher(ReminderDispatcher):
+    """
+    Dispatcher that records the latency of every occurrence due from since on.
+    
+    Reminders of the minute the scheduler starts in fire at once, long after
+    their minute began; they say nothing about the dispatch latency.
+    """
+    
+    def __init__(self, since, **kwargs):
+        super().__init__(**kwargs)
+        self.since = since
+        self.latencies = []
+    
+    def dispatch(self, occurrences):
+        super().dispatch(occurrences)
+        done = self.clock()
+        self.latencies.extend(
+            (done - occurrence.due).total_seconds()
+            for occurrence in occurrences if occurrence.due >= self.since
+        )
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="users (default 10000)")
+    parser.add_argument("--reminders", type=int, default=1000000, help="reminders (default 1000000)")
+    parser.add_argument("--days", type=int, default=30, help="days the reminders span (default 30)")
+    parser.add_argument("--burst", type=int, default=10000, help="reminders due in the same minute (default 10000)")
+    args = parser.parse_args()
+    
+    folder = tempfile.mkdtemp(prefix="bench_reminders_")
+    try:
+        connection_manager.set_database_path(os.path.join(folder, "reminders.db"))
+        configure_storage("server")
+        migrate()
+        
+        burst_minute = (datetime.now() + timedelta(minutes=5)).replace(second=0, microsecond=0)
+        start = time.perf_counter()
+        populate(args.users, args.reminders, args.days, args.burst, burst_minute)
+        print(f"{args.users} users, {args.reminders + args.burst} reminders over {args.days} days, "
+              f"seeded in {time.perf_counter() - start:.1f} s\n")
+        
+        print(f"{'window':>8} {'rows':>9} {'load ms':>9} {'held MB':>9} {'bytes/row':>10}")
+        for horizon in (DAEMON_HORIZON, timedelta(hours=24)):
+            rows, elapsed, held = measure_load(horizon, burst_minute - timedelta(seconds=LEAD_IN))
+            print(f"{horizon.total_seconds() / 3600:>7g}h {rows:>9} {elapsed * 1000:>9.1f} "
+                  f"{held / 2 ** 20:>9.1f} {held / max(rows, 1):>10.0f}")
+        
+        # The clock the scheduler sees starts LEAD_IN seconds before the burst minute
+        offset = burst_minute - timedelta(seconds=LEAD_IN) - datetime.now()
+        clock = lambda: datetime.now() + offset
+        
+        dispatcher = TimedDispatcher(clock(), clock=clock)
+        for user_id in range(1, args.users + 1, 10):
+            dispatcher.attach_session(user_id, lambda occurrence, message: None)
+        
+        scheduler = ReminderScheduler(None, horizon=DAEMON_HORIZON, clock=clock,
+                                      appointments=True, watch_interval=5.0)
+        scheduler.subscribe(dispatcher.dispatch, batch=True)
+        time.sleep(LEAD_IN + 3.0)
+        scheduler.stop()
+        
+        latencies = dispatcher.latencies
+        print(f"\ndispatched {dispatcher.dispatched} in {dispatcher.batches} batches "
+              f"({dispatcher.to_sessions} to sessions, {dispatcher.to_outbox} to the outbox), "
+              f"{scheduler.loads} loads")
+        print(f"latency ms: p50 {percentile(latencies, 0.50) * 1000:.1f}, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f}, max {max(latencies, default=0) * 1000:.1f}")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"peak RSS {rss:.0f} MB (seeding and the SQLite cache and memory map included)")
+        
+        # The alternative: every user's own thread querying every 30 seconds
+        now = clock()
+        sample = random.sample(range(1, args.users + 1), min(1000, args.users))
+        start = time.perf_counter()
+        for user_id in sample:
+            reminders_repo.due_between(user_id, now.strftime("%Y-%m-%d"), now.strftime("%H:%M"),
+                                       (now + timedelta(minutes=1)).strftime("%H:%M"))
+        per_query = (time.perf_counter() - start) / len(sample)
+        print(f"\nper-user polling: {args.users / 30:.0f} queries/s, {per_query * 1000:.3f} ms each, "
+              f"{per_query * args.users / 30 * 100:.1f}% of a core and {args.users} threads")
+    finally:
+        checkpoint_scheduler.stop()
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: overhead of SQL tracing on typical repository calls.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_sql_trace.py [--calls N]
+
+Uses a throw-away database in a temporary folder.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sql_trace
+from db_manager import connection_manager
+from migrations import migrate
+from repositories import appointments_repo, reminders_repo, readings_repo
+
+def setup_database(folder):
+    """Create a migrated database with one user and some rows; returns the user id"""
+    connection_manager.set_database_path(os.path.join(folder, "bench.db"))
+    migrate()
+    
+    with connection_manager.acquire() as conn:
+        user_id = conn.execute(
+            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+            ("bench", "bench", "Benchmark User")
+        ).lastrowid
+        conn.execute("INSERT INTO medications (name, price, description, quantity) VALUES ('Aspirin', 1, '', 100)")
+    
+    appointments_repo.add_many(user_id, [
+        (f"{day:02d}-05-2025", "09:00", "Smith (General Physician)", "Check-up", "", "Scheduled")
+        for day in range(1, 29)
+    ])
+    reminders_repo.add_many([(user_id, 1, "1 tablet", f"{day:02d}-05-2025", "08:00", "Daily") for day in range(1, 29)])
+    readings_repo.add_many([(user_id, "pulse", 70 + i % 20, None, None) for i in range(500)])
+    return user_id
+
+def workload(user_id, calls):
+    for _ in range(calls):
+        appointments_repo.list_for_user(user_id)
+        reminders_repo.active_from(user_id, "2025-05-10", "08:00")
+        reminders_repo.count_for_user(user_id)
+        readings_repo.recent(user_id, "pulse", 50)
+
+def measure(user_id, calls, repeats=5):
+    """Best of several runs, in seconds"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        workload(user_id, calls)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="workload iterations per run (default 500)")
+    args = parser.parse_args()
+    
+    folder = tempfile.mkdtemp(prefix="bench_trace_")
+    try:
+        user_id = setup_database(folder)
+        statements = args.calls * 4
+        
+        sql_trace.disable()
+        plain = measure(user_id, args.calls)
+        
+        sql_trace.tracer.slow_log_path = os.path.join(folder, "slow_queries.log")
+        sql_trace.enable()
+        traced = measure(user_id, args.calls)
+        sql_trace.disable()
+        
+        print(f"untraced: {plain:.3f} s  ({plain / statements * 1e6:.1f} us/statement)")
+        print(f"traced:   {traced:.3f} s  ({traced / statements * 1e6:.1f} us/statement)")
+        print(f"overhead: {(traced - plain) / statements * 1e6:.1f} us/statement ({(traced / plain - 1) * 100:.1f}%)\n")
+        print(sql_trace.report(limit=10))
+    finally:
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
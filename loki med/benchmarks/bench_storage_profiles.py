@@ -0,0 +1,117 @@
+"""
+Benchmark: concurrent read/write throughput under each storage profile.
+
+Run from the "loki med" folder:
+    python benchmarks/bench_storage_profiles.py [--seconds S] [--readers N] [--writers N]
+
+Reader threads run the tab queries while writer threads insert health
+readings one commit at a time (like the sensor and reminder threads).
+Every profile gets a fresh database in a temporary folder.
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import STORAGE_PROFILES, connection_manager, checkpoint_scheduler, configure_storage
+from migrations import migrate
+from repositories import appointments_repo, readings_repo
+
+def setup_database(folder, profile_name):
+    """Create a migrated database with one user and some rows; returns the user id"""
+    connection_manager.set_database_path(os.path.join(folder, f"{profile_name}.db"))
+    configure_storage(profile_name)
+    migrate()
+    
+    with connection_manager.acquire() as conn:
+        user_id = conn.execute(
+            "INSERT INTO users (username, password, full_name) VALUES (?, ?, ?)",
+            ("bench", "bench", "Benchmark User")
+        ).lastrowid
+    
+    appointments_repo.add_many(user_id, [
+        (f"{day:02d}-05-2025", "09:00", "Smith (General Physician)", "Check-up", "", "Scheduled")
+        for day in range(1, 29)
+    ])
+    readings_repo.add_many([(user_id, "pulse", 70 + i % 20, None, None) for i in range(2000)])
+    return user_id
+
+def run_profile(profile_name, seconds, readers, writers):
+    folder = tempfile.mkdtemp(prefix="bench_storage_")
+    try:
+        user_id = setup_database(folder, profile_name)
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        latencies = {"reads": [], "writes": []}
+        lock = threading.Lock()
+        
+        def worker(kind, operation):
+            done = 0
+            errors = 0
+            slowest = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    operation()
+                    done += 1
+                    slowest.append(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    # "database is locked" after busy_timeout
+                    errors += 1
+            connection_manager.close_thread_connection()
+            with lock:
+                counts[kind] += done
+                counts["errors"] += errors
+                latencies[kind].extend(slowest)
+        
+        def read():
+            readings_repo.recent(user_id, "pulse", 50)
+            appointments_repo.list_for_user(user_id)
+        
+        def write():
+            readings_repo.add(user_id, "pulse", 72, "bench")
+        
+        threads = [threading.Thread(target=worker, args=("reads", read)) for _ in range(readers)]
+        threads += [threading.Thread(target=worker, args=("writes", write)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        
+        def p99(values):
+            values = sorted(values)
+            return values[int(0.99 * (len(values) - 1))] * 1000 if values else 0.0
+        
+        return (
+            counts["reads"] / seconds, counts["writes"] / seconds, counts["errors"],
+            p99(latencies["reads"]), p99(latencies["writes"])
+        )
+    finally:
+        checkpoint_scheduler.stop()
+        connection_manager.close_all()
+        shutil.rmtree(folder, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="run time per profile (default 3)")
+    parser.add_argument("--readers", type=int, default=3, help="reader threads (default 3)")
+    parser.add_argument("--writers", type=int, default=1, help="writer threads (default 1)")
+    args = parser.parse_args()
+    
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g} s per profile\n")
+    print(f"{'profile':10} {'reads/s':>10} {'writes/s':>10} {'errors':>7} {'read p99 ms':>12} {'write p99 ms':>13}")
+    for name in STORAGE_PROFILES:
+        reads, writes, errors, read_p99, write_p99 = run_profile(name, args.seconds, args.readers, args.writers)
+        print(f"{name:10} {reads:>10.0f} {writes:>10.0f} {errors:>7} {read_p99:>12.2f} {write_p99:>13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+A local SMTP stand-in for trying out email notifications.
+
+Run from the "loki med" folder:
+    python benchmarks/smtp_sink.py [--port 1025] [--quiet]
+then start the application with MEDICAL_SMTP_HOST=localhost MEDICAL_SMTP_PORT=1025.
+
+It speaks enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT), accepts every message and prints it, like the debugging
+server that used to ship with Python. fail_every=N refuses every Nth
+recipient with a temporary 451 reply, to exercise the outbox's retries.
+"""
+
+import argparse
+import threading
+import socketserver
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """One SMTP session"""
+    
+    def reply(self, text):
+        self.wfile.write(f"{text}\r\n".encode("ascii"))
+    
+    def handle(self):
+        sink = self.server.sink
+        self.reply("220 localhost SMTP sink ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if sink.refuse_next():
+                    self.reply("451 Try again later")
+                else:
+                    recipients.append(command[8:].strip())
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data.decode("utf-8", "replace"))
+                sink.received(recipients, "".join(lines))
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SmtpSink:
+    """
+    SMTP server on a background thread; port 0 picks a free port.
+    
+    messages counts what was accepted; on_message(recipients, data) is
+    called for each message, by default printing it unless quiet.
+    """
+    
+    def __init__(self, host="localhost", port=0, fail_every=0, quiet=False, on_message=None):
+        self.fail_every = fail_every
+        self.quiet = quiet
+        self.on_message = on_message
+        self.messages = 0
+        self.refused = 0
+        self._recipients = 0
+        self._lock = threading.Lock()
+        
+        self._server = _Server((host, port), _SmtpHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def refuse_next(self):
+        """Whether to refuse the recipient being added (every fail_every-th)"""
+        with self._lock:
+            self._recipients += 1
+            refuse = self.fail_every > 0 and self._recipients % self.fail_every == 0
+            self.refused += refuse
+            return refuse
+    
+    def received(self, recipients, data):
+        with self._lock:
+            self.messages += 1
+        if self.on_message is not None:
+            self.on_message(recipients, data)
+        elif not self.quiet:
+            print(f"---------- message to {', '.join(recipients)} ----------")
+            print(data.rstrip())
+            print("------------ end of message ------------")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="localhost", help="address to listen on (default localhost)")
+    parser.add_argument("--port", type=int, default=1025, help="port to listen on (default 1025)")
+    parser.add_argument("--fail-every", type=int, default=0, help="refuse every Nth recipient with 451")
+    parser.add_argument("--quiet", action="store_true", help="count messages without printing them")
+    args = parser.parse_args()
+    
+    sink = SmtpSink(args.host, args.port, fail_every=args.fail_every, quiet=args.quiet).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port}; press Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.stop()
+    print(f"{sink.messages} messages received, {sink.refused} recipients refused")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Month calendar drawn on a single Canvas.
+The 6 x 7 day grid is created once as canvas items and recoloured in
+place when the month changes. Appointment days come from one indexed
+range query covering the shown month and its neighbours, cached per
+month, so paging back and forth does not hit the database.
+"""
+
+import time
+import calendar
+import tkinter as tk
+from datetime import date
+
+from theme_styles import COLORS, FONTS
+from repositories import appointments_repo
+from db_worker import run_in_background
+
+# Cached months kept per calendar
+MAX_CACHED_MONTHS = 24
+
+# Cached months older than this are shown, then refreshed in the background
+MONTH_MAX_AGE = 60.0
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+WEEKS = 6
+HEADER_HEIGHT = 22
+CELL_HEIGHT = 30
+CELL_PAD = 1
+
+def shift_month(year, month, delta):
+    """(year, month) delta months away"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+def month_range(year, month):
+    """First and last ISO day of a month"""
+    last = calendar.monthrange(year, month)[1]
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last:02d}"
+
+class MonthCache:
+    """Appointment days per (year, month), least recently used dropped first"""
+    
+    def __init__(self, max_months=MAX_CACHED_MONTHS, max_age=MONTH_MAX_AGE):
+        self.max_months = max_months
+        self.max_age = max_age
+        # (year, month) -> (loaded at, set of days)
+        self._months = {}
+    
+    def get(self, year, month):
+        """The cached days of a month, or None"""
+        entry = self._months.pop((year, month), None)
+        if entry is None:
+            return None
+        # Re-insert to mark it as recently used
+        self._months[(year, month)] = entry
+        return entry[1]
+    
+    def is_fresh(self, year, month):
+        entry = self._months.get((year, month))
+        return entry is not None and time.monotonic() - entry[0] < self.max_age
+    
+    def put(self, year, month, days):
+        self._months.pop((year, month), None)
+        self._months[(year, month)] = (time.monotonic(), set(days))
+        while len(self._months) > self.max_months:
+            del self._months[next(iter(self._months))]
+    
+    def clear(self):
+        self._months.clear()
+
+def load_months(user_id, months):
+    """Appointment days of consecutive (year, month) pairs, from one range query"""
+    start, _ = month_range(*months[0])
+    _, end = month_range(*months[-1])
+    dates = appointments_repo.dates_between(user_id, start, end)
+    
+    by_month = {key: set() for key in months}
+    for iso in dates:
+        key = (int(iso[0:4]), int(iso[5:7]))
+        if key in by_month:
+            by_month[key].add(int(iso[8:10]))
+    return by_month
+
+class MonthCalendar:
+    """
+    A month view on one Canvas with appointment days highlighted.
+    
+    show() switches month; cached months are drawn immediately and the
+    neighbouring months are fetched in the background, so the next
+    prev/next step is usually served from the cache.
+    on_month_changed(year, month) is called whenever the shown month changes.
+    """
+    
+    def __init__(self, parent, user_id, on_month_changed=None, cache=None):
+        self.user_id = user_id
+        self.on_month_changed = on_month_changed
+        self.cache = cache or MonthCache()
+        
+        today = date.today()
+        self.year = today.year
+        self.month = today.month
+        
+        self.canvas = tk.Canvas(
+            parent,
+            height=HEADER_HEIGHT + WEEKS * CELL_HEIGHT,
+            background=COLORS["background"],
+            highlightthickness=0
+        )
+        
+        # Canvas items, created once and reused for every month
+        self._weekday_items = [
+            self.canvas.create_text(0, 0, text=name, font=FONTS["caption"], fill=COLORS["text_secondary"])
+            for name in WEEKDAYS
+        ]
+        self._cells = []
+        for _ in range(WEEKS * 7):
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, width=0, fill=COLORS["background"])
+            text = self.canvas.create_text(0, 0, text="", font=FONTS["body"])
+            self._cells.append((rect, text))
+        
+        self.canvas.bind("<Configure>", self._layout)
+    
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+    
+    # Navigation
+    
+    def show(self, year, month):
+        """Draw a month, from the cache if possible, and fetch what is missing"""
+        self.year, self.month = year, month
+        self._draw()
+        if self.on_month_changed:
+            self.on_month_changed(year, month)
+        self._prefetch()
+    
+    def next_month(self):
+        self.show(*shift_month(self.year, self.month, 1))
+    
+    def prev_month(self):
+        self.show(*shift_month(self.year, self.month, -1))
+    
+    def refresh(self):
+        """Forget the cached months and load the shown one again"""
+        self.cache.clear()
+        self.show(self.year, self.month)
+    
+    # Data
+    
+    def _prefetch(self):
+        if self.user_id is None:
+            return
+        
+        months = [shift_month(self.year, self.month, delta) for delta in (-1, 0, 1)]
+        stale = [key for key in months if not self.cache.is_fresh(*key)]
+        if not stale:
+            return
+        
+        # One query from the first to the last month that needs loading
+        span = months[months.index(stale[0]):months.index(stale[-1]) + 1]
+        run_in_background(
+            self.canvas, "calendar_months", load_months, (self.user_id, span),
+            on_done=self._loaded,
+            on_error=lambda e: print(f"Error getting appointment dates: {e}")
+        )
+    
+    def _loaded(self, by_month):
+        for (year, month), days in by_month.items():
+            self.cache.put(year, month, days)
+        if (self.year, self.month) in by_month:
+            self._draw()
+    
+    # Drawing
+    
+    def _layout(self, event=None):
+        """Place the items for the current canvas size"""
+        width = max(self.canvas.winfo_width(), 7)
+        cell_width = width / 7
+        
+        for column, item in enumerate(self._weekday_items):
+            self.canvas.coords(item, (column + 0.5) * cell_width, HEADER_HEIGHT / 2)
+        
+        for index, (rect, text) in enumerate(self._cells):
+            row, column = divmod(index, 7)
+            x0 = column * cell_width + CELL_PAD
+            y0 = HEADER_HEIGHT + row * CELL_HEIGHT + CELL_PAD
+            x1 = (column + 1) * cell_width - CELL_PAD
+            y1 = HEADER_HEIGHT + (row + 1) * CELL_HEIGHT - CELL_PAD
+            self.canvas.coords(rect, x0, y0, x1, y1)
+            self.canvas.coords(text, (x0 + x1) / 2, (y0 + y1) / 2)
+    
+    def _draw(self):
+        """Recolour the day cells for the shown month"""
+        weeks = calendar.monthcalendar(self.year, self.month)
+        days = [day for week in weeks for day in week]
+        days += [0] * (WEEKS * 7 - len(days))
+        
+        appointment_days = self.cache.get(self.year, self.month) or set()
+        today = date.today()
+        today_day = today.day if (today.year, today.month) == (self.year, self.month) else -1
+        
+        for (rect, text), day in zip(self._cells, days):
+            if day == 0:
+                # Empty cell for days not in this month
+                self.canvas.itemconfigure(rect, fill=COLORS["background"])
+                self.canvas.itemconfigure(text, text="")
+                continue
+            
+            if day == today_day:
+                fill, color, font = COLORS["primary"], COLORS["background"], FONTS["body_bold"]
+            elif day in appointment_days:
+                fill, color, font = COLORS["primary_light"], COLORS["background"], FONTS["body"]
+            else:
+                fill, color, font = COLORS["background"], COLORS["text"], FONTS["body"]
+            
+            self.canvas.itemconfigure(rect, fill=fill)
+            self.canvas.itemconfigure(text, text=str(day), fill=color, font=font)
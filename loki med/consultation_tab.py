@@ -5,8 +5,6 @@ This tab allows users to schedule and manage medical appointments.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-import os
 import calendar
 from datetime import datetime, timedelta
 from tkcalendar import Calendar
@@ -14,8 +12,9 @@ from tkcalendar import Calendar
 # Import UI components
 from widgets import create_custom_card
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import appointments_repo
+from user_session import resolve_user_id
 
 def add_appointment(username, date_entry, time_hour_var, time_minute_var, doctor_var, type_var, notes_text, appointments_tree):
     """Add a new appointment to the database"""
@@ -33,40 +32,18 @@ def add_appointment(username, date_entry, time_hour_var, time_minute_var, doctor
             messagebox.showerror("Error", "Please fill in all required fields (date, time, doctor, type)")
             return False
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        user_id = resolve_user_id(username)
         
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
-        # Insert appointment
-        cursor.execute(
-            """INSERT INTO appointments 
-               (user_id, date, time, doctor, type, notes, reminder, status, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                user_id,
-                date_str,
-                time_str,
-                doctor,
-                appointment_type,
-                notes,
-                1,  # Default reminder to True
-                status,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            )
-        )
-        
-        conn.commit()
-        conn.close()
+        # Insert appointment (the repository stores display and ISO dates)
+        try:
+            appointments_repo.add(user_id, date_str, time_str, doctor, appointment_type, notes, status)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return False
         
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
@@ -98,45 +75,25 @@ def update_appointment(username, appointment_id, date_entry, time_hour_var, time
             messagebox.showerror("Error", "Please fill in all required fields (date, time, doctor, type)")
             return False
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
         # Update appointment
-        cursor.execute(
-            """UPDATE appointments 
-               SET date = ?, time = ?, doctor = ?, type = ?, notes = ?, status = ? 
-               WHERE id = ? AND user_id = ?""",
-            (
-                date_str,
-                time_str,
-                doctor,
-                appointment_type,
-                notes,
-                status,
-                appointment_id,
-                user_id
+        try:
+            updated = appointments_repo.update(
+                appointment_id, user_id, date_str, time_str, doctor, appointment_type, notes, status
             )
-        )
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return False
         
-        if cursor.rowcount == 0:
+        if not updated:
             messagebox.showerror("Error", "Failed to update appointment. Appointment not found or not owned by current user.")
-            conn.close()
             return False
         
-        conn.commit()
-        conn.close()
-        
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
         
@@ -159,34 +116,17 @@ def delete_appointment(username, appointment_id, appointments_tree):
         if not confirm:
             return False
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
         # Delete appointment
-        cursor.execute(
-            "DELETE FROM appointments WHERE id = ? AND user_id = ?",
-            (appointment_id, user_id)
-        )
-        
-        if cursor.rowcount == 0:
+        if not appointments_repo.delete(appointment_id, user_id):
             messagebox.showerror("Error", "Failed to delete appointment. Appointment not found or not owned by current user.")
-            conn.close()
             return False
         
-        conn.commit()
-        conn.close()
-        
         # Refresh the appointments list
         load_appointments(username, appointments_tree)
         
@@ -204,41 +144,19 @@ def load_appointments(username, appointments_tree):
         for item in appointments_tree.get_children():
             appointments_tree.delete(item)
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        user_id = resolve_user_id(username)
         
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
+        if user_id is None:
             return False
         
-        user_id = result[0]
-        
-        # Get appointments
-        cursor.execute(
-            """SELECT id, date, time, doctor, type, status
-               FROM appointments 
-               WHERE user_id = ? 
-               ORDER BY date, time""",
-            (user_id,)
-        )
-        
-        appointments = cursor.fetchall()
-        conn.close()
-        
         # Add appointments to tree
-        for appointment in appointments:
-            app_id, date, time, doctor, app_type, status = appointment
-            
-            appointments_tree.insert("", "end", iid=app_id, values=(
-                date,
-                time,
-                doctor,
-                app_type,
-                status
+        for appointment in appointments_repo.list_for_user(user_id):
+            appointments_tree.insert("", "end", iid=appointment.id, values=(
+                appointment.date,
+                appointment.time,
+                appointment.doctor,
+                appointment.type,
+                appointment.status
             ))
         
         return True
@@ -250,34 +168,21 @@ def load_appointments(username, appointments_tree):
 def get_appointment_details(appointment_id):
     """Get details of a specific appointment"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT date, time, doctor, type, notes, status
-               FROM appointments 
-               WHERE id = ?""",
-            (appointment_id,)
-        )
+        appointment = appointments_repo.get(appointment_id)
         
-        result = cursor.fetchone()
-        conn.close()
-        
-        if not result:
+        if not appointment:
             return None
         
         # Create a dictionary with appointment details
-        appointment = {
-            "date": result[0],
-            "time": result[1],
-            "doctor": result[2],
-            "type": result[3],
-            "notes": result[4],
-            "status": result[5]
+        return {
+            "date": appointment.date,
+            "time": appointment.time,
+            "doctor": appointment.doctor,
+            "type": appointment.type,
+            "notes": appointment.notes,
+            "status": appointment.status
         }
         
-        return appointment
-        
     except Exception as e:
         print(f"Error getting appointment details: {str(e)}")
         return None
@@ -5,15 +5,19 @@ Provides a summary view of key information for the user.
 
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
-import os
 from datetime import datetime, timedelta
 import calendar
 
 from theme_styles import COLORS, FONTS, create_card, create_dashboard_card
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from db_manager import connect
+from repositories import dashboard_repo
+from readings_writer import flush_readings
+from user_session import resolve_user_id
+from date_codec import today_iso, to_display
+from calendar_view import MonthCalendar
+import startup_profile
 
 def get_greeting():
     """Return a greeting based on the time of day"""
@@ -29,7 +33,7 @@ def get_greeting():
 def get_user_info(username):
     """Get user information from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         
         cursor.execute("SELECT full_name FROM users WHERE username = ?", (username,))
@@ -66,75 +70,39 @@ def get_dashboard_data(username):
     }
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
-            conn.close()
+        if user_id is None:
             return data
         
-        user_id = result[0]
+        # Health readings still queued for writing must reach the triggers first
+        flush_readings()
         
-        # Upcoming appointments
-        today = datetime.now().strftime("%d-%m-%Y")
-        cursor.execute("""
-            SELECT COUNT(*), MIN(date), doctor
-            FROM appointments 
-            WHERE user_id = ? AND date >= ? AND status != 'Completed' AND status != 'Cancelled'
-            GROUP BY user_id
-        """, (user_id, today))
+        # One row, kept current by triggers on the underlying tables
+        summary = dashboard_repo.summary(user_id, today_iso())
+        if summary is None:
+            return data
         
-        result = cursor.fetchone()
-        if result:
-            data["appointments"]["upcoming"] = result[0]
-            data["appointments"]["next_date"] = result[1]
-            data["appointments"]["next_doctor"] = result[2]
+        # Upcoming appointments
+        if summary.upcoming_appointments:
+            data["appointments"]["upcoming"] = summary.upcoming_appointments
+            data["appointments"]["next_date"] = to_display(summary.next_appointment_date)
+            data["appointments"]["next_doctor"] = summary.next_appointment_doctor
         
         # Medications
-        cursor.execute("""
-            SELECT COUNT(*) FROM reminders WHERE user_id = ?
-        """, (user_id,))
-        
-        result = cursor.fetchone()
-        if result:
-            data["medications"]["total"] = result[0]
-        
-        today = datetime.now().strftime("%d-%m-%Y")
-        cursor.execute("""
-            SELECT COUNT(*) FROM reminders WHERE user_id = ? AND date = ?
-        """, (user_id, today))
-        
-        result = cursor.fetchone()
-        if result:
-            data["medications"]["due_today"] = result[0]
+        data["medications"]["total"] = summary.reminder_count
+        data["medications"]["due_today"] = summary.reminders_due
         
         # Health readings
-        cursor.execute("""
-            SELECT value, timestamp FROM health_readings 
-            WHERE user_id = ? AND reading_type = 'pulse'
-            ORDER BY timestamp DESC LIMIT 1
-        """, (user_id,))
-        
-        result = cursor.fetchone()
-        if result:
-            data["health"]["latest_pulse"] = result[0]
-            data["health"]["pulse_date"] = result[1]
+        if summary.latest_pulse_at:
+            data["health"]["latest_pulse"] = summary.latest_pulse
+            data["health"]["pulse_date"] = summary.latest_pulse_at
         
         # Medical records
-        cursor.execute("""
-            SELECT COUNT(*), MAX(upload_date) FROM medical_records WHERE user_id = ?
-        """, (user_id,))
-        
-        result = cursor.fetchone()
-        if result and result[0]:
-            data["records"]["total"] = result[0]
-            data["records"]["latest"] = result[1]
-        
-        conn.close()
+        if summary.record_count:
+            data["records"]["total"] = summary.record_count
+            data["records"]["latest"] = summary.latest_record_at
     except Exception as e:
         print(f"Error getting dashboard data: {e}")
     
@@ -142,11 +110,6 @@ def get_dashboard_data(username):
 
 def create_calendar_widget(parent, username):
     """Create calendar widget showing appointments"""
-    # Get current date information
-    now = datetime.now()
-    current_month = now.month
-    current_year = now.year
-    
     # Create a frame to hold calendar
     cal_frame = create_card(parent, "Calendar")
     
@@ -154,8 +117,7 @@ def create_calendar_widget(parent, username):
     header_frame = ttk.Frame(cal_frame)
     header_frame.pack(fill="x", pady=(0, 10))
     
-    month_year = f"{calendar.month_name[current_month]} {current_year}"
-    month_label = ttk.Label(header_frame, text=month_year, font=FONTS["subtitle"])
+    month_label = ttk.Label(header_frame, text="", font=FONTS["subtitle"])
     month_label.pack(side="left")
     
     # Navigation buttons
@@ -168,96 +130,17 @@ def create_calendar_widget(parent, username):
     next_button = ttk.Button(nav_frame, text=">", width=2, style="Text.TButton")
     next_button.pack(side="left", padx=2)
     
-    # Days of week header
-    days_frame = ttk.Frame(cal_frame)
-    days_frame.pack(fill="x")
+    def show_month_name(year, month):
+        month_label.config(text=f"{calendar.month_name[month]} {year}")
     
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    for day in days:
-        day_label = ttk.Label(days_frame, text=day, font=FONTS["caption"], anchor="center", width=4)
-        day_label.pack(side="left", expand=True, fill="x")
+    # Day grid on a single canvas; appointment days load in the background
+    month_view = MonthCalendar(cal_frame, resolve_user_id(username), on_month_changed=show_month_name)
+    month_view.pack(fill="both", expand=True)
     
-    # Calendar grid
-    cal_grid_frame = ttk.Frame(cal_frame)
-    cal_grid_frame.pack(fill="both", expand=True)
+    prev_button.config(command=month_view.prev_month)
+    next_button.config(command=month_view.next_month)
     
-    # Get calendar for current month
-    cal = calendar.monthcalendar(current_year, current_month)
-    
-    # Get appointment dates
-    appointment_dates = []
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if result:
-            user_id = result[0]
-            
-            cursor.execute("""
-                SELECT date FROM appointments 
-                WHERE user_id = ? AND status != 'Cancelled'
-            """, (user_id,))
-            
-            for row in cursor.fetchall():
-                try:
-                    date_str = row[0]
-                    date = datetime.strptime(date_str, "%d-%m-%Y")
-                    if date.month == current_month and date.year == current_year:
-                        appointment_dates.append(date.day)
-                except:
-                    continue
-        
-        conn.close()
-    except Exception as e:
-        print(f"Error getting appointment dates: {e}")
-    
-    # Today's date
-    today = now.day if now.month == current_month and now.year == current_year else -1
-    
-    # Create calendar cells
-    for week in cal:
-        week_frame = ttk.Frame(cal_grid_frame)
-        week_frame.pack(fill="x", expand=True)
-        
-        for day in week:
-            # Create day frame
-            day_frame = ttk.Frame(week_frame, width=30, height=30)
-            day_frame.pack_propagate(False)
-            day_frame.pack(side="left", expand=True, fill="both", padx=1, pady=1)
-            
-            if day == 0:
-                # Empty cell for days not in this month
-                continue
-            
-            # Determine style based on whether it's today or has appointments
-            if day == today:
-                # Today's date
-                bg_color = COLORS["primary"]
-                fg_color = COLORS["background"]
-                font_config = FONTS["body_bold"]
-            elif day in appointment_dates:
-                # Day with appointments
-                bg_color = COLORS["primary_light"]
-                fg_color = COLORS["background"]
-                font_config = FONTS["body"]
-            else:
-                # Regular day
-                bg_color = COLORS["background"]
-                fg_color = COLORS["text"]
-                font_config = FONTS["body"]
-            
-            # Create custom label since ttk.Label doesn't support background easily
-            day_label = tk.Label(
-                day_frame, 
-                text=str(day),
-                bg=bg_color,
-                fg=fg_color,
-                font=font_config
-            )
-            day_label.pack(fill="both", expand=True)
+    month_view.show(month_view.year, month_view.month)
     
     return cal_frame
 
@@ -267,11 +150,12 @@ def create_dashboard_tab(parent, username):
     dash_frame = ttk.Frame(parent)
     dash_frame.pack(fill="both", expand=True, padx=20, pady=20)
     
-    # Get user's full name
-    user_fullname = get_user_info(username) or username
-    
-    # Get dashboard data
-    data = get_dashboard_data(username)
+    with startup_profile.phase("first dashboard query", "query", once=True):
+        # Get user's full name
+        user_fullname = get_user_info(username) or username
+        
+        # Get dashboard data
+        data = get_dashboard_data(username)
     
     # Welcome header
     greeting = get_greeting()
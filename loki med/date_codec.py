@@ -0,0 +1,78 @@
+"""
+Date codec for the Medical Assistant application.
+Converts between the dd-mm-YYYY dates shown in the UI and the ISO-8601
+date_iso columns that queries filter and sort on.
+"""
+
+from datetime import datetime, date as date_type
+
+# Format shown to the user and kept in the legacy date columns
+DISPLAY_DATE_FORMAT = "%d-%m-%Y"
+
+# Sortable format stored in the date_iso columns
+ISO_DATE_FORMAT = "%Y-%m-%d"
+
+# Formats found in existing rows and produced by the widgets
+# (tkcalendar with locale en_US returns m/d/yy), tried in order
+INPUT_DATE_FORMATS = (
+    DISPLAY_DATE_FORMAT,
+    ISO_DATE_FORMAT,
+    "%m/%d/%y",
+    "%m/%d/%Y",
+)
+
+def parse_date(value):
+    """Return a date for any supported date text (or date), or None"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    
+    text = str(value).strip()
+    for date_format in INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def to_iso(value):
+    """Return the YYYY-MM-DD form of a date, or None if it cannot be parsed"""
+    parsed = parse_date(value)
+    return parsed.strftime(ISO_DATE_FORMAT) if parsed else None
+
+def to_display(value):
+    """Return the dd-mm-YYYY form of a date; unparseable text is returned as is"""
+    parsed = parse_date(value)
+    return parsed.strftime(DISPLAY_DATE_FORMAT) if parsed else value
+
+def today_iso():
+    """Today's date in ISO form"""
+    return datetime.now().strftime(ISO_DATE_FORMAT)
+
+def normalize_time(value):
+    """Return a zero-padded HH:MM time so times compare correctly, or None"""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), "%H:%M").strftime("%H:%M")
+    except ValueError:
+        return None
+
+def encode_date(value):
+    """
+    Encode a date for writing.
+    
+    Returns (display_date, iso_date), or (None, None) if the text is not
+    a recognisable date.
+    """
+    parsed = parse_date(value)
+    if parsed is None:
+        return None, None
+    return parsed.strftime(DISPLAY_DATE_FORMAT), parsed.strftime(ISO_DATE_FORMAT)
+
+def to_epoch(iso_date, time_str="00:00"):
+    """Seconds since the epoch (local time) for an ISO date and HH:MM time"""
+    return int(datetime.strptime(f"{iso_date} {time_str}", f"{ISO_DATE_FORMAT} %H:%M").timestamp())
@@ -5,28 +5,448 @@ Central module for database initialization and management.
 
 import os
 import json
+import atexit
 import sqlite3
+import threading
+from time import monotonic
 from datetime import datetime
+from collections import namedtuple
 
 # Database file paths
 DB_FOLDER = "database"
 SQLITE_DB = os.path.join(DB_FOLDER, "medical_assistant.db")
 
+# Folders the application keeps its files in, relative to the working directory
+APP_DIRECTORIES = (
+    "database",
+    "preferences",
+    "appointments",
+    "medical_records",
+    "emergency",
+    "notifications",
+    "carts",
+    "reminders",
+    "calls",
+)
+
+# Connection settings applied to every cached connection.
+# cache_size follows SQLite: negative values are KiB, positive ones pages.
+StorageProfile = namedtuple(
+    "StorageProfile",
+    "journal_mode synchronous cache_size mmap_size busy_timeout wal_autocheckpoint"
+)
+
+STORAGE_PROFILES = {
+    # SQLite defaults: rollback journal, readers and writers block each other
+    "legacy": StorageProfile("DELETE", "FULL", -2000, 0, 5000, 1000),
+    # One user on a laptop or desktop: WAL lets the tabs read while the
+    # reminder and sensor threads write
+    "desktop": StorageProfile("WAL", "NORMAL", -8000, 64 * 1024 * 1024, 5000, 2000),
+    # Shared terminal that may lose power: every commit is synced to disk
+    "kiosk": StorageProfile("WAL", "FULL", -4000, 0, 10000, 1000),
+    # Many users and the reminder service: bigger cache and map, longer waits
+    "server": StorageProfile("WAL", "NORMAL", -64000, 256 * 1024 * 1024, 15000, 4000),
+}
+
+DEFAULT_STORAGE_PROFILE = "desktop"
+
+class _ThreadSlot:
+    """The cached connection of one thread and how many checkouts hold it"""
+    
+    def __init__(self, conn, thread, hooks):
+        self.conn = conn
+        self.thread = thread
+        self.depth = 0
+        # Connect hooks that still have to run on this connection
+        self.pending_hooks = list(hooks)
+        # Callbacks waiting for the open transaction to commit
+        self.after_commit = []
+        # A nested checkout committed; the outermost one finishes the commit
+        self.commit_pending = False
+
+class PooledConnection:
+    """
+    A checkout of a thread's cached connection.
+    
+    Behaves like sqlite3.Connection, but close() hands the connection back
+    to the manager instead of closing it. Used as a context manager it
+    commits on success, rolls back on error and then releases the checkout.
+    """
+    
+    def __init__(self, manager, slot, row_factory=None):
+        self._manager = manager
+        self._slot = slot
+        self._cursors = []
+        self.row_factory = row_factory
+        self.closed = False
+    
+    def cursor(self):
+        """Create a cursor that uses this checkout's row factory"""
+        if self.closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        factory = self._manager.cursor_factory
+        cursor = self._slot.conn.cursor(factory) if factory else self._slot.conn.cursor()
+        cursor.row_factory = self.row_factory
+        self._cursors.append(cursor)
+        return cursor
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+    
+    def commit(self):
+        slot = self._slot
+        if slot.depth > 1 and slot.conn.in_transaction:
+            # Part of an outer checkout's transaction, committed with it
+            slot.commit_pending = True
+            return
+        self._manager._commit(slot)
+    
+    def rollback(self):
+        self._slot.conn.rollback()
+        self._slot.commit_pending = False
+        self._slot.after_commit = []
+    
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # Everything else (total_changes, in_transaction, create_function, ...)
+        # comes straight from the underlying connection
+        return getattr(self._slot.conn, name)
+    
+    def close(self):
+        """Release the checkout; the connection itself stays cached"""
+        if self.closed:
+            return
+        self.closed = True
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except sqlite3.Error:
+                pass
+        self._cursors = []
+        self._manager.release(self._slot)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+        return False
+    
+    def __del__(self):
+        # Callers that forget close() on an error path must not pin the slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class ConnectionManager:
+    """
+    Per-thread cache of SQLite connections.
+    
+    Each thread (the Tk main thread, reminder and sensor workers) gets one
+    long-lived connection which is handed out again on every checkout, so
+    a tab refresh no longer pays connect and teardown costs per query.
+    Nested checkouts on the same thread share the connection and its
+    transaction: a nested commit is carried out by the outermost checkout,
+    when it commits or is released, so the commit callbacks run once the
+    whole transaction is durable. Other uncommitted work is rolled back
+    when the outermost checkout is released, just like closing a private
+    connection would.
+    """
+    
+    def __init__(self, db_path, timeout=5.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._hooks = []
+        # sqlite3.Cursor subclass used for new cursors (set by sql_trace)
+        self.cursor_factory = None
+        self.storage_profile = None
+        # monotonic() of the latest checkout or release, for idle detection
+        self.last_activity = monotonic()
+    
+    def add_connect_hook(self, hook):
+        """
+        Run hook(conn) on every cached connection.
+        
+        Hooks run in the owning thread at its next checkout. A hook that
+        raises sqlite3.Error (e.g. because its table does not exist yet on
+        a fresh database) is retried at the following checkout.
+        """
+        with self._lock:
+            self._hooks.append(hook)
+            for slot in self._slots.values():
+                slot.pending_hooks.append(hook)
+    
+    def set_storage_profile(self, profile):
+        """Apply a StorageProfile to every connection, open or opened later"""
+        hook = self._apply_storage_profile
+        with self._lock:
+            self.storage_profile = profile
+            if hook not in self._hooks:
+                self._hooks.append(hook)
+            for slot in self._slots.values():
+                if hook not in slot.pending_hooks:
+                    slot.pending_hooks.append(hook)
+    
+    def _apply_storage_profile(self, conn):
+        profile = self.storage_profile
+        if profile is None:
+            return
+        # Changing the journal mode fails inside a transaction or while another
+        # connection holds a lock; the sqlite3.Error retries at the next checkout
+        conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout)}")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(profile.wal_autocheckpoint)}")
+    
+    def call_after_commit(self, fn):
+        """
+        Run fn() once the calling thread's open transaction commits.
+        
+        Meant for the SQL callbacks of triggers, which run before the change
+        is visible to other connections. Outside a transaction fn runs at
+        once; a rollback drops it. Queuing the same fn twice runs it once.
+        """
+        slot = getattr(self._local, "slot", None)
+        if slot is None or not slot.conn.in_transaction:
+            fn()
+        elif fn not in slot.after_commit:
+            slot.after_commit.append(fn)
+    
+    def _commit(self, slot):
+        """Commit the slot's transaction and run its commit callbacks"""
+        slot.commit_pending = False
+        slot.conn.commit()
+        if slot.after_commit:
+            self._run_after_commit(slot)
+    
+    def _run_after_commit(self, slot):
+        callbacks, slot.after_commit = slot.after_commit, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                print(f"Error running commit callback {fn.__name__}: {e}")
+    
+    def is_idle(self, seconds):
+        """Whether no connection was checked out or released for the given time"""
+        return monotonic() - self.last_activity >= seconds
+    
+    def _run_pending_hooks(self, slot):
+        """Run the connect hooks this connection has not seen yet"""
+        pending, slot.pending_hooks = slot.pending_hooks, []
+        for hook in pending:
+            try:
+                hook(slot.conn)
+            except sqlite3.Error:
+                slot.pending_hooks.append(hook)
+            except Exception as e:
+                print(f"Error running connection hook {hook.__name__}: {e}")
+    
+    def _open(self):
+        """Open the calling thread's connection"""
+        # check_same_thread is off so close_all() can close connections of
+        # other threads at shutdown; each connection is still only used by
+        # the thread that owns its slot
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        thread = threading.current_thread()
+        
+        with self._lock:
+            slot = _ThreadSlot(conn, thread, self._hooks)
+            # Drop connections left behind by threads that have finished
+            for ident, old_slot in list(self._slots.items()):
+                if not old_slot.thread.is_alive():
+                    old_slot.conn.close()
+                    del self._slots[ident]
+            self._slots[thread.ident] = slot
+        
+        self._local.slot = slot
+        return slot
+    
+    def acquire(self, row_factory=None):
+        """Check out the calling thread's connection"""
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = self._open()
+        if slot.pending_hooks:
+            self._run_pending_hooks(slot)
+        slot.depth += 1
+        self.last_activity = monotonic()
+        return PooledConnection(self, slot, row_factory)
+    
+    def release(self, slot):
+        """Return a checkout; the last one commits what nested checkouts committed, or rolls back"""
+        slot.depth = max(slot.depth - 1, 0)
+        self.last_activity = monotonic()
+        if slot.depth > 0:
+            return
+        if slot.commit_pending and slot.conn.in_transaction:
+            try:
+                self._commit(slot)
+                return
+            except sqlite3.Error as e:
+                print(f"Error committing nested transaction: {e}")
+        slot.commit_pending = False
+        if slot.conn.in_transaction:
+            slot.after_commit = []
+            try:
+                slot.conn.rollback()
+            except sqlite3.Error:
+                pass
+    
+    def close_thread_connection(self):
+        """Close the calling thread's cached connection, if any"""
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            return
+        self._local.slot = None
+        with self._lock:
+            self._slots.pop(slot.thread.ident, None)
+        slot.conn.close()
+    
+    def close_all(self):
+        """Close every cached connection (used at shutdown)"""
+        with self._lock:
+            slots = list(self._slots.values())
+            self._slots.clear()
+        for slot in slots:
+            try:
+                slot.conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+    
+    def set_database_path(self, db_path):
+        """Point the manager at another database file"""
+        self.close_all()
+        self.db_path = db_path
+
+class CheckpointScheduler:
+    """
+    Checkpoints the write-ahead log in the background while the application is idle.
+    
+    SQLite's automatic checkpoint runs inside whichever commit crosses
+    wal_autocheckpoint pages, which can be a Tk callback. This thread copies
+    the WAL back into the database every interval seconds, but only once no
+    connection has been used for idle_time seconds. A PASSIVE checkpoint
+    never waits for readers; when the WAL has grown past truncate_pages and
+    was copied completely it is truncated to free the disk space.
+    """
+    
+    def __init__(self, manager, interval=30.0, idle_time=2.0, truncate_pages=4096):
+        self.manager = manager
+        self.interval = interval
+        self.idle_time = idle_time
+        self.truncate_pages = truncate_pages
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.checkpoints = 0
+        self.pages_checkpointed = 0
+        self.skipped_busy = 0
+    
+    def start(self):
+        """Start the scheduler thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="wal-checkpoint", daemon=True)
+                self._thread.start()
+    
+    def stop(self, wait=True):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        self._stop.set()
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+    
+    def _run(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            if not self.manager.is_idle(self.idle_time):
+                # Busy; look again shortly instead of waiting a full interval
+                self.skipped_busy += 1
+                delay = self.idle_time
+                continue
+            
+            try:
+                self.checkpoint()
+            except sqlite3.Error as e:
+                print(f"Error checkpointing the database: {e}")
+            delay = self.interval
+        
+        self.manager.close_thread_connection()
+    
+    def checkpoint(self, mode="PASSIVE"):
+        """Run one checkpoint; returns (busy, wal pages, pages checkpointed)"""
+        with self.manager.acquire() as conn:
+            busy, log_pages, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            # (0, -1, -1) means the database is not in WAL mode
+            if log_pages > 0:
+                self.checkpoints += 1
+                self.pages_checkpointed += checkpointed
+                
+                if mode == "PASSIVE" and not busy and checkpointed == log_pages \
+                        and log_pages >= self.truncate_pages:
+                    busy, log_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        return busy, log_pages, checkpointed
+
+# Process-wide connection manager
+connection_manager = ConnectionManager(SQLITE_DB)
+atexit.register(connection_manager.close_all)
+
+# Started by configure_storage() for WAL profiles; stopped before the
+# connections are closed at exit (atexit runs in reverse order)
+checkpoint_scheduler = CheckpointScheduler(connection_manager)
+atexit.register(checkpoint_scheduler.stop)
+
+def configure_storage(name=None):
+    """
+    Apply a named storage profile to every connection.
+    
+    The profile is name, else the MEDICAL_STORAGE_PROFILE environment
+    variable, else DEFAULT_STORAGE_PROFILE. WAL profiles also start the
+    checkpoint scheduler. Returns the name of the profile applied.
+    """
+    name = name or os.environ.get("MEDICAL_STORAGE_PROFILE") or DEFAULT_STORAGE_PROFILE
+    profile = STORAGE_PROFILES.get(name)
+    if profile is None:
+        print(f"Unknown storage profile {name}, using {DEFAULT_STORAGE_PROFILE}")
+        name = DEFAULT_STORAGE_PROFILE
+        profile = STORAGE_PROFILES[name]
+    
+    connection_manager.set_storage_profile(profile)
+    
+    if profile.journal_mode == "WAL":
+        checkpoint_scheduler.start()
+    else:
+        checkpoint_scheduler.stop()
+    return name
+
 def ensure_directories_exist():
     """Ensure all required directories exist"""
-    directories = [
-        "database",
-        "preferences",
-        "appointments",
-        "medical_records",
-        "emergency",
-        "notifications",
-        "carts",
-        "reminders",
-        "calls"
-    ]
-    
-    for directory in directories:
+    for directory in APP_DIRECTORIES:
         if not os.path.exists(directory):
             os.makedirs(directory)
             print(f"Created directory: {directory}")
@@ -38,154 +458,21 @@ def initialize_database():
         os.makedirs(DB_FOLDER)
         print(f"Created database directory: {DB_FOLDER}")
     
-    # Connect to the database (this will create it if it doesn't exist)
-    conn = sqlite3.connect(SQLITE_DB)
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        email TEXT,
-        phone TEXT,
-        full_name TEXT,
-        registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Create personal_info table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS personal_info (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        dob TEXT,
-        gender TEXT,
-        blood_group TEXT,
-        address TEXT,
-        city TEXT,
-        state TEXT,
-        zip_code TEXT,
-        country TEXT,
-        emergency_contact_name TEXT,
-        emergency_contact_relation TEXT,
-        emergency_contact_phone TEXT,
-        allergies TEXT,
-        chronic_illnesses TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Create appointments table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS appointments (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        date TEXT,
-        time TEXT,
-        doctor TEXT,
-        type TEXT,
-        notes TEXT,
-        reminder BOOLEAN,
-        status TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Create medications table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS medications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        price REAL,
-        description TEXT,
-        quantity INTEGER
-    )
-    """)
-    
-    # Create reminders table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS reminders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        medicine_id INTEGER,
-        dose TEXT,
-        date TEXT,
-        time TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (medicine_id) REFERENCES medications(id)
-    )
-    """)
-    
-    # Create medical_records table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS medical_records (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        file_name TEXT,
-        file_path TEXT,
-        record_type TEXT,
-        record_date TEXT,
-        provider TEXT,
-        description TEXT,
-        tags TEXT,
-        upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Create cart_items table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS cart_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        medicine_id INTEGER,
-        quantity INTEGER,
-        price REAL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (medicine_id) REFERENCES medications(id)
-    )
-    """)
-    
-    # Create health_readings table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS health_readings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        reading_type TEXT,
-        value TEXT,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        notes TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Create notifications table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS notifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        message TEXT,
-        is_read BOOLEAN DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    """)
-    
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
+    # The schema itself lives in migrations.py; this creates the file if needed
+    from migrations import migrate
+    migrate()
+
+def get_connection(row_factory=sqlite3.Row):
+    """Get a connection to the SQLite database (dictionary rows by default)"""
+    return connection_manager.acquire(row_factory)
 
-def get_connection():
-    """Get a connection to the SQLite database"""
-    conn = sqlite3.connect(SQLITE_DB)
-    # Enable dictionary results
-    conn.row_factory = sqlite3.Row
-    return conn
+def connect():
+    """Drop-in replacement for sqlite3.connect(SQLITE_DB) backed by the connection cache"""
+    return connection_manager.acquire()
+
+def close_all_connections():
+    """Close all cached database connections"""
+    connection_manager.close_all()
 
 def check_database():
     """Check if the database exists and is properly initialized"""
@@ -194,30 +481,13 @@ def check_database():
         initialize_database()
         return False
     
-    # Check if the database has the expected tables
+    # Apply any migrations this database has not seen yet
     try:
-        conn = sqlite3.connect(SQLITE_DB)
-        cursor = conn.cursor()
-        
-        # Get all table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        expected_tables = [
-            "users", "personal_info", "appointments", "medications", 
-            "reminders", "medical_records", "cart_items", "health_readings",
-            "notifications"
-        ]
-        
-        # Check if all expected tables exist
-        all_tables_exist = all(table in tables for table in expected_tables)
+        from migrations import migrate
+        applied = migrate()
         
-        conn.close()
-        
-        if not all_tables_exist:
-            print("Database schema incomplete, reinitializing...")
-            initialize_database()
-            return False
+        if applied:
+            print(f"Database schema upgraded ({len(applied)} migrations applied)")
         
         return True
     except Exception as e:
@@ -226,15 +496,10 @@ def check_database():
 
 def get_medications():
     """Get all medications from the database"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM medications")
-    
-    medications = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    # Imported here: the catalog module itself depends on this one
+    from medication_catalog import medication_catalog
     
-    return medications
+    return [medicine._asdict() for medicine in medication_catalog.list_all()]
 
 # Initialize functions
 if __name__ == "__main__":
@@ -249,7 +514,7 @@ if __name__ == "__main__":
 def populate_initial_data():
     """Populate the database with initial data"""
     # Add sample medications
-    conn = sqlite3.connect(SQLITE_DB)
+    conn = connect()
     cursor = conn.cursor()
     
     # Check if medications table is empty
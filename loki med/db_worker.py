@@ -0,0 +1,248 @@
+"""
+Background database worker for the Medical Assistant application.
+Runs tab queries on a dedicated thread so Tk callbacks never wait on SQLite,
+and hands the results back to the Tk thread through widget.after().
+"""
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+
+from db_manager import connection_manager
+
+# How often the Tk thread looks for finished work
+POLL_INTERVAL_MS = 15
+
+# Text shown in a list while its rows are being fetched
+LOADING_TEXT = "Loading…"
+
+# Treeview item id used for the loading / error row
+PLACEHOLDER_IID = "__placeholder__"
+
+class DatabaseWorker:
+    """
+    A single thread that executes submitted database calls in order.
+    
+    submit() returns a concurrent.futures.Future. The worker uses its own
+    cached connection from the connection manager, so a lock held by the
+    reminder thread or a slow disk only delays the future, not the window.
+    """
+    
+    def __init__(self, name="db-worker"):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the worker thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+    
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return a Future for its result"""
+        self.start()
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            future, fn, args, kwargs = item
+            # Skip work that was cancelled while it waited in the queue
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        
+        connection_manager.close_thread_connection()
+    
+    def shutdown(self, wait=True):
+        """Stop the worker after the queued work; pending futures are cancelled"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        
+        # Cancel what has not started yet
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            if wait:
+                thread.join()
+
+# Process-wide worker used by the tabs
+db_worker = DatabaseWorker()
+
+class LoadGroup:
+    """
+    The background loads started on behalf of one widget (usually a tab).
+    
+    cancel() drops every pending load: queued work never runs and results
+    of work already running are discarded. Cancelled loads are remembered
+    and started again by resume(), so a tab that was left mid-load fills
+    in when the user comes back to it.
+    """
+    
+    def __init__(self, widget):
+        self.widget = widget
+        self._pending = {}
+        self._interrupted = {}
+    
+    def run(self, key, fn, args=(), on_done=None, on_error=None):
+        """
+        Run fn(*args) on the worker and pass its result to on_done on the Tk thread.
+        
+        key names the load; starting a load with the key of one that is
+        still pending replaces it, so only the newest result is shown.
+        """
+        self._drop(key)
+        self._interrupted.pop(key, None)
+        
+        future = db_worker.submit(fn, *args)
+        self._pending[key] = (future, fn, args, on_done, on_error)
+        self._poll(key, future)
+        return future
+    
+    def _drop(self, key):
+        entry = self._pending.pop(key, None)
+        if entry:
+            entry[0].cancel()
+        return entry
+    
+    def _poll(self, key, future):
+        entry = self._pending.get(key)
+        if entry is None or entry[0] is not future:
+            # Cancelled or superseded; discard the result
+            return
+        
+        if not future.done():
+            try:
+                self.widget.after(POLL_INTERVAL_MS, lambda: self._poll(key, future))
+            except tk.TclError:
+                # The widget is gone
+                self._drop(key)
+            return
+        
+        del self._pending[key]
+        _, _, _, on_done, on_error = entry
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                print(f"Error in background load {key}: {e}")
+            return
+        
+        if on_done:
+            try:
+                on_done(result)
+            except tk.TclError:
+                # The widget was destroyed while the load was running
+                pass
+    
+    def cancel(self):
+        """Cancel every pending load of this group"""
+        for key in list(self._pending):
+            future, fn, args, on_done, on_error = self._drop(key)
+            self._interrupted[key] = (fn, args, on_done, on_error)
+    
+    def resume(self):
+        """Restart the loads interrupted by cancel()"""
+        interrupted, self._interrupted = self._interrupted, {}
+        for key, (fn, args, on_done, on_error) in interrupted.items():
+            self.run(key, fn, args, on_done, on_error)
+    
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+# Load groups by widget path
+_groups = {}
+
+def load_group(widget):
+    """Return the load group of a widget, creating it on first use"""
+    path = str(widget)
+    group = _groups.get(path)
+    if group is None:
+        group = LoadGroup(widget)
+        _groups[path] = group
+        
+        def forget(event):
+            # Drop the group and its pending loads with the widget
+            if str(event.widget) == path:
+                _groups.pop(path, None)
+                group.cancel()
+        
+        widget.bind("<Destroy>", forget, add="+")
+    return group
+
+def run_in_background(widget, key, fn, args=(), on_done=None, on_error=None):
+    """Run a database call off the Tk thread in the load group of widget"""
+    return load_group(widget).run(key, fn, args, on_done, on_error)
+
+def _groups_inside(container):
+    """Load groups whose widget is container or one of its descendants"""
+    path = str(container)
+    return [
+        group for group_path, group in list(_groups.items())
+        if group_path == path or group_path.startswith(path + ".")
+    ]
+
+def bind_tab_cancellation(notebook):
+    """
+    Cancel the loads of tabs the user leaves and resume those of the tab shown.
+    """
+    def on_tab_changed(event):
+        try:
+            selected = notebook.select()
+        except tk.TclError:
+            return
+        
+        for tab in notebook.tabs():
+            for group in _groups_inside(tab):
+                if tab == selected:
+                    group.resume()
+                else:
+                    group.cancel()
+    
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed, add="+")
+
+def show_tree_placeholder(tree, text=LOADING_TEXT):
+    """Replace the rows of a Treeview with a single placeholder row"""
+    tree.delete(*tree.get_children())
+    columns = tree["columns"]
+    values = [text] + [""] * (len(columns) - 1)
+    tree.insert("", "end", iid=PLACEHOLDER_IID, values=values)
+
+def clear_tree(tree):
+    """Remove every row of a Treeview (including the placeholder)"""
+    tree.delete(*tree.get_children())
+
+def tree_items(tree):
+    """Item ids of a Treeview's data rows, without the placeholder"""
+    return [item for item in tree.get_children() if item != PLACEHOLDER_IID]
+
+def shutdown_worker():
+    """Stop the background worker (used at shutdown)"""
+    db_worker.shutdown(wait=False)
@@ -5,14 +5,13 @@ This tab allows users to connect with doctors via Google Meet.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font
-import sqlite3
 import os
 import webbrowser
 from datetime import datetime
 import json
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from db_manager import connect
 
 # Doctor Google Meet links (would be in a database in a real app)
 DOCTOR_MEET_LINKS = {
@@ -213,7 +212,7 @@ def update_call_status(username, status):
 def get_doctors():
     """Get list of doctors from database or return default list"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         
         # Check if doctors table exists
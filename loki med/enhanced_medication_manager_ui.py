@@ -5,41 +5,24 @@ This module creates a comprehensive medication management UI with reminders func
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font
-import sqlite3
-import os
 from datetime import datetime, timedelta
 import time
 import threading
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
-
-def ensure_reminders_frequency_column():
-    """Check if the reminders table has a frequency column, and add it if it doesn't"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if the frequency column exists
-        cursor.execute("PRAGMA table_info(reminders)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if "frequency" not in columns:
-            # Add the frequency column
-            cursor.execute("ALTER TABLE reminders ADD COLUMN frequency TEXT DEFAULT 'Daily'")
-            print("Added frequency column to reminders table")
-            conn.commit()
-        
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error ensuring frequency column: {e}")
-        return False
+# Database access
+from repositories import medications_repo
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
+from db_worker import run_in_background, show_tree_placeholder, clear_tree
+from services import ServiceError, reminders as reminder_service
+from reminder_scheduler import watch_reminders
+from notification_dispatcher import NotificationDispatcher
+from startup import startup
 
 def create_medication_manager_tab(parent, username):
     """Create the medication manager tab with enhanced UI"""
-    # Ensure database has the required frequency column
-    ensure_reminders_frequency_column()
+    # Seed dosage details for the medication list (once per process)
+    startup.ensure("medicine_details")
     
     # Set up custom fonts
     custom_font = font.nametofont("TkDefaultFont").copy()
@@ -336,13 +319,7 @@ def update_current_datetime(datetime_label):
 def get_medications():
     """Get all medications from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name FROM medications ORDER BY name")
-        medications = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
+        medications = medication_catalog.names()
         if not medications:
             raise Exception("No medications found")
         return medications
@@ -395,39 +372,13 @@ def get_medication_details():
     
     # Try to get from database first
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if we have a custom medicine_details table
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='medicine_details'
-        """)
-        
-        if cursor.fetchone():
-            # Get all medicine details
-            cursor.execute("""
-                SELECT m.name, md.description, md.dosage_info, md.common_doses
-                FROM medications m
-                LEFT JOIN medicine_details md ON m.id = md.medicine_id
-            """)
-            
-            db_details = {}
-            for row in cursor.fetchall():
-                name, description, dosage, common_doses = row
-                if description and dosage:
-                    db_details[name] = {
-                        "description": description,
-                        "dosage": dosage,
-                        "common_doses": common_doses.split(",") if common_doses else []
-                    }
-            
-            # Merge with default details
-            if db_details:
-                for med in db_details:
-                    medicine_details[med] = db_details[med]
-        
-        conn.close()
+        for row in medications_repo.details():
+            if row.description and row.dosage:
+                medicine_details[row.name] = {
+                    "description": row.description,
+                    "dosage": row.dosage,
+                    "common_doses": row.common_doses.split(",") if row.common_doses else []
+                }
     except Exception as e:
         print(f"Error getting medicine details from database: {e}")
     
@@ -439,18 +390,9 @@ def load_medication_reminders(username, reminders_list):
         # Clear existing items
         reminders_list.delete(0, tk.END)
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # First check if the frequency column exists in the reminders table
-        cursor.execute("PRAGMA table_info(reminders)")
-        columns = [column[1] for column in cursor.fetchall()]
-        has_frequency_column = "frequency" in columns
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
+        try:
+            reminders = reminder_service.list_reminders(username)
+        except ServiceError:
             # If user not found, add sample data
             sample_reminders = [
                 "15-04-2025 08:00 - Paracetamol (500mg) - Daily",
@@ -464,55 +406,15 @@ def load_medication_reminders(username, reminders_list):
                 # Add alternating background colors
                 if i % 2 == 0:
                     reminders_list.itemconfig(i, bg="#f0f0f0")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
-        # Get reminders with medication names
-        if has_frequency_column:
-            # Use frequency if the column exists
-            cursor.execute("""
-                SELECT r.date, r.time, m.name, r.dose, r.frequency
-                FROM reminders r
-                JOIN medications m ON r.medicine_id = m.id
-                WHERE r.user_id = ?
-                ORDER BY r.date, r.time
-            """, (user_id,))
-            
-            reminders = cursor.fetchall()
-            conn.close()
-            
-            # Add reminders to list with alternating colors for readability
-            for i, reminder in enumerate(reminders):
-                date_str, time_str, medicine, dose, frequency = reminder
-                reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
-                reminders_list.insert(tk.END, reminder_text)
-                # Add alternating background colors
-                if i % 2 == 0:
-                    reminders_list.itemconfig(i, bg="#f0f0f0")
-        else:
-            # If frequency column doesn't exist, use a default frequency
-            cursor.execute("""
-                SELECT r.date, r.time, m.name, r.dose
-                FROM reminders r
-                JOIN medications m ON r.medicine_id = m.id
-                WHERE r.user_id = ?
-                ORDER BY r.date, r.time
-            """, (user_id,))
-            
-            reminders = cursor.fetchall()
-            conn.close()
-            
-            # Add reminders to list with alternating colors and default frequency
-            for i, reminder in enumerate(reminders):
-                date_str, time_str, medicine, dose = reminder
-                # Assume "Daily" as default frequency
-                reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - Daily"
-                reminders_list.insert(tk.END, reminder_text)
-                # Add alternating background colors
-                if i % 2 == 0:
-                    reminders_list.itemconfig(i, bg="#f0f0f0")
+        # Add reminders to list with alternating colors for readability
+        for i, reminder in enumerate(reminders):
+            reminder_text = f"{reminder.date} {reminder.time} - {reminder.medicine} ({reminder.dose}) - {reminder.frequency or 'Once only'}"
+            reminders_list.insert(tk.END, reminder_text)
+            # Add alternating background colors
+            if i % 2 == 0:
+                reminders_list.itemconfig(i, bg="#f0f0f0")
         
         # If no reminders found, add sample data
         if reminders_list.size() == 0:
@@ -574,32 +476,7 @@ def delete_selected_reminder(username, reminders_list):
         
         # Try to delete from database
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            result = cursor.fetchone()
-            
-            if result:
-                user_id = result[0]
-                
-                # Get medicine ID
-                cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-                med_result = cursor.fetchone()
-                
-                if med_result:
-                    medicine_id = med_result[0]
-                    
-                    # Delete reminder
-                    cursor.execute("""
-                        DELETE FROM reminders 
-                        WHERE user_id = ? AND medicine_id = ? AND date = ? AND time = ? AND dose = ?
-                    """, (user_id, medicine_id, date_str, time_str, dose))
-                    
-                    conn.commit()
-            
-            conn.close()
+            reminder_service.delete_reminder(username, medicine, date_str, time_str, dose)
         except Exception as e:
             print(f"Database error during deletion: {str(e)}")
         
@@ -625,94 +502,18 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
         medicine = medicine_var.get()
         dose = dose_var.get()
         
-        # Validate inputs
-        if not medicine or not dose or not date_str or not time_str or not frequency:
-            messagebox.showerror("Error", "Please fill in all fields")
-            return False
-        
-        # Validate date format (DD-MM-YYYY)
-        try:
-            reminder_date = datetime.strptime(date_str, "%d-%m-%Y")
-            if reminder_date < datetime.now() - timedelta(days=1):
-                if not messagebox.askyesno("Warning", "This date is in the past. Are you sure you want to continue?"):
-                    return False
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date format. Use DD-MM-YYYY")
-            return False
+        # Ask before saving a reminder for a date that has passed
+        if reminder_service.is_past_date(date_str):
+            if not messagebox.askyesno("Warning", "This date is in the past. Are you sure you want to continue?"):
+                return False
         
-        # Validate time format (HH:MM)
+        # Validates the fields and stores the date and time in display form
         try:
-            datetime.strptime(time_str, "%H:%M")
-        except ValueError:
-            messagebox.showerror("Error", "Invalid time format. Use HH:MM")
+            reminder = reminder_service.add_reminder(username, medicine, dose, date_str, time_str, frequency)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
-        
-        # Ensure frequency column exists
-        ensure_reminders_frequency_column()
-        
-        # Try to add to database
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            result = cursor.fetchone()
-            if not result:
-                messagebox.showerror("Error", "User not found in database")
-                conn.close()
-                
-                # Still add to list for demonstration
-                reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
-                reminders_list.insert(tk.END, reminder_text)
-                
-                # Update alternating colors
-                for i in range(reminders_list.size()):
-                    if i % 2 == 0:
-                        reminders_list.itemconfig(i, bg="#f0f0f0")
-                    else:
-                        reminders_list.itemconfig(i, bg="#ffffff")
-                
-                return False
-            
-            user_id = result[0]
-            
-            # Get medicine ID
-            cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-            result = cursor.fetchone()
-            if not result:
-                messagebox.showerror("Error", "Medicine not found in database")
-                conn.close()
-                
-                # Still add to list for demonstration
-                reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
-                reminders_list.insert(tk.END, reminder_text)
-                
-                # Update alternating colors
-                for i in range(reminders_list.size()):
-                    if i % 2 == 0:
-                        reminders_list.itemconfig(i, bg="#f0f0f0")
-                    else:
-                        reminders_list.itemconfig(i, bg="#ffffff")
-                
-                return False
-            
-            medicine_id = result[0]
-            
-            # Insert reminder with frequency column
-            cursor.execute(
-                """INSERT INTO reminders 
-                   (user_id, medicine_id, dose, date, time, frequency, created_at) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (user_id, medicine_id, dose, date_str, time_str, frequency, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Database error: {e}")
-            # Handle the case where database operations fail
-            # Still continue to add to the list for demonstration
+        date_str, time_str = reminder.date, reminder.time
         
         # Add to list display
         reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
@@ -739,173 +540,98 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
         return False
 
 def load_active_medications(username, active_tree):
-    """Load active medications into the treeview"""
-    try:
-        # Clear existing items
-        for item in active_tree.get_children():
-            active_tree.delete(item)
-        
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            # Add sample data
-            sample_data = [
-                ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-                ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-                ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-                ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-            ]
-            
-            for data in sample_data:
-                active_tree.insert("", "end", values=data)
-            
-            conn.close()
-            return
-        
-        user_id = result[0]
-        
-        # Get active medications
-        cursor.execute("""
-            SELECT m.name, r.dose, r.frequency, r.date, r.time
-            FROM reminders r
-            JOIN medications m ON r.medicine_id = m.id
-            WHERE r.user_id = ? AND (
-                r.date >= ? OR
-                (r.date = ? AND r.time >= ?)
-            )
-            ORDER BY r.date, r.time
-        """, (
-            user_id, 
-            datetime.now().strftime("%d-%m-%Y"),
-            datetime.now().strftime("%d-%m-%Y"),
-            datetime.now().strftime("%H:%M")
-        ))
+    """Load active medications into the treeview (fetched on the background worker)"""
+    sample_data = [
+        ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
+        ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
+        ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
+        ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
+    ]
+    
+    show_tree_placeholder(active_tree)
+    
+    def fetch():
+        try:
+            active = reminder_service.active_reminders(username)
+        except ServiceError:
+            # Unknown user
+            return []
         
         today = datetime.now().strftime("%d-%m-%Y")
         tomorrow = (datetime.now() + timedelta(days=1)).strftime("%d-%m-%Y")
         
-        for row in cursor.fetchall():
-            med_name, dose, frequency, date, time = row
-            
+        rows = []
+        for reminder in active:
             # Format the due date
-            if date == today:
-                due_text = f"Today, {time}"
-            elif date == tomorrow:
-                due_text = f"Tomorrow, {time}"
+            if reminder.date == today:
+                due_text = f"Today, {reminder.time}"
+            elif reminder.date == tomorrow:
+                due_text = f"Tomorrow, {reminder.time}"
             else:
-                due_text = f"{date}, {time}"
+                due_text = f"{reminder.date}, {reminder.time}"
             
-            active_tree.insert("", "end", values=(med_name, dose, frequency, due_text))
-        
-        conn.close()
+            rows.append((reminder.medicine, reminder.dose, reminder.frequency, due_text))
+        return rows
+    
+    def show(rows):
+        clear_tree(active_tree)
         
         # If no active medications, add sample data
-        if len(active_tree.get_children()) == 0:
-            sample_data = [
-                ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-                ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-                ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-                ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-            ]
-            
-            for data in sample_data:
-                active_tree.insert("", "end", values=data)
-        
-    except Exception as e:
+        for data in rows or sample_data:
+            active_tree.insert("", "end", values=data)
+    
+    def failed(e):
         print(f"Error loading active medications: {e}")
         # Add sample data on error
-        sample_data = [
-            ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-            ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-            ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-            ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-        ]
-        
-        for data in sample_data:
-            active_tree.insert("", "end", values=data)
+        show(sample_data)
+    
+    return run_in_background(active_tree, "active_medications", fetch, on_done=show, on_error=failed)
 
 def check_due_reminders(username, notification_text, parent=None):
-    """Check for due reminders and update notification text"""
+    """Show reminders in the notification field as the scheduler fires them"""
+    # The reminder shown as due soon, so a later one does not replace it
+    shown = {"due": None}
+    
+    def show(prefix, occurrence):
+        notification_text.config(state="normal")
+        notification_text.delete(0, tk.END)
+        notification_text.insert(0, f"{prefix}: {occurrence.medicine} ({occurrence.dose}) at {occurrence.time}")
+        notification_text.config(state="readonly")
+    
+    def due_soon(occurrence):
+        if shown["due"] is not None and datetime.now() < shown["due"] <= occurrence.due:
+            return
+        shown["due"] = occurrence.due
+        show("Due soon", occurrence)
+    
+    def show_popup(notification):
+        messagebox.showinfo(notification.title, notification.message, parent=parent)
+    
+    # Doses that fall due together are logged in one transaction and, if a
+    # parent window is provided, shown in one popup
+    dispatcher = NotificationDispatcher()
+    if parent:
+        dispatcher.add_channel("popup", show_popup)
+    
+    def due_now(occurrences):
+        shown["due"] = None
+        current = [occurrence for occurrence in occurrences if not occurrence.missed]
+        if current:
+            show("Due now", current[-1])
+        else:
+            show("Missed", occurrences[-1])
+        dispatcher.dispatch(occurrences)
+    
     try:
-        # Connect to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if result:
-            user_id = result[0]
-            
-            # Get current date and time
-            now = datetime.now()
-            current_date = now.strftime("%d-%m-%Y")
-            current_time = now.strftime("%H:%M")
-            
-            # Check for reminders due right now
-            cursor.execute("""
-                SELECT m.name, r.dose, r.time
-                FROM reminders r
-                JOIN medications m ON r.medicine_id = m.id
-                WHERE r.user_id = ? AND r.date = ? AND r.time = ?
-                ORDER BY r.time
-            """, (user_id, current_date, current_time))
-            
-            due_now = cursor.fetchone()
-            
-            if due_now:
-                med_name, dose, due_time = due_now
-                
-                # Show popup reminder if parent window is provided
-                if parent:
-                    messagebox.showinfo(
-                        "Medication Reminder", 
-                        f"Time to take {med_name} ({dose})",
-                        parent=parent
-                    )
-                
-                # Update notification text
-                notification_text.config(state="normal")
-                notification_text.delete(0, tk.END)
-                notification_text.insert(0, f"Due now: {med_name} ({dose}) at {due_time}")
-                notification_text.config(state="readonly")
-            else:
-                # Get due reminders within the next hour
-                next_hour = (now + timedelta(hours=1)).strftime("%H:%M")
-                
-                cursor.execute("""
-                    SELECT m.name, r.dose, r.time
-                    FROM reminders r
-                    JOIN medications m ON r.medicine_id = m.id
-                    WHERE r.user_id = ? AND r.date = ? AND r.time BETWEEN ? AND ?
-                    ORDER BY r.time
-                    LIMIT 1
-                """, (user_id, current_date, current_time, next_hour))
-                
-                upcoming = cursor.fetchone()
-                
-                if upcoming:
-                    med_name, dose, due_time = upcoming
-                    
-                    # Update notification
-                    notification_text.config(state="normal")
-                    notification_text.delete(0, tk.END)
-                    notification_text.insert(0, f"Due soon: {med_name} ({dose}) at {due_time}")
-                    notification_text.config(state="readonly")
-        
-        conn.close()
+        user_id = resolve_user_id(username)
+        if user_id is not None:
+            # Reminders within the next hour are announced as due soon; doses
+            # missed while the application was closed are reported once
+            watch_reminders(notification_text, user_id, due_soon, lead=timedelta(hours=1))
+            watch_reminders(notification_text, user_id, due_now, catch_up=True, batch=True)
         
     except Exception as e:
         print(f"Error checking reminders: {e}")
-    
-    # Schedule next check in 1 minute
-    notification_text.after(60 * 1000, lambda: check_due_reminders(username, notification_text, parent))
 
 def show_medication_history(parent, username):
     """Show medication history in a new window"""
@@ -1068,68 +794,32 @@ def show_medication_history(parent, username):
     y = parent.winfo_rooty() + (parent.winfo_height() // 2) - (height // 2)
     history_window.geometry(f"+{x}+{y}")
 
-def create_medicine_details_table():
-    """Create medicine_details table if it doesn't exist yet"""
+def populate_medicine_details():
+    """Fill the medicine_details table (created by migrations.py) if it is empty"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if the table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='medicine_details'
-        """)
-        
-        if not cursor.fetchone():
-            # Create the table
-            cursor.execute("""
-                CREATE TABLE medicine_details (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    medicine_id INTEGER,
-                    description TEXT,
-                    dosage_info TEXT,
-                    common_doses TEXT,
-                    contraindications TEXT,
-                    side_effects TEXT,
-                    FOREIGN KEY (medicine_id) REFERENCES medications(id)
-                )
-            """)
-            
+        if medications_repo.details_count() == 0:
             # Populate with some default data
             medicine_details = get_medication_details()
             
-            # Get medication IDs
-            cursor.execute("SELECT id, name FROM medications")
-            medicines = cursor.fetchall()
-            
-            for med_id, med_name in medicines:
-                if med_name in medicine_details:
-                    details = medicine_details[med_name]
-                    common_doses = ",".join(details.get("common_doses", []))
-                    
-                    cursor.execute("""
-                        INSERT INTO medicine_details 
-                        (medicine_id, description, dosage_info, common_doses)
-                        VALUES (?, ?, ?, ?)
-                    """, (
-                        med_id, 
-                        details.get("description", ""), 
+            rows = []
+            for medicine in medication_catalog.list_all():
+                if medicine.name in medicine_details:
+                    details = medicine_details[medicine.name]
+                    rows.append((
+                        medicine.id,
+                        details.get("description", ""),
                         details.get("dosage", ""),
-                        common_doses
+                        ",".join(details.get("common_doses", []))
                     ))
             
-            conn.commit()
-            print("Created and populated medicine_details table")
+            medications_repo.add_details_many(rows)
+            print("Populated medicine_details table")
         
-        conn.close()
         return True
     except Exception as e:
-        print(f"Error creating medicine_details table: {e}")
+        print(f"Error populating medicine_details table: {e}")
         return False
 
-# Run this when the module is imported
-create_medicine_details_table()
-
 # For standalone testing
 if __name__ == "__main__":
     root = tk.Tk()
@@ -5,11 +5,14 @@ This module provides a comprehensive medication reminder system with desktop not
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-import os
 import threading
-import time
-from datetime import datetime, timedelta
+
+from repositories import reminders_repo
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
+from reminder_scheduler import scheduler_for
+from notification_dispatcher import NotificationDispatcher, rate_limits_from_environment
+from notification_outbox import OutboxWorker, delivery_channels, outbox_for
 
 # Try to import platform-specific notification libraries
 try:
@@ -43,12 +46,14 @@ class CustomNotification:
     
     def show_notification(self, title, message, duration=10):
         """Show a notification window"""
-        # Create a new top-level window
+        # Create a new top-level window, taller for a grouped notification
+        height = 100 + 18 * message.count("\n")
         notif_window = tk.Toplevel(self.parent)
         notif_window.title("")
-        notif_window.geometry("300x100+{}+{}".format(
+        notif_window.geometry("300x{}+{}+{}".format(
+            height,
             notif_window.winfo_screenwidth() - 320,
-            notif_window.winfo_screenheight() - 120
+            notif_window.winfo_screenheight() - height - 20
         ))
         notif_window.attributes("-topmost", True)
         
@@ -102,19 +107,23 @@ class CustomNotification:
         
         return notif_window
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
-
 class MedicationReminderSystem:
     """Class to manage medication reminders and notifications"""
     
     def __init__(self, username, parent=None):
         self.username = username
-        self.reminder_thread = None
-        self.running = False
+        self.scheduler = None
+        self.subscription = None
         self.due_reminders_callback = None
         self.parent = parent
         
+        # One grouped notification per batch of due reminders, queued in the
+        # outbox on the channels the user's preferences allow and this
+        # session can deliver (email only with an SMTP server configured)
+        self.channels = delivery_channels(self._show_desktop_notification, self._notify_in_app)
+        self.dispatcher = NotificationDispatcher(outbox=outbox_for(self.channels))
+        self.worker = None
+        
         # Initialize platform-specific notification systems
         if WINDOWS_NOTIFICATIONS:
             self.toaster = ToastNotifier()
@@ -126,22 +135,35 @@ class MedicationReminderSystem:
         self.custom_notifier = CustomNotification(parent)
     
     def start_reminder_service(self, due_reminders_callback=None):
-        """Start the reminder service in a separate thread"""
+        """Subscribe to the user's reminder scheduler"""
         self.due_reminders_callback = due_reminders_callback
         
-        if self.reminder_thread and self.running:
+        if self.subscription:
             return
         
-        self.running = True
-        self.reminder_thread = threading.Thread(target=self._check_reminders, daemon=True)
-        self.reminder_thread.start()
+        user_id = resolve_user_id(self.username)
+        if user_id is None:
+            return False
+        
+        # The scheduler thread hands the dispatcher the reminders of each minute
+        # together, and the doses missed while the application was closed or asleep
+        self.scheduler = scheduler_for(user_id)
+        self.subscription = self.scheduler.subscribe(self.dispatcher.dispatch, batch=True, catch_up=True)
+        
+        # This session delivers its user's outbox rows
+        self.worker = OutboxWorker(self.channels, user_id=user_id, rate_limits=rate_limits_from_environment()).start()
         
         return True
     
     def stop_reminder_service(self):
         """Stop the reminder service"""
-        self.running = False
-        self.reminder_thread = None
+        if self.subscription:
+            self.scheduler.unsubscribe(self.subscription)
+        self.subscription = None
+        
+        if self.worker:
+            self.worker.stop(wait=False)
+        self.worker = None
     
     def _show_desktop_notification(self, title, message):
         """Show a platform-specific desktop notification"""
@@ -190,78 +212,23 @@ class MedicationReminderSystem:
             
             return False
     
-    def _log_notification(self, user_id, medicine_name, dose, time):
-        """Log the notification to the database"""
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            # Insert into notifications table
-            cursor.execute(
-                """INSERT INTO notifications 
-                   (user_id, message, is_read, created_at) 
-                   VALUES (?, ?, ?, ?)""",
-                (
-                    user_id,
-                    f"Reminder: Take {medicine_name} ({dose}) at {time}",
-                    0,  # Not read
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                )
-            )
-            
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            print(f"Error logging notification: {e}")
-            return False
-    
     def add_reminder(self, medicine_name, dose, date_str, time_str, frequency="Once only"):
         """Add a new medication reminder"""
         try:
-            # Connect to database
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (self.username,))
-            result = cursor.fetchone()
+            user_id = resolve_user_id(self.username)
             
-            if not result:
-                conn.close()
+            if user_id is None:
                 return False
                 
-            user_id = result[0]
-            
             # Get medicine ID
-            cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine_name,))
-            result = cursor.fetchone()
+            medicine_id = medication_catalog.id_for_name(medicine_name)
             
-            if not result:
-                conn.close()
+            if medicine_id is None:
                 return False
-                
-            medicine_id = result[0]
-            
-            # Add reminder
-            cursor.execute(
-                """INSERT INTO reminders 
-                   (user_id, medicine_id, dose, date, time, frequency, created_at) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    user_id,
-                    medicine_id,
-                    dose,
-                    date_str,
-                    time_str,
-                    frequency,
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                )
-            )
             
-            conn.commit()
-            conn.close()
+            # Add reminder (an invalid date or time raises ValueError)
+            reminders_repo.add(user_id, medicine_id, dose, date_str, time_str, frequency)
             
             return True
             
@@ -272,97 +239,20 @@ class MedicationReminderSystem:
     def get_reminders(self):
         """Get all reminders for the current user"""
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (self.username,))
-            result = cursor.fetchone()
+            user_id = resolve_user_id(self.username)
             
-            if not result:
-                conn.close()
+            if user_id is None:
                 return []
                 
-            user_id = result[0]
-            
             # Get reminders
-            cursor.execute("""
-                SELECT r.id, m.name, r.dose, r.date, r.time, r.frequency
-                FROM reminders r
-                JOIN medications m ON r.medicine_id = m.id
-                WHERE r.user_id = ?
-                ORDER BY r.date, r.time
-            """, (user_id,))
-            
-            reminders = cursor.fetchall()
-            conn.close()
-            
-            return reminders
+            return reminders_repo.list_for_user(user_id)
             
         except Exception as e:
             print(f"Error getting reminders: {e}")
             return []
     
-    def _check_reminders(self):
-        """Check for due reminders periodically"""
-        while self.running:
-            try:
-                # Get current date and time
-                now = datetime.now()
-                current_date = now.strftime("%d-%m-%Y")
-                current_time = now.strftime("%H:%M")
-                
-                # Check for reminders due in the next minute
-                next_minute = (now + timedelta(minutes=1)).strftime("%H:%M")
-                
-                # Get user ID and due reminders
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                
-                # Get user ID
-                cursor.execute("SELECT id FROM users WHERE username = ?", (self.username,))
-                result = cursor.fetchone()
-                
-                if not result:
-                    # Sleep for 60 seconds before next check if user not found
-                    conn.close()
-                    time.sleep(60)
-                    continue
-                
-                user_id = result[0]
-                
-                # Check for any reminders due in the next minute
-                cursor.execute("""
-                    SELECT r.id, m.name, r.dose, r.time
-                    FROM reminders r
-                    JOIN medications m ON r.medicine_id = m.id
-                    WHERE r.user_id = ? AND r.date = ? AND r.time BETWEEN ? AND ?
-                """, (user_id, current_date, current_time, next_minute))
-                
-                due_reminders = cursor.fetchall()
-                conn.close()
-                
-                # Process due reminders
-                for reminder in due_reminders:
-                    reminder_id, medicine_name, dose, reminder_time = reminder
-                    
-                    # Create notification message
-                    message = f"Time to take {medicine_name} ({dose})"
-                    
-                    # Show desktop notification based on platform
-                    self._show_desktop_notification("Medication Reminder", message)
-                    
-                    # Show in-app notification if callback is set
-                    if self.due_reminders_callback:
-                        self.due_reminders_callback(message)
-                    
-                    # Log the notification
-                    self._log_notification(user_id, medicine_name, dose, reminder_time)
-                
-                # Sleep for 30 seconds before the next check
-                time.sleep(30)
-                
-            except Exception as e:
-                print(f"Error checking reminders: {e}")
-                # Sleep for 60 seconds before next check if an error occurs
-                time.sleep(60)
\ No newline at end of file
+    def _notify_in_app(self, row):
+        """Pass a delivered in-app notification's text to the callback, if one is set"""
+        if self.due_reminders_callback:
+            self.due_reminders_callback(row.message)
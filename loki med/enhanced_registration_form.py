@@ -5,13 +5,11 @@ This module creates a registration form with scrollable content for the Medical
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
-import sqlite3
 import hashlib
 from datetime import datetime
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from db_manager import connect
 
 def hash_password(password):
     """Create a hash of the password using SHA-256"""
@@ -246,7 +244,7 @@ def show_register_window(parent, login_callback=None):
         
         try:
             # Connect to database
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             # Check if username exists
@@ -4,15 +4,20 @@ Health monitoring tab UI with improved controls
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font
-import sqlite3
-import os
 import threading
 import time
 import random
 from datetime import datetime
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from services import ServiceError, user_id_of, readings as reading_service
+
+# Pulse label colour of each reading status
+STATUS_COLORS = {
+    "Low": "#ffc107",     # Yellow
+    "Normal": "#28a745",  # Green
+    "High": "#dc3545",    # Red
+}
 
 def create_custom_card(parent, title=None, padding=10):
     """Create a custom card widget with a title"""
@@ -48,10 +53,16 @@ def create_custom_card(parent, title=None, padding=10):
     return content_frame
 
 class PulseSimulation:
-    """Class to manage pulse simulation state"""
-    def __init__(self):
+    """Class to manage pulse simulation state
+    
+    Simulated values are only shown; a real sensor feed passes record=True
+    to have its readings stored in the user's health readings.
+    """
+    def __init__(self, username=None, record=False):
         self.running = False
         self.thread = None
+        self.username = username
+        self.record = record
     
     def start(self, pulse_label, status_label, readings_text):
         """Start the pulse simulation"""
@@ -76,27 +87,28 @@ class PulseSimulation:
     def generate_readings(self, pulse_label, status_label, readings_text):
         """Generate simulated pulse readings"""
         try:
+            # Only recorded feeds are stored, through the batched writer
+            user_id = None
+            if self.record:
+                try:
+                    user_id = user_id_of(self.username)
+                except ServiceError:
+                    pass
+            
             while self.running:
                 # Generate a random pulse value between 60 and 100 with some variation
                 base_pulse = random.uniform(70, 85)
                 variation = random.uniform(-5, 5)
-                pulse_value = base_pulse + variation
+                pulse_value = round(base_pulse + variation, 1)
+                
+                if user_id is not None:
+                    reading_service.add_reading(user_id, pulse_value, "Sensor")
                 
                 # Update pulse display
                 pulse_label.config(text=f"{pulse_value:.1f} BPM")
                 
-                # Determine status and color based on pulse rate
-                if pulse_value < 60:
-                    status = "Low"
-                    color = "#ffc107"  # Yellow
-                elif pulse_value > 100:
-                    status = "High"
-                    color = "#dc3545"  # Red
-                else:
-                    status = "Normal"
-                    color = "#28a745"  # Green
-                
-                pulse_label.config(foreground=color)
+                status = reading_service.pulse_status(pulse_value)
+                pulse_label.config(foreground=STATUS_COLORS[status])
                 
                 # Update status label
                 status_label.config(text=f"Current status: {status}")
@@ -169,51 +181,18 @@ def end_pulse_sensor(simulator, pulse_label, status_label, readings_text, connec
 def add_manual_reading(username, pulse_value, notes, readings_text, pulse_label, status_label):
     """Add a manual pulse reading"""
     try:
-        # Validate pulse value
-        pulse = float(pulse_value)
-        if pulse <= 0:
-            messagebox.showerror("Error", "Please enter a positive pulse value")
-            return
-        
-        # Save to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return
-        
-        user_id = result[0]
-        
-        # Insert reading
-        cursor.execute(
-            "INSERT INTO health_readings (user_id, reading_type, value, notes) VALUES (?, ?, ?, ?)",
-            (user_id, "pulse", str(pulse), notes)
-        )
-        
-        conn.commit()
-        conn.close()
+        # Validated and queued for the batched writer
+        try:
+            pulse = reading_service.add_reading(username, pulse_value, notes)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
+            return False
         
         # Update display
         pulse_label.config(text=f"{pulse:.1f} BPM")
         
-        # Determine status and color based on pulse rate
-        if pulse < 60:
-            status = "Low"
-            color = "#ffc107"  # Yellow
-        elif pulse > 100:
-            status = "High"
-            color = "#dc3545"  # Red
-        else:
-            status = "Normal"
-            color = "#28a745"  # Green
-        
-        pulse_label.config(foreground=color)
+        status = reading_service.pulse_status(pulse)
+        pulse_label.config(foreground=STATUS_COLORS[status])
         status_label.config(text=f"Current status: {status}")
         
         # Add to readings log
@@ -226,9 +205,6 @@ def add_manual_reading(username, pulse_value, notes, readings_text, pulse_label,
         messagebox.showinfo("Success", "Manual reading added successfully")
         
         return True
-    except ValueError:
-        messagebox.showerror("Error", "Please enter a valid numeric value for pulse")
-        return False
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {str(e)}")
         return False
@@ -239,14 +215,10 @@ def load_pulse_history(username, readings_text):
         readings_text.config(state='normal')
         readings_text.delete('1.0', tk.END)
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
+        # Get readings, including those still queued for writing
+        try:
+            readings = reading_service.recent_readings(username, reading_service.PULSE, 50)
+        except ServiceError:
             # If user not found, add sample data
             sample_readings = [
                 "Pulse: 72.5 BPM - 09:15:30 - Morning reading",
@@ -258,23 +230,8 @@ def load_pulse_history(username, readings_text):
                 readings_text.insert(tk.END, f"{reading}\n")
             
             readings_text.config(state='disabled')
-            conn.close()
             return False
         
-        user_id = result[0]
-        
-        # Get readings
-        cursor.execute("""
-            SELECT value, timestamp, notes
-            FROM health_readings
-            WHERE user_id = ? AND reading_type = 'pulse'
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """, (user_id,))
-        
-        readings = cursor.fetchall()
-        conn.close()
-        
         # Add readings to text widget
         for reading in readings:
             value, timestamp, notes = reading
@@ -303,7 +260,7 @@ def load_pulse_history(username, readings_text):
 def create_health_monitoring_tab(parent, username):
     """Create the health monitoring tab"""
     # Create pulse simulator
-    pulse_simulator = PulseSimulation()
+    pulse_simulator = PulseSimulation(username)
     
     # Set up custom fonts
     custom_font = font.nametofont("TkDefaultFont").copy()
@@ -4,8 +4,6 @@ Health monitoring tab UI
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import sqlite3
-import os
 import threading
 import time
 import random
@@ -14,8 +12,10 @@ from datetime import datetime
 # Import UI components
 from widgets import create_custom_card
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import readings_repo
+from readings_writer import readings_writer, flush_readings
+from user_session import resolve_user_id
 
 def simulate_pulse_reading(pulse_label, readings_text):
     """Simulate pulse sensor readings for demonstration"""
@@ -70,29 +70,15 @@ def add_manual_reading(username, pulse_value, notes, readings_text, pulse_label)
             messagebox.showerror("Error", "Please enter a positive pulse value")
             return
         
-        # Save to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return
         
-        user_id = result[0]
-        
-        # Insert reading
-        cursor.execute(
-            "INSERT INTO health_readings (user_id, reading_type, value, notes) VALUES (?, ?, ?, ?)",
-            (user_id, "pulse", str(pulse), notes)
-        )
-        
-        conn.commit()
-        conn.close()
+        # Queue for the batched writer
+        readings_writer.add(user_id, "pulse", pulse, notes)
         
         # Update display
         pulse_label.config(text=f"{pulse:.1f} BPM")
@@ -130,30 +116,15 @@ def add_manual_reading(username, pulse_value, notes, readings_text, pulse_label)
 def load_pulse_history(username, readings_text):
     """Load pulse reading history from database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
-            conn.close()
+        if user_id is None:
             return
         
-        user_id = result[0]
-        
-        # Get readings
-        cursor.execute("""
-            SELECT value, timestamp, notes
-            FROM health_readings
-            WHERE user_id = ? AND reading_type = 'pulse'
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """, (user_id,))
-        
-        readings = cursor.fetchall()
-        conn.close()
+        # Get readings, including those still queued for writing
+        flush_readings()
+        readings = readings_repo.recent(user_id, "pulse", 50)
         
         # Clear text widget
         readings_text.configure(state='normal')
@@ -173,29 +144,15 @@ def load_pulse_history(username, readings_text):
 def calculate_pulse_statistics(username):
     """Calculate statistics for pulse readings"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
-            conn.close()
+        if user_id is None:
             return None
         
-        user_id = result[0]
-        
-        # Get readings
-        cursor.execute("""
-            SELECT value
-            FROM health_readings
-            WHERE user_id = ? AND reading_type = 'pulse'
-            ORDER BY timestamp DESC
-        """, (user_id,))
-        
-        readings = cursor.fetchall()
-        conn.close()
+        # Get readings, including those still queued for writing
+        flush_readings()
+        readings = readings_repo.values(user_id, "pulse")
         
         if not readings:
             return {
@@ -210,7 +167,7 @@ def calculate_pulse_statistics(username):
         values = []
         for reading in readings:
             try:
-                values.append(float(reading[0]))
+                values.append(float(reading))
             except (ValueError, TypeError):
                 pass
         
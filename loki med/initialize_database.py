@@ -8,6 +8,8 @@ import sqlite3
 from datetime import datetime, timedelta
 import hashlib
 
+from migrations import migrate, backfill_sortable_dates
+
 # Database path
 DB_FOLDER = "database"
 SQLITE_DB = os.path.join(DB_FOLDER, "medical_assistant.db")
@@ -50,139 +52,8 @@ def initialize_database():
     
     print("Creating tables...")
     
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        email TEXT,
-        phone TEXT,
-        full_name TEXT,
-        registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Create personal_info table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS personal_info (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        dob TEXT,
-        gender TEXT,
-        blood_group TEXT,
-        address TEXT,
-        city TEXT,
-        state TEXT,
-        zip_code TEXT,
-        country TEXT,
-        emergency_contact_name TEXT,
-        emergency_contact_relation TEXT,
-        emergency_contact_phone TEXT,
-        allergies TEXT,
-        chronic_illnesses TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
-    
-    # Create appointments table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS appointments (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        date TEXT,
-        time TEXT,
-        doctor TEXT,
-        type TEXT,
-        notes TEXT,
-        reminder BOOLEAN,
-        status TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
-    
-    # Create medications table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS medications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        price REAL,
-        description TEXT,
-        quantity INTEGER
-    )
-    ''')
-    
-    # Create reminders table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS reminders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        medicine_id INTEGER,
-        dose TEXT,
-        date TEXT,
-        time TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (medicine_id) REFERENCES medications(id)
-    )
-    ''')
-    
-    # Create medical_records table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS medical_records (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        file_name TEXT,
-        file_path TEXT,
-        record_type TEXT,
-        record_date TEXT,
-        provider TEXT,
-        description TEXT,
-        tags TEXT,
-        upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
-    
-    # Create cart_items table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS cart_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        medicine_id INTEGER,
-        quantity INTEGER,
-        price REAL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id),
-        FOREIGN KEY (medicine_id) REFERENCES medications(id)
-    )
-    ''')
-    
-    # Create health_readings table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS health_readings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        reading_type TEXT,
-        value TEXT,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        notes TEXT,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
-    
-    # Create notifications table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS notifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        message TEXT,
-        is_read BOOLEAN DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
+    # Tables and indexes are defined by the migration steps
+    migrate(conn)
     
     print("Tables created successfully")
     
@@ -335,8 +206,8 @@ def initialize_database():
                 
                 cursor.executemany(
                     """INSERT INTO reminders 
-                       (user_id, medicine_id, dose, date, time, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?)""",
+                       (user_id, medicine_id, dose, date, time, created_at, frequency)
+                       VALUES (?, ?, ?, ?, ?, ?, 'Once only')""",
                     reminders
                 )
                 
@@ -414,6 +285,9 @@ def initialize_database():
             
             print("Sample notifications added")
     
+    # Give the sample appointments and reminders their sortable dates
+    backfill_sortable_dates(conn)
+    
     # Commit changes and close
     conn.commit()
     conn.close()
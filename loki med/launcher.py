@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Launcher for the Medical Assistant application.
+The full environment check (dependencies, folders, database schema) runs
+only when the launch manifest is missing or stale. A warm start reads the
+manifest, compares a few file stats and goes straight to the UI without
+importing anything the UI does not import itself.
+
+    python launcher.py              start the application
+    python launcher.py --validate   run the full check even if the manifest is current
+    python launcher.py --check      run the full check and exit
+    python launcher.py --no-splash  start without the splash screen
+    python launcher.py --reminder-daemon
+                                    run the reminder daemon for every user, without the UI
+"""
+
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime
+
+# --profile-startup has to hook imports before the application modules load
+import startup_profile
+startup_profile.begin_from_argv()
+
+from db_manager import APP_DIRECTORIES, DB_FOLDER, SQLITE_DB
+from startup import startup
+
+# Folder of the application sources; the data folders are relative to it
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Written after every successful full check
+MANIFEST_PATH = os.path.join(DB_FOLDER, "launch_manifest.json")
+
+# Bump when the manifest layout or what it covers changes
+MANIFEST_VERSION = 1
+
+# (module, distribution) the UI cannot start without; distribution is None
+# for modules that ship with Python
+REQUIRED_MODULES = (
+    ("tkinter", None),
+    ("sqlite3", None),
+    ("PIL", "pillow"),
+)
+
+# The reminder daemon needs no UI modules
+DAEMON_REQUIRED_MODULES = (
+    ("sqlite3", None),
+)
+
+# Modules that enable extra features when installed
+OPTIONAL_MODULES = (
+    ("tkcalendar", "tkcalendar"),
+    ("win10toast", "win10toast"),
+    ("notify2", "notify2"),
+    ("pync", "pync"),
+)
+
+def _library_paths():
+    """
+    Modification times of the sys.path folders outside the application.
+    
+    Installing, upgrading or removing a package adds or removes entries
+    in its site-packages folder, which changes the folder's mtime.
+    """
+    paths = {}
+    for entry in sys.path:
+        folder = os.path.abspath(entry or os.curdir)
+        if folder == APP_DIR or folder in paths:
+            continue
+        try:
+            paths[folder] = os.stat(folder).st_mtime_ns
+        except OSError:
+            continue
+    return paths
+
+def _layout_hash():
+    """Hash of the data folders present and the size and mtime of every source file"""
+    digest = hashlib.sha1()
+    for directory in APP_DIRECTORIES:
+        digest.update(f"{directory}:{os.path.isdir(directory)}\n".encode())
+    
+    with os.scandir(APP_DIR) as entries:
+        sources = sorted(
+            (entry for entry in entries if entry.name.endswith(".py") and entry.is_file()),
+            key=lambda entry: entry.name
+        )
+    for entry in sources:
+        stat = entry.stat()
+        digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def _file_identity(path):
+    """[device, inode] of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_dev, stat.st_ino]
+
+def current_fingerprint():
+    """What a manifest has to match to skip the full check; file stats only"""
+    return {
+        "python": sys.version,
+        "executable": sys.executable,
+        "libraries": _library_paths(),
+        "layout": _layout_hash(),
+        # A deleted or replaced database file needs its schema checked again
+        "database": _file_identity(SQLITE_DB),
+    }
+
+def load_manifest(path=MANIFEST_PATH):
+    """The stored manifest, or None if there is none or it cannot be read"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest atomically, so a crash never leaves half of one"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, path)
+
+def manifest_is_current(manifest, required=REQUIRED_MODULES):
+    """True if the manifest was written by a full check of this exact environment"""
+    # A check made for the daemon did not look at the UI modules
+    versions = manifest.get("dependencies") or {}
+    return (
+        manifest.get("version") == MANIFEST_VERSION
+        and manifest.get("schema_version") == manifest.get("latest_schema_version")
+        and all(versions.get(module_name) for module_name, _ in required)
+        and manifest.get("fingerprint") == current_fingerprint()
+    )
+
+def _module_version(module_name, module, distribution):
+    if distribution:
+        from importlib import metadata
+        try:
+            return metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            return getattr(module, "__version__", "unknown")
+    if module_name == "tkinter":
+        return f"Tk {module.TkVersion}"
+    if module_name == "sqlite3":
+        return f"SQLite {module.sqlite_version}"
+    return getattr(module, "__version__", "unknown")
+
+def check_dependencies(required=REQUIRED_MODULES):
+    """
+    Import the required and optional modules.
+    
+    Returns (versions, missing): versions maps every module to its version
+    (None if it cannot be imported), missing lists the required
+    (module, distribution) pairs that cannot be imported.
+    """
+    from importlib import import_module
+    
+    versions = {}
+    missing = []
+    for module_name, distribution in required + OPTIONAL_MODULES:
+        try:
+            module = import_module(module_name)
+        except Exception:
+            # Platform notifiers fail with more than ImportError elsewhere
+            versions[module_name] = None
+            if (module_name, distribution) in required:
+                missing.append((module_name, distribution))
+            continue
+        versions[module_name] = _module_version(module_name, module, distribution)
+    return versions, missing
+
+def validate(required=REQUIRED_MODULES):
+    """
+    Full check: dependencies, folders and database schema.
+    
+    Writes and returns a new manifest, or returns None if the application
+    cannot start.
+    """
+    print("Checking dependencies...")
+    versions, missing = check_dependencies(required)
+    if missing:
+        print("The following required packages are missing:")
+        for module_name, distribution in missing:
+            if distribution:
+                print(f"  - {module_name} (pip install {distribution})")
+            else:
+                print(f"  - {module_name} (part of the Python installation)")
+        return None
+    
+    print("Checking folders and database...")
+    startup.run(["directories", "schema"])
+    
+    from migrations import LATEST_VERSION, get_schema_version
+    try:
+        schema_version = get_schema_version()
+    except Exception as e:
+        print(f"Error checking database: {e}")
+        return None
+    if schema_version != LATEST_VERSION:
+        print(f"Database schema is at version {schema_version}, expected {LATEST_VERSION}")
+        return None
+    
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "validated_at": datetime.now().isoformat(timespec="seconds"),
+        "dependencies": versions,
+        "schema_version": schema_version,
+        "latest_schema_version": LATEST_VERSION,
+        "fingerprint": current_fingerprint(),
+    }
+    try:
+        write_manifest(manifest)
+    except OSError as e:
+        # Not fatal; the next launch just checks again
+        print(f"Error writing launch manifest: {e}")
+    return manifest
+
+def launch(argv=None):
+    """Check the environment if needed and run the application; returns the exit status"""
+    argv = sys.argv[1:] if argv is None else argv
+    
+    # The data folders are relative to the sources, wherever we were started from
+    os.chdir(APP_DIR)
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    
+    daemon = "--reminder-daemon" in argv
+    required = DAEMON_REQUIRED_MODULES if daemon else REQUIRED_MODULES
+    
+    full_check = "--validate" in argv or "--check" in argv
+    with startup_profile.phase("manifest check", "launcher"):
+        manifest = None if full_check else load_manifest()
+        warm = manifest is not None and manifest_is_current(manifest, required)
+    
+    if warm:
+        # Folders and schema are known to be in place
+        startup.assume_done("directories", "schema")
+    else:
+        with startup_profile.phase("full check", "launcher"):
+            manifest = validate(required)
+        if manifest is None:
+            return 1
+    
+    if "--check" in argv:
+        print(f"Environment OK (schema version {manifest['schema_version']})")
+        return 0
+    
+    if daemon:
+        from reminder_daemon import run_daemon
+        return run_daemon()
+    
+    from main import main
+    main(show_splash="--no-splash" not in argv)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(launch())
@@ -0,0 +1,114 @@
+"""
+On-demand construction of notebook tabs.
+Each tab starts as an empty frame with a loading label; its widgets (and
+the database queries they run) are only built the first time the tab is
+selected, or while the application is idle if prebuilding is enabled.
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from db_worker import LOADING_TEXT
+
+# Delay after the first tab is shown before idle prebuilding starts
+PREBUILD_DELAY_MS = 500
+
+# Pause between two prebuilt tabs, so input events are handled in between
+PREBUILD_GAP_MS = 50
+
+class LazyTabs:
+    """
+    Tabs of a ttk.Notebook that are built on first use.
+    
+    add() registers a tab with a builder(frame) function. The selected tab
+    is built on <<NotebookTabChanged>>; prebuild() builds the remaining
+    ones one at a time from idle callbacks.
+    """
+    
+    def __init__(self, notebook):
+        self.notebook = notebook
+        # Tab widget path -> (title, builder, frame); removed once built
+        self._pending = {}
+        self._placeholders = {}
+        self._order = []
+        self._prebuilding = False
+        
+        # Seconds each tab took to build, by title
+        self.build_times = {}
+        
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+    
+    def add(self, title, builder):
+        """Add a tab whose contents builder(frame) creates on first use"""
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=title)
+        
+        placeholder = ttk.Label(frame, text=LOADING_TEXT)
+        placeholder.pack(expand=True)
+        
+        path = str(frame)
+        self._pending[path] = (title, builder, frame)
+        self._placeholders[path] = placeholder
+        self._order.append(path)
+        return frame
+    
+    def is_built(self, tab):
+        return str(tab) not in self._pending
+    
+    def build(self, tab):
+        """Build a tab now if it has not been built yet"""
+        path = str(tab)
+        entry = self._pending.pop(path, None)
+        if entry is None:
+            return False
+        
+        title, builder, frame = entry
+        self._placeholders.pop(path).destroy()
+        
+        start = time.perf_counter()
+        try:
+            builder(frame)
+        except Exception as e:
+            print(f"Error building tab {title}: {e}")
+        self.build_times[title] = time.perf_counter() - start
+        return True
+    
+    def build_selected(self):
+        """Build the tab that is currently shown"""
+        try:
+            selected = self.notebook.select()
+        except tk.TclError:
+            return False
+        return self.build(selected) if selected else False
+    
+    def _on_tab_changed(self, event):
+        self.build_selected()
+    
+    def prebuild(self, delay_ms=PREBUILD_DELAY_MS):
+        """Build the remaining tabs in the background once the window is idle"""
+        if self._prebuilding:
+            return
+        self._prebuilding = True
+        self.notebook.after(delay_ms, self._schedule_next)
+    
+    def _schedule_next(self):
+        if not self._pending:
+            self._prebuilding = False
+            return
+        try:
+            self.notebook.after_idle(self._prebuild_next)
+        except tk.TclError:
+            # The window was closed
+            self._prebuilding = False
+    
+    def _prebuild_next(self):
+        for path in self._order:
+            if path in self._pending:
+                self.build(path)
+                break
+        
+        try:
+            self.notebook.after(PREBUILD_GAP_MS, self._schedule_next)
+        except tk.TclError:
+            self._prebuilding = False
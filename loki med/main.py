@@ -4,20 +4,45 @@ Enhanced main.py file with AI assistant integration and medication tab.
 This is the main entry point for the Medical Assistant application.
 """
 
+# --profile-startup has to hook imports before the application modules load
+import startup_profile
+startup_profile.begin_from_argv()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
-from PIL import Image, ImageTk
 import time
+import importlib
+import threading
+from PIL import Image, ImageTk
 
-def show_splash_screen():
+# Shortest time the splash screen stays up, in seconds; 0 closes it as soon
+# as startup is done (MEDICAL_SPLASH_SECONDS)
+try:
+    SPLASH_MIN_SECONDS = max(float(os.environ.get("MEDICAL_SPLASH_SECONDS", "1.0")), 0.0)
+except ValueError:
+    SPLASH_MIN_SECONDS = 1.0
+
+# How often the splash screen shows the progress of the startup thread
+SPLASH_POLL_MS = 30
+
+def show_splash_screen(orchestrator, min_seconds=SPLASH_MIN_SECONDS):
     """
-    Shows a splash screen with the medical.jpg image for 3 seconds,
-    then destroys the window.
+    Shows a splash screen with the medical.jpg image while the startup
+    tasks run on a background thread, then destroys the window.
+    
+    The splash closes when the last task is done, but not before it has
+    been shown for min_seconds.
     """
     # Create splash window
-    root = tk.Tk()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        # No display; just do the work
+        print(f"Splash screen unavailable: {e}")
+        orchestrator.run()
+        return
     
     # Remove window decorations
     root.overrideredirect(True)
@@ -38,7 +63,7 @@ def show_splash_screen():
     photo = ImageTk.PhotoImage(img)
     
     # Calculate window size and position (centered)
-    width, height = 400, 450
+    width, height = 400, 490
     screen_width = root.winfo_screenwidth()
     screen_height = root.winfo_screenheight()
     x = (screen_width - width) // 2
@@ -60,14 +85,51 @@ def show_splash_screen():
     subtitle = tk.Label(frame, text="to Medical Care", font=("Arial", 18), fg="#29abe2", bg="white")
     subtitle.pack(pady=5)
     
-    # Update the window to make sure everything is displayed
-    root.update()
+    # Startup progress
+    progress = ttk.Progressbar(frame, maximum=1, length=300, mode="determinate")
+    progress.pack(pady=(10, 2))
+    
+    status = tk.Label(frame, text="Starting…", font=("Arial", 9), fg="#666666", bg="white")
+    status.pack()
+    
+    # Written by the startup thread, read by the Tk thread
+    state = {"finished": 0, "total": 1, "label": "Starting"}
+    
+    def report(finished, total, task):
+        state["finished"] = finished
+        state["total"] = max(total, 1)
+        state["label"] = task.description
+    
+    def work():
+        try:
+            orchestrator.run(report=report)
+        finally:
+            # The thread's cached connection would otherwise linger
+            connection_manager.close_thread_connection()
+    
+    worker = threading.Thread(target=work, name="startup", daemon=True)
+    shown_at = time.monotonic()
+    
+    def poll():
+        if worker.is_alive():
+            progress.config(maximum=state["total"], value=state["finished"])
+            status.config(text=f"{state['label']}…")
+            root.after(SPLASH_POLL_MS, poll)
+            return
+        
+        progress.config(maximum=1, value=1)
+        status.config(text="Ready")
+        
+        # Keep the splash up for the minimum time, if startup was quicker
+        remaining = min_seconds - (time.monotonic() - shown_at)
+        root.after(max(int(remaining * 1000), 0), root.destroy)
     
-    # Wait for 3 seconds
-    time.sleep(3)
+    worker.start()
+    root.after(SPLASH_POLL_MS, poll)
+    root.mainloop()
     
-    # Close the splash screen
-    root.destroy()
+    # The window may have been closed before startup finished
+    worker.join()
 
 
 # Add current directory to Python path
@@ -101,19 +163,38 @@ except ImportError:
         style.configure("Card.TFrame", relief="solid", borderwidth=1)
         return style
 
-from db_manager import check_database, ensure_directories_exist
+from db_manager import close_all_connections, connection_manager
+from db_worker import bind_tab_cancellation, shutdown_worker
+from readings_writer import readings_writer
+from reminder_scheduler import stop_schedulers
+from notification_outbox import stop_workers as stop_outbox_workers
+from enhanced_medication_reminder import MedicationReminderSystem
+from sql_trace import enable_from_environment as enable_sql_trace
 from user_auth import show_login_window
+from user_session import start_session, end_session
 
-# Import tabs
-try:
-    # Import the enhanced medication manager
-    from enhanced_medication_manager_ui import create_medication_manager_tab
-except ImportError:
-    print("Enhanced medication manager not found - will use fallback.")
-    try:
-        from medication_management_tab import create_medication_manager_tab
-    except ImportError:
-        print("Medication management tab not found - will use placeholder.")
+from lazy_tabs import LazyTabs
+from startup import startup
+
+# Main window tabs, in order: (title, [(module, builder function), ...]).
+# Modules are imported when their tab is first built; the first one that
+# imports is used, otherwise a placeholder is shown.
+MAIN_TABS = [
+    ("Dashboard", [("dashboard", "create_dashboard_tab")]),
+    ("Medication Management", [
+        ("enhanced_medication_manager_ui", "create_medication_manager_tab"),
+        ("medication_management_tab", "create_medication_manager_tab"),
+    ]),
+    ("Doctor Consultation", [("doctor_consultation_tab", "create_doctor_consultation_tab")]),
+    ("Purchase Medicine", [("purchase_medicine_tab", "create_purchase_medicine_tab")]),
+    ("Health Monitoring", [("health_monitoring_tab", "create_health_monitoring_tab")]),
+    ("Appointments", [("appointment_tab", "create_appointment_tab")]),
+    ("Medical Records", [("medical_records_tab", "create_medical_records_tab")]),
+]
+
+# Build the tabs that are not shown yet while the window is idle
+# (MEDICAL_PREBUILD_TABS=0 builds each tab only when it is first opened)
+PREBUILD_TABS = os.environ.get("MEDICAL_PREBUILD_TABS", "1").lower() not in ("0", "false", "no", "off")
 
 # Import the AI assistant if available
 try:
@@ -123,8 +204,11 @@ except ImportError:
     print("AI assistant module not found - AI features will be disabled.")
     has_ai_assistant = False
 
-def create_main_window(username):
+def create_main_window(username, user_id=None):
     """Create the main application window after successful login"""
+    window_ready = startup_profile.start_phase("main window", "window")
+    start_session(username, user_id)
+    
     root = tk.Tk()
     root.title("Medical Assistant")
     root.geometry("1000x700")
@@ -132,6 +216,11 @@ def create_main_window(username):
     # Setup styles
     setup_styles()
     
+    # Due reminders are queued in the outbox as grouped notifications, and
+    # this session delivers them until logout or exit
+    reminder_system = MedicationReminderSystem(username, root)
+    reminder_system.start_reminder_service()
+    
     # Create a header frame
     header_frame = ttk.Frame(root)
     header_frame.pack(fill="x", padx=0, pady=0)
@@ -187,6 +276,8 @@ def create_main_window(username):
     logout_button.pack(side="left")
     
     def logout(root):
+        reminder_system.stop_reminder_service()
+        end_session()
         root.destroy()
         show_login_window()
     
@@ -194,77 +285,20 @@ def create_main_window(username):
     main_frame = ttk.Frame(root)
     main_frame.pack(fill="both", expand=True, padx=15, pady=15)
     
-    # Create tabs
+    # Create tabs; each one is built when it is first shown
     tab_control = ttk.Notebook(main_frame)
+    lazy_tabs = LazyTabs(tab_control)
     
-    # Create dashboard tab
-    dashboard_tab = ttk.Frame(tab_control)
-    tab_control.add(dashboard_tab, text="Dashboard")
-    try:
-        from dashboard import create_dashboard_tab
-        create_dashboard_tab(dashboard_tab, username)
-    except ImportError:
-        # Create simple dashboard if dashboard module is not available
-        create_simple_dashboard(dashboard_tab, username)
-    
-    # Create medication management tab
-    medication_tab = ttk.Frame(tab_control)
-    tab_control.add(medication_tab, text="Medication Management")
-    
-    try:
-        create_medication_manager_tab(medication_tab, username)
-    except NameError:
-        # If the function import failed earlier, use a placeholder
-        create_placeholder_tab(medication_tab, "Medication Management")
-    
-    # Create doctor consultation tab
-    consultation_tab = ttk.Frame(tab_control)
-    tab_control.add(consultation_tab, text="Doctor Consultation")
-    try:
-        from doctor_consultation_tab import create_doctor_consultation_tab
-        create_doctor_consultation_tab(consultation_tab, username)
-    except ImportError:
-        create_placeholder_tab(consultation_tab, "Doctor Consultation")
-    
-    # Create purchase medicine tab
-    purchase_tab = ttk.Frame(tab_control)
-    tab_control.add(purchase_tab, text="Purchase Medicine")
-    try:
-        from purchase_medicine_tab import create_purchase_medicine_tab
-        create_purchase_medicine_tab(purchase_tab, username)
-    except ImportError:
-        create_placeholder_tab(purchase_tab, "Purchase Medicine")
-    
-    # Create health monitoring tab
-    health_tab = ttk.Frame(tab_control)
-    tab_control.add(health_tab, text="Health Monitoring")
-    try:
-        from health_monitoring_tab import create_health_monitoring_tab
-        create_health_monitoring_tab(health_tab, username)
-    except ImportError:
-        create_placeholder_tab(health_tab, "Health Monitoring")
-    
-    # Create appointments tab
-    appointment_tab = ttk.Frame(tab_control)
-    tab_control.add(appointment_tab, text="Appointments")
-    try:
-        from appointment_tab import create_appointment_tab
-        create_appointment_tab(appointment_tab, username)
-    except ImportError:
-        create_placeholder_tab(appointment_tab, "Appointments")
-    
-    # Create medical records tab
-    records_tab = ttk.Frame(tab_control)
-    tab_control.add(records_tab, text="Medical Records")
-    try:
-        from medical_records_tab import create_medical_records_tab
-        create_medical_records_tab(records_tab, username)
-    except ImportError:
-        create_placeholder_tab(records_tab, "Medical Records")
+    for title, candidates in MAIN_TABS:
+        lazy_tabs.add(title, lambda frame, title=title, candidates=candidates:
+                      build_tab(frame, title, candidates, username))
     
     # Pack the tab control
     tab_control.pack(expand=1, fill="both")
     
+    # Only the dashboard is built before the window appears
+    lazy_tabs.build_selected()
+    
     # Add AI button if available
     
     if has_ai_assistant:
@@ -316,13 +350,46 @@ def create_main_window(username):
         ai_frame.lift()
 
         # Make sure the button raises to the top after tab changes
-        tab_control.bind("<<NotebookTabChanged>>", lambda e: ai_frame.lift())
+        tab_control.bind("<<NotebookTabChanged>>", lambda e: ai_frame.lift(), add="+")
+    
+    # Cancel background loads of tabs the user leaves
+    bind_tab_cancellation(tab_control)
     
     # Center window on screen
     center_window(root)
     
+    if PREBUILD_TABS:
+        lazy_tabs.prebuild()
+    
+    # With --profile-startup, startup ends when the main window can take input
+    def main_window_ready():
+        window_ready()
+        startup_profile.finish()
+    startup_profile.when_idle(root, main_window_ready)
+    
     # Start the main loop
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        reminder_system.stop_reminder_service()
+
+def build_tab(frame, title, candidates, username):
+    """Fill a tab frame with the first builder that can be imported"""
+    for module_name, function_name in candidates:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            print(f"{module_name} not found - trying the next option for {title}.")
+            continue
+        with startup_profile.phase(f"{module_name}.{function_name}", "tab"):
+            getattr(module, function_name)(frame, username)
+        return
+    
+    if title == "Dashboard":
+        # Create simple dashboard if dashboard module is not available
+        create_simple_dashboard(frame, username)
+    else:
+        create_placeholder_tab(frame, title)
 
 def create_simple_dashboard(parent, username):
     """Create a simple dashboard for when the dashboard module is not available"""
@@ -442,21 +509,52 @@ def center_window(window):
     y = (window.winfo_screenheight() // 2) - (height // 2)
     window.geometry(f'{width}x{height}+{x}+{y}')
 
-def main():
+def import_tab_modules():
+    """Import the tab modules now, so opening a tab only costs building it"""
+    for title, candidates in MAIN_TABS:
+        for module_name, function_name in candidates:
+            try:
+                importlib.import_module(module_name)
+                break
+            except ImportError:
+                continue
+    
+    try:
+        importlib.import_module("settings_menu")
+    except ImportError:
+        pass
+
+# Tab modules are imported during startup; the database tasks live in startup.py.
+# user_auth imports this file again as "main" when it runs as __main__.
+if "modules" not in startup:
+    startup.add("modules", import_tab_modules, description="Loading modules")
+
+def main(show_splash=True):
     """Main application function"""
-    # Initialize database and directories
-    ensure_directories_exist()
-    db_initialized = check_database()
+    # Opt-in SQL tracing (MEDICAL_SQL_TRACE=1)
+    enable_sql_trace()
+    
+    # Startup tasks run while the splash screen shows their progress
+    with startup_profile.phase("splash", "startup"):
+        if show_splash:
+            show_splash_screen(startup)
+        else:
+            startup.run()
     
     # Start the login process
     show_login_window()
+    
+    # Write queued health readings, stop the reminder schedulers and the
+    # background worker and release cached database connections once the
+    # UI has exited
+    readings_writer.close()
+    stop_schedulers()
+    stop_outbox_workers()
+    shutdown_worker()
+    close_all_connections()
 
 if __name__ == "__main__":
-    # First show splash screen
-    show_splash_screen()
-    
-    # Then start your actual application
     print("Starting main application...")
     
-    # Call the main function instead of creating another login window
+    # The splash screen is shown by main() while startup work runs
     main()
\ No newline at end of file
@@ -5,85 +5,27 @@ This tab allows users to upload and manage their medical records.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
-import sqlite3
 import os
-import shutil
 from datetime import datetime
 import json
 
 # Import UI components
 from widgets import create_custom_card
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
-
-# Medical Records directory
-RECORDS_DIR = "medical_records"
+# Database access
+from services import ServiceError, records as record_service
+from db_worker import run_in_background, show_tree_placeholder, clear_tree, PLACEHOLDER_IID
 
 def add_medical_record(username, file_path, record_type, record_date, provider, description, tags, records_tree):
     """Add a new medical record to the database and file system"""
     try:
-        if not os.path.exists(file_path):
-            messagebox.showerror("Error", "File does not exist")
-            return False
-        
-        # Validate inputs
-        if not record_type or not record_date or not provider:
-            messagebox.showerror("Error", "Please fill in all required fields (Type, Date, Provider)")
-            return False
-        
-        # Get file details
-        file_name = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        
-        # Create user directory if it doesn't exist
-        user_dir = os.path.join(RECORDS_DIR, username)
-        if not os.path.exists(user_dir):
-            os.makedirs(user_dir)
-        
-        # Copy file to user directory
-        dest_path = os.path.join(user_dir, file_name)
-        shutil.copy2(file_path, dest_path)
-        
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
+        # Copies the file to the user's folder and stores its details
+        try:
+            record_service.add_record(username, file_path, record_type, record_date, provider, description, tags)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
-        user_id = result[0]
-        
-        # Convert tags list to comma-separated string
-        tags_str = tags if isinstance(tags, str) else ",".join(tags)
-        
-        # Insert record into database
-        cursor.execute(
-            """INSERT INTO medical_records 
-               (user_id, file_name, file_path, record_type, record_date, 
-                provider, description, tags, upload_date)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                user_id,
-                file_name,
-                dest_path,
-                record_type,
-                record_date,
-                provider,
-                description,
-                tags_str,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            )
-        )
-        
-        conn.commit()
-        conn.close()
-        
         # Refresh the records list
         load_medical_records(username, records_tree)
         
@@ -106,55 +48,12 @@ def delete_medical_record(username, record_id, records_tree):
         if not confirm:
             return False
         
-        # Get user ID and file details from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Get file path before deleting record
-        cursor.execute(
-            "SELECT file_path FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        result = cursor.fetchone()
-        if not result:
-            messagebox.showerror("Error", "Record not found or not owned by current user")
-            conn.close()
-            return False
-        
-        file_path = result[0]
-        
-        # Delete record from database
-        cursor.execute(
-            "DELETE FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        if cursor.rowcount == 0:
-            messagebox.showerror("Error", "Failed to delete record from database")
-            conn.close()
+        try:
+            record_service.delete_record(username, record_id)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
-        conn.commit()
-        conn.close()
-        
-        # Delete file if it exists
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except:
-                print(f"Warning: Could not delete file {file_path}")
-        
         # Refresh the records list
         load_medical_records(username, records_tree)
         
@@ -172,37 +71,10 @@ def view_medical_record(username, record_id):
             messagebox.showerror("Error", "No record selected for viewing")
             return False
         
-        # Get file path from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            messagebox.showerror("Error", "User not found")
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        cursor.execute(
-            "SELECT file_path FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        result = cursor.fetchone()
-        if not result:
-            messagebox.showerror("Error", "Record not found or not owned by current user")
-            conn.close()
-            return False
-        
-        file_path = result[0]
-        conn.close()
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
-            messagebox.showerror("Error", "File not found on disk")
+        try:
+            file_path = record_service.record_file(username, record_id)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return False
         
         # Try to open the file with the default application
@@ -229,84 +101,53 @@ def view_medical_record(username, record_id):
         return False
 
 def load_medical_records(username, records_tree):
-    """Load medical records from the database"""
-    try:
-        # Clear existing records
-        for item in records_tree.get_children():
-            records_tree.delete(item)
-        
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return False
-        
-        user_id = result[0]
-        
-        # Get records
-        cursor.execute(
-            """SELECT id, file_name, record_type, record_date, provider, upload_date
-               FROM medical_records 
-               WHERE user_id = ? 
-               ORDER BY upload_date DESC""",
-            (user_id,)
-        )
-        
-        records = cursor.fetchall()
-        conn.close()
+    """Load medical records from the database on the background worker"""
+    show_tree_placeholder(records_tree)
+    
+    def fetch():
+        try:
+            return record_service.list_records(username)
+        except ServiceError:
+            # Unknown user
+            return []
+    
+    def show(records):
+        clear_tree(records_tree)
         
         # Add records to tree
         for record in records:
-            rec_id, file_name, record_type, record_date, provider, upload_date = record
-            
-            records_tree.insert("", "end", iid=rec_id, values=(
-                file_name,
-                record_type,
-                record_date,
-                provider,
-                upload_date
+            records_tree.insert("", "end", iid=record.id, values=(
+                record.file_name,
+                record.record_type,
+                record.record_date,
+                record.provider,
+                record.upload_date
             ))
-        
-        return True
-        
-    except Exception as e:
+    
+    def failed(e):
         print(f"Error loading medical records: {str(e)}")
-        return False
+        show_tree_placeholder(records_tree, "Could not load records")
+    
+    return run_in_background(records_tree, "records", fetch, on_done=show, on_error=failed)
 
 def get_record_details(record_id):
     """Get details of a specific medical record"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT file_name, record_type, record_date, provider, description, tags, upload_date, file_path
-               FROM medical_records 
-               WHERE id = ?""",
-            (record_id,)
-        )
-        
-        result = cursor.fetchone()
-        conn.close()
+        row = record_service.get_record(record_id)
         
-        if not result:
+        if not row:
             return None
         
         # Create a dictionary with record details
         record = {
-            "file_name": result[0],
-            "record_type": result[1],
-            "record_date": result[2],
-            "provider": result[3],
-            "description": result[4],
-            "tags": result[5].split(",") if result[5] else [],
-            "upload_date": result[6],
-            "file_path": result[7]
+            "file_name": row.file_name,
+            "record_type": row.record_type,
+            "record_date": row.record_date,
+            "provider": row.provider,
+            "description": row.description,
+            "tags": row.tags.split(",") if row.tags else [],
+            "upload_date": row.upload_date,
+            "file_path": row.file_path
         }
         
         return record
@@ -318,8 +159,8 @@ def get_record_details(record_id):
 def create_medical_records_tab(parent, username):
     """Create the medical records tab"""
     # Ensure medical records directory exists
-    if not os.path.exists(RECORDS_DIR):
-        os.makedirs(RECORDS_DIR)
+    if not os.path.exists(record_service.RECORDS_DIR):
+        os.makedirs(record_service.RECORDS_DIR)
     
     # Create main frame
     main_frame = ttk.Frame(parent)
@@ -517,7 +358,7 @@ def create_medical_records_tab(parent, username):
         nonlocal current_record_id
         
         selected = records_tree.selection()
-        if not selected:
+        if not selected or selected[0] == PLACEHOLDER_IID:
             return
         
         # Get the record ID
@@ -0,0 +1,106 @@
+"""
+Process-wide cache of the medicine catalog.
+The medications table is small and read by every medicine list and lookup,
+but changes rarely. The cache keeps one snapshot of it and re-reads the
+table only when the catalog_version counter (bumped by triggers on
+medications, see migration 6) has moved.
+"""
+
+import threading
+
+from db_manager import connect
+from repositories import medications_repo
+
+class CatalogSnapshot:
+    """One consistent copy of the catalog with lookups by id and by name"""
+    
+    __slots__ = ("version", "medicines", "by_id", "by_name")
+    
+    def __init__(self, version, medicines):
+        self.version = version
+        # Medicine tuples, ordered by name
+        self.medicines = tuple(medicines)
+        self.by_id = {medicine.id: medicine for medicine in self.medicines}
+        self.by_name = {}
+        for medicine in self.medicines:
+            # Names are not unique in the schema; keep the first one
+            self.by_name.setdefault(medicine.name, medicine)
+    
+    def names(self):
+        return [medicine.name for medicine in self.medicines]
+
+class MedicationCatalog:
+    """
+    Cached medicine catalog.
+    
+    Every access costs one single-row read of catalog_version; the table
+    itself is only read again when that version differs from the cached
+    snapshot's. If the counter is missing (a database that has not been
+    migrated) every access reads the table, as before.
+    """
+    
+    VERSION_SQL = "SELECT version FROM catalog_version WHERE id = 1"
+    
+    def __init__(self, repo=medications_repo):
+        self.repo = repo
+        self._snapshot = None
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.hits = 0
+        self.refreshes = 0
+    
+    def current_version(self):
+        """The catalog version stored in the database, or None without the counter"""
+        try:
+            with connect() as conn:
+                row = conn.execute(self.VERSION_SQL).fetchone()
+        except Exception:
+            return None
+        return row[0] if row else None
+    
+    def snapshot(self):
+        """The catalog as of now, re-read only when it has changed"""
+        version = self.current_version()
+        
+        with self._lock:
+            snapshot = self._snapshot
+            if version is not None and snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+        
+        # Read outside the lock; a concurrent refresh just does the same work
+        snapshot = CatalogSnapshot(version, self.repo.list_all())
+        with self._lock:
+            self.refreshes += 1
+            if version is not None:
+                self._snapshot = snapshot
+        return snapshot
+    
+    def list_all(self):
+        """Every medicine, by name"""
+        return list(self.snapshot().medicines)
+    
+    def names(self):
+        return self.snapshot().names()
+    
+    def get(self, medicine_id):
+        """One medicine by id, or None"""
+        return self.snapshot().by_id.get(medicine_id)
+    
+    def by_name(self, name):
+        """One medicine by its exact name, or None"""
+        return self.snapshot().by_name.get(name)
+    
+    def id_for_name(self, name):
+        """The id of a medicine, or None"""
+        medicine = self.by_name(name)
+        return medicine.id if medicine else None
+    
+    def invalidate(self):
+        """Forget the cached snapshot (for writes that bypass the triggers)"""
+        with self._lock:
+            self._snapshot = None
+
+# Process-wide catalog used by the tabs
+medication_catalog = MedicationCatalog()
@@ -5,14 +5,18 @@ This module creates a comprehensive medication management UI with reminders func
 from tkinter import ttk
 import tkinter as tk
 from tkinter import ttk, messagebox, font
-import sqlite3
-import os
 from datetime import datetime, timedelta
 import time
 import threading
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import medications_repo, reminders_repo
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
+from db_worker import run_in_background, show_tree_placeholder, clear_tree
+from date_codec import encode_date, normalize_time
+from reminder_scheduler import watch_reminders
+from services import reminders as reminder_service
 
 def create_medication_manager_tab(parent, username):
     """Create the medication manager tab with enhanced UI"""
@@ -314,13 +318,7 @@ def update_current_datetime(datetime_label):
 def get_medications():
     """Get all medications from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name FROM medications ORDER BY name")
-        medications = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
+        medications = medication_catalog.names()
         if not medications:
             raise Exception("No medications found")
         return medications
@@ -373,39 +371,13 @@ def get_medication_details():
     
     # Try to get from database first
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if we have a custom medicine_details table
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='medicine_details'
-        """)
-        
-        if cursor.fetchone():
-            # Get all medicine details
-            cursor.execute("""
-                SELECT m.name, md.description, md.dosage_info, md.common_doses
-                FROM medications m
-                LEFT JOIN medicine_details md ON m.id = md.medicine_id
-            """)
-            
-            db_details = {}
-            for row in cursor.fetchall():
-                name, description, dosage, common_doses = row
-                if description and dosage:
-                    db_details[name] = {
-                        "description": description,
-                        "dosage": dosage,
-                        "common_doses": common_doses.split(",") if common_doses else []
-                    }
-            
-            # Merge with default details
-            if db_details:
-                for med in db_details:
-                    medicine_details[med] = db_details[med]
-        
-        conn.close()
+        for row in medications_repo.details():
+            if row.description and row.dosage:
+                medicine_details[row.name] = {
+                    "description": row.description,
+                    "dosage": row.dosage,
+                    "common_doses": row.common_doses.split(",") if row.common_doses else []
+                }
     except Exception as e:
         print(f"Error getting medicine details from database: {e}")
     
@@ -417,13 +389,9 @@ def load_medication_reminders(username, reminders_list):
         # Clear existing items
         reminders_list.delete(0, tk.END)
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
+        user_id = resolve_user_id(username)
+        if user_id is None:
             # If user not found, add sample data
             sample_reminders = [
                 "15-04-2025 08:00 - Paracetamol (500mg) - Daily",
@@ -437,27 +405,14 @@ def load_medication_reminders(username, reminders_list):
                 # Add alternating background colors
                 if i % 2 == 0:
                     reminders_list.itemconfig(i, bg="#f0f0f0")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
         # Get reminders with medication names
-        cursor.execute("""
-            SELECT r.date, r.time, m.name, r.dose, r.frequency
-            FROM reminders r
-            JOIN medications m ON r.medicine_id = m.id
-            WHERE r.user_id = ?
-            ORDER BY r.date, r.time
-        """, (user_id,))
-        
-        reminders = cursor.fetchall()
-        conn.close()
+        reminders = reminders_repo.list_for_user(user_id)
         
         # Add reminders to list with alternating colors for readability
         for i, reminder in enumerate(reminders):
-            date_str, time_str, medicine, dose, frequency = reminder
-            reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
+            reminder_text = f"{reminder.date} {reminder.time} - {reminder.medicine} ({reminder.dose}) - {reminder.frequency or 'Once only'}"
             reminders_list.insert(tk.END, reminder_text)
             # Add alternating background colors
             if i % 2 == 0:
@@ -523,32 +478,16 @@ def delete_selected_reminder(username, reminders_list):
         
         # Try to delete from database
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            result = cursor.fetchone()
+            user_id = resolve_user_id(username)
             
-            if result:
-                user_id = result[0]
-                
+            if user_id is not None:
                 # Get medicine ID
-                cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-                med_result = cursor.fetchone()
+                medicine_id = medication_catalog.id_for_name(medicine)
                 
-                if med_result:
-                    medicine_id = med_result[0]
-                    
+                if medicine_id is not None:
                     # Delete reminder
-                    cursor.execute("""
-                        DELETE FROM reminders 
-                        WHERE user_id = ? AND medicine_id = ? AND date = ? AND time = ? AND dose = ?
-                    """, (user_id, medicine_id, date_str, time_str, dose))
-                    
-                    conn.commit()
-            
-            conn.close()
+                    reminders_repo.delete_matching(user_id, medicine_id, date_str, time_str, dose)
         except Exception as e:
             print(f"Database error during deletion: {str(e)}")
         
@@ -596,17 +535,16 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
             messagebox.showerror("Error", "Invalid time format. Use HH:MM")
             return False
         
+        # Display forms of the stored date/time
+        date_str, _ = encode_date(date_str)
+        time_str = normalize_time(time_str)
+        
         # Try to add to database
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            result = cursor.fetchone()
-            if not result:
+            user_id = resolve_user_id(username)
+            if user_id is None:
                 messagebox.showerror("Error", "User not found in database")
-                conn.close()
                 
                 # Still add to list for demonstration
                 reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
@@ -621,14 +559,10 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
                 
                 return False
             
-            user_id = result[0]
-            
             # Get medicine ID
-            cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-            result = cursor.fetchone()
-            if not result:
+            medicine_id = medication_catalog.id_for_name(medicine)
+            if medicine_id is None:
                 messagebox.showerror("Error", "Medicine not found in database")
-                conn.close()
                 
                 # Still add to list for demonstration
                 reminder_text = f"{date_str} {time_str} - {medicine} ({dose}) - {frequency}"
@@ -643,18 +577,8 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
                 
                 return False
             
-            medicine_id = result[0]
-            
             # Insert reminder
-            cursor.execute(
-                """INSERT INTO reminders 
-                   (user_id, medicine_id, dose, date, time, frequency, created_at) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (user_id, medicine_id, dose, date_str, time_str, frequency, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            
-            conn.commit()
-            conn.close()
+            reminders_repo.add(user_id, medicine_id, dose, date_str, time_str, frequency)
         except Exception as e:
             print(f"Database error: {e}")
             # Handle the case where database operations fail
@@ -685,145 +609,74 @@ def add_medication_reminder(username, medicine_var, dose_var, date_str, time_str
         return False
 
 def load_active_medications(username, active_tree):
-    """Load active medications into the treeview"""
-    try:
-        # Clear existing items
-        for item in active_tree.get_children():
-            active_tree.delete(item)
-        
+    """Load active medications into the treeview (fetched on the background worker)"""
+    sample_data = [
+        ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
+        ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
+        ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
+        ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
+    ]
+    
+    show_tree_placeholder(active_tree)
+    
+    def fetch():
         # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
-            # Add sample data
-            sample_data = [
-                ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-                ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-                ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-                ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-            ]
-            
-            for data in sample_data:
-                active_tree.insert("", "end", values=data)
-            
-            conn.close()
-            return
+        user_id = resolve_user_id(username)
         
-        user_id = result[0]
-        
-        # Get active medications
-        cursor.execute("""
-            SELECT m.name, r.dose, r.frequency, r.date, r.time
-            FROM reminders r
-            JOIN medications m ON r.medicine_id = m.id
-            WHERE r.user_id = ? AND (
-                r.date >= ? OR
-                (r.date = ? AND r.time >= ?)
-            )
-            ORDER BY r.date, r.time
-        """, (
-            user_id, 
-            datetime.now().strftime("%d-%m-%Y"),
-            datetime.now().strftime("%d-%m-%Y"),
-            datetime.now().strftime("%H:%M")
-        ))
+        if user_id is None:
+            return []
+        
+        # Get active medications; recurring ones show their next dose
+        active = reminder_service.active_reminders(user_id)
         
         today = datetime.now().strftime("%d-%m-%Y")
         tomorrow = (datetime.now() + timedelta(days=1)).strftime("%d-%m-%Y")
         
-        for row in cursor.fetchall():
-            med_name, dose, frequency, date, time = row
-            
+        rows = []
+        for reminder in active:
             # Format the due date
-            if date == today:
-                due_text = f"Today, {time}"
-            elif date == tomorrow:
-                due_text = f"Tomorrow, {time}"
+            if reminder.date == today:
+                due_text = f"Today, {reminder.time}"
+            elif reminder.date == tomorrow:
+                due_text = f"Tomorrow, {reminder.time}"
             else:
-                due_text = f"{date}, {time}"
+                due_text = f"{reminder.date}, {reminder.time}"
             
-            active_tree.insert("", "end", values=(med_name, dose, frequency, due_text))
-        
-        conn.close()
+            rows.append((reminder.medicine, reminder.dose, reminder.frequency, due_text))
+        return rows
+    
+    def show(rows):
+        clear_tree(active_tree)
         
         # If no active medications, add sample data
-        if len(active_tree.get_children()) == 0:
-            sample_data = [
-                ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-                ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-                ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-                ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-            ]
-            
-            for data in sample_data:
-                active_tree.insert("", "end", values=data)
-        
-    except Exception as e:
+        for data in rows or sample_data:
+            active_tree.insert("", "end", values=data)
+    
+    def failed(e):
         print(f"Error loading active medications: {e}")
         # Add sample data on error
-        sample_data = [
-            ("Paracetamol", "500mg", "Daily", "Today, 20:00"),
-            ("Ibuprofen", "200mg", "Every 6 hours", "Today, 14:00"),
-            ("Aspirin", "100mg", "Daily", "Tomorrow, 08:00"),
-            ("Vitamin D", "1000IU", "Weekly", "16-04-2025, 20:00")
-        ]
-        
-        for data in sample_data:
-            active_tree.insert("", "end", values=data)
+        show(sample_data)
+    
+    return run_in_background(active_tree, "active_medications", fetch, on_done=show, on_error=failed)
 
 def check_due_reminders(username, notification_text):
-    """Check for due reminders and update notification text"""
+    """Show reminders due within the next hour as the scheduler fires them"""
+    def due_soon(occurrence):
+        # Update notification
+        notification_text.config(state="normal")
+        notification_text.delete(0, tk.END)
+        notification_text.insert(0, f"Due soon: {occurrence.medicine} ({occurrence.dose}) at {occurrence.time}")
+        notification_text.config(state="readonly")
+    
     try:
-        # Connect to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if result:
-            user_id = result[0]
-            
-            # Get current date and time
-            now = datetime.now()
-            current_date = now.strftime("%d-%m-%Y")
-            current_time = now.strftime("%H:%M")
-            
-            # Get due reminders within the next hour
-            next_hour = (now + timedelta(hours=1)).strftime("%H:%M")
-            
-            cursor.execute("""
-                SELECT m.name, r.dose, r.time
-                FROM reminders r
-                JOIN medications m ON r.medicine_id = m.id
-                WHERE r.user_id = ? AND r.date = ? AND r.time BETWEEN ? AND ?
-                ORDER BY r.time
-                LIMIT 1
-            """, (user_id, current_date, current_time, next_hour))
-            
-            due_reminder = cursor.fetchone()
-            
-            if due_reminder:
-                med_name, dose, due_time = due_reminder
-                
-                # Update notification
-                notification_text.config(state="normal")
-                notification_text.delete(0, tk.END)
-                notification_text.insert(0, f"Due soon: {med_name} ({dose}) at {due_time}")
-                notification_text.config(state="readonly")
+        user_id = resolve_user_id(username)
         
-        conn.close()
+        if user_id is not None:
+            watch_reminders(notification_text, user_id, due_soon, lead=timedelta(hours=1))
         
     except Exception as e:
         print(f"Error checking reminders: {e}")
-    
-    # Schedule next check in 5 minutes
-    notification_text.after(5 * 60 * 1000, lambda: check_due_reminders(username, notification_text))
 
 def show_medication_history(parent, username):
     """Show medication history in a new window"""
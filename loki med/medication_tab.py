@@ -4,17 +4,17 @@ Medication management tab UI
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import sqlite3
-import os
-import threading
-import time
 from datetime import datetime, timedelta
 
 # Import UI components
 from widgets import create_custom_card, center_window
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import reminders_repo
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
+from date_codec import encode_date, normalize_time
+from reminder_scheduler import watch_reminders
 
 def add_reminder(date_entry, time_entry, medicine_combo, dose_entry, reminder_list, username):
     """Add a new medication reminder"""
@@ -44,38 +44,24 @@ def add_reminder(date_entry, time_entry, medicine_combo, dose_entry, reminder_li
             messagebox.showerror("Error", "Invalid time format. Use HH:MM")
             return
         
-        # Add to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # Display forms of the stored date/time
+        date_str, _ = encode_date(date_str)
+        time_str = normalize_time(time_str)
         
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
+        user_id = resolve_user_id(username)
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return
         
-        user_id = result[0]
-        
         # Get medicine ID
-        cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-        result = cursor.fetchone()
-        if not result:
+        medicine_id = medication_catalog.id_for_name(medicine)
+        if medicine_id is None:
             messagebox.showerror("Error", "Medicine not found")
-            conn.close()
             return
         
-        medicine_id = result[0]
-        
         # Insert reminder
-        cursor.execute(
-            "INSERT INTO reminders (user_id, medicine_id, dose, date, time, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, medicine_id, dose, date_str, time_str, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        
-        conn.commit()
-        conn.close()
+        reminders_repo.add(user_id, medicine_id, dose, date_str, time_str, "Once only")
         
         # Add to list display
         reminder_text = f"{date_str} {time_str} - {medicine} ({dose})"
@@ -97,37 +83,20 @@ def add_reminder(date_entry, time_entry, medicine_combo, dose_entry, reminder_li
 def load_reminders(reminder_list, username):
     """Load medication reminders from database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
+        user_id = resolve_user_id(username)
+        if user_id is None:
             return
         
-        user_id = result[0]
-        
         # Get reminders with medication names
-        cursor.execute("""
-            SELECT r.date, r.time, m.name, r.dose
-            FROM reminders r
-            JOIN medications m ON r.medicine_id = m.id
-            WHERE r.user_id = ?
-            ORDER BY r.date, r.time
-        """, (user_id,))
-        
-        reminders = cursor.fetchall()
-        conn.close()
+        reminders = reminders_repo.list_for_user(user_id)
         
         # Clear existing items
         reminder_list.delete(0, tk.END)
         
         # Add reminders to list
         for reminder in reminders:
-            date_str, time_str, medicine, dose = reminder
-            reminder_text = f"{date_str} {time_str} - {medicine} ({dose})"
+            reminder_text = f"{reminder.date} {reminder.time} - {reminder.medicine} ({reminder.dose})"
             reminder_list.insert(tk.END, reminder_text)
         
     except Exception as e:
@@ -155,38 +124,20 @@ def delete_reminder(reminder_list, username):
         medicine = medicine_part[0]
         dose = medicine_part[1].rstrip(")")
         
-        # Connect to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
+        user_id = resolve_user_id(username)
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return
         
-        user_id = result[0]
-        
         # Get medicine ID
-        cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-        result = cursor.fetchone()
-        if not result:
+        medicine_id = medication_catalog.id_for_name(medicine)
+        if medicine_id is None:
             messagebox.showerror("Error", "Medicine not found")
-            conn.close()
             return
         
-        medicine_id = result[0]
-        
         # Delete reminder
-        cursor.execute(
-            "DELETE FROM reminders WHERE user_id = ? AND medicine_id = ? AND date = ? AND time = ? AND dose = ?",
-            (user_id, medicine_id, date_str, time_str, dose)
-        )
-        
-        conn.commit()
-        conn.close()
+        reminders_repo.delete_matching(user_id, medicine_id, date_str, time_str, dose)
         
         # Remove from list
         reminder_list.delete(selected_index)
@@ -196,63 +147,28 @@ def delete_reminder(reminder_list, username):
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
-def check_due_reminders(username, notification_callback=None):
-    """Check for due reminders in a separate thread"""
-    def generate_readings():
-        while True:
-            try:
-                now = datetime.now()
-                current_date = now.strftime("%d-%m-%Y")
-                current_time = now.strftime("%H:%M")
-                
-                # Connect to database
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                
-                # Get user ID
-                cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-                result = cursor.fetchone()
-                if not result:
-                    conn.close()
-                    time.sleep(60)  # Check every minute
-                    continue
-                
-                user_id = result[0]
-                
-                # Get due reminders
-                cursor.execute("""
-                    SELECT r.id, m.name, r.dose
-                    FROM reminders r
-                    JOIN medications m ON r.medicine_id = m.id
-                    WHERE r.user_id = ? AND r.date = ? AND r.time = ?
-                """, (user_id, current_date, current_time))
-                
-                due_reminders = cursor.fetchall()
-                conn.close()
-                
-                # Show notifications for due reminders
-                for reminder in due_reminders:
-                    reminder_id, medicine, dose = reminder
-                    message = f"Time to take {medicine} ({dose})"
-                    
-                    # Call notification callback if provided
-                    if notification_callback:
-                        notification_callback(message)
-                    
-                    # Show system notification
-                    messagebox.showinfo("Medication Reminder", message)
-            
-            except Exception as e:
-                print(f"Error checking reminders: {str(e)}")
-            
-            # Check every minute
-            time.sleep(60)
+def check_due_reminders(widget, username, notification_callback=None):
+    """Notify the user as the scheduler fires their reminders"""
+    def due_now(occurrence):
+        message = f"Time to take {occurrence.medicine} ({occurrence.dose})"
+        
+        # Call notification callback if provided
+        if notification_callback:
+            notification_callback(message)
+        
+        # Show system notification
+        messagebox.showinfo("Medication Reminder", message)
     
-    # Start the simulation thread
-    thread = threading.Thread(target=generate_readings, daemon=True)
-    thread.start()
+    try:
+        # Get user ID
+        user_id = resolve_user_id(username)
+        if user_id is not None:
+            return watch_reminders(widget, user_id, due_now)
+    
+    except Exception as e:
+        print(f"Error checking reminders: {str(e)}")
     
-    return thread
+    return None
 
 def create_medication_tab(parent, username):
     """Create the medication management tab"""
@@ -275,11 +191,7 @@ def create_medication_tab(parent, username):
     med_label.pack(anchor="w", pady=(0, 5))
     
     # Get medicines from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM medications ORDER BY name")
-    medicines = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    medicines = medication_catalog.names()
     
     medicine_var = tk.StringVar()
     medicine_combo = ttk.Combobox(add_reminder_card, textvariable=medicine_var, values=medicines)
@@ -358,8 +270,8 @@ def create_medication_tab(parent, username):
     )
     refresh_button.pack(fill="x", pady=(10, 0))
     
-    # Start reminder checker thread
-    check_due_reminders(username)
+    # Notify due reminders while the tab exists
+    check_due_reminders(main_frame, username)
     
     return main_frame
 
@@ -5,13 +5,14 @@ Run this file directly to test the medication management tab
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
 import sys
-import sqlite3
 from datetime import datetime
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import reminders_repo
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
+from date_codec import encode_date, normalize_time
 
 def center_window(window):
     """Center a window on the screen"""
@@ -55,14 +56,7 @@ def update_current_datetime(datetime_label):
 def get_medications():
     """Get all medications from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name FROM medications ORDER BY name")
-        medications = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
-        return medications
+        return medication_catalog.names()
     except Exception as e:
         print(f"Error getting medications: {str(e)}")
         # Provide default medications if database fails
@@ -75,13 +69,9 @@ def load_medication_reminders(username, reminders_list):
         # Clear existing items
         reminders_list.delete(0, tk.END)
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        if not result:
+        user_id = resolve_user_id(username)
+        if user_id is None:
             # If user not found, add sample data
             sample_reminders = [
                 "15-04-2025 08:00 - Paracetamol (500mg)",
@@ -90,27 +80,14 @@ def load_medication_reminders(username, reminders_list):
             ]
             for reminder in sample_reminders:
                 reminders_list.insert(tk.END, reminder)
-            conn.close()
             return False
         
-        user_id = result[0]
-        
         # Get reminders with medication names
-        cursor.execute("""
-            SELECT r.date, r.time, m.name, r.dose
-            FROM reminders r
-            JOIN medications m ON r.medicine_id = m.id
-            WHERE r.user_id = ?
-            ORDER BY r.date, r.time
-        """, (user_id,))
-        
-        reminders = cursor.fetchall()
-        conn.close()
+        reminders = reminders_repo.list_for_user(user_id)
         
         # Add reminders to list
         for reminder in reminders:
-            date_str, time_str, medicine, dose = reminder
-            reminder_text = f"{date_str} {time_str} - {medicine} ({dose})"
+            reminder_text = f"{reminder.date} {reminder.time} - {reminder.medicine} ({reminder.dose})"
             reminders_list.insert(tk.END, reminder_text)
         
         # If no reminders found, add sample data
@@ -165,34 +142,22 @@ def add_medication_reminder(username, medicine_var, dose_var, date_entry, time_e
             messagebox.showerror("Error", "Invalid time format. Use HH:MM")
             return False
         
+        # Display forms of the stored date/time
+        date_str, _ = encode_date(date_str)
+        time_str = normalize_time(time_str)
+        
         # Try to add to database, but continue even if it fails
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
             # Get user ID
-            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-            result = cursor.fetchone()
+            user_id = resolve_user_id(username)
             
-            if result:
-                user_id = result[0]
-                
+            if user_id is not None:
                 # Get medicine ID
-                cursor.execute("SELECT id FROM medications WHERE name = ?", (medicine,))
-                result = cursor.fetchone()
+                medicine_id = medication_catalog.id_for_name(medicine)
                 
-                if result:
-                    medicine_id = result[0]
-                    
+                if medicine_id is not None:
                     # Insert reminder
-                    cursor.execute(
-                        "INSERT INTO reminders (user_id, medicine_id, dose, date, time, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                        (user_id, medicine_id, dose, date_str, time_str, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                    )
-                    
-                    conn.commit()
-            
-            conn.close()
+                    reminders_repo.add(user_id, medicine_id, dose, date_str, time_str, "Once only")
         except Exception as e:
             print(f"Database error: {e}")
             # Continue even if database operation fails
@@ -0,0 +1,829 @@
+"""
+Schema migrations for the Medical Assistant database.
+The schema is defined here only, as ordered numbered steps; the
+schema_version table records which steps a database has applied.
+"""
+
+import sys
+import sqlite3
+
+from db_manager import connect
+from date_codec import encode_date, normalize_time
+from recurrence import parse_frequency
+
+def _create_base_tables(cursor):
+    """The original nine application tables"""
+    # Create users table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        full_name TEXT,
+        registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    # Create personal_info table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS personal_info (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        dob TEXT,
+        gender TEXT,
+        blood_group TEXT,
+        address TEXT,
+        city TEXT,
+        state TEXT,
+        zip_code TEXT,
+        country TEXT,
+        emergency_contact_name TEXT,
+        emergency_contact_relation TEXT,
+        emergency_contact_phone TEXT,
+        allergies TEXT,
+        chronic_illnesses TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+    
+    # Create appointments table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS appointments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        date TEXT,
+        time TEXT,
+        doctor TEXT,
+        type TEXT,
+        notes TEXT,
+        reminder BOOLEAN,
+        status TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+    
+    # Create medications table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS medications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        price REAL,
+        description TEXT,
+        quantity INTEGER
+    )
+    """)
+    
+    # Create reminders table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        medicine_id INTEGER,
+        dose TEXT,
+        date TEXT,
+        time TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (medicine_id) REFERENCES medications(id)
+    )
+    """)
+    
+    # Create medical_records table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS medical_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        file_name TEXT,
+        file_path TEXT,
+        record_type TEXT,
+        record_date TEXT,
+        provider TEXT,
+        description TEXT,
+        tags TEXT,
+        upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+    
+    # Create cart_items table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS cart_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        medicine_id INTEGER,
+        quantity INTEGER,
+        price REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (medicine_id) REFERENCES medications(id)
+    )
+    """)
+    
+    # Create health_readings table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS health_readings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        reading_type TEXT,
+        value TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+    
+    # Create notifications table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        message TEXT,
+        is_read BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+def _add_reminder_frequency(cursor):
+    """Reminders gained a frequency (Daily, Weekly, ...)"""
+    cursor.execute("PRAGMA table_info(reminders)")
+    columns = [column[1] for column in cursor.fetchall()]
+    
+    # Databases touched by older builds already have the column
+    if "frequency" not in columns:
+        cursor.execute("ALTER TABLE reminders ADD COLUMN frequency TEXT DEFAULT 'Daily'")
+
+def _create_medicine_details(cursor):
+    """Dosage details shown in the medication manager"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS medicine_details (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        medicine_id INTEGER,
+        description TEXT,
+        dosage_info TEXT,
+        common_doses TEXT,
+        contraindications TEXT,
+        side_effects TEXT,
+        FOREIGN KEY (medicine_id) REFERENCES medications(id)
+    )
+    """)
+
+def _create_access_path_indexes(cursor):
+    """Composite indexes for the per-user queries of the tabs"""
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reminders_user_date_time
+    ON reminders (user_id, date, time)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_appointments_user_date
+    ON appointments (user_id, date)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_health_readings_user_type_time
+    ON health_readings (user_id, reading_type, timestamp)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_medical_records_user_upload
+    ON medical_records (user_id, upload_date)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_cart_items_user_medicine
+    ON cart_items (user_id, medicine_id)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_notifications_user_created
+    ON notifications (user_id, created_at)
+    """)
+
+def _add_sortable_dates(cursor):
+    """ISO date columns for appointments and reminders, replacing the text-date indexes"""
+    for table in ("appointments", "reminders"):
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "date_iso" not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN date_iso TEXT")
+    
+    # dd-mm-YYYY text cannot serve range scans, so these indexes only cost writes
+    cursor.execute("DROP INDEX IF EXISTS idx_reminders_user_date_time")
+    cursor.execute("DROP INDEX IF EXISTS idx_appointments_user_date")
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reminders_user_date_iso_time
+    ON reminders (user_id, date_iso, time)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_appointments_user_date_iso
+    ON appointments (user_id, date_iso, time)
+    """)
+    
+    _backfill_table(cursor, "appointments")
+    _backfill_table(cursor, "reminders")
+
+def _create_catalog_version(cursor):
+    """A counter the triggers bump whenever the medicine catalog changes"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1)")
+    
+    # Stock changes (checkout) are updates, so they invalidate cached catalogs too
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_medications_{event.lower()}_version
+        AFTER {event} ON medications
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """)
+
+# An appointment that still counts as upcoming on the dashboard
+_OPEN_APPOINTMENT = "{row}.status != 'Completed' AND {row}.status != 'Cancelled'"
+
+# Re-derive the next open appointment of the summary row's user
+_NEXT_APPOINTMENT = """
+    (next_appointment_date, next_appointment_time, next_appointment_doctor) = (
+        SELECT a.date_iso, a.time, a.doctor FROM appointments a
+        WHERE a.user_id = dashboard_summary.user_id AND a.date_iso >= dashboard_summary.as_of
+          AND a.status != 'Completed' AND a.status != 'Cancelled'
+        ORDER BY a.date_iso, a.time LIMIT 1
+    )
+"""
+
+# Re-derive the latest pulse reading of the summary row's user
+_LATEST_PULSE = """
+    (latest_pulse, latest_pulse_at) = (
+        SELECT r.value, r.timestamp FROM health_readings r
+        WHERE r.user_id = dashboard_summary.user_id AND r.reading_type = 'pulse'
+        ORDER BY r.timestamp DESC LIMIT 1
+    )
+"""
+
+def _dashboard_trigger_statements():
+    """
+    (trigger name, event, body) of the triggers that keep dashboard_summary current.
+    
+    They only maintain rows that exist: a summary row is built on first
+    read (and again on a new day, since "upcoming" and "due" are relative
+    to as_of), then kept up to date by these triggers. Counters change
+    incrementally; a "latest" or "next" value is looked up again through
+    its index only when the row that held it goes away.
+    """
+    open_old = _OPEN_APPOINTMENT.format(row="OLD")
+    open_new = _OPEN_APPOINTMENT.format(row="NEW")
+    
+    # Take an appointment out of / into its user's summary
+    remove_appointment = f"""
+        UPDATE dashboard_summary SET upcoming_appointments = upcoming_appointments - 1
+        WHERE user_id = OLD.user_id AND OLD.date_iso >= as_of AND {open_old};
+        UPDATE dashboard_summary SET {_NEXT_APPOINTMENT}
+        WHERE user_id = OLD.user_id AND next_appointment_date = OLD.date_iso
+          AND next_appointment_time IS OLD.time;
+    """
+    add_appointment = f"""
+        UPDATE dashboard_summary SET upcoming_appointments = upcoming_appointments + 1
+        WHERE user_id = NEW.user_id AND NEW.date_iso >= as_of AND {open_new};
+        UPDATE dashboard_summary
+        SET next_appointment_date = NEW.date_iso, next_appointment_time = NEW.time,
+            next_appointment_doctor = NEW.doctor
+        WHERE user_id = NEW.user_id AND NEW.date_iso >= as_of AND {open_new}
+          AND (next_appointment_date IS NULL
+               OR (NEW.date_iso, COALESCE(NEW.time, '')) < (next_appointment_date, COALESCE(next_appointment_time, '')));
+    """
+    
+    remove_reminder = """
+        UPDATE dashboard_summary
+        SET reminder_count = reminder_count - 1,
+            reminders_due = reminders_due - COALESCE(OLD.date_iso = as_of, 0)
+        WHERE user_id = OLD.user_id;
+    """
+    add_reminder = """
+        UPDATE dashboard_summary
+        SET reminder_count = reminder_count + 1,
+            reminders_due = reminders_due + COALESCE(NEW.date_iso = as_of, 0)
+        WHERE user_id = NEW.user_id;
+    """
+    
+    remove_record = """
+        UPDATE dashboard_summary
+        SET record_count = record_count - 1,
+            latest_record_at = (SELECT MAX(m.upload_date) FROM medical_records m WHERE m.user_id = OLD.user_id)
+        WHERE user_id = OLD.user_id;
+    """
+    add_record = """
+        UPDATE dashboard_summary
+        SET record_count = record_count + 1,
+            latest_record_at = CASE
+                WHEN latest_record_at IS NULL OR NEW.upload_date > latest_record_at THEN NEW.upload_date
+                ELSE latest_record_at END
+        WHERE user_id = NEW.user_id;
+    """
+    
+    return [
+        ("trg_dashboard_appointment_insert", "AFTER INSERT ON appointments", add_appointment),
+        ("trg_dashboard_appointment_delete", "AFTER DELETE ON appointments", remove_appointment),
+        ("trg_dashboard_appointment_update",
+         "AFTER UPDATE OF user_id, date_iso, time, doctor, status ON appointments",
+         remove_appointment + add_appointment),
+        
+        ("trg_dashboard_reminder_insert", "AFTER INSERT ON reminders", add_reminder),
+        ("trg_dashboard_reminder_delete", "AFTER DELETE ON reminders", remove_reminder),
+        ("trg_dashboard_reminder_update", "AFTER UPDATE OF user_id, date_iso ON reminders",
+         remove_reminder + add_reminder),
+        
+        ("trg_dashboard_record_insert", "AFTER INSERT ON medical_records", add_record),
+        ("trg_dashboard_record_delete", "AFTER DELETE ON medical_records", remove_record),
+        ("trg_dashboard_record_update", "AFTER UPDATE OF user_id, upload_date ON medical_records",
+         remove_record + add_record),
+        
+        # Sensor feeds insert many readings; only pulse readings newer than
+        # the stored one touch the summary
+        ("trg_dashboard_pulse_insert",
+         "AFTER INSERT ON health_readings WHEN NEW.reading_type = 'pulse'",
+         """
+        UPDATE dashboard_summary SET latest_pulse = NEW.value, latest_pulse_at = NEW.timestamp
+        WHERE user_id = NEW.user_id AND (latest_pulse_at IS NULL OR NEW.timestamp >= latest_pulse_at);
+         """),
+        ("trg_dashboard_pulse_delete",
+         "AFTER DELETE ON health_readings WHEN OLD.reading_type = 'pulse'",
+         f"""
+        UPDATE dashboard_summary SET {_LATEST_PULSE}
+        WHERE user_id = OLD.user_id AND OLD.timestamp >= latest_pulse_at;
+         """),
+        ("trg_dashboard_pulse_update",
+         "AFTER UPDATE OF user_id, reading_type, value, timestamp ON health_readings",
+         f"""
+        UPDATE dashboard_summary SET {_LATEST_PULSE}
+        WHERE user_id IN (OLD.user_id, NEW.user_id);
+         """),
+        
+        ("trg_dashboard_user_delete", "AFTER DELETE ON users",
+         "DELETE FROM dashboard_summary WHERE user_id = OLD.id;"),
+    ]
+
+def _create_dashboard_summary(cursor):
+    """Per-user dashboard figures kept current by triggers"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS dashboard_summary (
+        user_id INTEGER PRIMARY KEY,
+        as_of TEXT NOT NULL,
+        upcoming_appointments INTEGER NOT NULL DEFAULT 0,
+        next_appointment_date TEXT,
+        next_appointment_time TEXT,
+        next_appointment_doctor TEXT,
+        reminder_count INTEGER NOT NULL DEFAULT 0,
+        reminders_due INTEGER NOT NULL DEFAULT 0,
+        latest_pulse TEXT,
+        latest_pulse_at TEXT,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        latest_record_at TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+    
+    for name, event, body in _dashboard_trigger_statements():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+def _create_schedule_version(cursor):
+    """Due-time indexes over all users and a counter of reminder/appointment changes"""
+    # The reminder daemon loads what falls due across every user
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reminders_date_iso_time
+    ON reminders (date_iso, time)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_appointments_date_iso_time
+    ON appointments (date_iso, time)
+    """)
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schedule_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO schedule_version (id, version) VALUES (1, 1)")
+    
+    # Lets a scheduler in another process notice changes without re-reading the tables
+    for table in ("reminders", "appointments"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_schedule_version
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE schedule_version SET version = version + 1 WHERE id = 1;
+            END
+            """)
+
+def _add_recurrence_rules(cursor):
+    """One recurrence rule per reminder, derived from its frequency text"""
+    cursor.execute("PRAGMA table_info(reminders)")
+    columns = [column[1] for column in cursor.fetchall()]
+    
+    # period_minutes 0 is a single dose; times_of_day holds extra HH:MM times,
+    # occurrence_count and until_iso (inclusive) end a recurring reminder
+    for name, definition in (
+        ("period_minutes", "INTEGER NOT NULL DEFAULT 0"),
+        ("times_of_day", "TEXT"),
+        ("occurrence_count", "INTEGER"),
+        ("until_iso", "TEXT"),
+    ):
+        if name not in columns:
+            cursor.execute(f"ALTER TABLE reminders ADD COLUMN {name} {definition}")
+    
+    # A reminder saved without any frequency stays a single dose; one with a
+    # frequency (the forms' "Daily" included) becomes that recurrence
+    cursor.execute("""
+    UPDATE reminders SET frequency = 'Once only'
+    WHERE frequency IS NULL OR TRIM(frequency) = ''
+    """)
+    
+    # A handful of distinct texts, so one UPDATE per text
+    cursor.execute("SELECT DISTINCT frequency FROM reminders")
+    for (frequency,) in cursor.fetchall():
+        cursor.execute(
+            "UPDATE reminders SET period_minutes = ? WHERE frequency IS ?",
+            (parse_frequency(frequency), frequency)
+        )
+    
+    # Recurring rules stay active long after their first date, so the
+    # schedulers look them up apart from the single doses
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reminders_recurring_user
+    ON reminders (user_id, date_iso) WHERE period_minutes > 0
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reminders_recurring
+    ON reminders (date_iso) WHERE period_minutes > 0
+    """)
+
+def _create_reminder_cursors(cursor):
+    """How far each reminder scheduler has dispatched, for catch-up after a restart"""
+    # dispatched_until is a YYYY-MM-DD HH:MM:SS time; every reminder due at
+    # or before it has been delivered or handled by the catch-up policy
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS reminder_cursors (
+        name TEXT PRIMARY KEY,
+        dispatched_until TEXT NOT NULL,
+        updated_at TIMESTAMP
+    )
+    """)
+
+def _create_notification_outbox(cursor):
+    """Notifications waiting to be delivered on a channel (desktop, email, in_app)"""
+    # status: pending -> sending (claimed by a worker) -> sent or failed.
+    # Times are YYYY-MM-DD HH:MM:SS.mmm so latencies can be measured.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        category TEXT NOT NULL,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TEXT NOT NULL,
+        claimed_by TEXT,
+        claimed_at TEXT,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        sent_at TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """)
+    
+    # The workers only look at the few unfinished rows
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_outbox_pending
+    ON notification_outbox (channel, next_attempt_at) WHERE status = 'pending'
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_outbox_claimed
+    ON notification_outbox (claimed_by) WHERE status = 'sending'
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_outbox_sent
+    ON notification_outbox (sent_at) WHERE status = 'sent'
+    """)
+
+def _create_notification_search(cursor):
+    """Unread filter index and full-text search for the notification history"""
+    # The history pages through (created_at, id) on idx_notifications_user_created,
+    # whose entries end in the rowid; unread-only pages use this smaller index
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_notifications_user_unread
+    ON notifications (user_id, created_at) WHERE is_read = 0
+    """)
+    
+    # Trigram tokens match any substring of three or more characters, like
+    # LIKE '%...%' but from an index. SQLite builds without FTS5 (or older
+    # than 3.34) skip the table and the history searches with LIKE instead.
+    try:
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS notifications_fts
+        USING fts5(message, content='notifications', content_rowid='id', tokenize='trigram')
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"Notification search will not be indexed: {e}")
+        return
+    
+    # External-content table: kept in step with notifications by triggers
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_fts_insert
+    AFTER INSERT ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (rowid, message) VALUES (NEW.id, NEW.message);
+    END
+    """)
+    
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_fts_delete
+    AFTER DELETE ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (notifications_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+    END
+    """)
+    
+    # Marking a notification read leaves the index alone
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_fts_update
+    AFTER UPDATE OF message ON notifications
+    BEGIN
+        INSERT INTO notifications_fts (notifications_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+        INSERT INTO notifications_fts (rowid, message) VALUES (NEW.id, NEW.message);
+    END
+    """)
+    
+    cursor.execute("INSERT INTO notifications_fts (notifications_fts) VALUES ('rebuild')")
+
+# Ordered schema history: (version, description, step).
+# Append new steps at the end; never edit or renumber a released one.
+MIGRATIONS = [
+    (1, "Base tables", _create_base_tables),
+    (2, "Reminder frequency column", _add_reminder_frequency),
+    (3, "Medicine details table", _create_medicine_details),
+    (4, "Per-user access path indexes", _create_access_path_indexes),
+    (5, "Sortable ISO dates for appointments and reminders", _add_sortable_dates),
+    (6, "Medicine catalog version counter", _create_catalog_version),
+    (7, "Trigger-maintained dashboard summary", _create_dashboard_summary),
+    (8, "Due-time indexes and schedule version counter", _create_schedule_version),
+    (9, "Reminder recurrence rules", _add_recurrence_rules),
+    (10, "Reminder dispatch cursors", _create_reminder_cursors),
+    (11, "Notification outbox", _create_notification_outbox),
+    (12, "Notification history unread index and search", _create_notification_search),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def _ensure_version_table(conn):
+    """Create the bookkeeping table that records applied migrations"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.commit()
+
+def get_schema_version(conn=None):
+    """Return the highest migration applied to the database (0 if none)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+    
+    try:
+        _ensure_version_table(conn)
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return row[0] or 0
+    finally:
+        if own_conn:
+            conn.close()
+
+def migrate(conn=None):
+    """
+    Bring the database schema up to LATEST_VERSION.
+    
+    Each pending step runs in its own transaction together with its
+    schema_version row, so an interrupted upgrade resumes at the step
+    that failed. Returns the list of versions applied.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+    
+    applied = []
+    try:
+        current = get_schema_version(conn)
+        
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            
+            # DDL is transactional in SQLite, so a failed step leaves no trace
+            conn.execute("BEGIN")
+            try:
+                step(conn.cursor())
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            
+            applied.append(version)
+            print(f"Applied migration {version}: {description}")
+    finally:
+        if own_conn:
+            conn.close()
+    
+    return applied
+
+def _backfill_table(cursor, table, batch_size=500):
+    """Fill date_iso for rows written before the column existed, normalizing date and time"""
+    updated = 0
+    last_id = 0
+    
+    while True:
+        # Walk by id so rows with unparseable dates are not revisited forever
+        cursor.execute(
+            f"""SELECT id, date, time FROM {table}
+                WHERE id > ? AND date_iso IS NULL
+                ORDER BY id LIMIT ?""",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        
+        last_id = rows[-1][0]
+        changes = []
+        for row_id, date_text, time_text in rows:
+            display_date, iso_date = encode_date(date_text)
+            if iso_date:
+                changes.append((display_date, iso_date, normalize_time(time_text) or time_text, row_id))
+        
+        if changes:
+            cursor.executemany(
+                f"UPDATE {table} SET date = ?, date_iso = ?, time = ? WHERE id = ?",
+                changes
+            )
+            updated += len(changes)
+    
+    return updated
+
+def backfill_sortable_dates(conn=None, batch_size=500):
+    """
+    Fill the date_iso columns of rows inserted without them.
+    
+    Migration 5 runs this once; it is safe to run again (for example after
+    seeding sample data with plain INSERTs). Returns the number of rows updated.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+    
+    try:
+        cursor = conn.cursor()
+        updated = 0
+        for table in ("appointments", "reminders"):
+            updated += _backfill_table(cursor, table, batch_size)
+        conn.commit()
+        return updated
+    finally:
+        if own_conn:
+            conn.close()
+
+# Index each hot query is expected to use: (index name, query, parameters).
+# The queries mirror the ones issued by the tabs.
+INDEX_CHECKS = [
+    (
+        "idx_reminders_user_date_iso_time",
+        "SELECT id, dose FROM reminders WHERE user_id = ? AND date_iso = ? AND time BETWEEN ? AND ? ORDER BY time",
+        (1, "2025-01-01", "08:00", "08:05")
+    ),
+    (
+        "idx_reminders_date_iso_time",
+        "SELECT id, user_id, dose FROM reminders WHERE (date_iso, time) >= (?, ?) AND (date_iso, time) < (?, ?) "
+        "ORDER BY date_iso, time",
+        ("2025-01-01", "08:00", "2025-01-01", "09:00")
+    ),
+    (
+        "idx_reminders_recurring_user",
+        "SELECT id, period_minutes FROM reminders WHERE period_minutes > 0 AND user_id = ? AND date_iso <= ?",
+        (1, "2025-01-01")
+    ),
+    (
+        "idx_appointments_date_iso_time",
+        "SELECT id, user_id, doctor FROM appointments WHERE (date_iso, time) >= (?, ?) AND (date_iso, time) < (?, ?) "
+        "ORDER BY date_iso, time",
+        ("2025-01-01", "08:00", "2025-01-01", "09:00")
+    ),
+    (
+        "idx_appointments_user_date_iso",
+        "SELECT id, date_iso, time FROM appointments WHERE user_id = ? AND date_iso >= ? ORDER BY date_iso, time",
+        (1, "2025-01-01")
+    ),
+    (
+        "idx_health_readings_user_type_time",
+        "SELECT value, timestamp FROM health_readings WHERE user_id = ? AND reading_type = 'pulse' "
+        "ORDER BY timestamp DESC LIMIT 1",
+        (1,)
+    ),
+    (
+        "idx_medical_records_user_upload",
+        "SELECT id, file_name FROM medical_records WHERE user_id = ? ORDER BY upload_date DESC",
+        (1,)
+    ),
+    (
+        "idx_cart_items_user_medicine",
+        "SELECT id, quantity FROM cart_items WHERE user_id = ? AND medicine_id = ?",
+        (1, 1)
+    ),
+    (
+        "idx_notifications_user_created",
+        "SELECT message, created_at, is_read FROM notifications WHERE user_id = ? ORDER BY created_at DESC",
+        (1,)
+    ),
+    (
+        "idx_notifications_user_created",
+        "SELECT id, message, is_read, created_at FROM notifications WHERE user_id = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT 100",
+        (1, "2025-01-01 08:00:00", 1000)
+    ),
+    (
+        "idx_notifications_user_unread",
+        "SELECT id, message, is_read, created_at FROM notifications WHERE user_id = ? AND is_read = 0 "
+        "ORDER BY created_at DESC, id DESC LIMIT 100",
+        (1,)
+    ),
+    (
+        "idx_outbox_pending",
+        "SELECT id FROM notification_outbox WHERE status = 'pending' AND channel = ? AND next_attempt_at <= ? "
+        "ORDER BY next_attempt_at LIMIT 100",
+        ("email", "2025-01-01 08:00:00.000")
+    ),
+]
+
+def explain_query_plan(sql, parameters=(), conn=None):
+    """Return the detail lines of EXPLAIN QUERY PLAN for a query"""
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+    
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        return [row[-1] for row in rows]
+    finally:
+        if own_conn:
+            conn.close()
+
+def check_index_usage(conn=None):
+    """
+    Verify the planner uses the expected index for every INDEX_CHECKS query.
+    
+    Returns a list of (index name, used, plan lines).
+    """
+    results = []
+    for index_name, sql, parameters in INDEX_CHECKS:
+        plan = explain_query_plan(sql, parameters, conn)
+        used = any(index_name in line for line in plan)
+        results.append((index_name, used, plan))
+    return results
+
+if __name__ == "__main__":
+    migrate()
+    print(f"Schema version: {get_schema_version()}")
+    
+    # Repair the trigger-maintained dashboard figures from the base tables
+    if "--rebuild-dashboard" in sys.argv[1:]:
+        from repositories import dashboard_repo
+        from date_codec import today_iso
+        print(f"Dashboard summary rebuilt for {dashboard_repo.rebuild(today_iso())} users")
+    
+    failures = 0
+    for index_name, used, plan in check_index_usage():
+        status = "OK" if used else "NOT USED"
+        print(f"{status:9} {index_name}: {'; '.join(plan)}")
+        if not used:
+            failures += 1
+    
+    sys.exit(1 if failures else 0)
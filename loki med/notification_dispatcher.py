@@ -0,0 +1,255 @@
+"""
+Coalesced delivery of reminder notifications.
+Everything a scheduler batch brings - the eight medicines of the morning
+dose, or the doses caught up after a restart - becomes one grouped
+notification per user on each channel, and the batch's notification rows
+are written in one transaction.
+
+Channels can be rate limited. What arrives while a channel is over its
+limit is held and merged into the next notification that channel sends.
+Limits are given to the dispatcher or in the environment:
+    MEDICAL_NOTIFY_RATE_LIMITS="desktop=3/60,in_app=20/60"
+(at most 3 desktop notifications per 60 seconds, ...).
+
+A dispatcher given an outbox hands the grouped notifications to it
+instead, one per user and category, and the outbox workers deliver them
+on the channels the user's preferences allow.
+"""
+
+import os
+import time
+import threading
+from collections import namedtuple, deque
+
+from repositories import notifications_repo
+from reminder_scheduler import AppointmentDue, occurrence_text, missed_message
+from notification_preferences import CATEGORY_APPOINTMENTS, CATEGORY_MEDICATION
+
+# At most count notifications per seconds on one channel
+RateLimit = namedtuple("RateLimit", "count seconds")
+
+# What a channel receives: one user's occurrences, grouped
+GroupedNotification = namedtuple("GroupedNotification", "user_id title message occurrences category")
+
+# Longest list shown in one notification; the rest is summarised
+MAX_LINES = 8
+
+def notification_message(occurrence):
+    """Text logged for a reminder or appointment that fell due, or was missed"""
+    if occurrence.missed:
+        return missed_message(occurrence)
+    return f"Reminder: {occurrence_text(occurrence)}"
+
+def _line(occurrence):
+    """One entry of a grouped notification"""
+    if isinstance(occurrence, AppointmentDue):
+        text = occurrence_text(occurrence)
+    else:
+        text = f"{occurrence.medicine} ({occurrence.dose})"
+    if occurrence.missed:
+        text += f" - missed, due {occurrence.due.strftime('%d-%m-%Y %H:%M')}"
+    return text
+
+def group_notification(user_id, occurrences):
+    """The GroupedNotification of one user's occurrences, in due order"""
+    occurrences = sorted(occurrences, key=lambda occurrence: occurrence.due)
+    reminders = [occurrence for occurrence in occurrences if not isinstance(occurrence, AppointmentDue)]
+    missed = all(occurrence.missed for occurrence in occurrences)
+    
+    category = CATEGORY_MEDICATION if reminders else CATEGORY_APPOINTMENTS
+    if not reminders:
+        title = "Appointment Reminder"
+    elif missed:
+        title = "Missed Medication"
+    else:
+        title = "Medication Reminder"
+    
+    if len(occurrences) == 1:
+        occurrence = occurrences[0]
+        if occurrence.missed or isinstance(occurrence, AppointmentDue):
+            message = notification_message(occurrence)
+        else:
+            message = f"Time to take {occurrence.medicine} ({occurrence.dose})"
+        return GroupedNotification(user_id, title, message, occurrences, category)
+    
+    if len(reminders) == len(occurrences):
+        heading = f"Time to take {len(occurrences)} medications:"
+    else:
+        heading = f"{len(occurrences)} reminders:"
+    lines = [f"- {_line(occurrence)}" for occurrence in occurrences[:MAX_LINES]]
+    if len(occurrences) > MAX_LINES:
+        lines.append(f"... and {len(occurrences) - MAX_LINES} more")
+    return GroupedNotification(user_id, title, "\n".join([heading] + lines), occurrences, category)
+
+def group_occurrences(occurrences):
+    """One GroupedNotification per user and category (reminders, appointments) of a batch"""
+    groups = {}
+    for occurrence in occurrences:
+        key = (occurrence.user_id, isinstance(occurrence, AppointmentDue))
+        groups.setdefault(key, []).append(occurrence)
+    return [group_notification(user_id, group) for (user_id, _), group in groups.items()]
+
+def parse_rate_limits(text):
+    """{channel: RateLimit} of "desktop=3/60,in_app=20/60"; raises ValueError"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, limit = entry.partition("=")
+        count, _, seconds = limit.partition("/")
+        limit = RateLimit(int(count), float(seconds or 60))
+        if not name.strip() or limit.count < 1 or limit.seconds <= 0:
+            raise ValueError(f"Invalid rate limit: {entry}")
+        limits[name.strip()] = limit
+    return limits
+
+def rate_limits_from_environment():
+    """The limits in MEDICAL_NOTIFY_RATE_LIMITS, or none"""
+    text = os.environ.get("MEDICAL_NOTIFY_RATE_LIMITS")
+    try:
+        return parse_rate_limits(text)
+    except ValueError:
+        print(f"Ignoring invalid MEDICAL_NOTIFY_RATE_LIMITS: {text}")
+        return {}
+
+class _Channel:
+    """A channel's deliver callback, limit, recent send times and held occurrences"""
+    
+    __slots__ = ("name", "deliver", "limit", "sent", "held", "timer")
+    
+    def __init__(self, name, deliver, limit):
+        self.name = name
+        self.deliver = deliver
+        self.limit = limit
+        self.sent = deque()
+        # user id -> occurrences waiting for the limit
+        self.held = {}
+        self.timer = None
+
+class NotificationDispatcher:
+    """
+    Groups each batch of due occurrences and hands it to the channels.
+    
+    dispatch() is a batch subscription callback for ReminderScheduler.
+    add_channel() registers deliver(notification), called with a
+    GroupedNotification; a channel's deliver runs on the scheduler thread,
+    or on a timer thread when held notifications are released. With an
+    outbox (notification_outbox.Outbox) the channels are not used.
+    """
+    
+    def __init__(self, log=notifications_repo, rate_limits=None, clock=time.monotonic, outbox=None):
+        self.log = log
+        self.outbox = outbox
+        self.rate_limits = dict(rate_limits or {})
+        self.clock = clock
+        self._channels = {}
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.batches = 0
+        self.sent = 0
+        self.held = 0
+        self.logged = 0
+    
+    def add_channel(self, name, deliver, rate_limit=None):
+        """Register a channel; rate_limit overrides the dispatcher's limit for name"""
+        with self._lock:
+            self._channels[name] = _Channel(name, deliver, rate_limit or self.rate_limits.get(name))
+    
+    def remove_channel(self, name):
+        with self._lock:
+            channel = self._channels.pop(name, None)
+            if channel is not None and channel.timer is not None:
+                channel.timer.cancel()
+    
+    def close(self):
+        """Drop every channel and its held notifications"""
+        for name in list(self._channels):
+            self.remove_channel(name)
+    
+    def dispatch(self, occurrences):
+        """Log one batch in one transaction and send one notification per user and channel"""
+        if not occurrences:
+            return
+        
+        if self.outbox is not None:
+            # The in_app channel of the outbox writes the notification rows
+            try:
+                self.outbox.enqueue(group_occurrences(occurrences))
+            except Exception as e:
+                print(f"Error queuing {len(occurrences)} notifications: {e}")
+            self.batches += 1
+            return
+        
+        if self.log is not None:
+            try:
+                self.logged += self.log.add_many(
+                    [(occurrence.user_id, notification_message(occurrence)) for occurrence in occurrences]
+                )
+            except Exception as e:
+                print(f"Error logging {len(occurrences)} notifications: {e}")
+        
+        by_user = {}
+        for occurrence in occurrences:
+            by_user.setdefault(occurrence.user_id, []).append(occurrence)
+        
+        with self._lock:
+            channels = list(self._channels.values())
+        for channel in channels:
+            self._send(channel, by_user)
+        self.batches += 1
+    
+    def _send(self, channel, by_user):
+        """Deliver to one channel what its limit allows now, holding the rest"""
+        with self._lock:
+            for user_id, occurrences in by_user.items():
+                channel.held.setdefault(user_id, []).extend(occurrences)
+            ready = self._take(channel)
+            self.held += sum(len(occurrences) for user_id, occurrences in by_user.items()
+                             if user_id in channel.held)
+        
+        self._deliver(channel, ready)
+    
+    def _take(self, channel):
+        """
+        Remove the held notifications the channel may send now and count them
+        as sent; arms the release timer for the rest (called with the lock held).
+        """
+        limit = channel.limit
+        if limit is None:
+            ready, channel.held = channel.held, {}
+            return ready
+        
+        now = self.clock()
+        while channel.sent and channel.sent[0] <= now - limit.seconds:
+            channel.sent.popleft()
+        
+        ready = {}
+        for user_id in list(channel.held):
+            if len(channel.sent) >= limit.count:
+                break
+            ready[user_id] = channel.held.pop(user_id)
+            channel.sent.append(now)
+        
+        if channel.held and channel.timer is None:
+            channel.timer = threading.Timer(channel.sent[0] + limit.seconds - now, self._release, (channel,))
+            channel.timer.daemon = True
+            channel.timer.start()
+        return ready
+    
+    def _release(self, channel):
+        """Timer callback: send what a channel held once its limit allows"""
+        with self._lock:
+            channel.timer = None
+            if self._channels.get(channel.name) is not channel:
+                return
+            ready = self._take(channel)
+        
+        self._deliver(channel, ready)
+    
+    def _deliver(self, channel, ready):
+        """Send each user's grouped notification (without the lock)"""
+        for user_id, occurrences in ready.items():
+            try:
+                channel.deliver(group_notification(user_id, occurrences))
+                self.sent += 1
+            except Exception as e:
+                print(f"Error sending notification on {channel.name}: {e}")
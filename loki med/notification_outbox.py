@@ -0,0 +1,428 @@
+"""
+Notification outbox.
+A notification is first written to the notification_outbox table, one row
+per channel the user's preferences allow (see notification_preferences),
+all rows of a batch in one transaction. Delivery workers claim due rows in
+batches and send each batch on its channel - one SMTP session per email
+batch, one transaction per in-app batch - then record the results of the
+batch together. A row that failed is retried with exponential backoff
+until MAX_ATTEMPTS, then marked failed.
+
+Rows are only queued on channels the process has a sender for (see
+delivery_channels()), and rows nobody delivered in time are expired, so
+nothing waits in the table forever.
+
+Email is sent when an SMTP server is configured in the environment:
+    MEDICAL_SMTP_HOST=localhost        MEDICAL_SMTP_PORT=1025
+    MEDICAL_SMTP_SENDER=reminders@example.org
+    MEDICAL_SMTP_USER, MEDICAL_SMTP_PASSWORD    optional login
+    MEDICAL_SMTP_STARTTLS=1                     upgrade the connection
+benchmarks/smtp_sink.py is a local server that prints what it receives.
+"""
+
+import os
+import random
+import smtplib
+import weakref
+import itertools
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from db_manager import connection_manager
+from repositories import outbox_repo, notifications_repo
+from notification_preferences import channels_by_user, CHANNEL_DESKTOP, CHANNEL_EMAIL, CHANNEL_IN_APP
+
+# Rows claimed and sent together
+BATCH_SIZE = 100
+
+# Seconds between looks for rows queued by other processes or due for a retry
+POLL_INTERVAL = 5.0
+
+# Attempts before a row is marked failed
+MAX_ATTEMPTS = 6
+
+# Retry delays double from BACKOFF_BASE seconds up to BACKOFF_MAX
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 3600.0
+
+# A claim older than this belonged to a worker that died; its rows are sent again
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Sent rows are deleted after this long
+SENT_RETENTION = timedelta(days=30)
+
+# A reminder this late is no longer worth sending; its pending rows are deleted
+PENDING_EXPIRY = timedelta(days=1)
+
+# Failed rows are kept this long for inspection
+FAILED_RETENTION = timedelta(days=7)
+
+# Seconds between reclaiming stale rows and purging old ones
+MAINTENANCE_INTERVAL = 300.0
+
+def _stamp(moment):
+    """The stored form of an outbox time, with milliseconds"""
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def backoff_delay(attempts, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """
+    Seconds to wait after a row's attempts-th failed attempt.
+    
+    The jitter keeps rows that failed together (an SMTP outage) from all
+    being retried in the same second.
+    """
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+class DeliveryError(Exception):
+    """A row could not be delivered; with retry=False it is failed at once"""
+    
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+class Outbox:
+    """
+    Queues grouped notifications on the channels their users want.
+    
+    channels limits the channels queued to, for a process that knows no
+    worker will ever serve the others (the daemon has no desktop).
+    """
+    
+    def __init__(self, repo=outbox_repo, channels=None, channels_for=channels_by_user, clock=datetime.now):
+        self.repo = repo
+        self.channels = None if channels is None else frozenset(channels)
+        self.channels_for = channels_for
+        self.clock = clock
+    
+    def enqueue(self, notifications):
+        """Queue GroupedNotifications in one transaction; returns the rows written"""
+        users_by_category = {}
+        for notification in notifications:
+            users_by_category.setdefault(notification.category, set()).add(notification.user_id)
+        wanted = {
+            category: self.channels_for(user_ids, category)
+            for category, user_ids in users_by_category.items()
+        }
+        
+        now = _stamp(self.clock())
+        rows = []
+        for notification in notifications:
+            for channel in wanted[notification.category].get(notification.user_id, ()):
+                if self.channels is None or channel in self.channels:
+                    rows.append((notification.user_id, channel, notification.category,
+                                 notification.title, notification.message, now, now))
+        
+        if rows:
+            self.repo.add_many(rows)
+            _wake_workers()
+        return len(rows)
+
+class DesktopChannel:
+    """Desktop notifications through show(title, message), which returns False on failure"""
+    
+    name = CHANNEL_DESKTOP
+    
+    def __init__(self, show):
+        self.show = show
+    
+    def send(self, rows):
+        failures = {}
+        for row in rows:
+            try:
+                if self.show(row.title, row.message) is False:
+                    failures[row.id] = DeliveryError("The notification could not be shown")
+            except Exception as e:
+                failures[row.id] = e
+        return failures
+
+class InAppChannel:
+    """
+    The notification history: a batch is one add_many() transaction.
+    
+    on_delivered(row) is called for each row afterwards, e.g. to show it
+    in an open window.
+    """
+    
+    name = CHANNEL_IN_APP
+    
+    def __init__(self, log=notifications_repo, on_delivered=None):
+        self.log = log
+        self.on_delivered = on_delivered
+    
+    def send(self, rows):
+        # A failed transaction fails the whole batch, which the worker retries
+        self.log.add_many([(row.user_id, row.message) for row in rows])
+        if self.on_delivered:
+            for row in rows:
+                try:
+                    self.on_delivered(row)
+                except Exception as e:
+                    print(f"Error showing notification {row.id}: {e}")
+        return {}
+
+def _permanent(error):
+    """Whether an SMTP error will not go away by retrying (a 5xx reply)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+class EmailChannel:
+    """Email over SMTP, one connection per batch"""
+    
+    name = CHANNEL_EMAIL
+    
+    def __init__(self, host, port=25, sender="medical-assistant@localhost", username=None, password=None,
+                 starttls=False, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+    
+    def _message(self, row):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = row.email
+        message["Subject"] = row.title
+        message.set_content(row.message)
+        return message
+    
+    def send(self, rows):
+        failures = {}
+        deliverable = []
+        for row in rows:
+            if row.email and "@" in row.email:
+                deliverable.append(row)
+            else:
+                failures[row.id] = DeliveryError("The user has no email address", retry=False)
+        if not deliverable:
+            return failures
+        
+        sent = set()
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password or "")
+                for row in deliverable:
+                    try:
+                        smtp.send_message(self._message(row))
+                        sent.add(row.id)
+                    except smtplib.SMTPServerDisconnected:
+                        raise
+                    except smtplib.SMTPException as e:
+                        failures[row.id] = DeliveryError(str(e), retry=not _permanent(e))
+        except (OSError, smtplib.SMTPException) as e:
+            # No connection, or it broke: what was not sent is retried
+            for row in deliverable:
+                if row.id not in sent:
+                    failures.setdefault(row.id, DeliveryError(f"SMTP {self.host}:{self.port}: {e}"))
+        return failures
+
+def email_channel_from_environment():
+    """An EmailChannel for MEDICAL_SMTP_HOST, or None if it is not set"""
+    host = os.environ.get("MEDICAL_SMTP_HOST")
+    if not host:
+        return None
+    try:
+        port = int(os.environ.get("MEDICAL_SMTP_PORT", "25"))
+    except ValueError:
+        print(f"Ignoring invalid MEDICAL_SMTP_PORT: {os.environ.get('MEDICAL_SMTP_PORT')}")
+        port = 25
+    return EmailChannel(
+        host, port,
+        sender=os.environ.get("MEDICAL_SMTP_SENDER") or "medical-assistant@localhost",
+        username=os.environ.get("MEDICAL_SMTP_USER"),
+        password=os.environ.get("MEDICAL_SMTP_PASSWORD"),
+        starttls=os.environ.get("MEDICAL_SMTP_STARTTLS", "").lower() in ("1", "true", "yes", "on"),
+    )
+
+def delivery_channels(show_desktop=None, on_in_app=None):
+    """
+    The channels this process can deliver: desktop notifications through
+    show_desktop(title, message) if given, the in-app history, and email
+    when an SMTP server is configured.
+    """
+    channels = []
+    if show_desktop is not None:
+        channels.append(DesktopChannel(show_desktop))
+    channels.append(InAppChannel(on_delivered=on_in_app))
+    email = email_channel_from_environment()
+    if email is not None:
+        channels.append(email)
+    return channels
+
+def outbox_for(channels, **kwargs):
+    """An Outbox that queues only on the given channels, so each row has a sender"""
+    return Outbox(channels=[channel.name for channel in channels], **kwargs)
+
+# Every running worker of this process, woken when rows are queued
+_workers = weakref.WeakSet()
+
+def _wake_workers():
+    for worker in list(_workers):
+        worker.wake()
+
+def stop_workers():
+    """Stop every outbox worker (used at shutdown)"""
+    for worker in list(_workers):
+        worker.stop(wait=False)
+
+class OutboxWorker:
+    """
+    Delivers outbox rows on a thread.
+    
+    Only the given channels are served, and with user_id only that user's
+    rows: a desktop session delivers its own user's desktop notifications
+    while the daemon sends everyone's email. rate_limits ({channel:
+    notification_dispatcher.RateLimit}) caps the rows claimed per window;
+    the rest wait in the table.
+    """
+    
+    def __init__(self, channels, user_id=None, repo=outbox_repo, batch_size=BATCH_SIZE,
+                 poll_interval=POLL_INTERVAL, rate_limits=None, max_attempts=MAX_ATTEMPTS,
+                 backoff=backoff_delay, clock=datetime.now):
+        self.channels = {channel.name: channel for channel in channels}
+        self.user_id = user_id
+        self.repo = repo
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.rate_limits = dict(rate_limits or {})
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.clock = clock
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._woken = False
+        self._stopped = False
+        self._thread = None
+        self._claims = itertools.count()
+        # channel -> times of the rows sent in the current rate window
+        self._sent_at = {name: deque() for name in self.channels}
+        self._maintained_at = None
+        
+        # Statistics
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+                self._thread.start()
+        _workers.add(self)
+        return self
+    
+    def stop(self, wait=True):
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+            thread, self._thread = self._thread, None
+        _workers.discard(self)
+        
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=10)
+    
+    def wake(self):
+        """Look for rows now; called when this process queued some"""
+        with self._lock:
+            self._woken = True
+            self._wakeup.notify()
+    
+    def _allowance(self, name, now):
+        """Rows channel name may send now under its rate limit"""
+        limit = self.rate_limits.get(name)
+        if limit is None:
+            return self.batch_size
+        sent_at = self._sent_at[name]
+        while sent_at and sent_at[0] <= now - timedelta(seconds=limit.seconds):
+            sent_at.popleft()
+        return min(self.batch_size, limit.count - len(sent_at))
+    
+    def run_once(self):
+        """Claim and send one batch per channel; returns the rows handled"""
+        handled = 0
+        for name, channel in self.channels.items():
+            now = self.clock()
+            allowance = self._allowance(name, now)
+            if allowance <= 0:
+                continue
+            
+            token = f"{os.getpid()}-{id(self):x}-{next(self._claims)}"
+            rows = self.repo.claim(token, _stamp(now), name, allowance, self.user_id)
+            if not rows:
+                continue
+            
+            try:
+                failures = channel.send(rows)
+            except Exception as e:
+                failures = {row.id: e for row in rows}
+            self._finish(token, name, rows, failures)
+            handled += len(rows)
+        return handled
+    
+    def _finish(self, token, name, rows, failures):
+        """Record a batch's results in one transaction"""
+        now = self.clock()
+        sent, retries, failed = [], [], []
+        for row in rows:
+            error = failures.get(row.id)
+            if error is None:
+                sent.append((_stamp(now), row.id))
+            elif getattr(error, "retry", True) and row.attempts < self.max_attempts:
+                retry_at = now + timedelta(seconds=self.backoff(row.attempts))
+                retries.append((_stamp(retry_at), str(error), row.id))
+            else:
+                failed.append((str(error), row.id))
+        
+        self.repo.finish(token, sent, retries, failed)
+        if name in self.rate_limits:
+            self._sent_at[name].extend([now] * len(sent))
+        self.sent += len(sent)
+        self.retried += len(retries)
+        self.failed += len(failed)
+        self.batches += 1
+    
+    def _maintain(self):
+        """Hand back stale claims and delete old rows, every MAINTENANCE_INTERVAL"""
+        now = self.clock()
+        if self._maintained_at is not None and (now - self._maintained_at).total_seconds() < MAINTENANCE_INTERVAL:
+            return
+        self._maintained_at = now
+        self.repo.reclaim(_stamp(now - CLAIM_TIMEOUT))
+        self.repo.purge(_stamp(now - SENT_RETENTION))
+        self.repo.expire(_stamp(now - PENDING_EXPIRY), _stamp(now - FAILED_RETENTION))
+    
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if self._stopped:
+                        return
+                    self._woken = False
+                
+                try:
+                    self._maintain()
+                    handled = self.run_once()
+                except Exception as e:
+                    print(f"Error delivering notifications: {e}")
+                    handled = 0
+                
+                if handled:
+                    # More may be waiting
+                    continue
+                with self._lock:
+                    if not (self._woken or self._stopped):
+                        self._wakeup.wait(self.poll_interval)
+        finally:
+            connection_manager.close_thread_connection()
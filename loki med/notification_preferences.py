@@ -0,0 +1,81 @@
+"""
+Notification preferences of each user.
+The Settings dialog saves them to preferences/<username>.json; this module
+reads them for the notification outbox and decides which channels a
+notification of a category goes to. Files are re-read only when they change.
+"""
+
+import os
+import json
+import threading
+
+from repositories import users_repo
+
+# Folder the Settings dialog writes to
+PREFERENCES_FOLDER = "preferences"
+
+# Categories of the "Notify me about" checkboxes
+CATEGORY_APPOINTMENTS = "Appointments"
+CATEGORY_MEDICATION = "Medication Reminders"
+
+# Channels of the outbox
+CHANNEL_DESKTOP = "desktop"
+CHANNEL_EMAIL = "email"
+CHANNEL_IN_APP = "in_app"
+
+# What a user without a preferences file gets (the dialog's defaults)
+DEFAULT_PREFERENCES = {
+    "email_notifications": True,
+    "app_notifications": True,
+    "notification_types": {},
+}
+
+# username -> (file mtime, preferences)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def load_preferences(username):
+    """The saved preferences of a user merged over the defaults"""
+    path = os.path.join(PREFERENCES_FOLDER, f"{username}.json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return dict(DEFAULT_PREFERENCES)
+    
+    with _cache_lock:
+        cached = _cache.get(username)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    preferences = dict(DEFAULT_PREFERENCES)
+    try:
+        with open(path, "r") as f:
+            preferences.update(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"Error reading preferences of {username}: {e}")
+    
+    with _cache_lock:
+        _cache[username] = (mtime, preferences)
+    return preferences
+
+def channels_for(preferences, category):
+    """The channels a notification of category goes to under preferences"""
+    if not preferences.get("notification_types", {}).get(category, True):
+        return ()
+    
+    channels = []
+    if preferences.get("app_notifications", True):
+        channels += [CHANNEL_DESKTOP, CHANNEL_IN_APP]
+    if preferences.get("email_notifications", True):
+        channels.append(CHANNEL_EMAIL)
+    return tuple(channels)
+
+def channels_by_user(user_ids, category):
+    """{user id: channels} for a category, with one username query for all users"""
+    usernames = users_repo.usernames(set(user_ids))
+    return {
+        user_id: channels_for(
+            load_preferences(usernames[user_id]) if user_id in usernames else DEFAULT_PREFERENCES, category
+        )
+        for user_id in set(user_ids)
+    }
@@ -4,14 +4,14 @@ Purchase medicine tab UI implementation with improved quantity field visibility
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font, Canvas, Frame
-import sqlite3
 import os
 import json
 from datetime import datetime
 from PIL import Image, ImageTk
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from services import ServiceError, cart as cart_service
+from db_worker import run_in_background, show_tree_placeholder, clear_tree, tree_items, PLACEHOLDER_IID
 
 def create_custom_card(parent, title=None, padding=10):
     """Create a custom card widget with a title"""
@@ -49,13 +49,7 @@ def create_custom_card(parent, title=None, padding=10):
 def load_medicines():
     """Load medicines from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id, name, price, description, quantity FROM medications ORDER BY name")
-        medicines = cursor.fetchall()
-        
-        conn.close()
+        medicines = cart_service.catalog()
         
         if not medicines:
             # Return default medicines if none found
@@ -98,88 +92,15 @@ def add_to_cart(catalog_tree, medicine_var, quantity_var, cart_tree, total_label
         selected = catalog_tree.selection()
         if selected:
             medicine_name = catalog_tree.item(selected[0])["values"][0]
-        
-        if not medicine_name:
-            messagebox.showerror("Error", "Please select a medicine")
-            return
     
-    # Get quantity
+    # Checks the quantity and stock, merging with a line already in the cart
+    quantity = quantity_var.get()
     try:
-        quantity = int(quantity_var.get())
-        if quantity <= 0:
-            messagebox.showerror("Error", "Please enter a valid quantity")
-            return
-    except ValueError:
-        messagebox.showerror("Error", "Please enter a valid quantity")
-        return
-    
-    # Get medicine details from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, price, quantity FROM medications WHERE name = ?", (medicine_name,))
-    result = cursor.fetchone()
-    
-    if not result:
-        messagebox.showerror("Error", "Medicine not found")
-        conn.close()
+        cart_service.add_to_cart(username, medicine_name, quantity)
+    except ServiceError as e:
+        messagebox.showerror("Error", str(e))
         return
     
-    medicine_id, price, available_quantity = result
-    
-    # Check if enough quantity is available
-    if quantity > available_quantity:
-        messagebox.showerror("Error", f"Only {available_quantity} units available")
-        conn.close()
-        return
-    
-    # Calculate subtotal
-    subtotal = price * quantity
-    
-    # Add to cart_items table
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    result = cursor.fetchone()
-    
-    if not result:
-        messagebox.showerror("Error", "User not found")
-        conn.close()
-        return
-    
-    user_id = result[0]
-    
-    # Check if item already exists in cart
-    cursor.execute(
-        "SELECT id, quantity FROM cart_items WHERE user_id = ? AND medicine_id = ?",
-        (user_id, medicine_id)
-    )
-    existing_item = cursor.fetchone()
-    
-    if existing_item:
-        # Update existing item
-        cart_item_id, current_quantity = existing_item
-        
-        new_quantity = current_quantity + quantity
-        
-        # Check if new quantity exceeds available stock
-        if new_quantity > available_quantity:
-            messagebox.showerror("Error", f"Cannot add {quantity} more units. Only {available_quantity - current_quantity} additional units available.")
-            conn.close()
-            return
-        
-        cursor.execute(
-            "UPDATE cart_items SET quantity = ?, price = ? WHERE id = ?",
-            (new_quantity, price, cart_item_id)
-        )
-    else:
-        # Insert new item
-        cursor.execute(
-            "INSERT INTO cart_items (user_id, medicine_id, quantity, price) VALUES (?, ?, ?, ?)",
-            (user_id, medicine_id, quantity, price)
-        )
-    
-    conn.commit()
-    conn.close()
-    
     # Update the cart display
     update_cart_display(cart_tree, total_label, username)
     
@@ -189,61 +110,41 @@ def add_to_cart(catalog_tree, medicine_var, quantity_var, cart_tree, total_label
     messagebox.showinfo("Success", f"{quantity} units of {medicine_name} added to cart")
 
 def update_cart_display(cart_tree, total_label, username):
-    """Update the cart display with items from the database"""
-    try:
-        # Clear existing items
-        for item in cart_tree.get_children():
-            cart_tree.delete(item)
-        
-        # Get cart items from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
+    """Update the cart display with items from the database (loaded in the background)"""
+    show_tree_placeholder(cart_tree)
+    
+    def fetch():
+        try:
+            return cart_service.get_cart(username)
+        except ServiceError:
             # If user not found in the database
-            total_label.config(text="Total: ₹0.00")
-            conn.close()
-            return
-        
-        user_id = result[0]
-        
-        # Get cart items with medicine names
-        cursor.execute("""
-            SELECT c.id, m.name, c.quantity, m.price, (c.quantity * m.price) as subtotal
-            FROM cart_items c
-            JOIN medications m ON c.medicine_id = m.id
-            WHERE c.user_id = ?
-        """, (user_id,))
-        
-        cart_items = cursor.fetchall()
-        conn.close()
+            return cart_service.Cart([], 0)
+    
+    def show(cart):
+        clear_tree(cart_tree)
         
         # Add items to treeview
-        total_amount = 0
-        for item in cart_items:
-            cart_id, name, quantity, price, subtotal = item
+        for cart_id, name, quantity, price, subtotal in cart.lines:
             cart_tree.insert("", "end", iid=cart_id, values=(
                 name,
                 quantity,
                 f"₹{price:.2f}",
                 f"₹{subtotal:.2f}"
             ))
-            total_amount += subtotal
         
         # Update total label
-        total_label.config(text=f"Total: ₹{total_amount:.2f}")
-        
-    except Exception as e:
+        total_label.config(text=f"Total: ₹{cart.total:.2f}")
+    
+    def failed(e):
         print(f"Error updating cart: {e}")
+        clear_tree(cart_tree)
         total_label.config(text="Total: ₹0.00")
+    
+    return run_in_background(cart_tree, "cart", fetch, on_done=show, on_error=failed)
 
 def remove_from_cart(cart_tree, total_label, username):
     """Remove selected item from the cart"""
-    selected = cart_tree.selection()
+    selected = [item for item in cart_tree.selection() if item != PLACEHOLDER_IID]
     if not selected:
         messagebox.showinfo("Info", "Please select an item to remove")
         return
@@ -263,12 +164,7 @@ def remove_from_cart(cart_tree, total_label, username):
     
     try:
         # Remove from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM cart_items WHERE id = ?", (cart_item_id,))
-        conn.commit()
-        conn.close()
+        cart_service.remove_line(username, cart_item_id)
         
         # Update display
         update_cart_display(cart_tree, total_label, username)
@@ -280,7 +176,7 @@ def remove_from_cart(cart_tree, total_label, username):
 
 def clear_cart(cart_tree, total_label, username):
     """Clear all items from cart"""
-    if not cart_tree.get_children():
+    if not tree_items(cart_tree):
         messagebox.showinfo("Info", "Cart is already empty")
         return
     
@@ -291,19 +187,7 @@ def clear_cart(cart_tree, total_label, username):
     
     try:
         # Clear from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if result:
-            user_id = result[0]
-            cursor.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-            conn.commit()
-        
-        conn.close()
+        cart_service.clear_cart(username)
         
         # Update display
         update_cart_display(cart_tree, total_label, username)
@@ -315,7 +199,7 @@ def clear_cart(cart_tree, total_label, username):
 
 def create_enhanced_payment_window(parent, cart_tree, total_label, username):
     """Create an enhanced payment window with all payment methods"""
-    if not cart_tree.get_children():
+    if not tree_items(cart_tree):
         messagebox.showinfo("Info", "Your cart is empty")
         return
     
@@ -377,7 +261,7 @@ def create_enhanced_payment_window(parent, cart_tree, total_label, username):
     summary_tree.pack(fill="x", padx=10, pady=10)
     
     # Copy items from cart to summary
-    for item_id in cart_tree.get_children():
+    for item_id in tree_items(cart_tree):
         item_values = cart_tree.item(item_id, "values")
         name, quantity, price, subtotal = item_values
         summary_tree.insert("", "end", values=(name, quantity, subtotal))
@@ -397,9 +281,8 @@ def create_enhanced_payment_window(parent, cart_tree, total_label, username):
     payment_frame.pack(fill="x", pady=(0, 20))
     
     payment_var = tk.StringVar(value="Credit/Debit Card")
-    methods = ["Credit/Debit Card", "UPI", "Net Banking", "Cash on Delivery"]
     
-    for method in methods:
+    for method in cart_service.PAYMENT_METHODS:
         ttk.Radiobutton(payment_frame, text=method, variable=payment_var, value=method).pack(anchor="w", padx=20, pady=5)
     
     # Create all payment method frames
@@ -537,7 +420,7 @@ def create_enhanced_payment_window(parent, cart_tree, total_label, username):
     
     cod_info = ttk.Label(
         cod_frame,
-        text="Pay in cash at the time of delivery. Additional COD fee of ₹40 will be charged.",
+        text=f"Pay in cash at the time of delivery. Additional COD fee of ₹{cart_service.COD_FEE} will be charged.",
         wraplength=400,
         justify="left"
     )
@@ -586,51 +469,38 @@ def create_enhanced_payment_window(parent, cart_tree, total_label, username):
     def process_payment():
         selected_method = payment_var.get()
         
-        # Validate input based on payment method
-        if selected_method == "Credit/Debit Card":
-            card_num = card_entry.get().strip()
-            name = name_entry.get().strip()
-            cvv = cvv_entry.get().strip()
-            month = month_var.get()
-            year = year_var.get()
-            
-            if not card_num or len(card_num) < 13:
-                messagebox.showerror("Error", "Please enter a valid card number")
-                return
-                
-            if not name:
-                messagebox.showerror("Error", "Please enter the name on card")
-                return
-                
-            if not cvv or len(cvv) < 3:
-                messagebox.showerror("Error", "Please enter a valid CVV")
-                return
-                
-            if month == "MM" or year == "YY":
-                messagebox.showerror("Error", "Please select expiry date")
-                return
-        
-        elif selected_method == "Net Banking":
-            if not bank_var.get() and not bank_combo.get():
-                messagebox.showerror("Error", "Please select a bank")
-                return
-        
-        elif selected_method == "Cash on Delivery":
-            address = address_entry.get("1.0", "end-1c").strip()
-            if not address or address == "Enter your complete delivery address here...":
-                messagebox.showerror("Error", "Please enter your delivery address")
-                return
+        # Placeholders count as empty fields
+        address = address_entry.get("1.0", "end-1c").strip()
+        if address == "Enter your complete delivery address here...":
+            address = ""
+        details = {
+            "card_number": card_entry.get(),
+            "card_name": name_entry.get(),
+            "cvv": cvv_entry.get(),
+            "expiry_month": "" if month_var.get() == "MM" else month_var.get(),
+            "expiry_year": "" if year_var.get() == "YY" else year_var.get(),
+            "bank": bank_var.get() or bank_combo.get(),
+            "address": address,
+        }
+        
+        # Takes the ordered quantities out of stock and empties the cart
+        try:
+            order = cart_service.checkout(username, selected_method, details)
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
+            return
         
         # Close payment window
         payment_window.destroy()
+        update_cart_display(cart_tree, total_label, username)
         
         # Show success message
         success_msg = f"Your order has been placed successfully!\n\n"
         success_msg += f"Payment method: {selected_method}\n"
-        success_msg += f"Total amount: ₹{total_amount:.2f}\n\n"
+        success_msg += f"Total amount: ₹{order.total:.2f}\n\n"
         
-        if selected_method == "Cash on Delivery":
-            success_msg += f"Total payable at delivery: ₹{total_amount + 40:.2f} (includes ₹40 COD fee)\n\n"
+        if order.fee:
+            success_msg += f"Total payable at delivery: ₹{order.payable:.2f} (includes ₹{order.fee} COD fee)\n\n"
         
         success_msg += "Your medicines will be delivered within 2-3 business days."
         
@@ -675,101 +545,6 @@ def create_enhanced_payment_window(parent, cart_tree, total_label, username):
 def checkout(cart_tree, total_label, parent, username):
     """Process checkout by opening the enhanced payment window"""
     create_enhanced_payment_window(parent, cart_tree, total_label, username)
-    if not cart_tree.get_children():
-        messagebox.showinfo("Info", "Your cart is empty")
-        return
-    
-    # Get total amount
-    total_text = total_label.cget("text")
-    total_amount = float(total_text.replace("Total: ₹", ""))
-    
-    # Show payment window
-    payment_window = tk.Toplevel(parent)
-    payment_window.title("Complete Payment")
-    payment_window.geometry("500x500")
-    payment_window.transient(parent)
-    payment_window.grab_set()
-    
-    # Main frame
-    main_frame = ttk.Frame(payment_window, padding=20)
-    main_frame.pack(fill="both", expand=True)
-    
-    # Title
-    title_label = ttk.Label(main_frame, text="Complete Your Payment", font=("Segoe UI", 16, "bold"))
-    title_label.pack(pady=(0, 20))
-    
-    # Order summary
-    summary_frame = ttk.LabelFrame(main_frame, text="Order Summary")
-    summary_frame.pack(fill="x", pady=(0, 20))
-    
-    # Create a small treeview to list items
-    summary_tree = ttk.Treeview(summary_frame, columns=("Item", "Qty", "Price"), show="headings", height=5)
-    summary_tree.heading("Item", text="Item")
-    summary_tree.heading("Qty", text="Qty")
-    summary_tree.heading("Price", text="Price")
-    
-    summary_tree.column("Item", width=200)
-    summary_tree.column("Qty", width=50, anchor="center")
-    summary_tree.column("Price", width=100, anchor="e")
-    
-    summary_tree.pack(fill="x", padx=10, pady=10)
-    
-    # Copy items from cart to summary
-    for item_id in cart_tree.get_children():
-        item_values = cart_tree.item(item_id, "values")
-        name, quantity, price, subtotal = item_values
-        summary_tree.insert("", "end", values=(name, quantity, subtotal))
-    
-    # Show total
-    total_frame = ttk.Frame(summary_frame)
-    total_frame.pack(fill="x", pady=10, padx=10)
-    
-    total_amount_label = ttk.Label(total_frame, text=f"Total Amount: ", font=("Segoe UI", 11, "bold"))
-    total_amount_label.pack(side="left")
-    
-    total_value_label = ttk.Label(total_frame, text=f"₹{total_amount:.2f}", font=("Segoe UI", 11, "bold"))
-    total_value_label.pack(side="right")
-    
-    # Payment method selection
-    payment_frame = ttk.LabelFrame(main_frame, text="Payment Method")
-    payment_frame.pack(fill="x", pady=(0, 20))
-    
-    payment_var = tk.StringVar(value="Credit/Debit Card")
-    methods = ["Credit/Debit Card", "UPI", "Net Banking", "Cash on Delivery"]
-    
-    for method in methods:
-        ttk.Radiobutton(payment_frame, text=method, variable=payment_var, value=method).pack(anchor="w", padx=20, pady=5)
-    
-    # Credit card info frame (visible only for card payment)
-    card_frame = ttk.Frame(main_frame)
-    card_frame.pack(fill="x", pady=(0, 20))
-    
-    ttk.Label(card_frame, text="Card Number:").pack(anchor="w", pady=(0, 5))
-    card_entry = ttk.Entry(card_frame)
-    card_entry.pack(fill="x", pady=(0, 10))
-    
-    exp_frame = ttk.Frame(card_frame)
-    exp_frame.pack(fill="x", pady=(0, 10))
-    
-    ttk.Label(exp_frame, text="Expiry Date:").pack(side="left", padx=(0, 5))
-    
-    month_var = tk.StringVar(value="MM")
-    month_combo = ttk.Combobox(exp_frame, textvariable=month_var, values=[f"{i:02d}" for i in range(1, 13)], width=5)
-    month_combo.pack(side="left", padx=(0, 5))
-    
-    ttk.Label(exp_frame, text="/").pack(side="left", padx=(0, 5))
-    
-    year_var = tk.StringVar(value="YY")
-    year_combo = ttk.Combobox(exp_frame, textvariable=year_var, 
-                             values=[str(i)[-2:] for i in range(2025, 2035)], width=5)
-    year_combo.pack(side="left")
-    
-    cvv_frame = ttk.Frame(card_frame)
-    cvv_frame.pack(fill="x")
-    
-    ttk.Label(cvv_frame, text="CVV:").pack(side="left", padx=(0, 5))
-    cvv_entry = ttk.Entry(cvv_frame, width=5, show="*")
-    cvv_entry.pack(side="left")
 
 
 def create_purchase_medicine_tab(parent, username):
@@ -4,28 +4,20 @@ Medicine purchase tab UI
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-import os
 import json
 from datetime import datetime
 
 # Import UI components
 from widgets import create_custom_card, center_window
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import cart_repo, OutOfStockError
+from medication_catalog import medication_catalog
+from user_session import resolve_user_id
 
 def load_medicines():
     """Load medicines from the database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, name, price, description, quantity FROM medications ORDER BY name")
-    medicines = cursor.fetchall()
-    
-    conn.close()
-    
-    return medicines
+    return medication_catalog.list_all()
 
 def update_cart_display(cart_tree, total_label, username):
     """Update the cart display with items from the database"""
@@ -33,30 +25,14 @@ def update_cart_display(cart_tree, total_label, username):
     for item in cart_tree.get_children():
         cart_tree.delete(item)
     
-    # Get cart items from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     # Get user ID
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    result = cursor.fetchone()
+    user_id = resolve_user_id(username)
     
-    if not result:
-        conn.close()
+    if user_id is None:
         return
     
-    user_id = result[0]
-    
     # Get cart items with medicine names
-    cursor.execute("""
-        SELECT c.id, m.name, c.quantity, m.price, (c.quantity * m.price) as subtotal
-        FROM cart_items c
-        JOIN medications m ON c.medicine_id = m.id
-        WHERE c.user_id = ?
-    """, (user_id,))
-    
-    cart_items = cursor.fetchall()
-    conn.close()
+    cart_items = cart_repo.lines_for_user(user_id)
     
     # Add items to treeview
     total_amount = 0
@@ -84,12 +60,7 @@ def remove_from_cart(cart_tree, total_label, username):
     cart_item_id = selected_item[0]
     
     # Remove from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM cart_items WHERE id = ?", (cart_item_id,))
-    conn.commit()
-    conn.close()
+    cart_repo.remove_line(cart_item_id)
     
     # Update display
     update_cart_display(cart_tree, total_label, username)
@@ -102,23 +73,14 @@ def clear_cart(cart_tree, total_label, username):
     if not messagebox.askyesno("Confirm", "Are you sure you want to clear your cart?"):
         return
     
-    # Clear from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     # Get user ID
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    result = cursor.fetchone()
+    user_id = resolve_user_id(username)
     
-    if not result:
-        conn.close()
+    if user_id is None:
         return
     
-    user_id = result[0]
-    
-    cursor.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    # Clear from database
+    cart_repo.clear(user_id)
     
     # Update display
     update_cart_display(cart_tree, total_label, username)
@@ -192,39 +154,20 @@ def show_payment_screen(amount, parent, cart_tree, total_label, username):
     
     # Function to handle payment completion
     def complete_payment():
-        # Process the order
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if result:
-            user_id = result[0]
-            
-            # Get ordered items to update inventory
-            cursor.execute("""
-                SELECT medicine_id, quantity
-                FROM cart_items
-                WHERE user_id = ?
-            """, (user_id,))
-            
-            ordered_items = cursor.fetchall()
-            
-            # Update inventory quantities
-            for medicine_id, quantity in ordered_items:
-                cursor.execute(
-                    "UPDATE medications SET quantity = quantity - ? WHERE id = ?",
-                    (quantity, medicine_id)
+        if user_id is not None:
+            # Update inventory quantities and clear the cart in one transaction
+            try:
+                cart_repo.checkout(user_id)
+            except OutOfStockError as e:
+                messagebox.showerror(
+                    "Out of Stock",
+                    f"Only {e.available} units of {e.medicine} are left. Please update your cart.",
+                    parent=payment_window
                 )
-            
-            # Clear cart
-            cursor.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-            
-            conn.commit()
-        
-        conn.close()
+                return
         
         # Update the cart display
         update_cart_display(cart_tree, total_label, username)
@@ -282,45 +225,28 @@ def add_to_cart(medicine_var, quantity_var, cart_tree, total_label, username):
         return
     
     # Get medicine details from database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    medicine = medication_catalog.by_name(medicine_name)
     
-    cursor.execute("SELECT id, price, quantity FROM medications WHERE name = ?", (medicine_name,))
-    result = cursor.fetchone()
-    
-    if not result:
+    if not medicine:
         messagebox.showerror("Error", "Medicine not found")
-        conn.close()
         return
     
-    medicine_id, price, available_quantity = result
+    medicine_id, price, available_quantity = medicine.id, medicine.price, medicine.quantity
     
     # Check if enough quantity is available
     if quantity > available_quantity:
         messagebox.showerror("Error", f"Only {available_quantity} units available")
-        conn.close()
         return
     
-    # Calculate subtotal
-    subtotal = price * quantity
-    
     # Add to cart_items table
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    result = cursor.fetchone()
+    user_id = resolve_user_id(username)
     
-    if not result:
+    if user_id is None:
         messagebox.showerror("Error", "User not found")
-        conn.close()
         return
     
-    user_id = result[0]
-    
     # Check if item already exists in cart
-    cursor.execute(
-        "SELECT id, quantity FROM cart_items WHERE user_id = ? AND medicine_id = ?",
-        (user_id, medicine_id)
-    )
-    existing_item = cursor.fetchone()
+    existing_item = cart_repo.find_line(user_id, medicine_id)
     
     if existing_item:
         # Update existing item
@@ -331,22 +257,12 @@ def add_to_cart(medicine_var, quantity_var, cart_tree, total_label, username):
         # Check if new quantity exceeds available stock
         if new_quantity > available_quantity:
             messagebox.showerror("Error", f"Cannot add {quantity} more units. Only {available_quantity - current_quantity} additional units available.")
-            conn.close()
             return
         
-        cursor.execute(
-            "UPDATE cart_items SET quantity = ?, price = ? WHERE id = ?",
-            (new_quantity, price, cart_item_id)
-        )
+        cart_repo.set_quantity(cart_item_id, new_quantity, price)
     else:
         # Insert new item
-        cursor.execute(
-            "INSERT INTO cart_items (user_id, medicine_id, quantity, price) VALUES (?, ?, ?, ?)",
-            (user_id, medicine_id, quantity, price)
-        )
-    
-    conn.commit()
-    conn.close()
+        cart_repo.add_line(user_id, medicine_id, quantity, price)
     
     # Update the cart display
     update_cart_display(cart_tree, total_label, username)
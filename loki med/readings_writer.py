@@ -0,0 +1,270 @@
+"""
+Write-behind writer for health_readings.
+Sensor feeds produce readings many times per second; instead of one
+connection, lookup and commit per reading they are collected in memory and
+written in a single executemany transaction when the buffer is full or the
+flush interval has passed.
+"""
+
+import os
+import json
+import atexit
+import threading
+from datetime import datetime, timezone
+
+from db_manager import DB_FOLDER
+from repositories import readings_repo
+
+# Durability modes, from fastest to safest:
+#   "buffered" - readings only live in memory until flushed; a crash loses
+#                at most one flush interval of readings
+#   "spooled"  - every reading is also appended to a spool file that is
+#                replayed at the next start, so an application crash loses
+#                nothing (an OS crash or power cut may lose the OS cache)
+#   "fsync"    - like "spooled", but the spool is fsynced on every reading
+DURABILITY_MODES = ("buffered", "spooled", "fsync")
+
+# Spool file for the "spooled" and "fsync" modes
+SPOOL_PATH = os.path.join(DB_FOLDER, "health_readings.spool")
+
+def _utc_timestamp():
+    """Same format and clock as the column's CURRENT_TIMESTAMP default"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+class ReadingsWriter:
+    """
+    Buffered writer for health readings.
+    
+    add() only appends to the buffer (and the spool), so it is cheap enough
+    to call from a sensor thread. A background thread flushes the buffer
+    when it holds max_batch readings or flush_interval seconds after the
+    first unflushed reading. close() flushes what is left.
+    """
+    
+    def __init__(self, repo=readings_repo, max_batch=200, flush_interval=1.0,
+                 durability="spooled", spool_path=SPOOL_PATH):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        
+        self.repo = repo
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.spool_path = spool_path
+        
+        self._buffer = []
+        self._spool = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Serialises flushes so batches reach the database in order
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        # Spools moved aside for batches that are not committed yet
+        self._flushing_spools = []
+        self._spool_seq = 0
+        
+        # Statistics
+        self.rows_written = 0
+        self.flushes = 0
+    
+    def add(self, user_id, reading_type, value, notes=None, timestamp=None):
+        """Queue a reading; the timestamp is taken now, not at flush time"""
+        row = (user_id, reading_type, str(value), notes, timestamp or _utc_timestamp())
+        
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ReadingsWriter is closed")
+            self._start()
+            
+            if self.durability != "buffered":
+                self._spool_row(row)
+            
+            self._buffer.append(row)
+            if len(self._buffer) >= self.max_batch or len(self._buffer) == 1:
+                # Full batch, or the first reading starts the flush timer
+                self._wakeup.notify()
+    
+    def add_many(self, readings):
+        """Queue (user_id, reading_type, value, notes, timestamp) tuples"""
+        for user_id, reading_type, value, notes, timestamp in readings:
+            self.add(user_id, reading_type, value, notes, timestamp)
+    
+    @property
+    def pending(self):
+        """Number of readings not yet written to the database"""
+        with self._lock:
+            return len(self._buffer)
+    
+    def _start(self):
+        """Start the flush thread (called with the lock held)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="readings-writer", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            with self._lock:
+                # Sleep until there is something to write
+                while not self._buffer and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                
+                # Give the batch time to fill, unless it is already full
+                if len(self._buffer) < self.max_batch:
+                    self._wakeup.wait(self.flush_interval)
+            
+            try:
+                self.flush()
+            except Exception as e:
+                # The readings are kept and retried at the next flush
+                print(f"Error flushing health readings: {e}")
+                with self._lock:
+                    if not self._closed:
+                        self._wakeup.wait(self.flush_interval)
+    
+    def flush(self):
+        """Write every buffered reading in one transaction; returns the row count"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                if batch:
+                    self._rotate_spool()
+            
+            if not batch:
+                return 0
+            
+            try:
+                self.repo.add_many(batch)
+            except Exception:
+                # Put the batch back in front of newer readings; its spool
+                # stays until a later flush commits it
+                with self._lock:
+                    self._buffer[:0] = batch
+                raise
+            
+            # Everything in the moved spools is stored now
+            for path in self._flushing_spools:
+                os.remove(path)
+            self._flushing_spools = []
+            
+            self.rows_written += len(batch)
+            self.flushes += 1
+            return len(batch)
+    
+    def close(self):
+        """Flush the remaining readings and stop the flush thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify_all()
+            thread = self._thread
+        
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                if self._spool:
+                    self._spool.close()
+                    self._spool = None
+    
+    # Spool handling
+    
+    def _spool_row(self, row):
+        """Append a reading to the spool (called with the lock held)"""
+        if self._spool is None:
+            folder = os.path.dirname(self.spool_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            self._spool = open(self.spool_path, "a", encoding="utf-8")
+        
+        self._spool.write(json.dumps(row) + "\n")
+        self._spool.flush()
+        if self.durability == "fsync":
+            os.fsync(self._spool.fileno())
+    
+    def _rotate_spool(self):
+        """
+        Move the spool aside for the batch being flushed (called with the lock held).
+        
+        Readings added during the flush go to a fresh spool; the old one is
+        deleted once its batch is committed.
+        """
+        if self._spool is None:
+            return
+        
+        self._spool.close()
+        self._spool = None
+        
+        self._spool_seq += 1
+        flushing = f"{self.spool_path}.{os.getpid()}.{self._spool_seq}.flushing"
+        os.replace(self.spool_path, flushing)
+        self._flushing_spools.append(flushing)
+    
+    def recover(self):
+        """
+        Replay readings left in spool files by a previous run.
+        
+        A spool may belong to a batch that was committed just before the
+        crash, so replayed rows are skipped when an identical reading is
+        already stored. Returns the number of rows written.
+        """
+        folder = os.path.dirname(self.spool_path) or "."
+        base = os.path.basename(self.spool_path)
+        if not os.path.isdir(folder):
+            return 0
+        
+        with self._lock:
+            # Never replay spools this writer is still responsible for
+            if self._spool is not None or self._flushing_spools:
+                return 0
+            
+            paths = sorted(
+                os.path.join(folder, name) for name in os.listdir(folder)
+                if name == base or (name.startswith(base + ".") and name.endswith(".flushing"))
+            )
+            
+            rows = []
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rows.append(tuple(json.loads(line)))
+                        except ValueError:
+                            # A line cut short by the crash
+                            continue
+            
+            written = self.repo.add_missing_many(rows) if rows else 0
+            for path in paths:
+                os.remove(path)
+        
+        return written
+
+# Process-wide writer used by the health tabs
+readings_writer = ReadingsWriter()
+
+def recover_spooled_readings():
+    """Write readings spooled by a previous run that did not shut down cleanly"""
+    try:
+        written = readings_writer.recover()
+        if written:
+            print(f"Recovered {written} spooled health readings")
+        return written
+    except Exception as e:
+        print(f"Error recovering spooled health readings: {e}")
+        return 0
+
+def flush_readings():
+    """Make every queued reading visible to queries"""
+    try:
+        return readings_writer.flush()
+    except Exception as e:
+        print(f"Error flushing health readings: {e}")
+        return 0
+
+atexit.register(readings_writer.close)
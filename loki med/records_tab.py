@@ -4,7 +4,6 @@ Medical records tab UI
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
-import sqlite3
 import os
 import shutil
 from datetime import datetime
@@ -13,8 +12,9 @@ import json
 # Import UI components
 from widgets import create_custom_card
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from repositories import records_repo
+from user_session import resolve_user_id
 
 # Medical Records directory
 RECORDS_DIR = "medical_records"
@@ -44,45 +44,18 @@ def add_medical_record(username, file_path, record_type, record_date, provider,
         dest_path = os.path.join(user_dir, file_name)
         shutil.copy2(file_path, dest_path)
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        user_id = resolve_user_id(username)
         
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
-        
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
-        # Convert tags list to comma-separated string
-        tags_str = ",".join(tags) if isinstance(tags, list) else tags
-        
-        # Insert record into database
-        cursor.execute(
-            """INSERT INTO medical_records 
-               (user_id, file_name, file_path, record_type, record_date, 
-                provider, description, tags, upload_date)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                user_id,
-                file_name,
-                dest_path,
-                record_type,
-                record_date,
-                provider,
-                description,
-                tags_str,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            )
+        # Insert record into database (tags are stored comma separated)
+        records_repo.add(
+            user_id, file_name, dest_path, record_type, record_date,
+            provider, description, tags
         )
         
-        conn.commit()
-        conn.close()
-        
         # Refresh the records list
         load_medical_records(username, records_tree)
         
@@ -105,48 +78,23 @@ def delete_medical_record(username, record_id, records_tree):
         if not confirm:
             return False
         
-        # Get user ID and file details from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
         # Get file path before deleting record
-        cursor.execute(
-            "SELECT file_path FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        result = cursor.fetchone()
-        if not result:
+        file_path = records_repo.file_path(record_id, user_id)
+        if file_path is None:
             messagebox.showerror("Error", "Record not found or not owned by current user")
-            conn.close()
             return False
         
-        file_path = result[0]
-        
         # Delete record from database
-        cursor.execute(
-            "DELETE FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        if cursor.rowcount == 0:
+        if not records_repo.delete(record_id, user_id):
             messagebox.showerror("Error", "Failed to delete record from database")
-            conn.close()
             return False
         
-        conn.commit()
-        conn.close()
-        
         # Delete file if it exists
         if os.path.exists(file_path):
             try:
@@ -171,34 +119,18 @@ def view_medical_record(username, record_id):
             messagebox.showerror("Error", "No record selected for viewing")
             return False
         
-        # Get file path from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
-            conn.close()
             return False
         
-        user_id = result[0]
-        
-        cursor.execute(
-            "SELECT file_path FROM medical_records WHERE id = ? AND user_id = ?",
-            (record_id, user_id)
-        )
-        
-        result = cursor.fetchone()
-        if not result:
+        # Get file path from database
+        file_path = records_repo.file_path(record_id, user_id)
+        if file_path is None:
             messagebox.showerror("Error", "Record not found or not owned by current user")
-            conn.close()
             return False
         
-        file_path = result[0]
-        conn.close()
-        
         # Check if file exists
         if not os.path.exists(file_path):
             messagebox.showerror("Error", "File not found on disk")
@@ -234,41 +166,19 @@ def load_medical_records(username, records_tree):
         for item in records_tree.get_children():
             records_tree.delete(item)
         
-        # Get user ID from database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
-            conn.close()
+        if user_id is None:
             return False
         
-        user_id = result[0]
-        
-        # Get records
-        cursor.execute(
-            """SELECT id, file_name, record_type, record_date, provider, upload_date
-               FROM medical_records 
-               WHERE user_id = ? 
-               ORDER BY upload_date DESC""",
-            (user_id,)
-        )
-        
-        records = cursor.fetchall()
-        conn.close()
-        
         # Add records to tree
-        for record in records:
-            rec_id, file_name, record_type, record_date, provider, upload_date = record
-            
-            records_tree.insert("", "end", iid=rec_id, values=(
-                file_name,
-                record_type,
-                record_date,
-                provider,
-                upload_date
+        for record in records_repo.list_for_user(user_id):
+            records_tree.insert("", "end", iid=record.id, values=(
+                record.file_name,
+                record.record_type,
+                record.record_date,
+                record.provider,
+                record.upload_date
             ))
         
         return True
@@ -280,30 +190,19 @@ def load_medical_records(username, records_tree):
 def get_record_details(record_id):
     """Get details of a specific medical record"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT file_name, record_type, record_date, provider, description, tags
-               FROM medical_records 
-               WHERE id = ?""",
-            (record_id,)
-        )
-        
-        result = cursor.fetchone()
-        conn.close()
+        row = records_repo.get(record_id)
         
-        if not result:
+        if not row:
             return None
         
         # Create a dictionary with record details
         record = {
-            "file_name": result[0],
-            "record_type": result[1],
-            "record_date": result[2],
-            "provider": result[3],
-            "description": result[4],
-            "tags": result[5].split(",") if result[5] else []
+            "file_name": row.file_name,
+            "record_type": row.record_type,
+            "record_date": row.record_date,
+            "provider": row.provider,
+            "description": row.description,
+            "tags": row.tags.split(",") if row.tags else []
         }
         
         return record
@@ -0,0 +1,181 @@
+"""
+Recurrence rules for medication reminders.
+A reminder stores one compact rule instead of a row per dose: its first
+occurrence, a period in minutes (0 for a single dose), optional extra
+times of day and an optional number of doses or last date. Occurrences
+are computed only for the window that is asked for; the next occurrence
+after any moment takes one division and a bisect over the times of day.
+"""
+
+import re
+import heapq
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+
+from date_codec import parse_date
+
+MINUTES_PER_DAY = 24 * 60
+
+# Frequency of a reminder stored without one: a single dose, as reminders
+# were before they could recur
+DEFAULT_FREQUENCY = "Once only"
+
+# Named frequencies of the reminder forms -> period in minutes
+FREQUENCY_PERIODS = {
+    "once only": 0,
+    "once": 0,
+    "hourly": 60,
+    "twice daily": MINUTES_PER_DAY // 2,
+    "daily": MINUTES_PER_DAY,
+    "weekly": 7 * MINUTES_PER_DAY,
+}
+
+# "Every 6 hours", "Every 2 days", ...
+_EVERY = re.compile(r"^every (\d+) (minute|hour|day|week)s?$")
+
+_UNIT_MINUTES = {"minute": 1, "hour": 60, "day": MINUTES_PER_DAY, "week": 7 * MINUTES_PER_DAY}
+
+def parse_frequency(frequency):
+    """Period in minutes of a frequency such as "Daily" or "Every 6 hours"; 0 for a single dose or none"""
+    text = " ".join(str(frequency or DEFAULT_FREQUENCY).lower().split())
+    if text in FREQUENCY_PERIODS:
+        return FREQUENCY_PERIODS[text]
+    
+    match = _EVERY.match(text)
+    if match and int(match.group(1)) > 0:
+        return int(match.group(1)) * _UNIT_MINUTES[match.group(2)]
+    
+    # Anything else is treated as a single dose rather than guessed at
+    return 0
+
+def parse_times(times_of_day):
+    """
+    Minutes after midnight of "HH:MM" times, given as a comma-separated
+    text or a list; raises ValueError for an invalid time.
+    """
+    if not times_of_day:
+        return ()
+    if isinstance(times_of_day, str):
+        times_of_day = times_of_day.split(",")
+    
+    minutes = set()
+    for value in times_of_day:
+        parsed = datetime.strptime(str(value).strip(), "%H:%M")
+        minutes.add(parsed.hour * 60 + parsed.minute)
+    return tuple(sorted(minutes))
+
+def format_times(minutes):
+    """The stored form of parse_times(): "08:00,20:00", or None for none"""
+    if not minutes:
+        return None
+    return ",".join(f"{minute // 60:02d}:{minute % 60:02d}" for minute in minutes)
+
+class RecurrenceRule:
+    """
+    The occurrences of one reminder.
+    
+    Occurrence n falls in period n // m at offset n % m, where the m
+    offsets are the distances of the times of day from the first
+    occurrence's time. Times of day are only used with periods of whole
+    days. count limits the number of occurrences; until is the last date
+    on which one may fall.
+    """
+    
+    __slots__ = ("start", "period", "offsets", "count", "end")
+    
+    def __init__(self, start, period_minutes=0, times_of_day=(), count=None, until=None):
+        self.start = start
+        self.period = timedelta(minutes=period_minutes or 0)
+        
+        offsets = {0}
+        if period_minutes and period_minutes % MINUTES_PER_DAY == 0:
+            first = start.hour * 60 + start.minute
+            offsets.update((minute - first) % period_minutes for minute in times_of_day)
+        self.offsets = [timedelta(minutes=offset) for offset in sorted(offsets)]
+        
+        self.count = count
+        until = parse_date(until)
+        self.end = datetime.combine(until + timedelta(days=1), time()) if until else None
+    
+    @classmethod
+    def from_row(cls, row):
+        """The rule of a ScheduledReminder row, or None if its date or time is malformed"""
+        try:
+            start = datetime.strptime(f"{row.date_iso} {row.time}", "%Y-%m-%d %H:%M")
+            times_of_day = parse_times(row.times_of_day)
+        except (TypeError, ValueError):
+            # Rows written before dates and times were validated
+            return None
+        return cls(start, row.period_minutes, times_of_day, row.occurrence_count, row.until_iso)
+    
+    @property
+    def recurring(self):
+        return bool(self.period)
+    
+    def occurrence(self, n):
+        """The datetime of occurrence n (from 0), or None past the last one"""
+        if self.count is not None and n >= self.count:
+            return None
+        if not self.period:
+            due = self.start if n == 0 else None
+        else:
+            cycle, slot = divmod(n, len(self.offsets))
+            due = self.start + cycle * self.period + self.offsets[slot]
+        
+        if due is None or (self.end is not None and due >= self.end):
+            return None
+        return due
+    
+    def index_at(self, moment):
+        """Index of the first occurrence at or after moment"""
+        if moment <= self.start:
+            return 0
+        if not self.period:
+            return 1
+        
+        cycle, into = divmod(moment - self.start, self.period)
+        slot = bisect_left(self.offsets, into)
+        if slot == len(self.offsets):
+            cycle, slot = cycle + 1, 0
+        return cycle * len(self.offsets) + slot
+    
+    def next_at(self, moment):
+        """The first occurrence at or after moment, or None"""
+        return self.occurrence(self.index_at(moment))
+    
+    def between(self, start, end):
+        """Yield the occurrences from start up to (not including) end"""
+        n = self.index_at(start)
+        while True:
+            due = self.occurrence(n)
+            if due is None or due >= end:
+                return
+            yield due
+            n += 1
+
+def merge_occurrences(rules, start, end=None):
+    """
+    Yield (due, key) for the occurrences of many (key, rule) pairs in time order.
+    
+    A heap holds the next occurrence of each rule, so every step costs
+    O(log n) for n rules, however many occurrences each rule has.
+    """
+    heap = []
+    for order, (key, rule) in enumerate(rules):
+        n = rule.index_at(start)
+        due = rule.occurrence(n)
+        if due is not None:
+            heap.append((due, order, n, key, rule))
+    heapq.heapify(heap)
+    
+    while heap:
+        due, order, n, key, rule = heap[0]
+        if end is not None and due >= end:
+            return
+        yield due, key
+        
+        following = rule.occurrence(n + 1)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following, order, n + 1, key, rule))
@@ -0,0 +1,140 @@
+"""
+Reminder daemon for clinic kiosks and shared servers.
+One process runs a single scheduler over every user's reminders and
+appointments instead of a reminder thread per logged-in user. What falls
+due is loaded with one query per window for all users, and each batch is
+dispatched to the session of a user attached to this process or else
+queued in the notification outbox in one transaction, one grouped
+notification per user. The daemon's outbox worker sends the in-app and,
+with MEDICAL_SMTP_HOST set, the email notifications.
+
+    python launcher.py --reminder-daemon
+
+The daemon's cursor is saved as it dispatches, so after a restart the
+reminders that fell due while it was down are caught up according to
+MEDICAL_CATCH_UP (all, latest or mark_missed; default all).
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+from db_manager import configure_storage, close_all_connections
+from reminder_scheduler import ReminderScheduler, catch_up_policy
+from notification_dispatcher import notification_message, group_occurrences, rate_limits_from_environment
+from notification_outbox import OutboxWorker, delivery_channels, outbox_for
+
+# The daemon loads one hour at a time, so a large schedule never sits in memory
+DAEMON_HORIZON = timedelta(hours=1)
+
+# Seconds between checks for changes made by other processes
+WATCH_INTERVAL = 5.0
+
+# Storage profile used unless MEDICAL_STORAGE_PROFILE names another
+DAEMON_STORAGE_PROFILE = "server"
+
+# Name of the daemon's saved dispatch cursor
+DAEMON_CURSOR = "daemon"
+
+class ReminderDispatcher:
+    """
+    Routes due reminders to sessions or the outbox.
+    
+    attach_session() registers deliver(occurrence, message) for a user
+    logged in to this process; everyone else's reminders are grouped and
+    queued in the outbox. Notifications that could not be queued are kept
+    and queued with the next batch.
+    """
+    
+    def __init__(self, outbox=None, clock=datetime.now):
+        # A daemon has no desktop to show notifications on
+        self.outbox = outbox or outbox_for(delivery_channels())
+        self.clock = clock
+        self._sessions = {}
+        self._unsent = []
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.dispatched = 0
+        self.to_sessions = 0
+        self.to_outbox = 0
+        self.batches = 0
+        self.max_latency = 0.0
+    
+    def attach_session(self, user_id, deliver):
+        with self._lock:
+            self._sessions[user_id] = deliver
+    
+    def detach_session(self, user_id):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+    
+    def dispatch(self, occurrences):
+        """Deliver one batch of due occurrences (a batch subscription callback)"""
+        with self._lock:
+            sessions = dict(self._sessions)
+            notifications, self._unsent = self._unsent, []
+        
+        delivered = 0
+        queued = []
+        for occurrence in occurrences:
+            deliver = sessions.get(occurrence.user_id)
+            if deliver is not None:
+                try:
+                    deliver(occurrence, notification_message(occurrence))
+                    delivered += 1
+                    continue
+                except Exception as e:
+                    print(f"Error delivering reminder to session {occurrence.user_id}: {e}")
+            queued.append(occurrence)
+        
+        notifications += group_occurrences(queued)
+        if notifications:
+            try:
+                self.outbox.enqueue(notifications)
+            except Exception as e:
+                print(f"Error queuing {len(notifications)} notifications: {e}")
+                with self._lock:
+                    self._unsent[:0] = notifications
+                queued = []
+        
+        latency = (self.clock() - min(occurrence.due for occurrence in occurrences)).total_seconds()
+        self.max_latency = max(self.max_latency, latency)
+        self.dispatched += len(occurrences)
+        self.to_sessions += delivered
+        self.to_outbox += len(queued)
+        self.batches += 1
+
+def run_daemon(horizon=DAEMON_HORIZON, watch_interval=WATCH_INTERVAL, stop=None, catch_up=None):
+    """Run the scheduler and dispatcher until stop is set or Ctrl+C; returns the exit status"""
+    configure_storage(os.environ.get("MEDICAL_STORAGE_PROFILE") or DAEMON_STORAGE_PROFILE)
+    
+    scheduler = ReminderScheduler(
+        None, horizon=horizon, appointments=True, watch_interval=watch_interval,
+        cursor=DAEMON_CURSOR, catch_up=catch_up_policy(catch_up)
+    )
+    channels = delivery_channels()
+    dispatcher = ReminderDispatcher(outbox=outbox_for(channels))
+    scheduler.subscribe(dispatcher.dispatch, batch=True, catch_up=True)
+    worker = OutboxWorker(channels, rate_limits=rate_limits_from_environment()).start()
+    
+    stop = stop or threading.Event()
+    print("Reminder daemon running; press Ctrl+C to stop")
+    try:
+        # Short waits keep Ctrl+C responsive on Windows; they cost no queries
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        worker.stop()
+        close_all_connections()
+    
+    print(
+        f"Reminder daemon stopped: {dispatcher.dispatched} dispatched in {dispatcher.batches} batches "
+        f"({dispatcher.to_sessions} to sessions, {dispatcher.to_outbox} to the outbox), "
+        f"{scheduler.loads} loads, {scheduler.missed} missed; "
+        f"outbox: {worker.sent} sent, {worker.retried} retried, {worker.failed} failed"
+    )
+    return 0
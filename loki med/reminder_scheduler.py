@@ -0,0 +1,627 @@
+"""
+Event-driven scheduler for medication reminders.
+Instead of querying the reminders table every half minute, the upcoming
+occurrences of a user are loaded once into a heap ordered by firing time
+and one thread sleeps until the head is due. Inserting, updating or
+deleting a reminder re-arms the heap through temp triggers, so an idle
+application sends no queries and a reminder fires at the start of its
+minute.
+
+Changes made through this process's connection manager re-arm the heap
+at once. A scheduler with a watch interval (the reminder daemon) also
+notices changes committed by other processes: every interval it compares
+SQLite's data_version, and only when that moved the schedule_version
+counter kept by triggers.
+
+A scheduler with a cursor name saves how far it has dispatched in the
+reminder_cursors table. After the computer slept, the application was
+closed or the database failed for a while, the occurrences of the gap are
+loaded with one range query and handled by the catch-up policy; see
+CATCH_UP_POLICIES.
+"""
+
+import os
+import heapq
+import weakref
+import itertools
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from db_manager import connect, connection_manager
+from repositories import reminders_repo, appointments_repo, notifications_repo, reminder_cursors_repo
+from recurrence import RecurrenceRule
+
+# One firing of a reminder; due is the datetime of its minute, and missed
+# is set when it is delivered late by a catch-up
+Occurrence = namedtuple("Occurrence", "due reminder_id user_id medicine dose time missed", defaults=(False,))
+
+# Notice of an appointment; due is APPOINTMENT_NOTICE before its time
+AppointmentDue = namedtuple(
+    "AppointmentDue", "due appointment_id user_id doctor type time missed", defaults=(False,)
+)
+
+# How long before an appointment its notice is due
+APPOINTMENT_NOTICE = timedelta(hours=1)
+
+# How far ahead occurrences are loaded; the heap is reloaded when this runs out
+DEFAULT_HORIZON = timedelta(hours=24)
+
+# Longest single sleep. Waking up costs no query; it only keeps the firing
+# time right after the clock was changed or the computer was suspended.
+MAX_SLEEP = 60.0
+
+# Reminders have minute resolution and are due for their whole minute
+MINUTE = timedelta(minutes=1)
+
+# What a catch-up does with the occurrences missed in a gap
+CATCH_UP_ALL = "all"                  # deliver every one, flagged missed
+CATCH_UP_LATEST = "latest"            # deliver the latest of each reminder, flagged missed
+CATCH_UP_MARK_MISSED = "mark_missed"  # deliver none; log each as a missed notification
+CATCH_UP_POLICIES = (CATCH_UP_ALL, CATCH_UP_LATEST, CATCH_UP_MARK_MISSED)
+DEFAULT_CATCH_UP = CATCH_UP_ALL
+
+# How far back a catch-up looks; older occurrences are dropped
+MAX_CATCH_UP = timedelta(days=7)
+
+# Format of the saved cursors
+CURSOR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def catch_up_policy(name=None):
+    """The catch-up policy name, else MEDICAL_CATCH_UP, else DEFAULT_CATCH_UP"""
+    name = name or os.environ.get("MEDICAL_CATCH_UP") or DEFAULT_CATCH_UP
+    if name not in CATCH_UP_POLICIES:
+        print(f"Ignoring unknown catch-up policy {name!r}; use one of {', '.join(CATCH_UP_POLICIES)}")
+        return DEFAULT_CATCH_UP
+    return name
+
+def occurrence_text(occurrence):
+    """What a reminder or appointment notice is about, with its time"""
+    if isinstance(occurrence, AppointmentDue):
+        return f"{occurrence.type} with {occurrence.doctor} at {occurrence.time}"
+    return f"Take {occurrence.medicine} ({occurrence.dose}) at {occurrence.time}"
+
+def missed_message(occurrence):
+    """Text logged for an occurrence marked as missed"""
+    return f"Missed: {occurrence_text(occurrence)} on {occurrence.due.strftime('%d-%m-%Y')}"
+
+class _Subscription:
+    """A callback, its lead, whether it takes lists and whether it gets missed occurrences"""
+    
+    __slots__ = ("callback", "lead", "batch", "catch_up", "__weakref__")
+    
+    def __init__(self, callback, lead, batch, catch_up):
+        self.callback = callback
+        self.lead = lead
+        self.batch = batch
+        self.catch_up = catch_up
+
+def _delivery_key(subscription, occurrence):
+    """Identifies one firing for one subscription: (subscription, kind, id, due)"""
+    return (subscription, type(occurrence), occurrence[1], occurrence.due)
+
+# Every scheduler of this process, for the change triggers
+_live_schedulers = weakref.WeakSet()
+
+class ReminderScheduler:
+    """
+    Timer heap of the upcoming reminder occurrences of one user, or of
+    every user when user_id is None.
+    
+    subscribe() registers callback(occurrence), which is called on the
+    scheduler thread lead before each occurrence is due (at the start of
+    its minute for the default lead of zero). An occurrence whose firing
+    time has passed but whose minute is not over yet fires at once, so a
+    reminder added for the current minute is not missed. Each occurrence
+    reaches each subscription once, however often the heap is reloaded.
+    
+    With appointments=True the heap also holds an AppointmentDue for every
+    open appointment that asked for a reminder.
+    
+    With a cursor name, subscriptions made with catch_up=True also get the
+    occurrences whose minute passed without them being delivered, here or
+    before a restart, handled by the catch_up policy.
+    """
+    
+    DATA_VERSION_SQL = "PRAGMA data_version"
+    SCHEDULE_VERSION_SQL = "SELECT version FROM schedule_version WHERE id = 1"
+    
+    def __init__(self, user_id, repo=reminders_repo, horizon=DEFAULT_HORIZON, clock=datetime.now,
+                 appointments=False, watch_interval=None, cursor=None, catch_up=DEFAULT_CATCH_UP):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catch_up}")
+        
+        self.user_id = user_id
+        self.repo = repo
+        self.horizon = horizon
+        self.clock = clock
+        self.appointments = appointments
+        self.watch_interval = watch_interval
+        self.cursor = cursor
+        self.catch_up = catch_up
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._subscriptions = []
+        self._occurrences = []
+        # (firing time, order, occurrence, subscription)
+        self._heap = []
+        self._order = itertools.count()
+        # (subscription, reminder id, due) of every delivered firing
+        self._delivered = set()
+        self._loaded_until = None
+        self._loaded_lead = timedelta(0)
+        # _dirty: reload from the database; _rebuild: rebuild the heap only
+        self._dirty = True
+        self._rebuild = False
+        self._stopped = False
+        self._thread = None
+        # Last data_version / schedule_version seen by the watch
+        self._data_version = None
+        self._schedule_version = None
+        # Occurrences due at or before _cursor_until have been handled;
+        # _restored_until is the cursor a previous run saved
+        self._cursor_until = None
+        self._restored_until = None
+        self._cursor_saved = None
+        
+        # Statistics
+        self.loads = 0
+        self.fired = 0
+        self.missed = 0
+        
+        _live_schedulers.add(self)
+    
+    def subscribe(self, callback, lead=timedelta(0), batch=False, catch_up=False):
+        """
+        Call callback lead before each occurrence; returns the subscription.
+        
+        With batch=True callback gets a list of the occurrences that fell
+        due together instead of one call per occurrence. With catch_up=True
+        (and a cursor) it also gets missed occurrences, flagged missed.
+        """
+        subscription = _Subscription(callback, lead, batch, catch_up and self.cursor is not None)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if lead > self._loaded_lead:
+                # Occurrences just past the horizon fire within it now
+                self._dirty = True
+            self._rebuild = True
+            self._start()
+            self._wakeup.notify()
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._rebuild = True
+                self._wakeup.notify()
+    
+    def rearm(self):
+        """Reload the occurrences; called when the user's reminders change"""
+        with self._lock:
+            self._dirty = True
+            self._wakeup.notify()
+    
+    def _start(self):
+        """Start the scheduler thread (called with the lock held)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run, name=f"reminders-{self.user_id}", daemon=True
+            )
+            self._thread.start()
+    
+    def stop(self, wait=True):
+        """Stop the scheduler thread; subscribing again restarts it"""
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+            thread, self._thread = self._thread, None
+        
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+    
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    # Nobody to notify, nothing to load
+                    while not self._subscriptions and not self._stopped:
+                        self._wakeup.wait()
+                    if self._stopped:
+                        return
+                    
+                    now = self.clock()
+                    load = self._dirty or self._loaded_until is None or now >= self._loaded_until
+                    watch = not load and self.watch_interval is not None
+                    catching_up = any(subscription.catch_up for subscription in self._subscriptions)
+                    if load:
+                        # A change during the query marks the heap dirty again
+                        self._dirty = False
+                        lead = max(subscription.lead for subscription in self._subscriptions)
+                
+                if watch:
+                    try:
+                        if self._changed_elsewhere():
+                            self.rearm()
+                            continue
+                    except Exception as e:
+                        print(f"Error checking for reminder changes: {e}")
+                
+                if load:
+                    try:
+                        occurrences, until = self._load(now, lead, catching_up)
+                    except Exception as e:
+                        print(f"Error loading reminders: {e}")
+                        with self._lock:
+                            self._dirty = True
+                            if not self._stopped:
+                                self._wakeup.wait(MAX_SLEEP)
+                        continue
+                    
+                    with self._lock:
+                        self._occurrences = occurrences
+                        self._loaded_until = until
+                        self._loaded_lead = lead
+                        self._rebuild = True
+                
+                with self._lock:
+                    now = self.clock()
+                    if self._rebuild:
+                        self._build_heap(now)
+                    due, late = self._pop_due(now)
+                    if catching_up and self._cursor_until is not None:
+                        # Everything due by now has been popped
+                        self._cursor_until = max(self._cursor_until, now)
+                    
+                    if not due and not late:
+                        if not (self._dirty or self._rebuild or self._stopped):
+                            self._wakeup.wait(self._sleep_time(now))
+                        continue
+                
+                # Missed occurrences first, oldest first
+                self._deliver(self._handle_missed(late) + due)
+                if catching_up:
+                    self._save_cursor()
+        finally:
+            connection_manager.close_thread_connection()
+    
+    def _deliver(self, due):
+        """Call the subscriptions (on the scheduler thread, without the lock)"""
+        batches = {}
+        for subscription, occurrence in due:
+            if subscription.batch:
+                batches.setdefault(subscription, []).append(occurrence)
+                continue
+            try:
+                subscription.callback(occurrence)
+            except Exception as e:
+                print(f"Error delivering reminder: {e}")
+        
+        for subscription, occurrences in batches.items():
+            try:
+                subscription.callback(occurrences)
+            except Exception as e:
+                print(f"Error delivering reminders: {e}")
+    
+    def _handle_missed(self, late):
+        """The (subscription, occurrence) firings of missed occurrences to deliver, per the policy"""
+        if not late:
+            return []
+        self.missed += len({_delivery_key(None, occurrence) for _, occurrence in late})
+        
+        if self.catch_up == CATCH_UP_MARK_MISSED:
+            # Logged once per occurrence, however many subscriptions missed it
+            logged = {}
+            for _, occurrence in late:
+                logged.setdefault(_delivery_key(None, occurrence), occurrence)
+            try:
+                notifications_repo.add_many(
+                    [(occurrence.user_id, missed_message(occurrence)) for occurrence in logged.values()]
+                )
+            except Exception as e:
+                print(f"Error logging {len(logged)} missed reminders: {e}")
+            return []
+        
+        if self.catch_up == CATCH_UP_LATEST:
+            # Latest occurrence of each reminder or appointment, per subscription
+            latest = {}
+            for subscription, occurrence in late:
+                key = (subscription, type(occurrence), occurrence[1])
+                if key not in latest or occurrence.due > latest[key][1].due:
+                    latest[key] = (subscription, occurrence)
+            late = sorted(latest.values(), key=lambda firing: firing[1].due)
+        
+        return [(subscription, occurrence._replace(missed=True)) for subscription, occurrence in late]
+    
+    def _restore_cursor(self, now):
+        """Read the saved cursor (once, on the scheduler thread)"""
+        saved = reminder_cursors_repo.get(self.cursor)
+        if saved is None:
+            # First run: nothing to catch up
+            self._cursor_until = now
+            return
+        self._cursor_until = self._restored_until = self._cursor_saved = datetime.strptime(saved, CURSOR_FORMAT)
+    
+    def _save_cursor(self):
+        """Save the cursor after a delivery; errors only delay it to the next one"""
+        until = self._cursor_until.replace(microsecond=0)
+        if until == self._cursor_saved:
+            return
+        try:
+            reminder_cursors_repo.save(self.cursor, until.strftime(CURSOR_FORMAT))
+            self._cursor_saved = until
+        except Exception as e:
+            print(f"Error saving the reminder cursor: {e}")
+    
+    def _changed_elsewhere(self):
+        """
+        Whether another connection changed reminders or appointments since the last load.
+        
+        data_version only moves when another connection commits, so an idle
+        database costs one pragma and no page reads.
+        """
+        with connect() as conn:
+            data_version = conn.execute(self.DATA_VERSION_SQL).fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            version = conn.execute(self.SCHEDULE_VERSION_SQL).fetchone()[0]
+        return version != self._schedule_version
+    
+    def _load(self, now, lead, catching_up=False):
+        """
+        Occurrences from the current minute to the horizon (plus the longest
+        lead), and when catching up those since the cursor.
+        """
+        start = now.replace(second=0, microsecond=0)
+        until = start + self.horizon
+        end = until + lead
+        
+        if self.watch_interval is not None:
+            # Read before the rows, so a change committed in between reloads again
+            with connect() as conn:
+                self._data_version = conn.execute(self.DATA_VERSION_SQL).fetchone()[0]
+                self._schedule_version = conn.execute(self.SCHEDULE_VERSION_SQL).fetchone()[0]
+        
+        if self.cursor is not None and self._cursor_until is None:
+            self._restore_cursor(now)
+        
+        occurrences = []
+        if catching_up and self._cursor_until is not None:
+            # The gap since the cursor, in the same range queries
+            gap_start = max(self._cursor_until, start - MAX_CATCH_UP).replace(second=0, microsecond=0)
+            if gap_start < start:
+                occurrences = [
+                    occurrence for occurrence in self._load_range(gap_start, start)
+                    if occurrence.due > self._cursor_until
+                ]
+        
+        occurrences.extend(self._load_range(start, end))
+        self.loads += 1
+        return occurrences, until
+    
+    def _load_range(self, start, end):
+        """Occurrences due from start up to (not including) end"""
+        # Medicine names, doses and times repeat across users; keep one copy
+        # of each and parse each date and time once
+        strings = {}
+        dues = {}
+        
+        def shared(value):
+            return strings.setdefault(value, value)
+        
+        def parse(date_iso, time_str):
+            key = (date_iso, time_str)
+            if key not in dues:
+                dues[key] = _parse_due(date_iso, time_str)
+            return dues[key]
+        
+        occurrences = []
+        for row in self.repo.upcoming(self.user_id, _date_time(start), _date_time(end)):
+            due = parse(row.date_iso, row.time)
+            if due is not None:
+                occurrences.append(Occurrence(
+                    due, row.id, row.user_id, shared(row.medicine), shared(row.dose), shared(row.time)
+                ))
+        
+        # Recurring reminders are stored as rules; only this window is expanded
+        rules = self.repo.recurring(self.user_id, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        for row in rules:
+            rule = RecurrenceRule.from_row(row)
+            if rule is None:
+                continue
+            for due in rule.between(start, end):
+                occurrences.append(Occurrence(
+                    due, row.id, row.user_id, shared(row.medicine), shared(row.dose), shared(due.strftime("%H:%M"))
+                ))
+        
+        if self.appointments:
+            rows = appointments_repo.scheduled(
+                self.user_id, _date_time(start + APPOINTMENT_NOTICE), _date_time(end + APPOINTMENT_NOTICE)
+            )
+            for row in rows:
+                due = parse(row.date_iso, row.time)
+                if due is not None:
+                    occurrences.append(AppointmentDue(
+                        due - APPOINTMENT_NOTICE, row.id, row.user_id, shared(row.doctor), shared(row.type), shared(row.time)
+                    ))
+        return occurrences
+    
+    def _build_heap(self, now):
+        """Heap of the firings not delivered yet (called with the lock held)"""
+        self._delivered = {
+            key for key in self._delivered
+            if key[3] + MINUTE > now and key[0] in self._subscriptions
+        }
+        
+        heap = []
+        for occurrence in self._occurrences:
+            if self._restored_until is not None and occurrence.due <= self._restored_until:
+                # Handled before the restart
+                continue
+            # Past occurrences stay only for catch-up subscriptions, until the cursor passes them
+            past = occurrence.due + MINUTE <= now
+            if past and (self._cursor_until is None or occurrence.due <= self._cursor_until):
+                continue
+            for subscription in self._subscriptions:
+                if past and not subscription.catch_up:
+                    continue
+                if _delivery_key(subscription, occurrence) in self._delivered:
+                    continue
+                heap.append((occurrence.due - subscription.lead, next(self._order), occurrence, subscription))
+        
+        heapq.heapify(heap)
+        self._heap = heap
+        self._rebuild = False
+    
+    def _pop_due(self, now):
+        """
+        Remove the firings whose time has come (called with the lock held);
+        returns them and, apart, those whose minute is over.
+        """
+        due = []
+        late = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, occurrence, subscription = heapq.heappop(self._heap)
+            if occurrence.due + MINUTE <= now:
+                # Woke up after the minute was over (suspend or clock change)
+                if subscription.catch_up:
+                    self._delivered.add(_delivery_key(subscription, occurrence))
+                    late.append((subscription, occurrence))
+                continue
+            self._delivered.add(_delivery_key(subscription, occurrence))
+            due.append((subscription, occurrence))
+        
+        self.fired += len(due)
+        return due, late
+    
+    def _sleep_time(self, now):
+        """Seconds until the next firing, reload or watch, at most MAX_SLEEP"""
+        wake = self._loaded_until
+        if self._heap and self._heap[0][0] < wake:
+            wake = self._heap[0][0]
+        longest = MAX_SLEEP if self.watch_interval is None else min(MAX_SLEEP, self.watch_interval)
+        return max(0.0, min((wake - now).total_seconds(), longest))
+
+def _date_time(moment):
+    """(date_iso, time) pair of a datetime, as the repositories compare them"""
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M")
+
+def _parse_due(date_iso, time_str):
+    """The datetime of a stored date and time, or None for malformed rows"""
+    try:
+        return datetime.strptime(f"{date_iso} {time_str}", "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        # Rows written before dates and times were validated
+        return None
+
+# One scheduler per user, shared by the tabs and the notification service
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def scheduler_for(user_id):
+    """Return the scheduler of a user, creating it on first use"""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(user_id)
+        if scheduler is None:
+            scheduler = _schedulers[user_id] = ReminderScheduler(
+                user_id, cursor=f"user:{user_id}", catch_up=catch_up_policy()
+            )
+        return scheduler
+
+def stop_schedulers():
+    """Stop every scheduler thread (used at shutdown)"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+        _schedulers.clear()
+    for scheduler in schedulers:
+        scheduler.stop(wait=False)
+
+def watch_reminders(widget, user_id, callback, lead=timedelta(0), catch_up=False, batch=False):
+    """
+    Call callback(occurrence) on the Tk thread as the user's reminders fall due.
+    
+    With batch=True callback gets the list of occurrences that fell due
+    together. With catch_up=True it also gets the doses missed since the
+    user's cursor, flagged missed, once across restarts. The subscription
+    ends when widget is destroyed; returns it.
+    """
+    scheduler = scheduler_for(user_id)
+    subscription = None
+    
+    def deliver(due):
+        # tkinter hands calls made from other threads to the Tk event loop
+        try:
+            widget.after(0, lambda: callback(due))
+        except Exception:
+            # The widget is gone or the main loop has ended
+            scheduler.unsubscribe(subscription)
+    
+    subscription = scheduler.subscribe(deliver, lead, batch=batch, catch_up=catch_up)
+    
+    def forget(event):
+        if str(event.widget) == str(widget):
+            scheduler.unsubscribe(subscription)
+    
+    widget.bind("<Destroy>", forget, add="+")
+    return subscription
+
+# (table, user id) pairs this thread changed in its open transaction
+_changes = threading.local()
+
+def _publish_changes():
+    """Re-arm the schedulers of the changed users once the change is committed"""
+    changes = getattr(_changes, "pending", None)
+    _changes.pending = set()
+    if not changes:
+        return
+    
+    for scheduler in list(_live_schedulers):
+        for table, user_id in changes:
+            if table == "appointments" and not scheduler.appointments:
+                continue
+            # A user id of None stands for every user (a medicine was renamed);
+            # a scheduler without a user covers everyone
+            if user_id is None or scheduler.user_id is None or scheduler.user_id == user_id:
+                scheduler.rearm()
+                break
+
+def _schedule_changed(table, user_id):
+    """SQL callback fired by the temp triggers below"""
+    changes = getattr(_changes, "pending", None)
+    if changes is None:
+        changes = _changes.pending = set()
+    changes.add((table, user_id))
+    connection_manager.call_after_commit(_publish_changes)
+    return None
+
+# (trigger name, event, table, user ids passed to the callback) of the temp triggers
+_CHANGE_TRIGGERS = [
+    ("reminder_scheduler_insert", "AFTER INSERT ON main.reminders", "reminders", ("NEW.user_id",)),
+    ("reminder_scheduler_update", "AFTER UPDATE ON main.reminders", "reminders", ("OLD.user_id", "NEW.user_id")),
+    ("reminder_scheduler_delete", "AFTER DELETE ON main.reminders", "reminders", ("OLD.user_id",)),
+    ("reminder_scheduler_appointment_insert", "AFTER INSERT ON main.appointments", "appointments", ("NEW.user_id",)),
+    ("reminder_scheduler_appointment_update", "AFTER UPDATE ON main.appointments", "appointments",
+     ("OLD.user_id", "NEW.user_id")),
+    ("reminder_scheduler_appointment_delete", "AFTER DELETE ON main.appointments", "appointments", ("OLD.user_id",)),
+    # Occurrences carry the medicine name
+    ("reminder_scheduler_medicine_renamed", "AFTER UPDATE OF name ON main.medications", "reminders", ("NULL",)),
+]
+
+def _install_change_triggers(conn):
+    """Re-arm the schedulers whenever any code changes a reminder or appointment"""
+    conn.create_function("schedule_changed", 2, _schedule_changed)
+    for name, event, table, user_ids in _CHANGE_TRIGGERS:
+        calls = ", ".join(f"schedule_changed('{table}', {user_id})" for user_id in user_ids)
+        conn.execute(f"""
+            CREATE TEMP TRIGGER IF NOT EXISTS {name}
+            {event}
+            BEGIN
+                SELECT {calls};
+            END
+        """)
+
+connection_manager.add_connect_hook(_install_change_triggers)
@@ -0,0 +1,994 @@
+"""
+Data access layer for the Medical Assistant application.
+All SQL used by the tabs lives here, one repository per table.
+
+Each statement is a class constant, so the same SQL text is reused on the
+calling thread's cached connection and sqlite3 serves it from its
+prepared-statement cache instead of compiling it again. Rows come back as
+namedtuples, which still unpack like the plain tuples the tabs used before.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+from db_manager import connect
+from date_codec import encode_date, normalize_time, to_iso
+from recurrence import DEFAULT_FREQUENCY, parse_frequency, parse_times, format_times
+
+# Typed result rows
+Appointment = namedtuple("Appointment", "id date time doctor type notes status")
+Reminder = namedtuple("Reminder", "id medicine dose date time frequency")
+DueReminder = namedtuple("DueReminder", "id medicine dose time")
+ScheduledReminder = namedtuple(
+    "ScheduledReminder",
+    "id user_id medicine dose date_iso time frequency period_minutes times_of_day occurrence_count until_iso"
+)
+ScheduledAppointment = namedtuple("ScheduledAppointment", "id user_id doctor type date_iso time")
+Medicine = namedtuple("Medicine", "id name price description quantity")
+MedicineDetail = namedtuple("MedicineDetail", "name description dosage common_doses")
+CartLine = namedtuple("CartLine", "id medicine quantity price subtotal")
+MedicalRecord = namedtuple(
+    "MedicalRecord",
+    "id file_name file_path record_type record_date provider description tags upload_date"
+)
+Reading = namedtuple("Reading", "value timestamp notes")
+Notification = namedtuple("Notification", "id message is_read created_at")
+OutboxRow = namedtuple("OutboxRow", "id user_id channel category title message attempts email")
+DashboardSummary = namedtuple(
+    "DashboardSummary",
+    "as_of upcoming_appointments next_appointment_date next_appointment_time next_appointment_doctor "
+    "reminder_count reminders_due latest_pulse latest_pulse_at record_count latest_record_at"
+)
+
+def _now():
+    """Timestamp format used by the created_at / upload_date columns"""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class AppointmentsRepo:
+    """Appointments of a user; dates are kept in display and ISO form"""
+    
+    LIST_SQL = """
+        SELECT id, date, time, doctor, type, notes, status
+        FROM appointments
+        WHERE user_id = ?
+        ORDER BY date_iso, time
+    """
+    GET_SQL = """
+        SELECT id, date, time, doctor, type, notes, status
+        FROM appointments
+        WHERE id = ?
+    """
+    INSERT_SQL = """
+        INSERT INTO appointments
+        (user_id, date, date_iso, time, doctor, type, notes, reminder, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    UPDATE_SQL = """
+        UPDATE appointments
+        SET date = ?, date_iso = ?, time = ?, doctor = ?, type = ?, notes = ?, status = ?
+        WHERE id = ? AND user_id = ?
+    """
+    DELETE_SQL = "DELETE FROM appointments WHERE id = ? AND user_id = ?"
+    UPCOMING_SQL = """
+        SELECT COUNT(*), MIN(date_iso), doctor
+        FROM appointments
+        WHERE user_id = ? AND date_iso >= ? AND status != 'Completed' AND status != 'Cancelled'
+    """
+    DAYS_IN_RANGE_SQL = """
+        SELECT DISTINCT date_iso FROM appointments
+        WHERE user_id = ? AND date_iso BETWEEN ? AND ? AND status != 'Cancelled'
+    """
+    SCHEDULED_SQL = """
+        SELECT id, user_id, doctor, type, date_iso, time
+        FROM appointments
+        WHERE user_id = ? AND (date_iso, time) >= (?, ?) AND (date_iso, time) < (?, ?)
+          AND reminder != 0 AND status != 'Completed' AND status != 'Cancelled'
+        ORDER BY date_iso, time
+    """
+    SCHEDULED_ALL_SQL = """
+        SELECT id, user_id, doctor, type, date_iso, time
+        FROM appointments
+        WHERE (date_iso, time) >= (?, ?) AND (date_iso, time) < (?, ?)
+          AND reminder != 0 AND status != 'Completed' AND status != 'Cancelled'
+        ORDER BY date_iso, time
+    """
+    
+    def list_for_user(self, user_id):
+        """All appointments of a user in chronological order"""
+        with connect() as conn:
+            rows = conn.execute(self.LIST_SQL, (user_id,)).fetchall()
+        return [Appointment(*row) for row in rows]
+    
+    def get(self, appointment_id):
+        """One appointment, or None"""
+        with connect() as conn:
+            row = conn.execute(self.GET_SQL, (appointment_id,)).fetchone()
+        return Appointment(*row) if row else None
+    
+    def _encode(self, user_id, date_str, time_str, doctor, appointment_type, notes, status, reminder=1):
+        display_date, iso_date = encode_date(date_str)
+        time_str = normalize_time(time_str)
+        if iso_date is None or time_str is None:
+            raise ValueError("Invalid date or time. Use DD-MM-YYYY and HH:MM")
+        return (user_id, display_date, iso_date, time_str, doctor, appointment_type,
+                notes, reminder, status, _now())
+    
+    def add(self, user_id, date_str, time_str, doctor, appointment_type, notes="", status="Scheduled"):
+        """Insert an appointment; raises ValueError on an invalid date or time"""
+        with connect() as conn:
+            cursor = conn.execute(
+                self.INSERT_SQL,
+                self._encode(user_id, date_str, time_str, doctor, appointment_type, notes, status)
+            )
+            return cursor.lastrowid
+    
+    def add_many(self, user_id, appointments):
+        """Insert (date, time, doctor, type, notes, status) tuples in one transaction"""
+        rows = [self._encode(user_id, *appointment) for appointment in appointments]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def update(self, appointment_id, user_id, date_str, time_str, doctor, appointment_type, notes, status):
+        """Update an appointment owned by user_id; returns False if none matched"""
+        display_date, iso_date = encode_date(date_str)
+        time_str = normalize_time(time_str)
+        if iso_date is None or time_str is None:
+            raise ValueError("Invalid date or time. Use DD-MM-YYYY and HH:MM")
+        
+        with connect() as conn:
+            cursor = conn.execute(
+                self.UPDATE_SQL,
+                (display_date, iso_date, time_str, doctor, appointment_type, notes, status,
+                 appointment_id, user_id)
+            )
+            return cursor.rowcount > 0
+    
+    def delete(self, appointment_id, user_id):
+        """Delete an appointment owned by user_id; returns False if none matched"""
+        with connect() as conn:
+            return conn.execute(self.DELETE_SQL, (appointment_id, user_id)).rowcount > 0
+    
+    def upcoming_summary(self, user_id, from_iso):
+        """(count, next ISO date, next doctor) of open appointments from a date on"""
+        with connect() as conn:
+            return conn.execute(self.UPCOMING_SQL, (user_id, from_iso)).fetchone()
+    
+    def dates_between(self, user_id, start_iso, end_iso):
+        """ISO dates in a range (inclusive) that have a non-cancelled appointment"""
+        with connect() as conn:
+            rows = conn.execute(self.DAYS_IN_RANGE_SQL, (user_id, start_iso, end_iso)).fetchall()
+        return {row[0] for row in rows}
+    
+    def scheduled(self, user_id, start, end):
+        """
+        Open appointments with a reminder from start up to (not including) end.
+        
+        start and end are (date_iso, time) pairs; user_id None means every user.
+        """
+        if user_id is None:
+            sql, parameters = self.SCHEDULED_ALL_SQL, (*start, *end)
+        else:
+            sql, parameters = self.SCHEDULED_SQL, (user_id, *start, *end)
+        with connect() as conn:
+            rows = conn.execute(sql, parameters).fetchall()
+        return [ScheduledAppointment(*row) for row in rows]
+
+class RemindersRepo:
+    """Medication reminders joined with their medicine names"""
+    
+    LIST_SQL = """
+        SELECT r.id, m.name, r.dose, r.date, r.time, r.frequency
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.user_id = ?
+        ORDER BY r.date_iso, r.time
+    """
+    ACTIVE_SQL = """
+        SELECT r.id, m.name, r.dose, r.date, r.time, r.frequency
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.user_id = ? AND r.period_minutes = 0 AND (
+            r.date_iso > ? OR
+            (r.date_iso = ? AND r.time >= ?)
+        )
+        ORDER BY r.date_iso, r.time
+    """
+    DUE_SQL = """
+        SELECT r.id, m.name, r.dose, r.time
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.user_id = ? AND r.period_minutes = 0 AND r.date_iso = ? AND r.time BETWEEN ? AND ?
+        ORDER BY r.time
+    """
+    UPCOMING_SQL = """
+        SELECT r.id, r.user_id, m.name, r.dose, r.date_iso, r.time, r.frequency,
+               r.period_minutes, r.times_of_day, r.occurrence_count, r.until_iso
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.user_id = ? AND r.period_minutes = 0
+          AND (r.date_iso, r.time) >= (?, ?) AND (r.date_iso, r.time) < (?, ?)
+        ORDER BY r.date_iso, r.time
+    """
+    UPCOMING_ALL_SQL = """
+        SELECT r.id, r.user_id, m.name, r.dose, r.date_iso, r.time, r.frequency,
+               r.period_minutes, r.times_of_day, r.occurrence_count, r.until_iso
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.period_minutes = 0 AND (r.date_iso, r.time) >= (?, ?) AND (r.date_iso, r.time) < (?, ?)
+        ORDER BY r.date_iso, r.time
+    """
+    RECURRING_SQL = """
+        SELECT r.id, r.user_id, m.name, r.dose, r.date_iso, r.time, r.frequency,
+               r.period_minutes, r.times_of_day, r.occurrence_count, r.until_iso
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.period_minutes > 0 AND r.user_id = ? AND r.date_iso <= ?
+          AND (r.until_iso IS NULL OR r.until_iso >= ?)
+        ORDER BY r.id
+    """
+    RECURRING_ALL_SQL = """
+        SELECT r.id, r.user_id, m.name, r.dose, r.date_iso, r.time, r.frequency,
+               r.period_minutes, r.times_of_day, r.occurrence_count, r.until_iso
+        FROM reminders r
+        JOIN medications m ON r.medicine_id = m.id
+        WHERE r.period_minutes > 0 AND r.date_iso <= ?
+          AND (r.until_iso IS NULL OR r.until_iso >= ?)
+        ORDER BY r.id
+    """
+    INSERT_SQL = """
+        INSERT INTO reminders
+        (user_id, medicine_id, dose, date, date_iso, time, frequency,
+         period_minutes, times_of_day, occurrence_count, until_iso, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    DELETE_MATCHING_SQL = """
+        DELETE FROM reminders
+        WHERE user_id = ? AND medicine_id = ? AND date_iso = ? AND time = ? AND dose = ?
+    """
+    COUNT_SQL = "SELECT COUNT(*) FROM reminders WHERE user_id = ?"
+    COUNT_ON_SQL = "SELECT COUNT(*) FROM reminders WHERE user_id = ? AND date_iso = ?"
+    
+    def list_for_user(self, user_id):
+        """All reminders of a user in chronological order"""
+        with connect() as conn:
+            rows = conn.execute(self.LIST_SQL, (user_id,)).fetchall()
+        return [Reminder(*row) for row in rows]
+    
+    def active_from(self, user_id, date_iso, time_str):
+        """Single-dose reminders at or after the given date and time"""
+        with connect() as conn:
+            rows = conn.execute(self.ACTIVE_SQL, (user_id, date_iso, date_iso, time_str)).fetchall()
+        return [Reminder(*row) for row in rows]
+    
+    def due_between(self, user_id, date_iso, start_time, end_time):
+        """Single-dose reminders on a day whose time falls in [start_time, end_time]"""
+        with connect() as conn:
+            rows = conn.execute(self.DUE_SQL, (user_id, date_iso, start_time, end_time)).fetchall()
+        return [DueReminder(*row) for row in rows]
+    
+    def upcoming(self, user_id, start, end):
+        """
+        Single-dose reminders due from start up to (not including) end, for
+        the scheduler; recurring ones come from recurring().
+        
+        start and end are (date_iso, time) pairs; user_id None means every user.
+        """
+        if user_id is None:
+            sql, parameters = self.UPCOMING_ALL_SQL, (*start, *end)
+        else:
+            sql, parameters = self.UPCOMING_SQL, (user_id, *start, *end)
+        with connect() as conn:
+            rows = conn.execute(sql, parameters).fetchall()
+        return [ScheduledReminder(*row) for row in rows]
+    
+    def recurring(self, user_id, first_date_iso, last_date_iso):
+        """
+        Recurring reminders that may have occurrences between two dates
+        (inclusive): started by the last one and not ended before the first.
+        
+        The rows are rules; recurrence.RecurrenceRule.from_row() expands them.
+        user_id None means every user.
+        """
+        if user_id is None:
+            sql, parameters = self.RECURRING_ALL_SQL, (last_date_iso, first_date_iso)
+        else:
+            sql, parameters = self.RECURRING_SQL, (user_id, last_date_iso, first_date_iso)
+        with connect() as conn:
+            rows = conn.execute(sql, parameters).fetchall()
+        return [ScheduledReminder(*row) for row in rows]
+    
+    def _encode(self, user_id, medicine_id, dose, date_str, time_str, frequency=None,
+                times_of_day=None, count=None, until=None):
+        display_date, iso_date = encode_date(date_str)
+        time_str = normalize_time(time_str)
+        if iso_date is None or time_str is None:
+            raise ValueError("Invalid date or time. Use DD-MM-YYYY and HH:MM")
+        
+        until_iso = None
+        if until:
+            until_iso = to_iso(until)
+            if until_iso is None:
+                raise ValueError("Invalid end date. Use DD-MM-YYYY")
+        if count is not None and int(count) < 1:
+            raise ValueError("The number of doses must be at least 1")
+        
+        # No frequency chosen is a single dose, stored as such
+        frequency = frequency or DEFAULT_FREQUENCY
+        return (
+            user_id, medicine_id, dose, display_date, iso_date, time_str, frequency,
+            parse_frequency(frequency), format_times(parse_times(times_of_day)),
+            None if count is None else int(count), until_iso, _now()
+        )
+    
+    def add(self, user_id, medicine_id, dose, date_str, time_str, frequency=None,
+            times_of_day=None, count=None, until=None):
+        """
+        Insert a reminder; raises ValueError on an invalid date or time.
+        
+        frequency sets how it recurs (without one, it does not);
+        times_of_day ("08:00,20:00") adds daily times, and count or until
+        (DD-MM-YYYY) end it.
+        """
+        with connect() as conn:
+            cursor = conn.execute(
+                self.INSERT_SQL,
+                self._encode(user_id, medicine_id, dose, date_str, time_str, frequency,
+                             times_of_day, count, until)
+            )
+            return cursor.lastrowid
+    
+    def add_many(self, reminders):
+        """Insert (user_id, medicine_id, dose, date, time, frequency) tuples in one transaction"""
+        rows = [self._encode(*reminder) for reminder in reminders]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def delete_matching(self, user_id, medicine_id, date_str, time_str, dose):
+        """Delete the reminders shown as one list entry; returns the number removed"""
+        with connect() as conn:
+            cursor = conn.execute(
+                self.DELETE_MATCHING_SQL,
+                (user_id, medicine_id, to_iso(date_str), normalize_time(time_str) or time_str, dose)
+            )
+            return cursor.rowcount
+    
+    def count_for_user(self, user_id):
+        with connect() as conn:
+            return conn.execute(self.COUNT_SQL, (user_id,)).fetchone()[0]
+    
+    def count_on(self, user_id, date_iso):
+        with connect() as conn:
+            return conn.execute(self.COUNT_ON_SQL, (user_id, date_iso)).fetchone()[0]
+
+class MedicationsRepo:
+    """The medicine catalog and its stock levels"""
+    
+    LIST_SQL = "SELECT id, name, price, description, quantity FROM medications ORDER BY name"
+    BY_NAME_SQL = "SELECT id, name, price, description, quantity FROM medications WHERE name = ?"
+    DETAILS_SQL = """
+        SELECT m.name, md.description, md.dosage_info, md.common_doses
+        FROM medications m
+        JOIN medicine_details md ON m.id = md.medicine_id
+    """
+    DETAILS_COUNT_SQL = "SELECT COUNT(*) FROM medicine_details"
+    INSERT_DETAILS_SQL = """
+        INSERT INTO medicine_details (medicine_id, description, dosage_info, common_doses)
+        VALUES (?, ?, ?, ?)
+    """
+    
+    def list_all(self):
+        """Every medicine, by name"""
+        with connect() as conn:
+            rows = conn.execute(self.LIST_SQL).fetchall()
+        return [Medicine(*row) for row in rows]
+    
+    def by_name(self, name):
+        """One medicine by its exact name, or None"""
+        with connect() as conn:
+            row = conn.execute(self.BY_NAME_SQL, (name,)).fetchone()
+        return Medicine(*row) if row else None
+    
+    def id_for_name(self, name):
+        """The id of a medicine, or None"""
+        medicine = self.by_name(name)
+        return medicine.id if medicine else None
+    
+    def details(self):
+        """Description and dosage rows of every medicine that has them"""
+        with connect() as conn:
+            rows = conn.execute(self.DETAILS_SQL).fetchall()
+        return [MedicineDetail(*row) for row in rows]
+    
+    def details_count(self):
+        with connect() as conn:
+            return conn.execute(self.DETAILS_COUNT_SQL).fetchone()[0]
+    
+    def add_details_many(self, details):
+        """Insert (medicine_id, description, dosage_info, common_doses) tuples in one transaction"""
+        rows = list(details)
+        with connect() as conn:
+            conn.executemany(self.INSERT_DETAILS_SQL, rows)
+        return len(rows)
+
+class OutOfStockError(ValueError):
+    """A checkout asked for more of a medicine than is in stock"""
+    
+    def __init__(self, medicine, available):
+        super().__init__(f"{medicine} is out of stock ({available} units available)")
+        self.medicine = medicine
+        self.available = available
+
+class CartRepo:
+    """Shopping cart lines of a user"""
+    
+    LINES_SQL = """
+        SELECT c.id, m.name, c.quantity, m.price, (c.quantity * m.price) as subtotal
+        FROM cart_items c
+        JOIN medications m ON c.medicine_id = m.id
+        WHERE c.user_id = ?
+    """
+    FIND_SQL = "SELECT id, quantity FROM cart_items WHERE user_id = ? AND medicine_id = ?"
+    INSERT_SQL = "INSERT INTO cart_items (user_id, medicine_id, quantity, price) VALUES (?, ?, ?, ?)"
+    SET_QUANTITY_SQL = "UPDATE cart_items SET quantity = ?, price = ? WHERE id = ?"
+    REMOVE_SQL = "DELETE FROM cart_items WHERE id = ?"
+    REMOVE_USER_LINE_SQL = "DELETE FROM cart_items WHERE id = ? AND user_id = ?"
+    CLEAR_SQL = "DELETE FROM cart_items WHERE user_id = ?"
+    ORDERED_SQL = """
+        SELECT c.medicine_id, c.quantity, m.name
+        FROM cart_items c
+        JOIN medications m ON c.medicine_id = m.id
+        WHERE c.user_id = ?
+    """
+    # Matches no row when the stock no longer covers the order
+    TAKE_STOCK_SQL = "UPDATE medications SET quantity = quantity - ? WHERE id = ? AND quantity >= ?"
+    STOCK_SQL = "SELECT quantity FROM medications WHERE id = ?"
+    
+    def lines_for_user(self, user_id):
+        """Cart lines with medicine names and subtotals"""
+        with connect() as conn:
+            rows = conn.execute(self.LINES_SQL, (user_id,)).fetchall()
+        return [CartLine(*row) for row in rows]
+    
+    def find_line(self, user_id, medicine_id):
+        """(line id, quantity) of a medicine already in the cart, or None"""
+        with connect() as conn:
+            return conn.execute(self.FIND_SQL, (user_id, medicine_id)).fetchone()
+    
+    def add_line(self, user_id, medicine_id, quantity, price):
+        with connect() as conn:
+            return conn.execute(self.INSERT_SQL, (user_id, medicine_id, quantity, price)).lastrowid
+    
+    def add_many(self, user_id, items):
+        """Insert (medicine_id, quantity, price) tuples in one transaction"""
+        rows = [(user_id, medicine_id, quantity, price) for medicine_id, quantity, price in items]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def set_quantity(self, line_id, quantity, price):
+        with connect() as conn:
+            conn.execute(self.SET_QUANTITY_SQL, (quantity, price, line_id))
+    
+    def remove_line(self, line_id):
+        with connect() as conn:
+            conn.execute(self.REMOVE_SQL, (line_id,))
+    
+    def remove_user_line(self, line_id, user_id):
+        """Remove a line owned by user_id; returns False if none matched"""
+        with connect() as conn:
+            return conn.execute(self.REMOVE_USER_LINE_SQL, (line_id, user_id)).rowcount > 0
+    
+    def clear(self, user_id):
+        with connect() as conn:
+            conn.execute(self.CLEAR_SQL, (user_id,))
+    
+    def checkout(self, user_id):
+        """
+        Take the ordered quantities out of stock and empty the cart, atomically.
+        
+        Returns the CartLines that were ordered. If another checkout took the
+        stock a line needs since it was added to the cart, nothing is changed
+        and OutOfStockError names the medicine.
+        """
+        with connect() as conn:
+            lines = [CartLine(*row) for row in conn.execute(self.LINES_SQL, (user_id,)).fetchall()]
+            for medicine_id, quantity, name in conn.execute(self.ORDERED_SQL, (user_id,)).fetchall():
+                if conn.execute(self.TAKE_STOCK_SQL, (quantity, medicine_id, quantity)).rowcount == 0:
+                    # Raising inside the block rolls back the lines already taken
+                    row = conn.execute(self.STOCK_SQL, (medicine_id,)).fetchone()
+                    raise OutOfStockError(name, row[0] if row else 0)
+            conn.execute(self.CLEAR_SQL, (user_id,))
+        return lines
+
+class RecordsRepo:
+    """Uploaded medical record metadata (the files live under medical_records/)"""
+    
+    LIST_SQL = """
+        SELECT id, file_name, file_path, record_type, record_date, provider, description, tags, upload_date
+        FROM medical_records
+        WHERE user_id = ?
+        ORDER BY upload_date DESC
+    """
+    GET_SQL = """
+        SELECT id, file_name, file_path, record_type, record_date, provider, description, tags, upload_date
+        FROM medical_records
+        WHERE id = ?
+    """
+    FILE_PATH_SQL = "SELECT file_path FROM medical_records WHERE id = ? AND user_id = ?"
+    INSERT_SQL = """
+        INSERT INTO medical_records
+        (user_id, file_name, file_path, record_type, record_date,
+         provider, description, tags, upload_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    DELETE_SQL = "DELETE FROM medical_records WHERE id = ? AND user_id = ?"
+    SUMMARY_SQL = "SELECT COUNT(*), MAX(upload_date) FROM medical_records WHERE user_id = ?"
+    
+    def list_for_user(self, user_id):
+        """A user's records, newest upload first"""
+        with connect() as conn:
+            rows = conn.execute(self.LIST_SQL, (user_id,)).fetchall()
+        return [MedicalRecord(*row) for row in rows]
+    
+    def get(self, record_id):
+        """One record, or None"""
+        with connect() as conn:
+            row = conn.execute(self.GET_SQL, (record_id,)).fetchone()
+        return MedicalRecord(*row) if row else None
+    
+    def file_path(self, record_id, user_id):
+        """Path of a record owned by user_id, or None"""
+        with connect() as conn:
+            row = conn.execute(self.FILE_PATH_SQL, (record_id, user_id)).fetchone()
+        return row[0] if row else None
+    
+    def _encode(self, user_id, file_name, file_path, record_type, record_date, provider, description, tags):
+        # Tags are stored comma separated
+        tags_str = tags if isinstance(tags, str) else ",".join(tags)
+        return (user_id, file_name, file_path, record_type, record_date,
+                provider, description, tags_str, _now())
+    
+    def add(self, user_id, file_name, file_path, record_type, record_date, provider, description, tags):
+        with connect() as conn:
+            cursor = conn.execute(
+                self.INSERT_SQL,
+                self._encode(user_id, file_name, file_path, record_type, record_date, provider, description, tags)
+            )
+            return cursor.lastrowid
+    
+    def add_many(self, user_id, records):
+        """Insert (file_name, file_path, type, date, provider, description, tags) tuples in one transaction"""
+        rows = [self._encode(user_id, *record) for record in records]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def delete(self, record_id, user_id):
+        """Delete a record owned by user_id; returns False if none matched"""
+        with connect() as conn:
+            return conn.execute(self.DELETE_SQL, (record_id, user_id)).rowcount > 0
+    
+    def summary(self, user_id):
+        """(count, latest upload_date) of a user's records"""
+        with connect() as conn:
+            return conn.execute(self.SUMMARY_SQL, (user_id,)).fetchone()
+
+class ReadingsRepo:
+    """Health sensor readings (pulse, ...)"""
+    
+    INSERT_SQL = """
+        INSERT INTO health_readings (user_id, reading_type, value, notes, timestamp)
+        VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    """
+    RECENT_SQL = """
+        SELECT value, timestamp, notes
+        FROM health_readings
+        WHERE user_id = ? AND reading_type = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """
+    INSERT_MISSING_SQL = """
+        INSERT INTO health_readings (user_id, reading_type, value, notes, timestamp)
+        SELECT ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM health_readings
+            WHERE user_id = ? AND reading_type = ? AND timestamp = ? AND value = ?
+        )
+    """
+    VALUES_SQL = """
+        SELECT value
+        FROM health_readings
+        WHERE user_id = ? AND reading_type = ?
+        ORDER BY timestamp DESC
+    """
+    
+    def add(self, user_id, reading_type, value, notes=None, timestamp=None):
+        with connect() as conn:
+            conn.execute(self.INSERT_SQL, (user_id, reading_type, str(value), notes, timestamp))
+    
+    def add_many(self, readings):
+        """Insert (user_id, reading_type, value, notes, timestamp) tuples in one transaction"""
+        rows = [
+            (user_id, reading_type, str(value), notes, timestamp)
+            for user_id, reading_type, value, notes, timestamp in readings
+        ]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def add_missing_many(self, readings):
+        """Like add_many, but skips readings that are already stored; returns the rows added"""
+        rows = [
+            (user_id, reading_type, str(value), notes, timestamp, user_id, reading_type, timestamp, str(value))
+            for user_id, reading_type, value, notes, timestamp in readings
+        ]
+        with connect() as conn:
+            before = conn.total_changes
+            conn.executemany(self.INSERT_MISSING_SQL, rows)
+            return conn.total_changes - before
+    
+    def recent(self, user_id, reading_type, limit=50):
+        """Newest readings of one type"""
+        with connect() as conn:
+            rows = conn.execute(self.RECENT_SQL, (user_id, reading_type, limit)).fetchall()
+        return [Reading(*row) for row in rows]
+    
+    def latest(self, user_id, reading_type):
+        """The newest reading of one type, or None"""
+        readings = self.recent(user_id, reading_type, 1)
+        return readings[0] if readings else None
+    
+    def values(self, user_id, reading_type):
+        """All values of one type, newest first"""
+        with connect() as conn:
+            return [row[0] for row in conn.execute(self.VALUES_SQL, (user_id, reading_type)).fetchall()]
+
+class NotificationsRepo:
+    """
+    In-app notification log.
+    
+    The history is read a page at a time, newest first: a page starts after
+    the (created_at, id) of the last row of the previous one, so every page
+    is an index range however deep the user scrolls, where OFFSET would
+    step over all the rows before it.
+    """
+    
+    INSERT_SQL = """
+        INSERT INTO notifications (user_id, message, is_read, created_at)
+        VALUES (?, ?, 0, ?)
+    """
+    HISTORY_SQL = """
+        SELECT id, message, is_read, created_at
+        FROM notifications
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+    """
+    # {filters} is a combination of the *_FILTER clauses below
+    PAGE_SQL = """
+        SELECT id, message, is_read, created_at
+        FROM notifications
+        WHERE user_id = ?{filters}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """
+    AFTER_FILTER = " AND (created_at, id) < (?, ?)"
+    SINCE_FILTER = " AND created_at >= ?"
+    UNTIL_FILTER = " AND created_at < date(?, '+1 day')"
+    UNREAD_FILTER = " AND is_read = 0"
+    MATCH_FILTER = " AND id IN (SELECT rowid FROM notifications_fts WHERE notifications_fts MATCH ?)"
+    LIKE_FILTER = " AND message LIKE ? ESCAPE '\\'"
+    SEARCH_INDEX_SQL = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notifications_fts'"
+    MARK_READ_SQL = "UPDATE notifications SET is_read = 1 WHERE user_id = ? AND id = ? AND is_read = 0"
+    MARK_ALL_READ_SQL = "UPDATE notifications SET is_read = 1 WHERE user_id = ? AND is_read = 0"
+    UNREAD_COUNT_SQL = "SELECT COUNT(*) FROM notifications WHERE user_id = ? AND is_read = 0"
+    CLEAR_SQL = "DELETE FROM notifications WHERE user_id = ?"
+    
+    # Shortest text the trigram index can look up
+    MIN_MATCH_LENGTH = 3
+    
+    def add(self, user_id, message):
+        """Log an unread notification"""
+        with connect() as conn:
+            return conn.execute(self.INSERT_SQL, (user_id, message, _now())).lastrowid
+    
+    def add_many(self, notifications):
+        """Log (user_id, message) tuples in one transaction"""
+        created_at = _now()
+        rows = [(user_id, message, created_at) for user_id, message in notifications]
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def history(self, user_id):
+        """All notifications of a user, newest first"""
+        with connect() as conn:
+            rows = conn.execute(self.HISTORY_SQL, (user_id,)).fetchall()
+        return [Notification(*row) for row in rows]
+    
+    def page(self, user_id, after=None, limit=100, search=None, since_iso=None, until_iso=None, unread_only=False):
+        """
+        Up to limit notifications of a user, newest first, older than after.
+        
+        after is the (created_at, id) of the last row of the previous page,
+        or None for the first page. search matches any part of the message,
+        ignoring case; since_iso and until_iso (YYYY-MM-DD) bound the days.
+        """
+        filters = []
+        parameters = [user_id]
+        if after is not None:
+            filters.append(self.AFTER_FILTER)
+            parameters += after
+        if since_iso:
+            filters.append(self.SINCE_FILTER)
+            parameters.append(since_iso)
+        if until_iso:
+            filters.append(self.UNTIL_FILTER)
+            parameters.append(until_iso)
+        if unread_only:
+            filters.append(self.UNREAD_FILTER)
+        
+        search = (search or "").strip()
+        with connect() as conn:
+            if search:
+                if len(search) >= self.MIN_MATCH_LENGTH and conn.execute(self.SEARCH_INDEX_SQL).fetchone():
+                    # One quoted phrase, so the text is never read as query syntax
+                    filters.append(self.MATCH_FILTER)
+                    parameters.append('"' + search.replace('"', '""') + '"')
+                else:
+                    filters.append(self.LIKE_FILTER)
+                    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    parameters.append(f"%{escaped}%")
+            parameters.append(limit)
+            
+            rows = conn.execute(self.PAGE_SQL.format(filters="".join(filters)), parameters).fetchall()
+        return [Notification(*row) for row in rows]
+    
+    def mark_read(self, user_id, notification_id=None):
+        """Mark one notification, or all of a user's, as read; returns the rows changed"""
+        with connect() as conn:
+            if notification_id is None:
+                return conn.execute(self.MARK_ALL_READ_SQL, (user_id,)).rowcount
+            return conn.execute(self.MARK_READ_SQL, (user_id, notification_id)).rowcount
+    
+    def unread_count(self, user_id):
+        with connect() as conn:
+            return conn.execute(self.UNREAD_COUNT_SQL, (user_id,)).fetchone()[0]
+    
+    def clear(self, user_id):
+        """Delete every notification of a user"""
+        with connect() as conn:
+            conn.execute(self.CLEAR_SQL, (user_id,))
+
+class OutboxRepo:
+    """
+    The notification outbox.
+    
+    Workers claim due rows with one UPDATE that stamps them with a claim
+    token, so two workers never send the same row; rows of a worker that
+    died are handed back after a timeout.
+    """
+    
+    INSERT_SQL = """
+        INSERT INTO notification_outbox
+        (user_id, channel, category, title, message, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    CLAIM_SQL = """
+        UPDATE notification_outbox
+        SET status = 'sending', claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM notification_outbox
+            WHERE status = 'pending' AND channel = ? AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        )
+    """
+    CLAIM_USER_SQL = """
+        UPDATE notification_outbox
+        SET status = 'sending', claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM notification_outbox
+            WHERE status = 'pending' AND channel = ? AND next_attempt_at <= ? AND user_id = ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        )
+    """
+    CLAIMED_SQL = """
+        SELECT o.id, o.user_id, o.channel, o.category, o.title, o.message, o.attempts, u.email
+        FROM notification_outbox o
+        LEFT JOIN users u ON u.id = o.user_id
+        WHERE o.status = 'sending' AND o.claimed_by = ?
+        ORDER BY o.id
+    """
+    SENT_SQL = """
+        UPDATE notification_outbox
+        SET status = 'sent', sent_at = ?, claimed_by = NULL, last_error = NULL
+        WHERE id = ? AND claimed_by = ?
+    """
+    RETRY_SQL = """
+        UPDATE notification_outbox
+        SET status = 'pending', next_attempt_at = ?, claimed_by = NULL, last_error = ?
+        WHERE id = ? AND claimed_by = ?
+    """
+    FAILED_SQL = """
+        UPDATE notification_outbox
+        SET status = 'failed', claimed_by = NULL, last_error = ?
+        WHERE id = ? AND claimed_by = ?
+    """
+    RECLAIM_SQL = """
+        UPDATE notification_outbox
+        SET status = 'pending', claimed_by = NULL
+        WHERE status = 'sending' AND claimed_at < ?
+    """
+    PURGE_SQL = "DELETE FROM notification_outbox WHERE status = 'sent' AND sent_at < ?"
+    EXPIRE_SQL = """
+        DELETE FROM notification_outbox
+        WHERE (status = 'pending' AND created_at < ?) OR (status = 'failed' AND created_at < ?)
+    """
+    COUNTS_SQL = "SELECT status, COUNT(*) FROM notification_outbox GROUP BY status"
+    
+    def add_many(self, rows):
+        """Insert (user_id, channel, category, title, message, next_attempt_at, created_at) tuples"""
+        with connect() as conn:
+            conn.executemany(self.INSERT_SQL, rows)
+        return len(rows)
+    
+    def claim(self, token, now, channel, limit, user_id=None):
+        """Claim up to limit rows of a channel due by now (of one user, if given); returns them"""
+        with connect() as conn:
+            if user_id is None:
+                conn.execute(self.CLAIM_SQL, (token, now, channel, now, limit))
+            else:
+                conn.execute(self.CLAIM_USER_SQL, (token, now, channel, now, user_id, limit))
+            rows = conn.execute(self.CLAIMED_SQL, (token,)).fetchall()
+        return [OutboxRow(*row) for row in rows]
+    
+    def finish(self, token, sent, retries, failed):
+        """
+        Record a batch's results in one transaction: sent is [(sent_at, id)],
+        retries [(next_attempt_at, error, id)] and failed [(error, id)].
+        """
+        with connect() as conn:
+            conn.executemany(self.SENT_SQL, [(*row, token) for row in sent])
+            conn.executemany(self.RETRY_SQL, [(*row, token) for row in retries])
+            conn.executemany(self.FAILED_SQL, [(*row, token) for row in failed])
+    
+    def reclaim(self, claimed_before):
+        """Hand back rows claimed before the given time; returns how many"""
+        with connect() as conn:
+            return conn.execute(self.RECLAIM_SQL, (claimed_before,)).rowcount
+    
+    def purge(self, sent_before):
+        """Delete rows sent before the given time; returns how many"""
+        with connect() as conn:
+            return conn.execute(self.PURGE_SQL, (sent_before,)).rowcount
+    
+    def expire(self, pending_before, failed_before):
+        """Delete rows still pending since pending_before and failed ones older than failed_before"""
+        with connect() as conn:
+            return conn.execute(self.EXPIRE_SQL, (pending_before, failed_before)).rowcount
+    
+    def counts(self):
+        """{status: rows}"""
+        with connect() as conn:
+            return dict(conn.execute(self.COUNTS_SQL).fetchall())
+
+class UsersRepo:
+    """Lookups of user accounts by id"""
+    
+    USERNAMES_SQL = "SELECT id, username FROM users WHERE id IN ({})"
+    
+    # Bound parameters per statement, well below SQLite's limit
+    CHUNK = 500
+    
+    def usernames(self, user_ids):
+        """{user id: username} of the given ids"""
+        user_ids = list(user_ids)
+        names = {}
+        with connect() as conn:
+            for start in range(0, len(user_ids), self.CHUNK):
+                chunk = user_ids[start:start + self.CHUNK]
+                sql = self.USERNAMES_SQL.format(", ".join("?" * len(chunk)))
+                names.update(conn.execute(sql, chunk).fetchall())
+        return names
+
+class ReminderCursorsRepo:
+    """How far each reminder scheduler has dispatched"""
+    
+    GET_SQL = "SELECT dispatched_until FROM reminder_cursors WHERE name = ?"
+    # Never moves a cursor back, should two processes share one
+    SAVE_SQL = """
+        INSERT INTO reminder_cursors (name, dispatched_until, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE
+        SET dispatched_until = excluded.dispatched_until, updated_at = excluded.updated_at
+        WHERE excluded.dispatched_until > reminder_cursors.dispatched_until
+    """
+    
+    def get(self, name):
+        """The dispatched_until text of a cursor, or None if it was never saved"""
+        with connect() as conn:
+            row = conn.execute(self.GET_SQL, (name,)).fetchone()
+        return row[0] if row else None
+    
+    def save(self, name, dispatched_until):
+        with connect() as conn:
+            conn.execute(self.SAVE_SQL, (name, dispatched_until, _now()))
+
+class DashboardRepo:
+    """
+    The per-user dashboard_summary row (kept current by the triggers of migration 7).
+    
+    "Upcoming" appointments and reminders "due" are relative to the row's
+    as_of day, so a row from an earlier day is rebuilt on first read.
+    """
+    
+    SUMMARY_SQL = """
+        SELECT as_of, upcoming_appointments, next_appointment_date, next_appointment_time,
+               next_appointment_doctor, reminder_count, reminders_due, latest_pulse,
+               latest_pulse_at, record_count, latest_record_at
+        FROM dashboard_summary
+        WHERE user_id = ?
+    """
+    # Every column from the base tables; each subquery is served by an index
+    REBUILD_SQL = """
+        INSERT OR REPLACE INTO dashboard_summary (
+            user_id, as_of, upcoming_appointments, next_appointment_date, next_appointment_time,
+            next_appointment_doctor, reminder_count, reminders_due, latest_pulse,
+            latest_pulse_at, record_count, latest_record_at
+        )
+        SELECT
+            u.id,
+            :today,
+            (SELECT COUNT(*) FROM appointments a
+             WHERE a.user_id = u.id AND a.date_iso >= :today
+               AND a.status != 'Completed' AND a.status != 'Cancelled'),
+            n.date_iso, n.time, n.doctor,
+            (SELECT COUNT(*) FROM reminders r WHERE r.user_id = u.id),
+            (SELECT COUNT(*) FROM reminders r WHERE r.user_id = u.id AND r.date_iso = :today),
+            p.value, p.timestamp,
+            (SELECT COUNT(*) FROM medical_records m WHERE m.user_id = u.id),
+            (SELECT MAX(m.upload_date) FROM medical_records m WHERE m.user_id = u.id)
+        FROM users u
+        LEFT JOIN appointments n ON n.id = (
+            SELECT a.id FROM appointments a
+            WHERE a.user_id = u.id AND a.date_iso >= :today
+              AND a.status != 'Completed' AND a.status != 'Cancelled'
+            ORDER BY a.date_iso, a.time LIMIT 1
+        )
+        LEFT JOIN health_readings p ON p.id = (
+            SELECT r.id FROM health_readings r
+            WHERE r.user_id = u.id AND r.reading_type = 'pulse'
+            ORDER BY r.timestamp DESC LIMIT 1
+        )
+        WHERE :user_id IS NULL OR u.id = :user_id
+    """
+    
+    def summary(self, user_id, today):
+        """The summary of a user as of today (an ISO date), or None for an unknown user"""
+        with connect() as conn:
+            row = conn.execute(self.SUMMARY_SQL, (user_id,)).fetchone()
+            if row is None or row[0] != today:
+                conn.execute(self.REBUILD_SQL, {"today": today, "user_id": user_id})
+                row = conn.execute(self.SUMMARY_SQL, (user_id,)).fetchone()
+        return DashboardSummary(*row) if row else None
+    
+    def rebuild(self, today, user_id=None):
+        """Recompute the summary of one user, or of every user; returns the rows written"""
+        with connect() as conn:
+            return conn.execute(self.REBUILD_SQL, {"today": today, "user_id": user_id}).rowcount
+
+# Shared instances used by the tabs
+appointments_repo = AppointmentsRepo()
+reminders_repo = RemindersRepo()
+medications_repo = MedicationsRepo()
+cart_repo = CartRepo()
+records_repo = RecordsRepo()
+readings_repo = ReadingsRepo()
+notifications_repo = NotificationsRepo()
+reminder_cursors_repo = ReminderCursorsRepo()
+outbox_repo = OutboxRepo()
+users_repo = UsersRepo()
+dashboard_repo = DashboardRepo()
@@ -0,0 +1,25 @@
+"""
+Headless services for the Medical Assistant application.
+Reminders, appointments, the cart and checkout, health readings and
+medical records as plain functions: they take a user (username or id) and
+plain values, return data, and raise ServiceError for anything the user
+has to correct. Nothing here imports tkinter, so the same calls serve the
+tabs, scripts, benchmarks and server processes.
+
+    from services import cart
+    cart.add_to_cart("alice", "Paracetamol", 2)
+    order = cart.checkout("alice", "UPI")
+"""
+
+from services.common import ServiceError, user_id_of
+from services import appointments, cart, readings, records, reminders
+
+__all__ = [
+    "ServiceError",
+    "user_id_of",
+    "appointments",
+    "cart",
+    "readings",
+    "records",
+    "reminders",
+]
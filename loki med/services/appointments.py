@@ -0,0 +1,46 @@
+"""
+Doctor appointments.
+"""
+
+from repositories import appointments_repo
+from services.common import ServiceError, user_id_of
+
+def list_appointments(user):
+    """Every appointment of a user in chronological order"""
+    return appointments_repo.list_for_user(user_id_of(user))
+
+def get_appointment(appointment_id):
+    """One appointment, or None"""
+    return appointments_repo.get(appointment_id)
+
+def add_appointment(user, date_str, time_str, doctor, appointment_type, notes="", status="Scheduled"):
+    """Book an appointment; returns its id"""
+    if not date_str or not time_str or not doctor or not appointment_type:
+        raise ServiceError("Please fill in all required fields (date, time, doctor, type)")
+    
+    user_id = user_id_of(user)
+    try:
+        return appointments_repo.add(user_id, date_str, time_str, doctor, appointment_type, notes, status)
+    except ValueError as e:
+        raise ServiceError(str(e)) from None
+
+def update_appointment(user, appointment_id, date_str, time_str, doctor, appointment_type, notes, status):
+    """Change an appointment of the user"""
+    if not date_str or not time_str or not doctor or not appointment_type or not status:
+        raise ServiceError("Please fill in all required fields")
+    
+    user_id = user_id_of(user)
+    try:
+        updated = appointments_repo.update(
+            appointment_id, user_id, date_str, time_str, doctor, appointment_type, notes, status
+        )
+    except ValueError as e:
+        raise ServiceError(str(e)) from None
+    
+    if not updated:
+        raise ServiceError("Appointment not found or not owned by current user")
+
+def delete_appointment(user, appointment_id):
+    """Delete an appointment of the user"""
+    if not appointments_repo.delete(appointment_id, user_id_of(user)):
+        raise ServiceError("Appointment not found or not owned by current user")
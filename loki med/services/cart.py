@@ -0,0 +1,130 @@
+"""
+Shopping cart and checkout.
+"""
+
+from collections import namedtuple
+
+from medication_catalog import medication_catalog
+from repositories import cart_repo, OutOfStockError
+from services.common import ServiceError, user_id_of
+
+Cart = namedtuple("Cart", "lines total")
+Order = namedtuple("Order", "lines total payment_method fee payable")
+
+PAYMENT_METHODS = ("Credit/Debit Card", "UPI", "Net Banking", "Cash on Delivery")
+
+# Charged on top of the order total for cash on delivery
+COD_FEE = 40
+
+def catalog():
+    """Every medicine that can be ordered, by name"""
+    return medication_catalog.list_all()
+
+def get_cart(user):
+    """The user's cart lines and their total"""
+    lines = cart_repo.lines_for_user(user_id_of(user))
+    return Cart(lines, sum(line.subtotal for line in lines))
+
+def add_to_cart(user, medicine_name, quantity):
+    """
+    Add quantity units of a medicine, merging with its line if it is
+    already in the cart; returns the line's new quantity.
+    """
+    if not medicine_name:
+        raise ServiceError("Please select a medicine")
+    
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise ServiceError("Please enter a valid quantity") from None
+    if quantity <= 0:
+        raise ServiceError("Please enter a valid quantity")
+    
+    medicine = medication_catalog.by_name(medicine_name)
+    if not medicine:
+        raise ServiceError("Medicine not found")
+    if quantity > medicine.quantity:
+        raise ServiceError(f"Only {medicine.quantity} units available")
+    
+    user_id = user_id_of(user)
+    existing = cart_repo.find_line(user_id, medicine.id)
+    if not existing:
+        cart_repo.add_line(user_id, medicine.id, quantity, medicine.price)
+        return quantity
+    
+    line_id, current_quantity = existing
+    new_quantity = current_quantity + quantity
+    if new_quantity > medicine.quantity:
+        raise ServiceError(
+            f"Cannot add {quantity} more units. "
+            f"Only {medicine.quantity - current_quantity} additional units available."
+        )
+    cart_repo.set_quantity(line_id, new_quantity, medicine.price)
+    return new_quantity
+
+def remove_line(user, line_id):
+    """Remove one line from the user's cart"""
+    if not cart_repo.remove_user_line(line_id, user_id_of(user)):
+        raise ServiceError("Item not found in your cart")
+
+def clear_cart(user):
+    """Remove every line from the user's cart"""
+    cart_repo.clear(user_id_of(user))
+
+def validate_payment(payment_method, details=None):
+    """
+    Check the fields a payment method needs; raises ServiceError for the
+    first one missing.
+    
+    details may hold card_number, card_name, cvv, expiry_month and
+    expiry_year for cards, bank for net banking and address for cash on
+    delivery.
+    """
+    details = details or {}
+    
+    def field(name):
+        return (details.get(name) or "").strip()
+    
+    if payment_method not in PAYMENT_METHODS:
+        raise ServiceError(f"Unknown payment method: {payment_method}")
+    
+    if payment_method == "Credit/Debit Card":
+        if len(field("card_number")) < 13:
+            raise ServiceError("Please enter a valid card number")
+        if not field("card_name"):
+            raise ServiceError("Please enter the name on card")
+        if len(field("cvv")) < 3:
+            raise ServiceError("Please enter a valid CVV")
+        if not field("expiry_month") or not field("expiry_year"):
+            raise ServiceError("Please select expiry date")
+    elif payment_method == "Net Banking":
+        if not field("bank"):
+            raise ServiceError("Please select a bank")
+    elif payment_method == "Cash on Delivery":
+        if not field("address"):
+            raise ServiceError("Please enter your delivery address")
+
+def checkout(user, payment_method, details=None):
+    """
+    Pay for the user's cart: the ordered quantities are taken out of stock
+    and the cart is emptied. Returns the Order.
+    
+    Stock is checked again as it is taken; if someone else bought what a
+    line needs in the meantime, the cart is left as it was.
+    """
+    validate_payment(payment_method, details)
+    
+    user_id = user_id_of(user)
+    try:
+        lines = cart_repo.checkout(user_id)
+    except OutOfStockError as e:
+        raise ServiceError(
+            f"Not enough {e.medicine} in stock: only {e.available} units available. "
+            f"Please update your cart."
+        ) from None
+    if not lines:
+        raise ServiceError("Your cart is empty")
+    
+    total = sum(line.subtotal for line in lines)
+    fee = COD_FEE if payment_method == "Cash on Delivery" else 0
+    return Order(lines, total, payment_method, fee, total + fee)
@@ -0,0 +1,18 @@
+"""
+Pieces shared by the service modules.
+"""
+
+from user_session import resolve_user_id
+
+class ServiceError(ValueError):
+    """A request the caller has to correct; the message is meant for the user"""
+
+def user_id_of(user):
+    """The id of a user given by id or username; raises ServiceError if unknown"""
+    if isinstance(user, int):
+        return user
+    
+    user_id = resolve_user_id(user)
+    if user_id is None:
+        raise ServiceError("User not found")
+    return user_id
@@ -0,0 +1,45 @@
+"""
+Health readings (pulse, ...).
+New readings go through the batched readings writer.
+"""
+
+from readings_writer import readings_writer, flush_readings
+from repositories import readings_repo
+from services.common import ServiceError, user_id_of
+
+PULSE = "pulse"
+
+# Pulse rates (BPM) outside this range are reported as Low / High
+PULSE_LOW = 60
+PULSE_HIGH = 100
+
+def pulse_status(value):
+    """Low, Normal or High for a pulse rate"""
+    if value < PULSE_LOW:
+        return "Low"
+    if value > PULSE_HIGH:
+        return "High"
+    return "Normal"
+
+def add_reading(user, value, notes=None, reading_type=PULSE):
+    """Queue a reading for writing; returns its value as a float"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ServiceError(f"Please enter a valid numeric value for {reading_type}") from None
+    if value <= 0:
+        raise ServiceError(f"Please enter a positive {reading_type} value")
+    
+    readings_writer.add(user_id_of(user), reading_type, value, notes)
+    return value
+
+def recent_readings(user, reading_type=PULSE, limit=50):
+    """Newest readings of one type, including those still queued for writing"""
+    user_id = user_id_of(user)
+    flush_readings()
+    return readings_repo.recent(user_id, reading_type, limit)
+
+def latest_reading(user, reading_type=PULSE):
+    """The newest reading of one type, or None"""
+    readings = recent_readings(user, reading_type, 1)
+    return readings[0] if readings else None
@@ -0,0 +1,64 @@
+"""
+Medical records: metadata in the database, files under medical_records/.
+"""
+
+import os
+import shutil
+
+from repositories import records_repo
+from services.common import ServiceError, user_id_of
+
+# Uploaded files are copied to RECORDS_DIR/<user>/
+RECORDS_DIR = "medical_records"
+
+def list_records(user):
+    """A user's records, newest upload first"""
+    return records_repo.list_for_user(user_id_of(user))
+
+def get_record(record_id):
+    """One record, or None"""
+    return records_repo.get(record_id)
+
+def add_record(user, file_path, record_type, record_date, provider, description="", tags=()):
+    """Copy a file into the user's records folder and store its details; returns the record id"""
+    if not file_path or not os.path.exists(file_path):
+        raise ServiceError("File does not exist")
+    if not record_type or not record_date or not provider:
+        raise ServiceError("Please fill in all required fields (Type, Date, Provider)")
+    
+    user_id = user_id_of(user)
+    
+    user_dir = os.path.join(RECORDS_DIR, str(user))
+    os.makedirs(user_dir, exist_ok=True)
+    dest_path = os.path.join(user_dir, os.path.basename(file_path))
+    shutil.copy2(file_path, dest_path)
+    
+    return records_repo.add(
+        user_id, os.path.basename(file_path), dest_path, record_type, record_date,
+        provider, description, tags
+    )
+
+def record_file(user, record_id):
+    """Path of the file of a record owned by the user"""
+    file_path = records_repo.file_path(record_id, user_id_of(user))
+    if file_path is None:
+        raise ServiceError("Record not found or not owned by current user")
+    if not os.path.exists(file_path):
+        raise ServiceError("File not found on disk")
+    return file_path
+
+def delete_record(user, record_id):
+    """Delete a record of the user and its file"""
+    user_id = user_id_of(user)
+    
+    file_path = records_repo.file_path(record_id, user_id)
+    if file_path is None:
+        raise ServiceError("Record not found or not owned by current user")
+    if not records_repo.delete(record_id, user_id):
+        raise ServiceError("Failed to delete record from database")
+    
+    if os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            print(f"Warning: Could not delete file {file_path}")
@@ -0,0 +1,128 @@
+"""
+Medication reminders.
+Dates are DD-MM-YYYY and times HH:MM, as the tabs take them. A recurring
+reminder is one stored rule; its occurrences are computed when asked for.
+"""
+
+from datetime import datetime, timedelta
+
+from date_codec import encode_date, normalize_time, to_iso
+from medication_catalog import medication_catalog
+from recurrence import DEFAULT_FREQUENCY, RecurrenceRule, merge_occurrences
+from repositories import Reminder, DueReminder, reminders_repo
+from services.common import ServiceError, user_id_of
+
+# Upper bound for "started on any date" in recurring() lookups
+_LAST_DATE = "9999-12-31"
+
+def _rules(rows):
+    """(row, rule) pairs of recurring reminder rows, skipping malformed ones"""
+    pairs = []
+    for row in rows:
+        rule = RecurrenceRule.from_row(row)
+        if rule is not None:
+            pairs.append((row, rule))
+    return pairs
+
+def list_reminders(user):
+    """Every reminder of a user in chronological order"""
+    return reminders_repo.list_for_user(user_id_of(user))
+
+def active_reminders(user, now=None):
+    """
+    Reminders at or after now (default: the current time), in due order.
+    
+    A recurring reminder appears once, with the date and time of its next
+    occurrence.
+    """
+    now = now or datetime.now()
+    minute = now.replace(second=0, microsecond=0)
+    user_id = user_id_of(user)
+    
+    reminders = reminders_repo.active_from(user_id, to_iso(now), now.strftime("%H:%M"))
+    for row, rule in _rules(reminders_repo.recurring(user_id, to_iso(now), _LAST_DATE)):
+        due = rule.next_at(minute)
+        if due is not None:
+            reminders.append(Reminder(
+                row.id, row.medicine, row.dose, due.strftime("%d-%m-%Y"), due.strftime("%H:%M"), row.frequency
+            ))
+    
+    reminders.sort(key=lambda reminder: (to_iso(reminder.date) or "", reminder.time))
+    return reminders
+
+def due_reminders(user, now=None, within_minutes=0):
+    """
+    Today's reminders due from now until within_minutes later.
+    
+    The window stops at midnight; reminders are matched within one day.
+    """
+    now = now or datetime.now()
+    end = now + timedelta(minutes=within_minutes)
+    end_time = end.strftime("%H:%M") if end.date() == now.date() else "23:59"
+    user_id = user_id_of(user)
+    today = to_iso(now)
+    
+    due = reminders_repo.due_between(user_id, today, now.strftime("%H:%M"), end_time)
+    
+    # Occurrences of the recurring rules in the same minutes, end minute included
+    start = now.replace(second=0, microsecond=0)
+    stop = datetime.strptime(f"{today} {end_time}", "%Y-%m-%d %H:%M") + timedelta(minutes=1)
+    rules = _rules(reminders_repo.recurring(user_id, today, today))
+    for occurrence, row in merge_occurrences(rules, start, stop):
+        due.append(DueReminder(row.id, row.medicine, row.dose, occurrence.strftime("%H:%M")))
+    
+    due.sort(key=lambda reminder: reminder.time)
+    return due
+
+def parse_date(date_str):
+    """The datetime of a DD-MM-YYYY date; raises ServiceError for anything else"""
+    try:
+        return datetime.strptime(date_str, "%d-%m-%Y")
+    except (TypeError, ValueError):
+        raise ServiceError("Invalid date format. Use DD-MM-YYYY") from None
+
+def is_past_date(date_str):
+    """True if date_str is a valid date before yesterday"""
+    try:
+        return parse_date(date_str) < datetime.now() - timedelta(days=1)
+    except ServiceError:
+        return False
+
+def add_reminder(user, medicine, dose, date_str, time_str, frequency=DEFAULT_FREQUENCY,
+                 times_of_day=None, count=None, until=None):
+    """
+    Store a reminder; returns it as a Reminder with the date and time as stored.
+    
+    times_of_day ("08:00,20:00") adds daily times to a daily or longer
+    frequency; count (doses) or until (DD-MM-YYYY) end a recurring reminder.
+    """
+    if not medicine or not dose or not date_str or not time_str or not frequency:
+        raise ServiceError("Please fill in all fields")
+    
+    parse_date(date_str)
+    try:
+        datetime.strptime(time_str, "%H:%M")
+    except ValueError:
+        raise ServiceError("Invalid time format. Use HH:MM") from None
+    
+    user_id = user_id_of(user)
+    medicine_id = medication_catalog.id_for_name(medicine)
+    if medicine_id is None:
+        raise ServiceError("Medicine not found")
+    
+    date_str, _ = encode_date(date_str)
+    time_str = normalize_time(time_str)
+    try:
+        reminder_id = reminders_repo.add(user_id, medicine_id, dose, date_str, time_str, frequency,
+                                         times_of_day, count, until)
+    except ValueError as e:
+        raise ServiceError(str(e)) from None
+    return Reminder(reminder_id, medicine, dose, date_str, time_str, frequency)
+
+def delete_reminder(user, medicine, date_str, time_str, dose):
+    """Delete a user's reminders of a medicine and dose at one date and time; returns how many"""
+    user_id = user_id_of(user)
+    medicine_id = medication_catalog.id_for_name(medicine)
+    if medicine_id is None:
+        return 0
+    return reminders_repo.delete_matching(user_id, medicine_id, date_str, time_str, dose)
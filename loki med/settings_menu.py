@@ -10,8 +10,20 @@ import os
 from datetime import datetime
 import json
 
-# Database path
-DB_PATH = os.path.join("database", "medical_assistant.db")
+# Database access
+from db_manager import connect
+from user_session import resolve_user_id
+from repositories import notifications_repo
+from db_worker import run_in_background, LOADING_TEXT
+from date_codec import to_iso
+import sql_trace
+from medication_catalog import medication_catalog
+
+# Notifications fetched per page of the history window
+HISTORY_PAGE_SIZE = 100
+
+# Fraction of the list left below the view when the next page is fetched
+HISTORY_PREFETCH = 0.2
 
 def create_settings_menu(parent, settings_button, username):
     """Create a dropdown menu for the settings button"""
@@ -38,6 +50,11 @@ def create_settings_menu(parent, settings_button, username):
         command=lambda: show_personal_information(parent, username)
     )
     
+    settings_menu.add_command(
+        label="Query Performance",
+        command=lambda: show_query_report(parent)
+    )
+    
     settings_menu.add_separator()
     
     settings_menu.add_command(
@@ -118,7 +135,7 @@ def show_settings_dialog(parent, username):
     
     # Get user email from database
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("SELECT email FROM users WHERE username = ?", (username,))
         user_data = cursor.fetchone()
@@ -182,18 +199,18 @@ def show_settings_dialog(parent, username):
             if not cur or not new or not confirm:
                 messagebox.showerror("Error", "All fields are required")
                 return
-                
+            
             if new != confirm:
                 messagebox.showerror("Error", "New passwords do not match")
                 return
-                
+            
             if len(new) < 6:
                 messagebox.showerror("Error", "Password must be at least 6 characters long")
                 return
-                
+            
             # Verify current password
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = connect()
                 cursor = conn.cursor()
                 cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
                 result = cursor.fetchone()
@@ -275,7 +292,7 @@ def show_settings_dialog(parent, username):
         # Save email and notification preferences
         try:
             # Save email
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             cursor.execute("UPDATE users SET email = ? WHERE username = ?", (email_entry.get(), username))
             conn.commit()
@@ -399,22 +416,15 @@ def show_medicines_list(parent, username):
     # Get medicines from database and populate the tree
     all_medicines = []
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name, price, description, quantity FROM medications ORDER BY name")
-        for row in cursor.fetchall():
-            name, price, description, quantity = row
+        for medicine in medication_catalog.list_all():
             item_values = (
-                name,
-                f"₹{price:.2f}",
-                description,
-                quantity
+                medicine.name,
+                f"₹{medicine.price:.2f}",
+                medicine.description,
+                medicine.quantity
             )
             tree.insert("", "end", values=item_values)
             all_medicines.append(item_values)
-        
-        conn.close()
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load medicines: {str(e)}")
         # Add some dummy data if database fails
@@ -495,10 +505,10 @@ def show_medicines_list(parent, username):
     center_window(medicines_window, parent)
 
 def show_notification_history(parent, username):
-    """Show the notification history window"""
+    """Show the notification history window, loading it a page at a time as it is scrolled"""
     notification_window = Toplevel(parent)
     notification_window.title("Notification History")
-    notification_window.geometry("500x400")
+    notification_window.geometry("560x520")
     notification_window.transient(parent)  # Set parent window
     notification_window.grab_set()  # Make window modal
     
@@ -508,66 +518,223 @@ def show_notification_history(parent, username):
     
     # Add title
     title_label = ttk.Label(main_frame, text="Notification History", font=("Segoe UI", 16, "bold"))
-    title_label.pack(pady=(0, 20))
+    title_label.pack(pady=(0, 10))
+    
+    # Search, date range and unread filters
+    filter_frame = ttk.Frame(main_frame)
+    filter_frame.pack(fill="x")
+    
+    ttk.Label(filter_frame, text="Search:").grid(row=0, column=0, sticky="w")
+    search_var = tk.StringVar()
+    search_entry = ttk.Entry(filter_frame, textvariable=search_var, width=24)
+    search_entry.grid(row=0, column=1, columnspan=3, sticky="ew", padx=5)
+    
+    unread_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(filter_frame, text="Unread only", variable=unread_var,
+                    command=lambda: reload()).grid(row=0, column=4, sticky="w", padx=5)
+    
+    ttk.Label(filter_frame, text="From:").grid(row=1, column=0, sticky="w", pady=(5, 0))
+    since_var = tk.StringVar()
+    since_entry = ttk.Entry(filter_frame, textvariable=since_var, width=11)
+    since_entry.grid(row=1, column=1, sticky="w", padx=5, pady=(5, 0))
     
-    # Create a listbox for notifications
-    notification_list = tk.Listbox(main_frame, font=("Segoe UI", 10), height=12)
-    notification_list.pack(fill="both", expand=True, pady=10)
+    ttk.Label(filter_frame, text="To:").grid(row=1, column=2, sticky="w", pady=(5, 0))
+    until_var = tk.StringVar()
+    until_entry = ttk.Entry(filter_frame, textvariable=until_var, width=11)
+    until_entry.grid(row=1, column=3, sticky="w", padx=5, pady=(5, 0))
     
-    # Add a scrollbar
-    scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=notification_list.yview)
-    notification_list.configure(yscrollcommand=scrollbar.set)
+    ttk.Button(filter_frame, text="Apply", command=lambda: reload()).grid(row=1, column=4, sticky="w", padx=5, pady=(5, 0))
+    filter_frame.columnconfigure(1, weight=1)
+    
+    for entry in (search_entry, since_entry, until_entry):
+        entry.bind("<Return>", lambda event: reload())
+    
+    # Create a listbox for notifications, with its scrollbar beside it
+    list_frame = ttk.Frame(main_frame)
+    list_frame.pack(fill="both", expand=True, pady=10)
+    
+    notification_list = tk.Listbox(list_frame, font=("Segoe UI", 10), height=12)
+    scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=notification_list.yview)
     scrollbar.pack(side="right", fill="y")
+    notification_list.pack(side="left", fill="both", expand=True)
+    
+    status_label = ttk.Label(main_frame, text="", foreground="#6c757d")
+    status_label.pack(anchor="w")
+    
+    # Only the pages scrolled to are fetched: the listbox holds the rows
+    # loaded so far, and nearing its end loads the next page
+    state = {
+        "user_id": None,
+        "filters": {},
+        "rows": [],
+        "after": None,
+        "exhausted": False,
+        "loading": False,
+        "unread": 0,
+    }
     
-    # Get notifications from database
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    def row_text(notification):
+        marker = "\u2022 " if not notification.is_read else "   "
+        return f"{marker}{notification.created_at}: {notification.message}"
+    
+    def update_status():
+        more = "" if state["exhausted"] else "+"
+        status_label.config(
+            text=f"{len(state['rows'])}{more} shown, {state['unread']} unread - double-click to mark as read"
+        )
+    
+    def read_filters():
+        """The repository filters of the entries, or None after reporting an invalid date"""
+        filters = {"search": search_var.get().strip(), "unread_only": unread_var.get()}
+        for key, variable, label in (("since_iso", since_var, "From"), ("until_iso", until_var, "To")):
+            text = variable.get().strip()
+            filters[key] = to_iso(text) if text else None
+            if text and filters[key] is None:
+                messagebox.showerror("Error", f"{label} must be a date such as DD-MM-YYYY", parent=notification_window)
+                return None
+        return filters
+    
+    def fetch_page(user_id, after, filters):
+        if user_id is None:
+            user_id = resolve_user_id(username)
+            if user_id is None:
+                return None, [], 0
         
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        rows = notifications_repo.page(user_id, after=after, limit=HISTORY_PAGE_SIZE, **filters)
+        unread = notifications_repo.unread_count(user_id) if after is None else None
+        return user_id, rows, unread
+    
+    def show_page(result):
+        user_id, rows, unread = result
+        state["loading"] = False
+        state["user_id"] = user_id
+        first = state["after"] is None
+        if first:
+            notification_list.delete(0, tk.END)
+            state["rows"] = []
         
-        if result:
-            user_id = result[0]
-            
-            # Get notifications
-            cursor.execute("""
-                SELECT message, created_at
-                FROM notifications
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-            """, (user_id,))
-            
-            for row in cursor.fetchall():
-                message, created_at = row
-                notification_list.insert(tk.END, f"{created_at}: {message}")
+        state["rows"].extend(rows)
+        for notification in rows:
+            notification_list.insert(tk.END, row_text(notification))
+        if rows:
+            state["after"] = (rows[-1].created_at, rows[-1].id)
+        state["exhausted"] = len(rows) < HISTORY_PAGE_SIZE
         
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to load notifications: {str(e)}")
+        if first and not rows:
+            if any(state["filters"].values()):
+                notification_list.insert(tk.END, "No notifications match these filters")
+            else:
+                # If no notifications, show sample data
+                sample_data = [
+                    "2025-04-15 08:00: Reminder for Paracetamol (500mg)",
+                    "2025-04-14 14:30: Appointment with Dr. Johnson confirmed",
+                    "2025-04-13 09:15: New message from Dr. Smith",
+                    "2025-04-12 18:00: Order #12345 has been delivered",
+                    "2025-04-10 11:30: Reminder to update your medical record"
+                ]
+                for item in sample_data:
+                    notification_list.insert(tk.END, item)
+        
+        if unread is not None:
+            state["unread"] = unread
+        update_status()
+        
+        # A page that does not fill the list leaves nothing to scroll; go on loading
+        if not state["exhausted"]:
+            notification_list.after_idle(maybe_load_more)
+    
+    def failed(e):
+        state["loading"] = False
+        notification_list.delete(0, tk.END)
+        messagebox.showerror("Error", f"Failed to load notifications: {str(e)}", parent=notification_window)
+    
+    def load_page():
+        state["loading"] = True
+        run_in_background(notification_list, "notifications", fetch_page,
+                          (state["user_id"], state["after"], dict(state["filters"])),
+                          on_done=show_page, on_error=failed)
+    
+    def maybe_load_more():
+        if state["loading"] or state["exhausted"]:
+            return
+        first, last = notification_list.yview()
+        if last >= 1.0 - HISTORY_PREFETCH:
+            load_page()
     
-    # If no notifications, show sample data
-    if notification_list.size() == 0:
-        sample_data = [
-            "2025-04-15 08:00: Reminder for Paracetamol (500mg)",
-            "2025-04-14 14:30: Appointment with Dr. Johnson confirmed",
-            "2025-04-13 09:15: New message from Dr. Smith",
-            "2025-04-12 18:00: Order #12345 has been delivered",
-            "2025-04-10 11:30: Reminder to update your medical record"
-        ]
-        for item in sample_data:
-            notification_list.insert(tk.END, item)
+    def reload():
+        filters = read_filters()
+        if filters is None:
+            return
+        state.update(filters=filters, after=None, exhausted=False)
+        # Starting a load under the same key drops any page still in flight
+        notification_list.delete(0, tk.END)
+        notification_list.insert(tk.END, LOADING_TEXT)
+        load_page()
+    
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        maybe_load_more()
+    
+    notification_list.configure(yscrollcommand=on_scroll)
+    
+    def mark_selected_read(event=None):
+        selection = notification_list.curselection()
+        if not selection or selection[0] >= len(state["rows"]) or state["user_id"] is None:
+            return
+        index = selection[0]
+        notification = state["rows"][index]
+        if notification.is_read:
+            return
+        
+        try:
+            notifications_repo.mark_read(state["user_id"], notification.id)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update notification: {str(e)}", parent=notification_window)
+            return
+        
+        notification = notification._replace(is_read=1)
+        state["rows"][index] = notification
+        notification_list.delete(index)
+        notification_list.insert(index, row_text(notification))
+        state["unread"] = max(state["unread"] - 1, 0)
+        update_status()
+    
+    def mark_all_read():
+        if state["user_id"] is None:
+            return
+        try:
+            notifications_repo.mark_read(state["user_id"])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update notifications: {str(e)}", parent=notification_window)
+            return
+        reload()
+    
+    notification_list.bind("<Double-Button-1>", mark_selected_read)
+    
+    reload()
+    
+    button_frame = ttk.Frame(main_frame)
+    button_frame.pack(pady=10)
+    
+    # Add a mark-all-read button
+    read_button = tk.Button(
+        button_frame,
+        bg="#4043eb",
+        fg="#000000",
+        text="Mark All as Read",
+        command=mark_all_read
+    )
+    read_button.pack(side="left", padx=(0, 10))
     
     # Add a clear button
     clear_button = tk.Button(
-        main_frame,
+        button_frame,
         bg="#0b07ff",
         fg="#000000",
         text="Clear Notifications",
-        command=lambda: clear_notifications(notification_list, username)
+        command=lambda: clear_notifications(notification_list, username, state)
     )
-    clear_button.pack(pady=10)
+    clear_button.pack(side="left")
     
     # Add a close button
     close_button = tk.Button(
@@ -582,7 +749,7 @@ def show_notification_history(parent, username):
     # Center the window on the parent
     center_window(notification_window, parent)
 
-def clear_notifications(notification_list, username):
+def clear_notifications(notification_list, username, history_state=None):
     """Clear all notifications for the user"""
     # Confirm with the user
     confirm = messagebox.askyesno("Confirm", "Are you sure you want to clear all notifications?")
@@ -591,26 +758,19 @@ def clear_notifications(notification_list, username):
     
     # Clear from database
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if result:
-            user_id = result[0]
-            
+        if user_id is not None:
             # Delete notifications
-            cursor.execute("DELETE FROM notifications WHERE user_id = ?", (user_id,))
-            conn.commit()
-        
-        conn.close()
+            notifications_repo.clear(user_id)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to clear notifications: {str(e)}")
     
-    # Clear the listbox
+    # Clear the listbox, and stop the history window paging
     notification_list.delete(0, tk.END)
+    if history_state is not None:
+        history_state.update(rows=[], exhausted=True)
     messagebox.showinfo("Success", "All notifications have been cleared.")
 
 def show_personal_information(parent, username):
@@ -654,7 +814,7 @@ def show_personal_information(parent, username):
     }
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         conn.row_factory = sqlite3.Row  # Allow dictionary access to rows
         cursor = conn.cursor()
         
@@ -808,26 +968,18 @@ def show_personal_information(parent, username):
 
 def save_personal_info(username, data):
     """Save personal information to the database"""
-    import sqlite3
-    import os
-    
-    DB_PATH = os.path.join("database", "medical_assistant.db")
-    
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         
         # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        user_id = resolve_user_id(username)
         
-        if not result:
+        if user_id is None:
             messagebox.showerror("Error", "User not found")
             conn.close()
             return
         
-        user_id = result[0]
-        
         # Update user info
         cursor.execute(
             "UPDATE users SET email = ?, phone = ?, full_name = ? WHERE id = ?",
@@ -870,6 +1022,75 @@ def save_personal_info(username, data):
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save personal information: {str(e)}")
 
+def show_query_report(parent):
+    """Show the SQL tracing report (statement counts, latency percentiles, slow queries)"""
+    report_window = Toplevel(parent)
+    report_window.title("Query Performance")
+    report_window.geometry("900x500")
+    report_window.transient(parent)  # Set parent window
+    
+    # Create main frame
+    main_frame = ttk.Frame(report_window, padding=20)
+    main_frame.pack(expand=True, fill="both")
+    
+    # Add title
+    title_label = ttk.Label(main_frame, text="Query Performance", font=("Segoe UI", 16, "bold"))
+    title_label.pack(pady=(0, 10))
+    
+    status_label = ttk.Label(main_frame, font=("Segoe UI", 10))
+    status_label.pack(anchor="w", pady=(0, 10))
+    
+    # Report text
+    report_text = scrolledtext.ScrolledText(main_frame, font=("Consolas", 9), wrap="none")
+    report_text.pack(fill="both", expand=True)
+    
+    def refresh():
+        status_label.config(
+            text=f"Tracing is {'on' if sql_trace.is_enabled() else 'off'}. "
+                 f"Statements slower than {sql_trace.tracer.slow_query_ms:g} ms are logged to {sql_trace.SLOW_QUERY_LOG}."
+        )
+        toggle_button.config(text="Disable Tracing" if sql_trace.is_enabled() else "Enable Tracing")
+        
+        report_text.config(state="normal")
+        report_text.delete("1.0", tk.END)
+        report_text.insert(tk.END, sql_trace.report())
+        report_text.config(state="disabled")
+    
+    def toggle():
+        if sql_trace.is_enabled():
+            sql_trace.disable()
+        else:
+            sql_trace.enable()
+        refresh()
+    
+    def reset():
+        sql_trace.reset()
+        refresh()
+    
+    def save():
+        try:
+            path = sql_trace.dump_report()
+            messagebox.showinfo("Report Saved", f"Report written to {path}", parent=report_window)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save report: {str(e)}", parent=report_window)
+    
+    # Buttons
+    button_frame = ttk.Frame(main_frame)
+    button_frame.pack(fill="x", pady=(10, 0))
+    
+    toggle_button = ttk.Button(button_frame, command=toggle)
+    toggle_button.pack(side="left")
+    
+    ttk.Button(button_frame, text="Refresh", command=refresh).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Reset", command=reset).pack(side="left")
+    ttk.Button(button_frame, text="Save Report", command=save).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Close", command=report_window.destroy).pack(side="right")
+    
+    refresh()
+    
+    # Center the window on the parent
+    center_window(report_window, parent)
+
 def show_about_dialog(parent):
     """Show the about dialog"""
     about_window = Toplevel(parent)
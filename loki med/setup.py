@@ -10,7 +10,7 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'medical_assistant = main:main'  # Changed to match your main entry point
+            'medical_assistant = launcher:launch'
         ]
     },
 )
\ No newline at end of file
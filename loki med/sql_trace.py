@@ -0,0 +1,296 @@
+"""
+Opt-in SQL tracing for the Medical Assistant application.
+Times every statement run through the connection manager and keeps, per
+statement, the execution count, rows returned and a latency sample from
+which p50/p95/p99 are reported. Statements slower than a threshold are
+written to a slow-query log.
+
+Tracing is off unless enabled with enable() or the environment:
+    MEDICAL_SQL_TRACE=1          turn tracing on at startup
+    MEDICAL_SLOW_QUERY_MS=50     slow-query threshold (default 100 ms)
+"""
+
+import os
+import re
+import atexit
+import random
+import sqlite3
+import threading
+from datetime import datetime
+from time import perf_counter
+
+from db_manager import DB_FOLDER, connection_manager
+
+# Default slow-query threshold in milliseconds
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+# Latency samples kept per statement; beyond this a reservoir sample is kept
+MAX_SAMPLES = 1024
+
+# Longest statement text kept as a report key
+MAX_SQL_LENGTH = 200
+
+SLOW_QUERY_LOG = os.path.join(DB_FOLDER, "slow_queries.log")
+REPORT_PATH = os.path.join(DB_FOLDER, "sql_trace_report.txt")
+
+_WHITESPACE = re.compile(r"\s+")
+
+class StatementStats:
+    """Counters of one normalised statement"""
+    
+    __slots__ = ("sql", "count", "rows", "total", "max", "samples")
+    
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+    
+    def add(self, elapsed, rows):
+        self.count += 1
+        self.rows += rows
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            # Reservoir sampling keeps a uniform sample of every execution
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = elapsed
+    
+    def percentile(self, fraction):
+        """Latency (seconds) at the given fraction of the sorted sample"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+class SqlTracer:
+    """Collects statement statistics and the slow-query log"""
+    
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, slow_log_path=SLOW_QUERY_LOG):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.enabled = False
+        self.started = datetime.now()
+        self._stats = {}
+        # Raw SQL text -> normalised key, so each text is normalised once
+        self._keys = {}
+        self._lock = threading.Lock()
+    
+    def key(self, sql):
+        key = self._keys.get(sql)
+        if key is None:
+            key = _WHITESPACE.sub(" ", sql).strip()
+            if len(key) > MAX_SQL_LENGTH:
+                key = key[:MAX_SQL_LENGTH - 3] + "..."
+            self._keys[sql] = key
+        return key
+    
+    def record(self, sql, elapsed, rows):
+        """Account one finished execution of sql"""
+        key = self.key(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(key)
+            stats.add(elapsed, rows)
+        
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._log_slow(key, elapsed, rows)
+    
+    def _log_slow(self, key, elapsed, rows):
+        # Parameters are never logged; they may hold passwords or health data
+        line = (
+            f"{datetime.now():%Y-%m-%d %H:%M:%S} {elapsed * 1000:9.1f} ms "
+            f"{rows:6d} rows [{threading.current_thread().name}] {key}\n"
+        )
+        try:
+            with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Error writing slow-query log: {e}")
+    
+    def snapshot(self):
+        """Copies of the per-statement counters"""
+        with self._lock:
+            stats = list(self._stats.values())
+            return [
+                (s.sql, s.count, s.rows, s.total, s.max, list(s.samples))
+                for s in stats
+            ]
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started = datetime.now()
+    
+    def report(self, order_by="total", limit=25):
+        """Plain-text report of the statements, most expensive first"""
+        rows = []
+        for sql, count, returned, total, longest, samples in self.snapshot():
+            stats = StatementStats(sql)
+            stats.samples = samples
+            rows.append({
+                "sql": sql,
+                "count": count,
+                "rows": returned,
+                "total": total,
+                "max": longest,
+                "p50": stats.percentile(0.50),
+                "p95": stats.percentile(0.95),
+                "p99": stats.percentile(0.99),
+            })
+        
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        
+        executions = sum(row["count"] for row in rows)
+        total_time = sum(row["total"] for row in rows)
+        lines = [
+            f"SQL trace report - {datetime.now():%Y-%m-%d %H:%M:%S}",
+            f"Tracing {'on' if self.enabled else 'off'} since {self.started:%Y-%m-%d %H:%M:%S}; "
+            f"{len(rows)} statements, {executions} executions, {total_time * 1000:.1f} ms in total; "
+            f"slow-query threshold {self.slow_query_ms:g} ms",
+            "",
+            f"{'count':>7} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'rows':>8}  statement",
+        ]
+        for row in rows[:limit]:
+            lines.append(
+                f"{row['count']:>7} {row['total'] * 1000:>10.1f} {row['p50'] * 1000:>8.2f} "
+                f"{row['p95'] * 1000:>8.2f} {row['p99'] * 1000:>8.2f} {row['max'] * 1000:>8.2f} "
+                f"{row['rows']:>8}  {row['sql']}"
+            )
+        if len(rows) > limit:
+            lines.append(f"... {len(rows) - limit} more statements")
+        return "\n".join(lines)
+
+tracer = SqlTracer()
+
+class TracingCursor(sqlite3.Cursor):
+    """
+    Cursor that times its statements for the tracer.
+    
+    An execution is accounted when the cursor moves on to the next
+    statement or is closed, so the latency covers execute() and every
+    fetch of its rows.
+    """
+    
+    _sql = None
+    _elapsed = 0.0
+    _rows = 0
+    
+    def _finish(self):
+        if self._sql is not None:
+            tracer.record(self._sql, self._elapsed, self._rows)
+            self._sql = None
+    
+    def _timed(self, method, sql, parameters):
+        self._finish()
+        start = perf_counter()
+        try:
+            return method(self, sql, parameters)
+        finally:
+            self._sql = sql
+            self._elapsed = perf_counter() - start
+            self._rows = 0
+    
+    def execute(self, sql, parameters=()):
+        return self._timed(sqlite3.Cursor.execute, sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(sqlite3.Cursor.executemany, sql, seq_of_parameters)
+    
+    def _fetched(self, start, rows):
+        self._elapsed += perf_counter() - start
+        self._rows += rows
+    
+    def fetchone(self):
+        start = perf_counter()
+        row = sqlite3.Cursor.fetchone(self)
+        self._fetched(start, row is not None)
+        return row
+    
+    def fetchmany(self, size=None):
+        start = perf_counter()
+        rows = sqlite3.Cursor.fetchmany(self, self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+    
+    def fetchall(self):
+        start = perf_counter()
+        rows = sqlite3.Cursor.fetchall(self)
+        self._fetched(start, len(rows))
+        return rows
+    
+    def __next__(self):
+        start = perf_counter()
+        row = sqlite3.Cursor.__next__(self)
+        self._fetched(start, 1)
+        return row
+    
+    def close(self):
+        self._finish()
+        sqlite3.Cursor.close(self)
+    
+    def __del__(self):
+        # Cursors nobody closed are accounted when they are collected
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+def enable(slow_query_ms=None):
+    """Start tracing statements on connections checked out from now on"""
+    if slow_query_ms is not None:
+        tracer.slow_query_ms = float(slow_query_ms)
+    tracer.enabled = True
+    connection_manager.cursor_factory = TracingCursor
+
+def disable():
+    """Stop tracing; the collected statistics are kept"""
+    tracer.enabled = False
+    connection_manager.cursor_factory = None
+
+def is_enabled():
+    return tracer.enabled
+
+def report(order_by="total", limit=25):
+    return tracer.report(order_by, limit)
+
+def reset():
+    tracer.reset()
+
+def dump_report(path=REPORT_PATH):
+    """Write the report to a file and return its path"""
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report() + "\n")
+    return path
+
+def _dump_at_exit():
+    if tracer.enabled and tracer.snapshot():
+        try:
+            print(f"SQL trace report written to {dump_report()}")
+        except OSError as e:
+            print(f"Error writing SQL trace report: {e}")
+
+def enable_from_environment():
+    """Turn tracing on if MEDICAL_SQL_TRACE is set; returns whether it is on"""
+    if os.environ.get("MEDICAL_SQL_TRACE", "").lower() in ("1", "true", "yes", "on"):
+        slow_query_ms = os.environ.get("MEDICAL_SLOW_QUERY_MS")
+        try:
+            enable(float(slow_query_ms) if slow_query_ms else None)
+        except ValueError:
+            print(f"Ignoring invalid MEDICAL_SLOW_QUERY_MS: {slow_query_ms}")
+            enable()
+    return tracer.enabled
+
+atexit.register(_dump_at_exit)
@@ -0,0 +1,230 @@
+"""
+Startup orchestration for the Medical Assistant application.
+Initialisation work (folders, schema migrations, seeding, cache warm-up)
+is registered here as named tasks with dependencies instead of running
+as a side effect of importing a module. Each task runs once per process;
+tasks whose dependencies are done run in parallel on a small pool.
+"""
+
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from db_manager import check_database, configure_storage, connection_manager, ensure_directories_exist
+
+# Task states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+class StartupTask:
+    """One registered initialisation step and the outcome of its run"""
+    
+    __slots__ = ("name", "function", "requires", "parallel", "description",
+                 "state", "started", "duration", "thread", "error")
+    
+    def __init__(self, name, function, requires=(), parallel=True, description=None):
+        self.name = name
+        self.function = function
+        self.requires = tuple(requires)
+        self.parallel = parallel
+        self.description = description or name
+        self.state = PENDING
+        # Seconds after the first run() started, and how long the task took
+        self.started = None
+        self.duration = None
+        self.thread = None
+        self.error = None
+
+class StartupOrchestrator:
+    """
+    Registry of startup tasks.
+    
+    run() executes the pending tasks (or only the given targets and what
+    they require) in dependency order. Tasks registered with
+    parallel=False run on the thread that called run(), one at a time; the
+    others run on worker threads as soon as their dependencies are done.
+    A task whose dependency failed is skipped.
+    """
+    
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._tasks = {}
+        self._lock = threading.RLock()
+        # perf_counter() when the first run() started; task start times are relative to it
+        self.origin = None
+    
+    def add(self, name, function, requires=(), parallel=True, description=None):
+        """Register function() as the task name"""
+        with self._lock:
+            if name in self._tasks:
+                raise ValueError(f"Startup task already registered: {name}")
+            task = StartupTask(name, function, requires, parallel, description)
+            self._tasks[name] = task
+            return task
+    
+    def __contains__(self, name):
+        return name in self._tasks
+    
+    def task(self, name, requires=(), parallel=True, description=None):
+        """Decorator form of add()"""
+        def register(function):
+            self.add(name, function, requires, parallel, description)
+            return function
+        return register
+    
+    def _needed(self, targets):
+        """Task names to run for targets, dependencies first"""
+        order = []
+        seen = set()
+        
+        def visit(name, path):
+            if name in path:
+                raise ValueError(f"Startup task dependency cycle: {' -> '.join(path + (name,))}")
+            task = self._tasks.get(name)
+            if task is None:
+                raise KeyError(f"Unknown startup task: {name}")
+            if name in seen:
+                return
+            for dependency in task.requires:
+                visit(dependency, path + (name,))
+            seen.add(name)
+            order.append(name)
+        
+        for name in (self._tasks if targets is None else targets):
+            visit(name, ())
+        return order
+    
+    def run(self, targets=None, report=None):
+        """
+        Run every pending task needed for targets (all tasks by default).
+        
+        report(finished, total, task) is called as each task starts.
+        Returns True if every needed task is done.
+        """
+        with self._lock:
+            if self.origin is None:
+                self.origin = perf_counter()
+            
+            needed = self._needed(targets)
+            waiting = [name for name in needed if self._tasks[name].state == PENDING]
+            total = len(waiting)
+            finished = 0
+            running = {}
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="startup") as pool:
+                while waiting or running:
+                    progressed = False
+                    for name in list(waiting):
+                        task = self._tasks[name]
+                        states = [self._tasks[dependency].state for dependency in task.requires]
+                        
+                        if any(state in (FAILED, SKIPPED) for state in states):
+                            waiting.remove(name)
+                            task.state = SKIPPED
+                            task.error = "a required task did not complete"
+                            finished += 1
+                            progressed = True
+                            continue
+                        if not all(state == DONE for state in states):
+                            continue
+                        
+                        waiting.remove(name)
+                        progressed = True
+                        if report:
+                            report(finished, total, task)
+                        
+                        if task.parallel:
+                            running[pool.submit(self._execute, task, True)] = name
+                        else:
+                            self._execute(task, False)
+                            finished += 1
+                    
+                    if running:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            del running[future]
+                            finished += 1
+                    elif not progressed:
+                        # Nothing running and nothing became ready: a dependency
+                        # is held by another run; leave the rest pending
+                        break
+            
+            return all(self._tasks[name].state == DONE for name in needed)
+    
+    def _execute(self, task, on_worker):
+        task.state = RUNNING
+        task.thread = threading.current_thread().name
+        task.started = perf_counter() - self.origin
+        start = perf_counter()
+        try:
+            task.function()
+        except Exception as e:
+            task.state = FAILED
+            task.error = str(e)
+            print(f"Startup task {task.name} failed: {e}")
+        else:
+            task.state = DONE
+        finally:
+            task.duration = perf_counter() - start
+            if on_worker:
+                # Pool threads end with the run; do not leave their connections behind
+                connection_manager.close_thread_connection()
+    
+    def assume_done(self, *names):
+        """
+        Mark pending tasks as done without running them.
+        
+        For work the caller knows is already in place (the launcher skips
+        the folder and schema checks when its manifest is current); tasks
+        that require them run as usual.
+        """
+        with self._lock:
+            for name in names:
+                task = self._tasks[name]
+                if task.state == PENDING:
+                    task.state = DONE
+                    task.duration = 0.0
+    
+    def ensure(self, name):
+        """Run a task (and what it requires) unless it already ran; True if it is done"""
+        return self.run([name])
+    
+    def state(self, name):
+        return self._tasks[name].state
+    
+    def timings(self):
+        """(name, state, started, duration, thread, error) of every task, in start order"""
+        with self._lock:
+            tasks = list(self._tasks.values())
+        tasks.sort(key=lambda task: float("inf") if task.started is None else task.started)
+        return [
+            (task.name, task.state, task.started, task.duration, task.thread, task.error)
+            for task in tasks
+        ]
+
+# Process-wide registry; main.py adds the tasks that belong to the UI
+startup = StartupOrchestrator()
+
+# Connection settings first, so every connection opened afterwards uses them
+startup.add("storage", configure_storage, parallel=False, description="Configuring storage")
+startup.add("directories", ensure_directories_exist, description="Preparing folders")
+startup.add("schema", check_database, requires=("storage", "directories"), description="Checking database")
+
+@startup.task("readings_recovery", requires=("schema",), description="Recovering health readings")
+def _recover_readings():
+    # Store health readings spooled by a run that did not shut down cleanly
+    from readings_writer import recover_spooled_readings
+    recover_spooled_readings()
+
+@startup.task("catalog", requires=("schema",), description="Loading medicine catalog")
+def _warm_up_catalog():
+    from medication_catalog import medication_catalog
+    medication_catalog.snapshot()
+
+@startup.task("medicine_details", requires=("catalog",), description="Seeding medicine details")
+def _seed_medicine_details():
+    from enhanced_medication_manager_ui import populate_medicine_details
+    populate_medicine_details()
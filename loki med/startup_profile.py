@@ -0,0 +1,313 @@
+"""
+Startup profiling for the Medical Assistant application.
+Run the application with --profile-startup to record wall-clock time per
+phase: module imports, startup tasks, splash, login window, main window,
+every tab builder and the first dashboard query. The result is written
+as JSON (and optionally as a cProfile dump) when the main window is
+ready, and again at exit with whatever happened later.
+
+    python main.py --profile-startup                       -> startup_profile.json
+    python main.py --profile-startup=build/startup.json
+    python main.py --profile-startup --profile-cprofile=startup.prof
+
+This module only uses the standard library so it can be loaded before the
+application modules whose import time it measures.
+"""
+
+import os
+import sys
+import json
+import atexit
+import platform
+import threading
+from time import perf_counter
+from datetime import datetime
+from contextlib import contextmanager
+
+# Bumped when the layout of the JSON report changes
+REPORT_VERSION = 1
+
+DEFAULT_REPORT_PATH = "startup_profile.json"
+
+class _TimedLoader:
+    """Loader wrapper that times exec_module(); everything else is delegated"""
+    
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+    
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+    
+    def exec_module(self, module):
+        profiler = self._profiler
+        token = profiler._import_started(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            profiler._import_finished(token)
+    
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class _TimedImportFinder:
+    """Meta path finder that asks the real finders and wraps their loaders"""
+    
+    def __init__(self, profiler):
+        self.profiler = profiler
+    
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler)
+        return spec
+
+class StartupProfiler:
+    """Collects phase and import timings of one launch"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.report_path = DEFAULT_REPORT_PATH
+        self.cprofile_path = None
+        self.started_at = None
+        self._origin = None
+        self._lock = threading.Lock()
+        self._finder = None
+        self._cprofile = None
+        self._once = set()
+        self._written = None
+        
+        # Finished phases: {"name", "category", "start", "duration", "thread"}
+        self.phases = []
+        # Imported modules: {"module", "start", "cumulative", "self"}
+        self.imports = []
+        # (module, start, time spent in nested imports), per thread
+        self._import_stacks = threading.local()
+    
+    def begin(self, report_path=None, cprofile_path=None):
+        """Start profiling; call before the modules to measure are imported"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.report_path = report_path or DEFAULT_REPORT_PATH
+        self.cprofile_path = cprofile_path
+        self.started_at = datetime.now()
+        self._origin = perf_counter()
+        
+        self._finder = _TimedImportFinder(self)
+        sys.meta_path.insert(0, self._finder)
+        
+        if cprofile_path:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        
+        atexit.register(self._write_at_exit)
+    
+    def now(self):
+        """Seconds since profiling started"""
+        return perf_counter() - self._origin if self._origin is not None else 0.0
+    
+    # Imports
+    
+    def _import_started(self, name):
+        stack = getattr(self._import_stacks, "stack", None)
+        if stack is None:
+            stack = self._import_stacks.stack = []
+        entry = [name, perf_counter(), 0.0]
+        stack.append(entry)
+        return entry
+    
+    def _import_finished(self, entry):
+        stack = self._import_stacks.stack
+        stack.remove(entry)
+        name, start, nested = entry
+        cumulative = perf_counter() - start
+        if stack:
+            stack[-1][2] += cumulative
+        with self._lock:
+            self.imports.append({
+                "module": name,
+                "start": round(start - self._origin, 6),
+                "cumulative": round(cumulative, 6),
+                "self": round(cumulative - nested, 6),
+            })
+    
+    # Phases
+    
+    def record(self, name, category, start, duration):
+        """Add a finished phase; start is in seconds since profiling started"""
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "category": category,
+                "start": round(start, 6),
+                "duration": round(duration, 6),
+                "thread": threading.current_thread().name,
+            })
+    
+    @contextmanager
+    def phase(self, name, category="phase", once=False):
+        """Time the body of a with-block as a phase (once=True: first time only)"""
+        if not self.enabled or (once and name in self._once):
+            yield
+            return
+        if once:
+            self._once.add(name)
+        
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, self.now() - start)
+    
+    def start_phase(self, name, category="phase"):
+        """Start a phase that ends elsewhere; returns the function that ends it"""
+        if not self.enabled:
+            return lambda: None
+        
+        start = self.now()
+        ended = []
+        
+        def end():
+            if not ended:
+                ended.append(True)
+                self.record(name, category, start, self.now() - start)
+        return end
+    
+    def when_idle(self, widget, callback):
+        """
+        Call callback() once widget's window is drawn and idle.
+        
+        Used to end window phases at the point the window can react to input.
+        """
+        if not self.enabled:
+            return
+        # after(0) lets the window map first; after_idle waits for the redraw
+        widget.after(0, lambda: widget.after_idle(callback))
+    
+    def milestone(self, name):
+        """Record a point in time (a zero-length phase)"""
+        if self.enabled:
+            self.record(name, "milestone", self.now(), 0.0)
+    
+    # Reports
+    
+    def report(self):
+        """The report as a JSON-serialisable dict"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase["start"])
+            imports = sorted(self.imports, key=lambda entry: entry["cumulative"], reverse=True)
+        
+        tasks = []
+        try:
+            from startup import startup
+            # Task start times are relative to the orchestrator's first run
+            shift = (startup.origin - self._origin) if startup.origin is not None else 0.0
+            for name, state, started, duration, thread, error in startup.timings():
+                tasks.append({
+                    "name": name,
+                    "state": state,
+                    "start": None if started is None else round(started + shift, 6),
+                    "duration": None if duration is None else round(duration, 6),
+                    "thread": thread,
+                    "error": error,
+                })
+        except ImportError:
+            pass
+        
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "elapsed": round(self.now(), 6),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "argv": sys.argv,
+            "phases": phases,
+            "startup_tasks": tasks,
+            "imports": imports,
+            "import_total": round(sum(entry["self"] for entry in imports), 6),
+        }
+    
+    def write_report(self, path=None):
+        """Write the JSON report and return its path"""
+        path = path or self.report_path
+        report = self.report()
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self._written = len(report["phases"])
+        return path
+    
+    def finish(self):
+        """Stop the cProfile run and write both reports (startup is over)"""
+        if not self.enabled:
+            return
+        
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            try:
+                self._cprofile.dump_stats(self.cprofile_path)
+                print(f"cProfile data written to {self.cprofile_path}")
+            except OSError as e:
+                print(f"Error writing cProfile data: {e}")
+            self._cprofile = None
+        
+        try:
+            print(f"Startup profile written to {self.write_report()}")
+        except OSError as e:
+            print(f"Error writing startup profile: {e}")
+    
+    def _write_at_exit(self):
+        # Tabs built after the main window was ready, or a launch that
+        # never got that far
+        if self._written is None or self._written != len(self.phases):
+            self.finish()
+
+profiler = StartupProfiler()
+
+# Module-level shortcuts used by the application
+phase = profiler.phase
+start_phase = profiler.start_phase
+when_idle = profiler.when_idle
+milestone = profiler.milestone
+finish = profiler.finish
+
+def is_enabled():
+    return profiler.enabled
+
+def begin_from_argv(argv=None):
+    """
+    Start profiling if the command line asks for it; returns whether it is on.
+    
+    --profile-startup[=PATH]   JSON report (default startup_profile.json)
+    --profile-cprofile=PATH    also write cProfile data (implies --profile-startup)
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    report_path = None
+    cprofile_path = None
+    wanted = False
+    
+    for arg in argv:
+        if arg == "--profile-startup":
+            wanted = True
+        elif arg.startswith("--profile-startup="):
+            wanted = True
+            report_path = arg.split("=", 1)[1]
+        elif arg.startswith("--profile-cprofile="):
+            wanted = True
+            cprofile_path = arg.split("=", 1)[1]
+    
+    if wanted:
+        profiler.begin(report_path, cprofile_path)
+    return profiler.enabled
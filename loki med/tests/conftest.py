@@ -0,0 +1,36 @@
+"""
+Shared fixtures: every test gets a freshly migrated database of its own.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import connection_manager, connect
+from migrations import migrate
+from medication_catalog import medication_catalog
+
+@pytest.fixture
+def database(tmp_path):
+    """Point the connection manager at a migrated throw-away database"""
+    previous = connection_manager.db_path
+    connection_manager.set_database_path(str(tmp_path / "medical.db"))
+    migrate()
+    medication_catalog.invalidate()
+    yield connection_manager
+    connection_manager.set_database_path(previous)
+    medication_catalog.invalidate()
+
+@pytest.fixture
+def make_user(database):
+    """make_user(username) inserts a user and returns its id"""
+    def make(username, email=None):
+        with connect() as conn:
+            return conn.execute(
+                "INSERT INTO users (username, password, full_name, email) VALUES (?, 'x', ?, ?)",
+                (username, username.title(), email)
+            ).lastrowid
+    return make
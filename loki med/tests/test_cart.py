@@ -0,0 +1,48 @@
+import pytest
+
+from db_manager import connect
+from repositories import cart_repo
+from services import cart
+from services.common import ServiceError
+
+def add_medicine(name, quantity, price=10):
+    with connect() as conn:
+        return conn.execute(
+            "INSERT INTO medications (name, price, description, quantity) VALUES (?, ?, '', ?)",
+            (name, price, quantity)
+        ).lastrowid
+
+def stock(medicine_id):
+    with connect() as conn:
+        return conn.execute("SELECT quantity FROM medications WHERE id = ?", (medicine_id,)).fetchone()[0]
+
+def test_checkout_takes_stock_and_empties_cart(make_user):
+    alice = make_user("alice")
+    paracetamol = add_medicine("Paracetamol", 10)
+    cart.add_to_cart(alice, "Paracetamol", 4)
+    
+    order = cart.checkout(alice, "UPI")
+    
+    assert [(line.medicine, line.quantity) for line in order.lines] == [("Paracetamol", 4)]
+    assert stock(paracetamol) == 6
+    assert cart_repo.lines_for_user(alice) == []
+
+def test_competing_carts_cannot_oversell(make_user):
+    alice = make_user("alice")
+    bob = make_user("bob")
+    paracetamol = add_medicine("Paracetamol", 10)
+    ibuprofen = add_medicine("Ibuprofen", 10)
+    
+    # Both carts are filled while all ten units are still in stock
+    cart.add_to_cart(alice, "Paracetamol", 8)
+    cart.add_to_cart(bob, "Ibuprofen", 3)
+    cart.add_to_cart(bob, "Paracetamol", 7)
+    
+    cart.checkout(alice, "UPI")
+    with pytest.raises(ServiceError, match="Paracetamol"):
+        cart.checkout(bob, "UPI")
+    
+    # Bob's checkout changed nothing: no stock taken, not even for his other line
+    assert stock(paracetamol) == 2
+    assert stock(ibuprofen) == 10
+    assert len(cart_repo.lines_for_user(bob)) == 2
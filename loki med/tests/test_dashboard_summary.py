@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from db_manager import connect
+from repositories import appointments_repo, reminders_repo, dashboard_repo
+
+TODAY = date.today()
+
+def day(offset):
+    """DD-MM-YYYY of a day relative to today"""
+    return (TODAY + timedelta(days=offset)).strftime("%d-%m-%Y")
+
+def assert_matches_rebuild(user_id):
+    """The trigger-maintained row equals a full recompute from the base tables"""
+    today = TODAY.isoformat()
+    maintained = dashboard_repo.summary(user_id, today)
+    dashboard_repo.rebuild(today, user_id)
+    assert maintained == dashboard_repo.summary(user_id, today)
+
+def test_appointment_changes_keep_the_summary_current(make_user):
+    user_id = make_user("dashboard_appointments")
+    other_id = make_user("dashboard_other")
+    assert_matches_rebuild(user_id)
+    
+    later = appointments_repo.add(user_id, day(5), "09:00", "Dr. Later", "Checkup")
+    soonest = appointments_repo.add(user_id, day(1), "14:30", "Dr. Soon", "Consultation")
+    appointments_repo.add(user_id, day(-3), "10:00", "Dr. Past", "Checkup")
+    appointments_repo.add(user_id, day(2), "11:00", "Dr. Done", "Checkup", status="Completed")
+    appointments_repo.add(other_id, TODAY.strftime("%d-%m-%Y"), "08:00", "Dr. Other", "Checkup")
+    assert_matches_rebuild(user_id)
+    assert dashboard_repo.summary(user_id, TODAY.isoformat()).upcoming_appointments == 2
+    
+    # Moved behind the other one, then cancelled
+    appointments_repo.update(soonest, user_id, day(7), "14:30", "Dr. Soon", "Consultation", "", "Scheduled")
+    assert_matches_rebuild(user_id)
+    appointments_repo.update(soonest, user_id, day(7), "14:30", "Dr. Soon", "Consultation", "", "Cancelled")
+    assert_matches_rebuild(user_id)
+    
+    appointments_repo.delete(later, user_id)
+    assert_matches_rebuild(user_id)
+    assert dashboard_repo.summary(user_id, TODAY.isoformat()).next_appointment_doctor is None
+    assert_matches_rebuild(other_id)
+
+def test_reminder_changes_keep_the_summary_current(make_user):
+    user_id = make_user("dashboard_reminders")
+    with connect() as conn:
+        medicine_id = conn.execute(
+            "INSERT INTO medications (name, price, description, quantity) VALUES ('Aspirin', 1, '', 100)"
+        ).lastrowid
+    assert_matches_rebuild(user_id)
+    
+    reminders_repo.add(user_id, medicine_id, "1 tablet", day(0), "08:00")
+    tomorrow = reminders_repo.add(user_id, medicine_id, "1 tablet", day(1), "08:00")
+    reminders_repo.add(user_id, medicine_id, "1 tablet", day(0), "20:00", "Daily")
+    assert_matches_rebuild(user_id)
+    assert dashboard_repo.summary(user_id, TODAY.isoformat()).reminders_due == 2
+    
+    # Moved to today, then deleted
+    with connect() as conn:
+        conn.execute("UPDATE reminders SET date = ?, date_iso = ? WHERE id = ?",
+                     (day(0), TODAY.isoformat(), tomorrow))
+    assert_matches_rebuild(user_id)
+    reminders_repo.delete_matching(user_id, medicine_id, day(0), "08:00", "1 tablet")
+    assert_matches_rebuild(user_id)
+    assert dashboard_repo.summary(user_id, TODAY.isoformat()).reminder_count == 1
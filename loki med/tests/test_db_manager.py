@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from db_manager import connect, connection_manager
+from repositories import reminders_repo
+from reminder_scheduler import ReminderScheduler
+
+def committed_users(database):
+    """Usernames another connection can see"""
+    conn = sqlite3.connect(database.db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT username FROM users ORDER BY id")]
+    finally:
+        conn.close()
+
+def add_user(conn, username):
+    conn.execute("INSERT INTO users (username, password, full_name) VALUES (?, 'x', ?)", (username, username))
+
+def test_callbacks_wait_for_the_outermost_commit(database):
+    calls = []
+    
+    with connect() as outer:
+        add_user(outer, "outer")
+        with connect() as inner:
+            add_user(inner, "inner")
+            connection_manager.call_after_commit(lambda: calls.append(committed_users(database)))
+        
+        # The nested commit is left to the outer checkout
+        assert calls == []
+        assert committed_users(database) == []
+    
+    assert calls == [["outer", "inner"]]
+
+def test_rollback_of_the_outer_checkout_drops_nested_work(database):
+    calls = []
+    
+    with pytest.raises(RuntimeError):
+        with connect():
+            with connect() as inner:
+                add_user(inner, "inner")
+                connection_manager.call_after_commit(lambda: calls.append("committed"))
+            raise RuntimeError("outer failed")
+    
+    assert calls == []
+    assert committed_users(database) == []
+
+def test_release_of_the_outermost_checkout_finishes_a_nested_commit(database):
+    calls = []
+    
+    # An outer checkout that only reads and is closed without committing
+    outer = connect()
+    with connect() as inner:
+        add_user(inner, "inner")
+        connection_manager.call_after_commit(lambda: calls.append("committed"))
+    outer.close()
+    
+    assert calls == ["committed"]
+    assert committed_users(database) == ["inner"]
+
+def test_scheduler_rearms_after_the_outermost_commit(make_user, monkeypatch):
+    user_id = make_user("rearm")
+    with connect() as conn:
+        medicine_id = conn.execute(
+            "INSERT INTO medications (name, price, description, quantity) VALUES ('Aspirin', 1, '', 100)"
+        ).lastrowid
+    scheduler = ReminderScheduler(user_id)
+    rearms = []
+    monkeypatch.setattr(scheduler, "rearm", lambda: rearms.append(user_id))
+    
+    with connect():
+        # The repository commits a nested checkout
+        reminders_repo.add(user_id, medicine_id, "1 tablet", "01-01-2030", "08:00")
+        assert rearms == []
+    
+    assert rearms == [user_id]
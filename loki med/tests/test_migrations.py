@@ -0,0 +1,15 @@
+import pytest
+
+from db_manager import connect
+from migrations import INDEX_CHECKS, LATEST_VERSION, explain_query_plan, get_schema_version
+
+def test_migrates_to_latest_version(database):
+    assert get_schema_version() == LATEST_VERSION
+
+@pytest.mark.parametrize(
+    "index_name, sql, parameters", INDEX_CHECKS, ids=[f"{i}-{check[0]}" for i, check in enumerate(INDEX_CHECKS)]
+)
+def test_query_uses_expected_index(database, index_name, sql, parameters):
+    with connect() as conn:
+        plan = explain_query_plan(sql, parameters, conn)
+    assert any(index_name in line for line in plan), plan
@@ -0,0 +1,78 @@
+from db_manager import connect
+from repositories import notifications_repo
+
+def add_history(user_id):
+    """Ten rows on each of three days, in pairs sharing a created_at; returns their ids"""
+    rows = [
+        (user_id, f"Reminder {day}-{n}", f"2026-03-{day:02d} 08:{n // 2:02d}:00")
+        for day in (1, 2, 3) for n in range(10)
+    ]
+    with connect() as conn:
+        return [
+            conn.execute("INSERT INTO notifications (user_id, message, is_read, created_at) VALUES (?, ?, 0, ?)",
+                         row).lastrowid
+            for row in rows
+        ]
+
+def all_pages(user_id, limit, **filters):
+    """Page through the history; returns the rows in the order they were shown"""
+    shown = []
+    after = None
+    while True:
+        page = notifications_repo.page(user_id, after=after, limit=limit, **filters)
+        shown += page
+        if len(page) < limit:
+            return shown
+        after = (page[-1].created_at, page[-1].id)
+
+def test_pages_have_no_duplicates_or_gaps(make_user):
+    user_id = make_user("history_pages")
+    other_id = make_user("history_other")
+    ids = add_history(user_id)
+    add_history(other_id)
+    
+    with connect() as conn:
+        newest_first = [row[0] for row in conn.execute(
+            "SELECT id FROM notifications WHERE user_id = ? ORDER BY created_at DESC, id DESC", (user_id,))]
+    
+    # Page sizes that split the pairs sharing a created_at
+    for limit in (1, 3, 7, 30, 100):
+        assert [row.id for row in all_pages(user_id, limit)] == newest_first
+    assert sorted(newest_first) == ids
+
+def test_rows_added_while_paging_do_not_shift_pages(make_user):
+    user_id = make_user("history_live")
+    add_history(user_id)
+    
+    first = notifications_repo.page(user_id, limit=10)
+    notifications_repo.add(user_id, "Arrived while scrolling")
+    second = notifications_repo.page(user_id, after=(first[-1].created_at, first[-1].id), limit=10)
+    
+    assert not {row.id for row in first} & {row.id for row in second}
+    assert first[-1].created_at >= second[0].created_at
+
+def test_unread_filter(make_user):
+    user_id = make_user("history_unread")
+    ids = add_history(user_id)
+    for notification_id in ids[::3]:
+        notifications_repo.mark_read(user_id, notification_id)
+    
+    unread = all_pages(user_id, 4, unread_only=True)
+    
+    assert sorted(row.id for row in unread) == sorted(set(ids) - set(ids[::3]))
+    assert not any(row.is_read for row in unread)
+    assert len(unread) == notifications_repo.unread_count(user_id)
+
+def test_date_range_filter(make_user):
+    user_id = make_user("history_days")
+    ids = add_history(user_id)
+    
+    # Both bounds are whole days
+    second_day = all_pages(user_id, 4, since_iso="2026-03-02", until_iso="2026-03-02")
+    assert sorted(row.id for row in second_day) == ids[10:20]
+    
+    from_second_day = all_pages(user_id, 4, since_iso="2026-03-02")
+    assert sorted(row.id for row in from_second_day) == ids[10:]
+    
+    until_second_day = all_pages(user_id, 4, until_iso="2026-03-02", unread_only=True)
+    assert sorted(row.id for row in until_second_day) == ids[:20]
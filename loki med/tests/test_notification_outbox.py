@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta
+
+from db_manager import connect
+from repositories import outbox_repo, reminders_repo, reminder_cursors_repo
+from reminder_scheduler import CURSOR_FORMAT, stop_schedulers
+from enhanced_medication_reminder import MedicationReminderSystem
+from notification_dispatcher import GroupedNotification
+from notification_preferences import CATEGORY_MEDICATION
+from notification_outbox import OutboxWorker, delivery_channels, outbox_for, PENDING_EXPIRY
+
+def reminder(user_id):
+    return GroupedNotification(user_id, "Medication Reminder", "Time to take Aspirin (1 tablet)", [],
+                               CATEGORY_MEDICATION)
+
+def queued_channels():
+    with connect() as conn:
+        return sorted(row[0] for row in conn.execute("SELECT channel FROM notification_outbox"))
+
+def test_no_email_rows_without_smtp(make_user, monkeypatch):
+    monkeypatch.delenv("MEDICAL_SMTP_HOST", raising=False)
+    user_id = make_user("outbox_no_smtp", email="no-smtp@example.org")
+    
+    # The user's default preferences ask for email as well
+    outbox_for(delivery_channels(lambda title, message: True)).enqueue([reminder(user_id)])
+    
+    assert queued_channels() == ["desktop", "in_app"]
+
+def test_email_rows_with_smtp(make_user, monkeypatch):
+    monkeypatch.setenv("MEDICAL_SMTP_HOST", "localhost")
+    user_id = make_user("outbox_smtp", email="smtp@example.org")
+    
+    outbox_for(delivery_channels()).enqueue([reminder(user_id)])
+    
+    assert queued_channels() == ["email", "in_app"]
+
+def test_maintenance_expires_stale_rows(make_user, monkeypatch):
+    monkeypatch.delenv("MEDICAL_SMTP_HOST", raising=False)
+    user_id = make_user("outbox_stale")
+    now = datetime.now()
+    stale = now - PENDING_EXPIRY - timedelta(hours=1)
+    
+    outbox_for(delivery_channels(), clock=lambda: stale).enqueue([reminder(user_id)])
+    outbox_for(delivery_channels(), clock=lambda: now).enqueue([reminder(user_id)])
+    with connect() as conn:
+        conn.execute("""
+            INSERT INTO notification_outbox
+            (user_id, channel, category, title, message, status, next_attempt_at, created_at)
+            VALUES (?, 'email', 'Medication Reminders', 't', 'm', 'failed', '2000-01-01', '2000-01-01')
+        """, (user_id,))
+    
+    OutboxWorker([], clock=lambda: now)._maintain()
+    
+    assert outbox_repo.counts() == {"pending": 1}
+
+def test_reminder_system_queues_due_reminders(make_user, monkeypatch):
+    monkeypatch.delenv("MEDICAL_SMTP_HOST", raising=False)
+    shown = []
+    monkeypatch.setattr(MedicationReminderSystem, "_show_desktop_notification",
+                        lambda self, title, message: shown.append(title))
+    user_id = make_user("outbox_gui")
+    with connect() as conn:
+        medicine_id = conn.execute(
+            "INSERT INTO medications (name, price, description, quantity) VALUES ('Aspirin', 1, '', 100)"
+        ).lastrowid
+    
+    # A dose missed since the last session, as main.py's window finds it at login
+    now = datetime.now()
+    reminder_cursors_repo.save(f"user:{user_id}", (now - timedelta(hours=1)).strftime(CURSOR_FORMAT))
+    due = now - timedelta(minutes=30)
+    reminders_repo.add(user_id, medicine_id, "1 tablet", due.strftime("%d-%m-%Y"), due.strftime("%H:%M"))
+    
+    system = MedicationReminderSystem("outbox_gui")
+    try:
+        assert system.start_reminder_service()
+        deadline = time.monotonic() + 5
+        while not shown and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        system.stop_reminder_service()
+        stop_schedulers()
+    
+    assert queued_channels() == ["desktop", "in_app"]
+    assert shown == ["Missed Medication"]
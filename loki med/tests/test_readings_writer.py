@@ -0,0 +1,80 @@
+import json
+import time
+
+from db_manager import connect
+from readings_writer import ReadingsWriter
+
+def stored_values(user_id):
+    with connect() as conn:
+        return sorted(float(row[0]) for row in conn.execute(
+            "SELECT value FROM health_readings WHERE user_id = ?", (user_id,)))
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_flushes_full_batch(make_user, tmp_path):
+    user_id = make_user("writer_size")
+    writer = ReadingsWriter(max_batch=3, flush_interval=60, spool_path=str(tmp_path / "readings.spool"))
+    try:
+        writer.add_many([(user_id, "Pulse", value, None, None) for value in (70, 71, 72)])
+        
+        # Long before the flush interval
+        assert wait_for(lambda: writer.rows_written == 3)
+        assert stored_values(user_id) == [70, 71, 72]
+        assert writer.flushes == 1
+    finally:
+        writer.close()
+
+def test_flushes_after_interval(make_user, tmp_path):
+    user_id = make_user("writer_time")
+    writer = ReadingsWriter(max_batch=100, flush_interval=0.1, spool_path=str(tmp_path / "readings.spool"))
+    try:
+        writer.add(user_id, "Pulse", 80)
+        
+        assert wait_for(lambda: writer.rows_written == 1)
+        assert stored_values(user_id) == [80]
+        assert writer.pending == 0
+    finally:
+        writer.close()
+
+def test_close_flushes_remaining_readings(make_user, tmp_path):
+    user_id = make_user("writer_close")
+    spool_path = tmp_path / "readings.spool"
+    writer = ReadingsWriter(max_batch=100, flush_interval=60, spool_path=str(spool_path))
+    writer.add(user_id, "Pulse", 65)
+    writer.add(user_id, "Pulse", 66)
+    assert stored_values(user_id) == []
+    
+    writer.close()
+    
+    assert stored_values(user_id) == [65, 66]
+    assert not list(tmp_path.glob("readings.spool*"))
+
+def test_recover_replays_spools_once(make_user, tmp_path):
+    user_id = make_user("writer_recover")
+    spool_path = tmp_path / "readings.spool"
+    committed = (user_id, "Pulse", "75", None, "2026-01-01 08:00:00")
+    lost = (user_id, "Pulse", "76", None, "2026-01-01 08:00:01")
+    newer = (user_id, "Pulse", "77", None, "2026-01-01 08:00:02")
+    
+    # A batch committed just before the crash, still in its moved spool,
+    # and readings that never reached the database, one cut short
+    with connect() as conn:
+        conn.execute("INSERT INTO health_readings (user_id, reading_type, value, notes, timestamp) "
+                     "VALUES (?, ?, ?, ?, ?)", committed)
+    (tmp_path / "readings.spool.1.1.flushing").write_text(
+        json.dumps(committed) + "\n" + json.dumps(lost) + "\n", encoding="utf-8")
+    spool_path.write_text(json.dumps(newer) + "\n" + '[1, "Pu', encoding="utf-8")
+    
+    writer = ReadingsWriter(spool_path=str(spool_path))
+    assert writer.recover() == 2
+    writer.close()
+    
+    assert stored_values(user_id) == [75, 76, 77]
+    assert not list(tmp_path.glob("readings.spool*"))
+    assert ReadingsWriter(spool_path=str(spool_path)).recover() == 0
@@ -0,0 +1,141 @@
+import time
+from datetime import date, datetime, timedelta
+
+import migrations
+from db_manager import connect, connection_manager
+from repositories import reminders_repo, reminder_cursors_repo
+from reminder_scheduler import CURSOR_FORMAT, scheduler_for, stop_schedulers, watch_reminders
+import enhanced_medication_manager_ui
+
+def add_medicine(name="Aspirin"):
+    with connect() as conn:
+        return conn.execute(
+            "INSERT INTO medications (name, price, description, quantity) VALUES (?, 1, '', 100)", (name,)
+        ).lastrowid
+
+def stored(reminder_id):
+    with connect() as conn:
+        return conn.execute(
+            "SELECT frequency, period_minutes FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+
+class Widget:
+    """Stands in for the Tk entry: after() runs the call at once"""
+    
+    text = ""
+    
+    def after(self, delay, call):
+        call()
+    
+    def bind(self, sequence, handler, add=None):
+        pass
+    
+    def config(self, **options):
+        pass
+    
+    def delete(self, first, last=None):
+        self.text = ""
+    
+    def insert(self, index, text):
+        self.text += text
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_reminder_without_frequency_is_a_single_dose(make_user):
+    user_id = make_user("single_dose")
+    today = date.today()
+    reminder_id = reminders_repo.add(user_id, add_medicine(), "1 tablet", today.strftime("%d-%m-%Y"), "08:00")
+    
+    assert stored(reminder_id) == ("Once only", 0)
+    assert reminders_repo.recurring(user_id, today.isoformat(), (today + timedelta(days=7)).isoformat()) == []
+
+def test_reminder_with_frequency_recurs(make_user):
+    user_id = make_user("daily_dose")
+    reminder_id = reminders_repo.add(user_id, add_medicine(), "1 tablet", "01-01-2025", "08:00", "Daily")
+    
+    assert stored(reminder_id) == ("Daily", 1440)
+
+def test_migration_turns_legacy_frequencies_into_rules(tmp_path, monkeypatch):
+    previous = connection_manager.db_path
+    connection_manager.set_database_path(str(tmp_path / "legacy.db"))
+    try:
+        # A database as it was before recurrence rules (migration 9)
+        with monkeypatch.context() as patch:
+            patch.setattr(migrations, "MIGRATIONS", [step for step in migrations.MIGRATIONS if step[0] < 9])
+            migrations.migrate()
+        
+        with connect() as conn:
+            conn.execute("INSERT INTO users (username, password, full_name) VALUES ('legacy', 'x', 'Legacy')")
+            medicine_id = add_medicine()
+            ids = [
+                conn.execute(
+                    "INSERT INTO reminders (user_id, medicine_id, dose, date, date_iso, time, frequency) "
+                    "VALUES (1, ?, '1', '01-01-2025', '2025-01-01', '08:00', ?)",
+                    (medicine_id, frequency)
+                ).lastrowid
+                for frequency in ("Daily", None, "", "Weekly")
+            ]
+        
+        migrations.migrate()
+        
+        assert [stored(reminder_id) for reminder_id in ids] == [
+            ("Daily", 1440), ("Once only", 0), ("Once only", 0), ("Weekly", 10080)
+        ]
+        recurring = reminders_repo.recurring(1, "2025-03-01", "2025-03-02")
+        assert sorted(row.id for row in recurring) == [ids[0], ids[3]]
+    finally:
+        connection_manager.set_database_path(previous)
+
+def test_missed_dose_is_reported_once_across_restarts(make_user):
+    user_id = make_user("missed_dose")
+    cursor = f"user:{user_id}"
+    now = datetime.now()
+    # The application last ran an hour ago and was closed when the dose fell due
+    reminder_cursors_repo.save(cursor, (now - timedelta(hours=1)).strftime(CURSOR_FORMAT))
+    due = now - timedelta(minutes=30)
+    reminder_id = reminders_repo.add(user_id, add_medicine(), "1 tablet", due.strftime("%d-%m-%Y"), due.strftime("%H:%M"))
+    reported = []
+    
+    try:
+        watch_reminders(Widget(), user_id, reported.append, catch_up=True)
+        assert wait_for(lambda: reported and reminder_cursors_repo.get(cursor) >= now.strftime(CURSOR_FORMAT))
+        stop_schedulers()
+        
+        # The next start finds the saved cursor past the dose
+        watch_reminders(Widget(), user_id, reported.append, catch_up=True)
+        assert wait_for(lambda: scheduler_for(user_id).loads > 0)
+        time.sleep(0.2)
+    finally:
+        stop_schedulers()
+    
+    assert [(occurrence.reminder_id, occurrence.missed) for occurrence in reported] == [(reminder_id, True)]
+
+def test_doses_due_together_are_one_popup(make_user, monkeypatch):
+    user_id = make_user("grouped_doses")
+    now = datetime.now()
+    reminder_cursors_repo.save(f"user:{user_id}", (now - timedelta(hours=1)).strftime(CURSOR_FORMAT))
+    due = now - timedelta(minutes=30)
+    for name in ("Aspirin", "Metformin"):
+        reminders_repo.add(user_id, add_medicine(name), "1 tablet", due.strftime("%d-%m-%Y"), due.strftime("%H:%M"))
+    popups = []
+    monkeypatch.setattr(enhanced_medication_manager_ui.messagebox, "showinfo",
+                        lambda title, message, parent=None: popups.append((title, message)))
+    field = Widget()
+    
+    try:
+        enhanced_medication_manager_ui.check_due_reminders("grouped_doses", field, parent=object())
+        assert wait_for(lambda: popups)
+        time.sleep(0.1)
+    finally:
+        stop_schedulers()
+    
+    assert [title for title, message in popups] == ["Missed Medication"]
+    assert "Aspirin (1 tablet)" in popups[0][1] and "Metformin (1 tablet)" in popups[0][1]
+    assert field.text.startswith("Missed: ")
+    with connect() as conn:
+        logged = conn.execute("SELECT COUNT(*) FROM notifications WHERE user_id = ?", (user_id,)).fetchone()[0]
+    assert logged == 2
@@ -13,6 +13,10 @@ from datetime import datetime
 import random
 import string
 
+# Database access
+from db_manager import connect
+import startup_profile
+
 # Database path
 DB_PATH = os.path.join("database", "medical_assistant.db")
 
@@ -262,7 +266,7 @@ def show_register_window(parent):
         
         try:
             # Connect to database
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             # Insert user data
@@ -1299,7 +1303,7 @@ def show_register_window(parent):
         
         # Check if username exists
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             cursor.execute("SELECT username FROM users WHERE username = ?", (username,))
@@ -1437,7 +1441,7 @@ def show_forgot_password_window(parent):
         
         # Check if user exists with this email
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             cursor.execute(
@@ -1455,7 +1459,7 @@ def show_forgot_password_window(parent):
                 new_password = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
                 
                 # Update password in database
-                conn = sqlite3.connect(DB_PATH)
+                conn = connect()
                 cursor = conn.cursor()
                 
                 hashed_password = hash_password(new_password)
@@ -1506,6 +1510,7 @@ def show_forgot_password_window(parent):
 
 def show_login_window():
     """Show the modern login window matching the screenshot"""
+    login_ready = startup_profile.start_phase("login window", "window")
     login_window = tk.Tk()
     login_window.title("Medical Assistant - Login")
     login_window.geometry("800x600")
@@ -1560,15 +1565,15 @@ def show_login_window():
             return
         
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
-            # Get stored password
-            cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
+            # Get stored password (and the id, so the session never looks it up again)
+            cursor.execute("SELECT id, password FROM users WHERE username = ?", (username,))
             result = cursor.fetchone()
             
             if result:
-                stored_password = result[0]
+                user_id, stored_password = result
                 
                 # Check password (allow plain text for testing)
                 if stored_password == hash_password(password) or stored_password == password:
@@ -1577,7 +1582,7 @@ def show_login_window():
                     
                     # Import here to avoid circular imports
                     from main import create_main_window
-                    create_main_window(username)
+                    create_main_window(username, user_id)
                     return
             
             # If we get here, login failed
@@ -1640,6 +1645,7 @@ def show_login_window():
     # Center on screen
     center_window(login_window)
     
+    startup_profile.when_idle(login_window, login_ready)
     login_window.mainloop()
 
 if __name__ == "__main__":
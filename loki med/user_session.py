@@ -0,0 +1,120 @@
+"""
+Session identity service for the Medical Assistant application.
+Resolves usernames to user ids once and keeps them for the whole session.
+"""
+
+import threading
+
+from db_manager import connect, connection_manager
+
+# username -> user id for every user resolved in this process
+_user_ids = {}
+_lock = threading.Lock()
+
+# The user logged in to this window
+_session = {"username": None, "user_id": None}
+
+def remember_user(username, user_id):
+    """Store a known username/user id pair in the cache"""
+    with _lock:
+        _user_ids[username] = user_id
+
+def resolve_user_id(username):
+    """Return the id of username, querying the database only on a cache miss"""
+    if not username:
+        return None
+    
+    with _lock:
+        user_id = _user_ids.get(username)
+    if user_id is not None:
+        return user_id
+    
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+        result = cursor.fetchone()
+    finally:
+        conn.close()
+    
+    # Unknown users are not cached so a later registration is picked up
+    if not result:
+        return None
+    
+    remember_user(username, result[0])
+    return result[0]
+
+def invalidate_user(username=None, user_id=None):
+    """Forget a user by name and/or id (after deletion or rename)"""
+    with _lock:
+        for name, cached_id in list(_user_ids.items()):
+            if name == username or (user_id is not None and cached_id == user_id):
+                del _user_ids[name]
+        
+        if _session["username"] == username or (user_id is not None and _session["user_id"] == user_id):
+            _session["user_id"] = None
+
+def start_session(username, user_id=None):
+    """Record the logged-in user; resolves the id if the caller does not have it"""
+    if user_id is None:
+        user_id = resolve_user_id(username)
+    else:
+        remember_user(username, user_id)
+    
+    with _lock:
+        _session["username"] = username
+        _session["user_id"] = user_id
+    
+    return user_id
+
+def end_session():
+    """Forget the logged-in user (on logout)"""
+    with _lock:
+        _session["username"] = None
+        _session["user_id"] = None
+
+def current_username():
+    """Return the logged-in username, or None"""
+    return _session["username"]
+
+def current_user_id():
+    """Return the logged-in user's id, re-resolving it if it was invalidated"""
+    username = _session["username"]
+    user_id = _session["user_id"]
+    if user_id is None and username:
+        user_id = resolve_user_id(username)
+        with _lock:
+            if _session["username"] == username:
+                _session["user_id"] = user_id
+    return user_id
+
+def _user_identity_changed(old_username, new_username):
+    """SQL callback fired by the temp triggers below"""
+    invalidate_user(old_username)
+    
+    # Follow a rename of the logged-in user
+    if new_username is not None:
+        with _lock:
+            if _session["username"] == old_username:
+                _session["username"] = new_username
+    return None
+
+def _install_invalidation_triggers(conn):
+    """Invalidate the cache whenever any code deletes or renames a user"""
+    conn.create_function("user_identity_changed", 2, _user_identity_changed)
+    conn.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS user_identity_deleted
+        AFTER DELETE ON main.users
+        BEGIN
+            SELECT user_identity_changed(OLD.username, NULL);
+        END
+    """)
+    conn.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS user_identity_renamed
+        AFTER UPDATE OF username ON main.users
+        BEGIN
+            SELECT user_identity_changed(OLD.username, NEW.username);
+        END
+    """)
+
+connection_manager.add_connect_hook(_install_invalidation_triggers)